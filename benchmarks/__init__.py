@@ -0,0 +1,19 @@
+"""性能基准
+
+tests/ 只检查正确性；这里测量热点路径的吞吐与延迟，结果以 JSON 输出，便于在
+不同提交之间对比：
+
+    PYTHONPATH=src python -m benchmarks --output before.json
+    PYTHONPATH=src python -m benchmarks --output after.json --compare before.json
+
+基准项：
+    progress_pipeline  FakeWorker 在独立线程中回放进度钩子序列，经
+                       DownloadScheduler → MainWindow._on_scheduler_progress → TaskTableModel
+    db_commits         Database 单条更新（每条一次提交）与批量插入的吞吐
+    get_all_tasks      10k / 100k 行时 get_all_tasks 与 TaskTableModel.set_tasks 的耗时
+    startup            `python -m yt_dlp_gui --profile-startup` 的首帧时间
+    parallel_streams   假站点上逐个与同时下载分开的视频和音频流的吞吐（sequential / parallel）
+
+fake_site.py 提供离线的假视频站点与对应的 yt-dlp 提取器，用于在无网络环境中端到端
+驱动真实的 DownloadWorker（见 tests/test_fake_site.py）。
+"""
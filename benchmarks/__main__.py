@@ -0,0 +1,152 @@
+"""运行基准并输出 JSON：PYTHONPATH=src python -m benchmarks --help"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from typing import Any, Callable, Optional
+
+import click
+
+from . import suite
+from .fake_worker import load_trace
+
+BENCHMARKS = ("progress_pipeline", "db_commits", "get_all_tasks", "startup", "parallel_streams")
+
+# 对比时变化超过该比例视为明显变化
+COMPARE_THRESHOLD = 0.10
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def collect_meta() -> dict[str, Any]:
+    from PySide6 import __version__ as pyside_version
+
+    from yt_dlp_gui import __version__
+
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "version": __version__,
+        "python": platform.python_version(),
+        "pyside6": pyside_version,
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_sec")
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """逐项对比两次结果中的数值指标，返回报告行"""
+    lines = [f"{'指标':<48} {'之前':>12} {'之后':>12} {'变化':>9}"]
+    for bench, metrics in new["results"].items():
+        before = old.get("results", {}).get(bench, {})
+        for metric, value in metrics.items():
+            base = before.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(base, (int, float)):
+                continue
+            if base == 0 or metric in ("events", "updates", "inserts", "rows", "videos"):
+                continue
+            change = value / base - 1
+            better = change > 0 if higher_is_better(metric) else change < 0
+            flag = ""
+            if abs(change) >= COMPARE_THRESHOLD:
+                flag = " 提升" if better else " 退化"
+            lines.append(
+                f"{bench + '.' + metric:<48} {base:>12.2f} {value:>12.2f} {change:>+8.1%}{flag}"
+            )
+    return lines
+
+
+@click.command()
+@click.option("--output", "-o", metavar="PATH", help="JSON 结果路径（默认输出到标准输出）")
+@click.option("--compare", "compare_path", metavar="PATH", help="与之前的 JSON 结果对比")
+@click.option(
+    "--only",
+    multiple=True,
+    type=click.Choice(BENCHMARKS),
+    help="只运行指定的基准项（可重复指定）",
+)
+@click.option("--quick", is_flag=True, help="使用较小的规模，快速检查")
+@click.option("--events", default=50_000, show_default=True, help="进度回放的事件数")
+@click.option(
+    "--rows",
+    default="10000,100000",
+    show_default=True,
+    help="get_all_tasks 的行数（逗号分隔）",
+)
+@click.option("--trace", metavar="FILE", help="JSON Lines 格式的进度钩子序列，默认使用合成序列")
+def main(
+    output: Optional[str],
+    compare_path: Optional[str],
+    only: tuple[str, ...],
+    quick: bool,
+    events: int,
+    rows: str,
+    trace: Optional[str],
+) -> None:
+    """运行基准并输出可在提交之间对比的 JSON"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    selected = only or BENCHMARKS
+    row_counts = [int(r) for r in rows.split(",") if r.strip()]
+    if quick:
+        events, row_counts = min(events, 2_000), [min(r, 2_000) for r in row_counts[:1]]
+    progress_trace = load_trace(trace) if trace else None
+
+    runs: list[tuple[str, Callable[[], dict[str, float]]]] = []
+    if "progress_pipeline" in selected:
+        runs.append(
+            (
+                "progress_pipeline",
+                lambda: suite.bench_progress_pipeline(events, trace=progress_trace),
+            )
+        )
+    if "db_commits" in selected:
+        updates = 2_000 if quick else 20_000
+        runs.append(("db_commits", lambda: suite.bench_db_commits(updates, updates * 5)))
+    if "get_all_tasks" in selected:
+        for count in row_counts:
+            runs.append((f"get_all_tasks_{count}", lambda n=count: suite.bench_get_all_tasks(n)))
+    if "startup" in selected:
+        runs.append(("startup", lambda: suite.bench_startup(1 if quick else 3)))
+    if "parallel_streams" in selected:
+        runs.append(("parallel_streams", lambda: suite.bench_parallel_streams(1 if quick else 4)))
+
+    results: dict[str, Any] = {"meta": collect_meta(), "results": {}}
+    for name, run in runs:
+        click.echo(f"运行 {name} ...", err=True)
+        results["results"][name] = run()
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        click.echo(f"结果已写入: {output}", err=True)
+    else:
+        click.echo(text)
+
+    if compare_path:
+        with open(compare_path, encoding="utf-8") as f:
+            before = json.load(f)
+        click.echo("\n".join(compare(before, results)), err=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
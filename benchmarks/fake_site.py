@@ -0,0 +1,377 @@
+"""离线的假视频站点：本地 HTTP 服务器 + 只在测试中注册的 yt-dlp 提取器
+
+真实的 DownloadWorker 需要联网，无法在 CI 或离线环境中复现并发与重试问题。FakeSite
+在本机端口上提供合成的媒体文件、HLS 媒体播放列表与 DASH 清单及其分片，速度、延迟与
+错误率均可配置；FakeSiteIE 解析它的页面地址，FakeSiteWorker 只注册该提取器，通过
+DownloadScheduler(worker_class=FakeSiteWorker) 即可端到端驱动真实的下载流程：
+
+    with FakeSite(FakeSiteConfig(latency=0.05, error_rate=0.02, seed=1)) as site:
+        url = site.url("v1", kind="hls")  # http://127.0.0.1:<port>/watch/hls/v1
+
+地址形如 /watch/<kind>/<video_id>，kind 为 file（单个文件，支持 Range）、hls、dash 或
+split（视频与音频为两个单独的文件，用于比较逐个与并行下载多个流）。
+下载得到的文件大小见 FakeSite.expected_size，内容由 payload() 确定。
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from yt_dlp_gui.worker import DownloadWorker
+
+KINDS = ("file", "hls", "dash", "split")
+
+# DASH 初始化分片的大小（字节），计入下载得到的文件
+DASH_INIT_SIZE = 1024
+
+# 限速时每次写入的块大小
+_WRITE_CHUNK = 16 * 1024
+
+_ROUTE = re.compile(
+    r"^/(?:api/(?P<api_kind>file|hls|dash|split)/(?P<api_id>[\w-]+)\.json"
+    r"|media/(?P<file_id>[\w-]+)\.mp4|media/(?P<audio_id>[\w-]+)\.m4a"
+    r"|hls/(?P<hls_id>[\w-]+)/(?:(?P<playlist>index\.m3u8)|(?P<hls_seg>\d+)\.ts)"
+    r"|dash/(?P<dash_id>[\w-]+)/(?:(?P<manifest>manifest\.mpd)|(?P<init>init\.mp4)"
+    r"|(?P<dash_seg>\d+)\.m4s))$"
+)
+
+
+@dataclass
+class FakeSiteConfig:
+    media_size: int = 256 * 1024  # 每个视频的媒体字节数（分片格式均分到各分片）
+    audio_size: int = 64 * 1024  # split 类型中单独的音频文件的字节数
+    fragments: int = 8  # HLS / DASH 的分片数
+    speed: Optional[float] = None  # 每个连接的速度（字节/秒），None 表示不限速
+    latency: float = 0.0  # 每个请求在响应前等待的秒数
+    error_rate: float = 0.0  # 媒体与分片请求返回 error_status 的概率
+    error_status: int = 503
+    fail_first: int = 0  # 每个媒体与分片地址的前 N 次请求固定失败
+    seed: Optional[int] = None  # 错误注入的随机种子
+
+
+def payload(video_id: str, size: int) -> bytes:
+    """视频的合成媒体内容：由视频 ID 决定的字节序列，便于校验下载结果"""
+    block = hashlib.sha256(video_id.encode()).digest() * 128
+    return (block * (size // len(block) + 1))[:size]
+
+
+class FakeSiteStats:
+    """服务器的请求统计（线程安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.active = 0
+        self.peak_active = 0
+        # 每个视频同时进行中的请求数及其峰值，用于观察分片并发
+        self._active_by_video: dict[str, int] = {}
+        self.peak_by_video: dict[str, int] = {}
+        self._hits: dict[str, int] = {}
+
+    def begin(self, video_id: str) -> None:
+        with self._lock:
+            self.requests += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            count = self._active_by_video.get(video_id, 0) + 1
+            self._active_by_video[video_id] = count
+            self.peak_by_video[video_id] = max(self.peak_by_video.get(video_id, 0), count)
+
+    def end(self, video_id: str, sent: int) -> None:
+        with self._lock:
+            self.active -= 1
+            self._active_by_video[video_id] -= 1
+            self.bytes_sent += sent
+
+    def hit(self, path: str) -> int:
+        """记录一次对 path 的请求，返回这是第几次"""
+        with self._lock:
+            self._hits[path] = self._hits.get(path, 0) + 1
+            return self._hits[path]
+
+    def error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+
+class FakeSite:
+    """在后台线程中运行的假站点服务器，可用作上下文管理器"""
+
+    def __init__(self, config: Optional[FakeSiteConfig] = None) -> None:
+        self.config = config or FakeSiteConfig()
+        self.stats = FakeSiteStats()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        assert self._server is not None, "服务器尚未启动"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, video_id: str, kind: str = "file") -> str:
+        """视频的页面地址，交给 FakeSiteIE 解析"""
+        if kind not in KINDS:
+            raise ValueError(f"未知的类型: {kind}")
+        return f"{self.base_url}/watch/{kind}/{video_id}"
+
+    def expected_size(self, kind: str = "file") -> int:
+        """下载 kind 类型的视频后得到的文件大小"""
+        return self.config.media_size + (DASH_INIT_SIZE if kind == "dash" else 0)
+
+    def start(self) -> "FakeSite":
+        site = self
+
+        class Handler(_FakeSiteHandler):
+            pass
+
+        Handler.site = site
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler, bind_and_activate=False)
+        # 上百个下载同时建立连接时默认的监听队列（5）不够用
+        server.request_queue_size = 512
+        server.daemon_threads = True
+        server.server_bind()
+        server.server_activate()
+        self._server = server
+        self._thread = threading.Thread(
+            target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeSite":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def should_fail(self, path: str) -> bool:
+        """按 fail_first 与 error_rate 决定本次媒体请求是否返回错误"""
+        if self.stats.hit(path) <= self.config.fail_first:
+            return True
+        if self.config.error_rate <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < self.config.error_rate
+
+    def fragment(self, video_id: str, index: int) -> bytes:
+        """第 index 个分片（从 1 开始）的内容，各分片依次拼接即为完整媒体"""
+        size, count = self.config.media_size, self.config.fragments
+        start, end = size * (index - 1) // count, size * index // count
+        return payload(video_id, size)[start:end]
+
+    def hls_playlist(self, video_id: str) -> str:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-TARGETDURATION:2",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+        ]
+        for i in range(1, self.config.fragments + 1):
+            lines += ["#EXTINF:2.0,", f"{i}.ts"]
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def dash_manifest(self, video_id: str) -> str:
+        count = self.config.fragments
+        bandwidth = self.config.media_size * 8 // (count * 2)
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S"
+     mediaPresentationDuration="PT{count * 2}S" profiles="urn:mpeg:dash:profile:isoff-live:2011">
+  <Period id="0" start="PT0S">
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="av" bandwidth="{bandwidth}" width="640" height="360"
+                      codecs="avc1.4d401e,mp4a.40.2">
+        <SegmentTemplate timescale="1" duration="2" startNumber="1"
+                         initialization="init.mp4" media="$Number$.m4s"/>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+
+class _FakeSiteHandler(BaseHTTPRequestHandler):
+    site: FakeSite
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        match = _ROUTE.match(self.path.split("?")[0])
+        if match is None:
+            self.send_error(404)
+            return
+        route = match.groupdict()
+        keys = ("api_id", "file_id", "audio_id", "hls_id", "dash_id")
+        video_id = next(route[k] for k in keys if route[k])
+        site = self.site
+        sent = 0
+        site.stats.begin(video_id)
+        try:
+            if site.config.latency > 0:
+                time.sleep(site.config.latency)
+            sent = self._respond(site, route, video_id)
+        except (BrokenPipeError, ConnectionResetError):
+            # 下载被取消时客户端会提前断开
+            pass
+        finally:
+            site.stats.end(video_id, sent)
+
+    def _respond(self, site: FakeSite, route: dict[str, Optional[str]], video_id: str) -> int:
+        if route["api_kind"]:
+            meta = {
+                "id": video_id,
+                "kind": route["api_kind"],
+                "title": f"Fake video {video_id}",
+                "size": site.expected_size(route["api_kind"]),
+                "audio_size": site.config.audio_size,
+            }
+            return self._send(json.dumps(meta).encode(), "application/json")
+        if route["playlist"]:
+            return self._send(site.hls_playlist(video_id).encode(), "application/vnd.apple.mpegurl")
+        if route["manifest"]:
+            return self._send(site.dash_manifest(video_id).encode(), "application/dash+xml")
+
+        # 以下为媒体与分片请求，按配置注入错误
+        if site.should_fail(self.path):
+            site.stats.error()
+            self.send_error(site.config.error_status)
+            return 0
+        if route["file_id"]:
+            return self._send_ranged(payload(video_id, site.config.media_size))
+        if route["audio_id"]:
+            return self._send_ranged(payload("audio-" + video_id, site.config.audio_size))
+        if route["init"]:
+            return self._send(payload("init-" + video_id, DASH_INIT_SIZE), "video/mp4")
+        index = int(route["hls_seg"] or route["dash_seg"] or 0)
+        if not 1 <= index <= site.config.fragments:
+            self.send_error(404)
+            return 0
+        content_type = "video/mp2t" if route["hls_seg"] else "video/iso.segment"
+        return self._send(site.fragment(video_id, index), content_type)
+
+    def _send_ranged(self, data: bytes) -> int:
+        """支持 `Range: bytes=N-[M]`，yt-dlp 断点续传与分块下载时会使用"""
+        match = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        if match is None:
+            return self._send(data, "video/mp4")
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+        if start >= len(data):
+            self.send_error(416)
+            return 0
+        return self._send(data[start : end + 1], "video/mp4", (start, end, len(data)))
+
+    def _send(
+        self, body: bytes, content_type: str, content_range: Optional[tuple[int, int, int]] = None
+    ) -> int:
+        self.send_response(206 if content_range else 200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if content_range:
+            self.send_header("Content-Range", "bytes %d-%d/%d" % content_range)
+        self.end_headers()
+
+        speed = self.site.config.speed
+        if not speed:
+            self.wfile.write(body)
+            return len(body)
+        sent = 0
+        for start in range(0, len(body), _WRITE_CHUNK):
+            chunk = body[start : start + _WRITE_CHUNK]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            time.sleep(len(chunk) / speed)
+        return sent
+
+
+class FakeSiteIE(InfoExtractor):
+    """解析 FakeSite 的页面地址：file 为单个文件，hls / dash 分别解析播放列表与清单，
+    split 为只有视频与只有音频的两个格式"""
+
+    IE_NAME = "fakesite"
+    _VALID_URL = (
+        r"(?P<base>https?://(?:127\.0\.0\.1|localhost):\d+)"
+        r"/watch/(?P<kind>file|hls|dash|split)/(?P<id>[\w-]+)"
+    )
+
+    def _real_extract(self, url: str) -> dict[str, Any]:
+        base, kind, video_id = self._match_valid_url(url).group("base", "kind", "id")
+        meta = self._download_json(f"{base}/api/{kind}/{video_id}.json", video_id)
+        if kind == "hls":
+            formats = self._extract_m3u8_formats(
+                f"{base}/hls/{video_id}/index.m3u8", video_id, "mp4", m3u8_id="hls"
+            )
+        elif kind == "dash":
+            formats = self._extract_mpd_formats(
+                f"{base}/dash/{video_id}/manifest.mpd", video_id, mpd_id="dash"
+            )
+        elif kind == "split":
+            formats = [
+                {
+                    "format_id": "video",
+                    "url": f"{base}/media/{video_id}.mp4",
+                    "ext": "mp4",
+                    "filesize": meta["size"],
+                    "vcodec": "avc1.4d401e",
+                    "acodec": "none",
+                    "height": 360,
+                },
+                {
+                    "format_id": "audio",
+                    "url": f"{base}/media/{video_id}.m4a",
+                    "ext": "m4a",
+                    "filesize": meta["audio_size"],
+                    "vcodec": "none",
+                    "acodec": "mp4a.40.2",
+                },
+            ]
+        else:
+            formats = [
+                {
+                    "format_id": "file",
+                    "url": f"{base}/media/{video_id}.mp4",
+                    "ext": "mp4",
+                    "filesize": meta["size"],
+                    "vcodec": "avc1.4d401e",
+                    "acodec": "mp4a.40.2",
+                }
+            ]
+        return {"id": video_id, "title": meta["title"], "formats": formats}
+
+
+class FakeSiteWorker(DownloadWorker):
+    """只注册 FakeSiteIE 的 DownloadWorker（传给 DownloadScheduler 的 worker_class）"""
+
+    def _create_ydl(self, options: dict[str, Any]) -> yt_dlp.YoutubeDL:
+        # 合成分片不是真正的 MPEG-TS / MP4，不做 ffmpeg 修复，split 的视频与音频也不合并
+        # （保留为 .fvideo.mp4 与 .faudio.m4a 两个文件）；不经过环境变量中的代理
+        options = dict(options, fixup="never", allow_unplayable_formats=True, proxy="")
+        ydl = yt_dlp.YoutubeDL(options, auto_init=False)
+        ydl.add_info_extractor(FakeSiteIE())
+        return ydl
@@ -0,0 +1,81 @@
+"""回放进度钩子序列的假 DownloadWorker
+
+进度序列为 JSON Lines，每行一个 yt-dlp 进度钩子字典（与 DownloadWorker._progress_hook
+收到的相同）。未指定文件时使用 synthetic_trace() 生成的序列，其字段与 yt-dlp 下载
+DASH 视频时的真实回调一致（含 info_dict、fragment 计数与格式化后的速度字符串）。
+"""
+
+import json
+from typing import Any, Optional
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+
+def synthetic_trace(
+    ticks: int = 200, total_bytes: int = 250 * 1024 * 1024, title: str = "Benchmark video"
+) -> list[dict[str, Any]]:
+    """生成一次完整下载的进度钩子序列（匀速，最后一条为 100%）"""
+    info_dict = {
+        "id": "bench0000001",
+        "title": title,
+        "extractor": "youtube",
+        "extractor_key": "Youtube",
+        "webpage_url": "https://www.youtube.com/watch?v=bench0000001",
+        "format_id": "137+140",
+        "ext": "mp4",
+    }
+    speed = 8.0 * 1024 * 1024
+    trace = []
+    for i in range(1, ticks + 1):
+        downloaded = total_bytes * i // ticks
+        eta = int((total_bytes - downloaded) / speed)
+        trace.append(
+            {
+                "status": "downloading",
+                "downloaded_bytes": downloaded,
+                "total_bytes": total_bytes,
+                "tmpfilename": "Benchmark video.f137.mp4.part",
+                "filename": "Benchmark video.f137.mp4",
+                "eta": eta,
+                "speed": speed,
+                "elapsed": i * 0.1,
+                "fragment_index": i,
+                "fragment_count": ticks,
+                "_speed_str": "   8.00MiB/s",
+                "_eta_str": f"{eta // 60:02d}:{eta % 60:02d}",
+                "_percent_str": f"{downloaded / total_bytes * 100:5.1f}%",
+                "info_dict": info_dict,
+            }
+        )
+    return trace
+
+
+def load_trace(path: str) -> list[dict[str, Any]]:
+    """读取 JSON Lines 格式的进度钩子序列"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class FakeWorker(QObject):
+    """与 DownloadWorker 信号相同的假 Worker，在所属线程中尽快发出全部进度事件"""
+
+    progress = Signal(int, dict)
+    finished = Signal(int, bool, str)
+
+    def __init__(
+        self, task_ids: list[int], events: int, trace: Optional[list[dict[str, Any]]] = None
+    ) -> None:
+        super().__init__()
+        self.task_ids = task_ids
+        self.events = events
+        self.trace = trace or synthetic_trace()
+
+    @Slot()
+    def run(self) -> None:
+        """各任务轮流回放序列，每个事件都是新的字典（与 yt-dlp 每次回调一致）"""
+        trace, task_ids = self.trace, self.task_ids
+        for i in range(self.events):
+            task_id = task_ids[i % len(task_ids)]
+            self.progress.emit(task_id, dict(trace[(i // len(task_ids)) % len(trace)]))
+        for task_id in task_ids:
+            self.finished.emit(task_id, True, "完成")
@@ -0,0 +1,215 @@
+"""基准项实现：每个函数返回一个扁平的指标字典，数值越大越好的指标以 _per_sec 结尾"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+from PySide6.QtCore import QThread
+from PySide6.QtWidgets import QApplication
+
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.models import DownloadTask, TaskTableModel
+
+from .fake_worker import FakeWorker
+
+
+def _app() -> QApplication:
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication(sys.argv[:1])
+    assert isinstance(app, QApplication)
+    return app
+
+
+def _tasks(count: int, status: str = "queued") -> list[DownloadTask]:
+    return [
+        DownloadTask(
+            url=f"https://www.youtube.com/watch?v=bench{i:07d}",
+            save_path="/tmp/downloads",
+            format_preset="bestvideo+bestaudio/best",
+            title=f"Benchmark video {i}",
+            status=status,
+        )
+        for i in range(count)
+    ]
+
+
+def bench_progress_pipeline(
+    events: int, tasks: int = 10, trace: Optional[list[dict[str, Any]]] = None
+) -> dict[str, float]:
+    """回放进度事件：跨线程信号 → 调度器 → 主窗口 → 表格模型，测量主线程的处理速度"""
+    from yt_dlp_gui.main import MainWindow
+    from yt_dlp_gui.scheduler import DownloadScheduler
+
+    app = _app()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(db_path=os.path.join(tmp, "bench.db"))
+        scheduler = DownloadScheduler(db)
+        window = MainWindow(db, scheduler)
+        task_ids = db.add_tasks(_tasks(tasks, status="downloading"))
+        window._load_tasks_from_db()
+
+        delivered = 0
+
+        def count(task_id: int, data: dict[str, Any]) -> None:
+            nonlocal delivered
+            delivered += 1
+
+        # 在 MainWindow 的槽之后连接，计数时该事件已经更新到模型
+        scheduler.task_progress_changed.connect(count)
+        worker = FakeWorker(task_ids, events, trace)
+        thread = QThread()
+        worker.moveToThread(thread)
+        worker.progress.connect(scheduler._on_worker_progress)
+        thread.started.connect(worker.run)
+
+        start = time.perf_counter()
+        thread.start()
+        while delivered < events:
+            app.processEvents()
+        elapsed = time.perf_counter() - start
+        thread.quit()
+        thread.wait()
+
+        window.close()
+        window.deleteLater()
+        scheduler.shutdown()
+        db.close()
+        app.processEvents()
+
+    return {
+        "events": events,
+        "events_per_sec": events / elapsed,
+        "us_per_event": elapsed / events * 1e6,
+    }
+
+
+def bench_db_commits(updates: int, inserts: int) -> dict[str, float]:
+    """Database 单条异步更新（每条一次提交）与 add_tasks 批量插入的吞吐"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(db_path=os.path.join(tmp, "bench.db"))
+        task_ids = db.add_tasks(_tasks(100))
+
+        start = time.perf_counter()
+        for i in range(updates):
+            db.update_task(task_ids[i % len(task_ids)], {"progress": i % 100, "speed": "1MiB/s"})
+        # 同步查询排在所有更新之后，返回时更新已全部提交
+        db.get_task(task_ids[0])
+        update_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        db.add_tasks(_tasks(inserts))
+        insert_elapsed = time.perf_counter() - start
+        db.close()
+
+    return {
+        "updates": updates,
+        "commits_per_sec": updates / update_elapsed,
+        "inserts": inserts,
+        "inserted_rows_per_sec": inserts / insert_elapsed,
+    }
+
+
+def bench_get_all_tasks(rows: int, repeat: int = 3) -> dict[str, float]:
+    """get_all_tasks 与 TaskTableModel.set_tasks 在 rows 行时的耗时（取中位数）"""
+    _app()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(db_path=os.path.join(tmp, "bench.db"))
+        for offset in range(0, rows, 10_000):
+            db.add_tasks(_tasks(min(10_000, rows - offset)))
+
+        load_times, model_times = [], []
+        model = TaskTableModel()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tasks = db.get_all_tasks()
+            load_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            model.set_tasks(tasks)
+            model_times.append(time.perf_counter() - start)
+        db.close()
+
+    return {
+        "rows": rows,
+        "get_all_tasks_ms": statistics.median(load_times) * 1000,
+        "set_tasks_ms": statistics.median(model_times) * 1000,
+        "rows_per_sec": rows / statistics.median(load_times),
+    }
+
+
+def bench_startup(repeat: int = 3) -> dict[str, float]:
+    """在新进程中启动应用直到首帧绘制（--profile-startup），取中位数"""
+    first_paint, total = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            HOME=tmp,
+            QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+            PYTHONPATH=os.pathsep.join(sys.path),
+        )
+        output = os.path.join(tmp, "profile.json")
+        for _ in range(repeat):
+            subprocess.run(
+                [sys.executable, "-m", "yt_dlp_gui", "--profile-startup"]
+                + ["--profile-output", output],
+                env=env,
+                cwd=tmp,
+                check=True,
+                capture_output=True,
+                timeout=120,
+            )
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+            first_paint.append(report["marks"]["first_paint"])
+            total.append(report["total_ms"])
+
+    return {
+        "first_paint_ms": statistics.median(first_paint),
+        "total_ms": statistics.median(total),
+    }
+
+
+def bench_parallel_streams(
+    videos: int = 4,
+    media_size: int = 2 * 1024 * 1024,
+    audio_size: int = 512 * 1024,
+    speed: float = 4 * 1024 * 1024,
+    latency: float = 0.2,
+) -> dict[str, float]:
+    """在假站点上逐个下载与同时下载分开的视频和音频流，比较吞吐
+
+    每个连接限速并带有响应延迟，模拟单连接跑不满带宽的高延迟主机。合成的媒体无法合并，
+    两种方式都只计下载阶段。
+    """
+    from .fake_site import FakeSite, FakeSiteConfig, FakeSiteWorker
+
+    config = FakeSiteConfig(
+        media_size=media_size, audio_size=audio_size, speed=speed, latency=latency
+    )
+    result: dict[str, float] = {"videos": videos}
+    with FakeSite(config) as site:
+        for mode, parallel in (("sequential", False), ("parallel", True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                for i in range(videos):
+                    worker = FakeSiteWorker(
+                        task_id=i,
+                        url=site.url(f"{mode}-{i}", "split"),
+                        download_path=tmp,
+                        parallel_streams=parallel,
+                    )
+                    outcome: list[tuple[bool, str]] = []
+                    worker.finished.connect(lambda _, ok, msg: outcome.append((ok, msg)))
+                    worker.run()
+                    if not outcome or not outcome[0][0]:
+                        raise RuntimeError(f"{mode} 下载失败: {outcome}")
+                elapsed = time.perf_counter() - start
+            result[f"{mode}_seconds"] = elapsed
+            result[f"{mode}_bytes_per_sec"] = videos * (media_size + audio_size) / elapsed
+    return result
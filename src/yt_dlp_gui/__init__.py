@@ -13,12 +13,18 @@ except PackageNotFoundError:
     __version__ = "0.0.0-dev"
 
 
-# cli 延迟导入以避免循环依赖（main.py → __init__.py → main.py）
-# 外部使用者请直接 from yt_dlp_gui.main import cli
+# cli 延迟导入以避免循环依赖（cli.py → __init__.py → cli.py）
+# 外部使用者请直接 from yt_dlp_gui.cli import cli
 def __getattr__(name: str):  # noqa: N807
     if name == "cli":
-        from .main import cli
+        import time
 
+        from .profiling import record_phase
+
+        start = time.perf_counter()
+        from .cli import cli
+
+        record_phase("imports", start, time.perf_counter())
         return cli
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -6,6 +6,7 @@
 
 import os
 import sys
+import time
 
 
 def setup_environment() -> None:
@@ -39,10 +40,17 @@ def setup_environment() -> None:
 
 
 # ✅ 在 import PySide6 / yt_dlp_gui 之前立即调用，确保 Qt 初始化时 PATH 已正确
+_started = time.perf_counter()
 setup_environment()
+_environment_ready = time.perf_counter()
 
 # noqa: E402 — 故意在 setup_environment() 之后 import，顺序依赖是有意为之
-from yt_dlp_gui.main import cli  # noqa: E402
+from yt_dlp_gui.cli import cli  # noqa: E402
+from yt_dlp_gui.profiling import record_phase  # noqa: E402
+
+# 启动剖析 (--profile-startup) 在解析参数后才启用，这两个阶段先记下
+record_phase("environment", _started, _environment_ready)
+record_phase("imports", _environment_ready, time.perf_counter())
 
 if __name__ == "__main__":
     cli()
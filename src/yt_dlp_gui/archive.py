@@ -0,0 +1,77 @@
+"""数据库支持的下载存档
+
+yt-dlp 的 download_archive 参数既可以是文本文件路径，也可以是任何支持
+`in` 与 `add()` 的集合对象。DownloadArchive 在首次使用时把数据库中的存档表
+一次性载入内存集合，成员检查为 O(1)；新记录同时写入集合并异步写回数据库。
+
+存档 ID 沿用 yt-dlp 的格式："<小写提取器名> <视频 ID>"。播放列表中的条目在
+解析前就能得到该 ID，因此已下载的条目会在发起任何网络请求前被跳过。
+"""
+
+import threading
+from typing import Optional
+
+from .database import Database
+
+
+class DownloadArchive:
+    """进程内共享的下载存档，可被多个下载线程同时使用"""
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self._ids: Optional[set[str]] = None
+        self._lock = threading.Lock()
+
+    def _loaded(self) -> set[str]:
+        # 在首个下载线程中才载入，避免阻塞界面线程
+        with self._lock:
+            if self._ids is None:
+                self._ids = {
+                    f"{extractor} {video_id}"
+                    for extractor, video_id in self.db.get_archive_entries()
+                }
+            return self._ids
+
+    def __contains__(self, archive_id: object) -> bool:
+        return archive_id in self._loaded()
+
+    def __len__(self) -> int:
+        return len(self._loaded())
+
+    def __bool__(self) -> bool:
+        # yt-dlp 在存档为空 (falsy) 时直接跳过检查，此处始终返回 True 以免触发载入
+        return True
+
+    def add(self, archive_id: str, task_id: Optional[int] = None) -> None:
+        ids = self._loaded()
+        with self._lock:
+            if archive_id in ids:
+                return
+            ids.add(archive_id)
+        extractor, _, video_id = archive_id.partition(" ")
+        self.db.add_archive_entry(extractor, video_id, task_id)
+
+    def for_task(self, task_id: int, skip_known: bool = True) -> "TaskArchive":
+        """返回传给某个下载任务的存档视图"""
+        return TaskArchive(self, task_id, skip_known)
+
+
+class TaskArchive:
+    """单个任务使用的存档视图：新记录关联到该任务
+
+    skip_known=False 时只记录、不跳过（用户明确要求重新下载单个视频时）。
+    """
+
+    def __init__(self, archive: DownloadArchive, task_id: int, skip_known: bool) -> None:
+        self.archive = archive
+        self.task_id = task_id
+        self.skip_known = skip_known
+
+    def __contains__(self, archive_id: object) -> bool:
+        return self.skip_known and archive_id in self.archive
+
+    def __bool__(self) -> bool:
+        return True
+
+    def add(self, archive_id: str) -> None:
+        self.archive.add(archive_id, self.task_id)
@@ -0,0 +1,352 @@
+"""命令行入口
+
+不带子命令时启动图形界面；daemon / add / list / presets 子命令只使用调度器与数据库，
+不会导入 QtWidgets 与图形界面模块，可在无显示环境中运行。
+"""
+
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from typing import Optional
+
+import click
+
+from . import __version__, metrics, profiling
+from .config import (
+    AUDIO_CONVERT_FORMATS,
+    DAEMON_POLL_INTERVAL_MS,
+    FORMAT_PRESETS,
+    POSTPROCESS_MAX_CONCURRENT,
+)
+
+
+@click.group(invoke_without_command=True)
+@click.version_option(version=__version__)
+@click.option(
+    "--import",
+    "import_path",
+    metavar="FILE",
+    help="启动后批量导入文件中的链接（每行一个，- 表示从标准输入读取）",
+)
+@click.option(
+    "--profile-startup",
+    is_flag=True,
+    help="记录启动各阶段耗时，首帧绘制后写出报告并退出",
+)
+@click.option(
+    "--profile",
+    "cprofile",
+    is_flag=True,
+    help="同时使用 cProfile 与 tracemalloc 剖析（不带 --profile-startup 时剖析整个运行过程）",
+)
+@click.option(
+    "--profile-output",
+    default="yt-dlp-gui-profile.json",
+    show_default=True,
+    metavar="PATH",
+    help="JSON 报告路径，cProfile 统计写入同名的 .pstats 文件",
+)
+@click.option("--metrics", "enable_metrics", is_flag=True, help="启用运行指标与主窗口的指标面板")
+@click.option(
+    "--metrics-file",
+    metavar="PATH",
+    help="定期把运行指标以 Prometheus 文本格式写入该文件（隐含 --metrics）",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    import_path: Optional[str],
+    profile_startup: bool,
+    cprofile: bool,
+    profile_output: str,
+    enable_metrics: bool,
+    metrics_file: Optional[str],
+) -> None:
+    """现代化视频下载工具。不带子命令时启动图形界面。"""
+    if ctx.invoked_subcommand is not None:
+        return
+    if enable_metrics or metrics_file:
+        metrics.enable()
+    if profile_startup or cprofile:
+        profiling.start_profiling(
+            profile_output, cprofile=cprofile, exit_after_startup=profile_startup
+        )
+    else:
+        from .control import ControlError, forward_to_running_instance
+        from .importer import open_url_lines
+
+        # 已有窗口在运行时只转发参数，不再打开第二个窗口和数据库写入线程
+        lines = open_url_lines(import_path) if import_path else None
+        try:
+            forwarded = forward_to_running_instance(lines)
+        except ControlError as e:
+            raise click.ClickException(f"无法转发给运行中的窗口: {e}") from e
+        if forwarded:
+            click.echo("已转发给运行中的窗口")
+            return
+    start = time.perf_counter()
+    from .main import run_gui
+
+    profiling.record_phase("gui imports", start, time.perf_counter())
+    run_gui(import_path, metrics_file=metrics_file)
+
+
+@cli.command()
+@click.option(
+    "--poll-interval",
+    default=DAEMON_POLL_INTERVAL_MS,
+    show_default=True,
+    metavar="MS",
+    help="扫描数据库中新排队任务的间隔（毫秒）",
+)
+@click.option("--max-concurrent", default=3, show_default=True, help="同时下载的任务数")
+@click.option(
+    "--max-postprocess",
+    default=POSTPROCESS_MAX_CONCURRENT,
+    show_default=True,
+    help="同时执行后处理（合并、转码等）的任务数",
+)
+@click.option("--exit-when-idle", is_flag=True, help="所有排队任务结束后退出")
+@click.option(
+    "--metrics-file",
+    metavar="PATH",
+    help="启用运行指标，并定期以 Prometheus 文本格式写入该文件",
+)
+def daemon(
+    poll_interval: int,
+    max_concurrent: int,
+    max_postprocess: int,
+    exit_when_idle: bool,
+    metrics_file: Optional[str],
+) -> None:
+    """无界面运行下载调度器，处理数据库中的排队任务与订阅"""
+    from .headless import run_daemon
+
+    if metrics_file:
+        metrics.enable()
+    sys.exit(
+        run_daemon(
+            poll_interval,
+            exit_when_idle,
+            max_concurrent,
+            metrics_file=metrics_file,
+            max_concurrent_postprocess=max_postprocess,
+        )
+    )
+
+
+@cli.command()
+@click.argument("urls", nargs=-1)
+@click.option(
+    "--file",
+    "file_path",
+    metavar="FILE",
+    help="同时导入文件中的链接（每行一个，- 表示从标准输入读取）",
+)
+@click.option("--path", "save_path", metavar="DIR", help="保存目录，默认为系统下载目录")
+@click.option(
+    "--format",
+    "format_name",
+    default=next(iter(FORMAT_PRESETS)),
+    show_default=True,
+    help="格式预设名称（见 presets 子命令）或格式表达式",
+)
+@click.option("--playlist", is_flag=True, help="下载整个播放列表")
+@click.option("--parallel-streams", is_flag=True, help="同时下载分开选择的视频与音频流")
+def add(
+    urls: tuple[str, ...],
+    file_path: Optional[str],
+    save_path: Optional[str],
+    format_name: str,
+    playlist: bool,
+    parallel_streams: bool,
+) -> None:
+    """添加下载任务：交给运行中的实例，没有实例运行时以排队状态写入数据库"""
+    from .config import get_default_download_path
+    from .control import ControlError, connect_running_instance
+    from .database import Database
+    from .importer import ImportJob, open_url_lines
+    from .models import DownloadTask
+    from .presets import validate_format_spec
+
+    if not urls and not file_path:
+        raise click.UsageError("请提供至少一个链接或 --file")
+
+    def lines():
+        yield from urls
+        if file_path:
+            yield from open_url_lines(file_path)
+
+    save_path = os.path.abspath(save_path) if save_path else get_default_download_path()
+    client = connect_running_instance()
+    if client is not None:
+        # 有实例在运行时交给它添加，任务立即出现在界面中并按需启动
+        try:
+            result = client.request(
+                "bulk-add",
+                urls=list(lines()),
+                path=save_path,
+                format=format_name,
+                playlist=playlist,
+                parallel_streams=parallel_streams,
+            )
+        except ControlError as e:
+            raise click.ClickException(f"添加失败: {e}") from e
+        finally:
+            client.close()
+        click.echo(f"已添加 {result['added']} 个任务，跳过 {result['skipped']} 个重复或无效的链接")
+        return
+
+    db = Database()
+    try:
+        preset = db.find_preset(format_name)
+        if preset is None:
+            try:
+                format_name = validate_format_spec(format_name)
+            except ValueError as e:
+                raise click.BadParameter(str(e), param_hint="--format") from e
+        template = DownloadTask(
+            url="",
+            save_path=save_path,
+            format_preset=preset.selector if preset else format_name,
+            preset_id=preset.id if preset else None,
+            audio_format=preset.audio_format if preset else None,
+            download_playlist=playlist,
+            parallel_streams=parallel_streams,
+        )
+        # 与图形界面的批量导入相同：规范化、去重并跳过已完成或进行中的视频
+        job = ImportJob(db, lines, template)
+        result: dict[str, object] = {}
+        job.signals.finished.connect(
+            lambda added, skipped: result.update(added=added, skipped=skipped)
+        )
+        job.signals.failed.connect(lambda error: result.update(error=error))
+        job.run()
+    finally:
+        db.close()
+
+    if "error" in result:
+        raise click.ClickException(f"添加失败: {result['error']}")
+    click.echo(f"已添加 {result['added']} 个任务，跳过 {result['skipped']} 个重复或无效的链接")
+
+
+@cli.command(name="list")
+@click.option("--status", "statuses", multiple=True, help="只列出该状态的任务（可重复指定）")
+@click.option("--json", "as_json", is_flag=True, help="以 JSON Lines 输出")
+def list_tasks(statuses: tuple[str, ...], as_json: bool) -> None:
+    """列出数据库中的任务"""
+    from .database import Database
+
+    db = Database()
+    try:
+        tasks = db.get_all_tasks(sort_col="id", sort_dir="ASC")
+    finally:
+        db.close()
+
+    for task in tasks:
+        if statuses and task.status not in statuses:
+            continue
+        if as_json:
+            click.echo(json.dumps(asdict(task), ensure_ascii=False))
+        else:
+            click.echo(
+                f"{task.id:>6}  {task.status:<12} {task.progress:>3}%  {task.title}  {task.url}"
+            )
+
+
+@cli.group()
+def presets() -> None:
+    """管理格式预设"""
+
+
+@presets.command(name="list")
+def list_presets() -> None:
+    """列出格式预设及其格式表达式"""
+    from .database import Database
+    from .presets import describe_preset
+
+    db = Database()
+    try:
+        items = db.get_presets()
+    finally:
+        db.close()
+
+    for preset in items:
+        suffix = "（内置）" if preset.builtin else ""
+        click.echo(f"{preset.name}{suffix}  {describe_preset(preset)}")
+        click.echo(f"    {preset.selector}")
+
+
+@presets.command(name="add")
+@click.argument("name")
+@click.option("--ext", help="偏好的扩展名，如 mp4")
+@click.option("--codec", help="偏好的编码，如 avc1、vp9、opus")
+@click.option("--max-height", type=int, help="最大高度（像素）")
+@click.option("--audio-only", is_flag=True, help="只下载音频")
+@click.option(
+    "--audio-format",
+    type=click.Choice(AUDIO_CONVERT_FORMATS),
+    help="下载完成后用 ffmpeg 转换为该音频格式",
+)
+@click.option("--max-filesize", type=int, metavar="MIB", help="单个流的大小上限（MiB）")
+@click.option("--format-spec", help="直接使用 yt-dlp 格式表达式（不能与筛选条件同时设置）")
+def add_preset(
+    name: str,
+    ext: Optional[str],
+    codec: Optional[str],
+    max_height: Optional[int],
+    audio_only: bool,
+    audio_format: Optional[str],
+    max_filesize: Optional[int],
+    format_spec: Optional[str],
+) -> None:
+    """添加格式预设：保存前生成并编译一次格式表达式"""
+    from .database import Database
+    from .models import FormatPreset
+    from .presets import validate_preset
+
+    try:
+        preset = validate_preset(
+            FormatPreset(
+                name=name,
+                ext=ext,
+                codec=codec,
+                max_height=max_height,
+                audio_only=audio_only,
+                max_filesize=max_filesize * 1024 * 1024 if max_filesize is not None else None,
+                format_spec=format_spec,
+                audio_format=audio_format,
+            )
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+    db = Database()
+    try:
+        db.add_preset(preset)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        db.close()
+    click.echo(f"已添加预设 {preset.name}: {preset.selector}")
+
+
+@presets.command(name="remove")
+@click.argument("name")
+def remove_preset(name: str) -> None:
+    """删除自定义格式预设（引用它的任务保留当时的格式表达式）"""
+    from .database import Database
+
+    db = Database()
+    try:
+        preset = db.find_preset(name)
+        if preset is None:
+            raise click.ClickException(f"没有名为 {name} 的预设")
+        db.delete_preset(preset.id)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    finally:
+        db.close()
+    click.echo(f"已删除预设 {name}")
@@ -4,6 +4,7 @@ Yt-dlp GUI 配置常量
 集中管理应用程序配置，便于维护和修改。
 """
 
+import hashlib
 import os
 from typing import Final
 
@@ -17,7 +18,7 @@ DEFAULT_FORMAT: Final[str] = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4
 # 输出文件名模板
 OUTPUT_TEMPLATE: Final[str] = "%(title)s [%(id)s].%(ext)s"
 
-# 格式预设选项（下拉菜单显示）
+# 内置格式预设：名称 → 格式表达式（首次启动时写入数据库，之后可添加自定义预设）
 # 每个格式都包含回退选项，避免特定分辨率不可用时失败
 FORMAT_PRESETS: Final[dict[str, str]] = {
     "最佳质量 (MP4)": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/bestvideo+bestaudio/best",
@@ -29,6 +30,16 @@ FORMAT_PRESETS: Final[dict[str, str]] = {
     "仅音频 (MP3)": "bestaudio[ext=m4a]/bestaudio/best",
 }
 
+# 下载后转换音频格式的内置预设：名称 → 目标格式（FFmpegExtractAudio）
+FORMAT_PRESET_AUDIO_FORMATS: Final[dict[str, str]] = {"仅音频 (MP3)": "mp3"}
+
+# 自定义预设可选的音频转换格式与转换质量（VBR 等级，0 最好）
+AUDIO_CONVERT_FORMATS: Final[tuple[str, ...]] = ("mp3", "m4a", "opus", "flac", "wav")
+AUDIO_CONVERT_QUALITY: Final[str] = "2"
+
+# 按文件扩展名筛选视频时搭配的音频扩展名（合并后的容器能直接容纳）
+FORMAT_AUDIO_EXTS: Final[dict[str, str]] = {"mp4": "m4a", "webm": "webm"}
+
 # =====================
 # UI 配置
 # =====================
@@ -41,6 +52,12 @@ WINDOW_MIN_HEIGHT: Final[int] = 800
 # 进度条
 PROGRESS_BAR_MAX_WIDTH: Final[int] = 200
 
+# 状态栏总速度与队列剩余时间的刷新间隔（毫秒），同时也是吞吐量采样间隔
+THROUGHPUT_REFRESH_MS: Final[int] = 1000
+
+# 总速度指数加权平均的平滑系数（每次采样的权重），越小越平稳但响应越慢
+THROUGHPUT_EWMA_ALPHA: Final[float] = 0.3
+
 # 工具栏图标
 ICON_SIZE: Final[int] = 24
 ICON_COLOR: Final[str] = "#E0E0E0"
@@ -61,6 +78,19 @@ STYLESHEET_FILE: Final[str] = "dark_theme.qss"
 # 禁用 yt-dlp 自带的控制台进度条
 NO_PROGRESS: Final[bool] = True
 
+# =====================
+# 进度估算
+# =====================
+
+# 计算任务下载速度的滑动时间窗口（秒）
+ESTIMATOR_WINDOW_SECONDS: Final[float] = 5.0
+
+# 剩余时间平滑系数：新估算值的权重，其余沿用上次估算值按已过时间倒计时的结果
+ESTIMATOR_ETA_ALPHA: Final[float] = 0.2
+
+# 下载阶段最多显示到的百分比，剩余部分留给合并等后处理，任务完成时才显示 100%
+ESTIMATOR_DOWNLOAD_CEILING: Final[float] = 99.0
+
 # =====================
 # 播放列表选项默认值
 # =====================
@@ -77,30 +107,306 @@ DEFAULT_PLAYLIST_RANDOM: Final[bool] = False
 # 默认最大下载数（空表示无限制）
 DEFAULT_MAX_DOWNLOADS: Final[str] = ""
 
+# =====================
+# 批量导入
+# =====================
+
+# 批量导入 URL 时每个事务插入的任务数
+IMPORT_CHUNK_SIZE: Final[int] = 2000
+
+# 等待队列为空时，每次从已导入的任务中取出补充到等待队列的数量
+SCHEDULER_FEED_SIZE: Final[int] = 100
+
+# =====================
+# 订阅同步
+# =====================
+
+# 订阅检查间隔选项（对话框显示文本 → 秒）
+SUBSCRIPTION_INTERVALS: Final[dict[str, int]] = {
+    "每 30 分钟": 30 * 60,
+    "每小时": 60 * 60,
+    "每 6 小时": 6 * 60 * 60,
+    "每天": 24 * 60 * 60,
+}
+
+# 新订阅默认检查间隔（秒）
+SUBSCRIPTION_DEFAULT_INTERVAL: Final[int] = 60 * 60
+
+# 同时进行扁平提取的订阅数量上限
+SUBSCRIPTION_POLL_WORKERS: Final[int] = 2
+
+# 检查到期订阅的定时器间隔（毫秒）
+SUBSCRIPTION_TICK_MS: Final[int] = 30 * 1000
+
+# 新订阅首次检查时间的错开窗口（秒），避免大量订阅同时触发
+SUBSCRIPTION_STAGGER_SECONDS: Final[int] = 10 * 60
+
+
+# =====================
+# 解析结果缓存
+# =====================
+
+# 按提取器设置的缓存有效期（秒）；格式链接本身带有过期时间时取两者中较早者
+INFO_CACHE_TTLS: Final[dict[str, int]] = {
+    "Youtube": 4 * 3600,
+    "Generic": 600,
+}
+
+# 未单独配置的提取器使用的缓存有效期（秒）
+INFO_CACHE_DEFAULT_TTL: Final[int] = 3600
+
+# 缓存（压缩后）总大小上限，超出后按最近使用时间淘汰
+INFO_CACHE_MAX_BYTES: Final[int] = 64 * 1024 * 1024
+
+# 格式链接过期前预留的时间（秒），保证下载开始后链接仍然有效
+INFO_CACHE_EXPIRY_MARGIN: Final[int] = 300
+
+
+# =====================
+# 后处理
+# =====================
+
+# 同时执行后处理（合并音视频、转封装、字幕转换等 ffmpeg 操作）的任务数，
+# 与下载并发数分开设置；这些操作主要占用 CPU，默认取 CPU 核心数的一半
+POSTPROCESS_MAX_CONCURRENT: Final[int] = max(1, (os.cpu_count() or 2) // 2)
+
+# 后处理线程池关闭时等待正在执行的后处理结束的最长时间（毫秒）
+POSTPROCESS_SHUTDOWN_WAIT_MS: Final[int] = 3000
+
+
+# =====================
+# 失败重试
+# =====================
+
+# 临时错误（超时、5xx、429）的最大自动重试次数
+RETRY_MAX_ATTEMPTS: Final[int] = 5
+
+# 指数退避的基础延迟与最大延迟（秒）
+RETRY_BASE_DELAY: Final[float] = 5.0
+RETRY_MAX_DELAY: Final[float] = 600.0
+
+# 收到 429 后同一主机的冷却时间（秒），响应带 Retry-After 时以其为准
+RETRY_RATE_LIMIT_COOLDOWN: Final[float] = 60.0
+
+
+# =====================
+# 无界面守护进程
+# =====================
+
+# 守护进程扫描数据库中新排队任务（由 add 子命令或其他进程写入）的间隔（毫秒）
+DAEMON_POLL_INTERVAL_MS: Final[int] = 2000
+
+# 唤醒 Python 解释器处理 SIGINT/SIGTERM 的定时器间隔（毫秒）
+DAEMON_SIGNAL_WAKEUP_MS: Final[int] = 250
+
+# 守护进程启动时视为被中断、需要重新排队的任务状态
+# （等待重试的任务按数据库中的计划重试时间继续等待，见 DownloadScheduler.resume_retrying）
+DAEMON_RESUME_STATUSES: Final[tuple[str, ...]] = (
+    "downloading",
+    "merging",
+    "postprocessing",
+)
+
+
+# =====================
+# 本地控制接口
+# =====================
+
+# 向订阅者批量推送进度变化的间隔（毫秒）
+CONTROL_PROGRESS_FLUSH_MS: Final[int] = 500
+
+# 客户端连接运行中实例的超时（毫秒）
+CONTROL_CONNECT_TIMEOUT_MS: Final[int] = 1000
+
+# 客户端等待单个请求响应的超时（毫秒）
+CONTROL_REQUEST_TIMEOUT_MS: Final[int] = 30 * 1000
+
+
+# =====================
+# 多进程协调
+# =====================
+
+# 任务租约有效期（秒）：持有进程超过该时间未续期即视为已退出，租约可被接管
+LEASE_TTL_SECONDS: Final[float] = 60.0
+
+# 续期租约的心跳间隔（毫秒），远小于有效期以容忍偶发的延迟
+LEASE_HEARTBEAT_MS: Final[int] = 15 * 1000
+
+
+# =====================
+# 运行时指标
+# =====================
+
+# 以 Prometheus 文本格式导出指标文件的间隔（毫秒）
+METRICS_EXPORT_INTERVAL_MS: Final[int] = 10 * 1000
+
+# 指标面板可见时的刷新间隔（毫秒）
+METRICS_PANEL_REFRESH_MS: Final[int] = 1000
+
+# 耗时类直方图（信号送达、数据库排队与执行）的桶上限（秒）
+METRICS_LATENCY_BUCKETS: Final[tuple[float, ...]] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)  # fmt: skip
+
+# 任务在等待队列中停留时间直方图的桶上限（秒）
+METRICS_QUEUE_WAIT_BUCKETS: Final[tuple[float, ...]] = (
+    0.1, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0, 4 * 3600.0,
+)  # fmt: skip
+
 
 # =====================
 # 日志配置与管理助手
 # =====================
 
+# 日志窗口打开时从文件末尾加载的行数
+LOG_TAIL_LINES: Final[int] = 1000
+
+# 向上滚动到顶部时每次分页加载的更早行数
+LOG_PAGE_LINES: Final[int] = 500
+
+# 日志窗口保留的最大行数（分页加载的内容会额外计入）
+LOG_MAX_LINES: Final[int] = 2000
+
+# 反向读取日志文件时每次读取的块大小
+LOG_READ_CHUNK_SIZE: Final[int] = 64 * 1024
+
+# 调度器批量转发已订阅任务实时日志的间隔（毫秒）
+LOG_FLUSH_INTERVAL_MS: Final[int] = 200
+
+# 单个任务日志文件超过该大小后轮转为 task_N.log.1、task_N.log.2 ...
+LOG_ROTATE_BYTES: Final[int] = 10 * 1024 * 1024
+
+# 每个任务最多保留的轮转文件数
+LOG_BACKUP_COUNT: Final[int] = 3
+
+# 日志写入线程的文件缓冲区大小
+LOG_WRITE_BUFFER_SIZE: Final[int] = 256 * 1024
+
+# 日志写入线程收到第一行后继续攒批的最长等待时间（秒）
+LOG_WRITE_LINGER_SECONDS: Final[float] = 0.2
+
+# 日志写入线程单批最多处理的条目数
+LOG_WRITE_BATCH_SIZE: Final[int] = 5000
+
+# 日志存储后端："files" 为每个任务一个文件；"segments" 为追加写入的分段存储，
+# 适合任务数量极多的场景（可通过环境变量 YT_DLP_GUI_LOG_STORE 切换）
+LOG_STORE_BACKEND: Final[str] = os.environ.get("YT_DLP_GUI_LOG_STORE", "files")
+
+# 分段存储中单个段文件的大小上限
+LOG_SEGMENT_BYTES: Final[int] = 64 * 1024 * 1024
+
+# 段文件中仍被引用的数据占比低于该值时，在压缩整理时重写该段
+LOG_COMPACT_RATIO: Final[float] = 0.5
+
+
+def get_default_download_path() -> str:
+    """系统下载目录，不存在时使用当前目录"""
+    from PySide6.QtCore import QStandardPaths
+
+    path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DownloadLocation)
+    return path if path and os.path.exists(path) else "."
+
+
+# 实例角色：图形界面与守护进程各自只允许运行一个，两者可以同时运行并共用同一个数据库
+INSTANCE_ROLE_GUI: Final[str] = "gui"
+INSTANCE_ROLE_DAEMON: Final[str] = "daemon"
+
+
+def get_control_server_name(role: str = INSTANCE_ROLE_GUI) -> str:
+    """本地控制接口的套接字名称，按配置目录与实例角色区分"""
+    config_dir = os.path.expanduser("~/.yt-dlp-gui")
+    digest = hashlib.sha1(os.path.abspath(config_dir).encode("utf-8")).hexdigest()[:12]
+    return f"yt-dlp-gui-{digest}-{role}"
+
+
+def get_instance_lock_path(role: str = INSTANCE_ROLE_GUI) -> str:
+    """该角色的单实例锁文件路径（与任务数据库位于同一配置目录）"""
+    config_dir = os.path.expanduser("~/.yt-dlp-gui")
+    os.makedirs(config_dir, exist_ok=True)
+    return os.path.join(config_dir, f"instance-{role}.lock")
+
+
+# 已确认存在的日志目录，避免每次获取路径都调用 os.makedirs
+_created_log_dirs: set[str] = set()
+
 
 def get_log_dir() -> str:
     """获取日志存储目录并确保其存在"""
     config_dir = os.path.expanduser("~/.yt-dlp-gui")
     log_dir = os.path.join(config_dir, "logs")
-    os.makedirs(log_dir, exist_ok=True)
+    if log_dir not in _created_log_dirs:
+        os.makedirs(log_dir, exist_ok=True)
+        _created_log_dirs.add(log_dir)
     return log_dir
 
 
 def get_task_log_path(task_id: int) -> str:
-    """获取特定任务的日志文件路径"""
+    """获取特定任务的日志文件路径（当前正在写入的文件）"""
     return os.path.join(get_log_dir(), f"task_{task_id}.log")
 
 
-def remove_task_log(task_id: int) -> None:
-    """删除特定任务的日志文件"""
+def list_log_files(path: str) -> list[str]:
+    """列出某个日志的全部现存文件（含轮转和 gzip 压缩后的文件），按时间从旧到新排序"""
+    files = []
+    candidates = [f"{path}.{i}" for i in range(LOG_BACKUP_COUNT, 0, -1)] + [path]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            files.append(candidate)
+        elif os.path.exists(candidate + ".gz"):
+            files.append(candidate + ".gz")
+    return files
+
+
+def get_log_base_path(path: str) -> str:
+    """记录日志流起始逻辑偏移量的文件路径
+
+    轮转覆盖最旧的文件时，被丢弃的字节数累加到这里，日志流中已有行的逻辑偏移量
+    因此在整轮下载中保持不变。
+    """
+    return f"{path}.base"
+
+
+def read_log_base(path: str) -> int:
+    """读取日志流的起始逻辑偏移量，没有因轮转丢弃过内容时为 0"""
+    try:
+        with open(get_log_base_path(path), encoding="ascii") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
+
+
+def delete_task_log_files(task_id: int) -> None:
+    """直接删除特定任务的全部日志文件"""
+    path = get_task_log_path(task_id)
     try:
-        path = get_task_log_path(task_id)
-        if os.path.exists(path):
-            os.remove(path)
+        for file in list_log_files(path):
+            os.remove(file)
+        if os.path.exists(get_log_base_path(path)):
+            os.remove(get_log_base_path(path))
     except Exception:
         pass
+
+
+def remove_task_log(task_id: int) -> None:
+    """删除特定任务的日志"""
+    remove_task_logs([task_id])
+
+
+def remove_task_logs(task_ids: list[int]) -> None:
+    """批量删除任务日志
+
+    交由后台日志写入线程在处理完这些任务已排队的日志后再删除（不阻塞调用方），
+    避免删除后又被迟到的写入重新创建；分段存储模式下整批只做一次压缩整理。
+    写入线程未运行时，单个任务的日志直接同步删除。
+    """
+    from .log_writer import get_log_writer, get_running_log_writer  # 避免循环导入
+
+    writer = get_running_log_writer()
+    if writer is None and (LOG_STORE_BACKEND == "segments" or len(task_ids) > 1):
+        # 分段存储的索引只能由写入线程修改；批量删除大量文件也不应阻塞界面线程
+        writer = get_log_writer()
+    if writer is not None:
+        writer.remove_tasks(task_ids, wait=False)
+    else:
+        for task_id in task_ids:
+            delete_task_log_files(task_id)
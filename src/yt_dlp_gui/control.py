@@ -0,0 +1,440 @@
+"""本地控制接口
+
+运行中的实例（图形界面或守护进程）在 QLocalServer 上提供控制接口
+（Unix 上为仅当前用户可访问的本地套接字，Windows 上为命名管道），
+脚本无需操作界面即可批量添加和管理任务。协议为逐行 JSON：
+
+    请求  {"id": 1, "cmd": "add", "url": "https://...", "path": "/data"}
+    响应  {"id": 1, "ok": true, "result": {"id": 42}}
+          {"id": 1, "ok": false, "error": "..."}
+
+命令：
+    add        url, path?, format?, playlist?, parallel_streams?, allow_duplicate?  → {"id"}
+    bulk-add   urls (文本行，可含注释与多个链接), path?, format?, playlist?, parallel_streams?
+               → {"added", "skipped"}（全部写入数据库后才响应）
+    start / stop / delete   ids                                → {"count"}
+    list       status? (状态列表), ids?                          → [任务, ...]
+    subscribe  之后按 CONTROL_PROGRESS_FLUSH_MS 批量推送进度变化：
+               {"event": "progress", "tasks": [{"id": 42, "progress": 37, ...}]}
+               每个任务只包含上次推送之后变化的字段，已删除的任务为 {"id", "deleted": true}
+    activate   显示并激活主窗口（第二次启动时由 cli 发送）→ {"window"}（守护进程为 false）
+
+图形界面与守护进程各自在按角色命名的套接字上监听。同一配置目录下第二次启动图形界面时，
+cli 通过 ControlClient 把参数转发给运行中的窗口后退出，不会再打开一个窗口和一个数据库
+写入线程；add 子命令交给任意一个运行中的实例（优先图形界面）。
+"""
+
+import json
+import sys
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+from .config import (
+    CONTROL_CONNECT_TIMEOUT_MS,
+    CONTROL_PROGRESS_FLUSH_MS,
+    CONTROL_REQUEST_TIMEOUT_MS,
+    FORMAT_PRESETS,
+    INSTANCE_ROLE_DAEMON,
+    INSTANCE_ROLE_GUI,
+    get_control_server_name,
+    get_default_download_path,
+)
+from .database import Database
+from .importer import ImportJob, start_import
+from .models import DownloadTask
+from .presets import validate_format_spec
+from .scheduler import DownloadScheduler
+
+Reply = Callable[[Any], None]
+
+# 客户端单次阻塞等待的时长（毫秒）
+_WAIT_STEP_MS = 50
+
+
+class ControlError(Exception):
+    """请求无效或运行中的实例返回错误"""
+
+
+def _task_template(params: dict[str, Any], db: Database) -> DownloadTask:
+    for key in ("format", "path"):
+        if params.get(key) is not None and not isinstance(params[key], str):
+            raise ControlError(f"{key} 必须是字符串")
+    for key in ("playlist", "parallel_streams"):
+        if params.get(key) is not None and not isinstance(params[key], bool):
+            raise ControlError(f"{key} 必须是布尔值")
+    fmt = params.get("format") or next(iter(FORMAT_PRESETS))
+    # 既接受数据库中的预设名称，也接受原始的格式表达式（添加前编译一次校验）
+    preset = db.find_preset(fmt)
+    if preset is None:
+        try:
+            fmt = validate_format_spec(fmt)
+        except ValueError as e:
+            raise ControlError(str(e)) from e
+    return DownloadTask(
+        url="",
+        save_path=params.get("path") or get_default_download_path(),
+        format_preset=preset.selector if preset else fmt,
+        preset_id=preset.id if preset else None,
+        audio_format=preset.audio_format if preset else None,
+        download_playlist=bool(params.get("playlist")),
+        parallel_streams=bool(params.get("parallel_streams")),
+    )
+
+
+def _task_ids(params: dict[str, Any]) -> list[int]:
+    ids = params.get("ids")
+    if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        raise ControlError("ids 必须是任务 ID 列表")
+    return ids
+
+
+def _progress_fields(data: dict[str, Any]) -> dict[str, Any]:
+    """把 yt-dlp 进度回调数据转换为可序列化的增量字段"""
+    if data.get("status") == "merging":
+        fields: dict[str, Any] = {"status": "merging"}
+        if "_overall_percent" in data:
+            fields["progress"] = int(data["_overall_percent"])
+        return fields
+    if data.get("status") == "postprocessing":
+        # 后处理队列中的任务：当前执行的后处理器（开始执行前为 None）
+        fields = {"status": "postprocessing", "postprocessor": data.get("postprocessor")}
+        if "_overall_percent" in data:
+            fields["progress"] = int(data["_overall_percent"])
+        return fields
+    if data.get("status") != "downloading":
+        return {}
+    total = data.get("total_bytes") or data.get("total_bytes_estimate")
+    downloaded = data.get("downloaded_bytes")
+    fields = {
+        "downloaded_bytes": downloaded,
+        "total_bytes": total,
+        "speed": data.get("speed"),
+        "eta": data.get("eta"),
+    }
+    if "_overall_percent" in data:
+        # 优先使用 Worker 跨文件平滑后的整体进度、速度与剩余时间
+        fields["progress"] = int(data["_overall_percent"])
+        fields["speed"] = data.get("_smoothed_speed")
+        fields["eta"] = data.get("_smoothed_eta")
+    elif total and downloaded:
+        fields["progress"] = int(downloaded / total * 100)
+    return fields
+
+
+class ControlServer(QObject):
+    """在主线程事件循环中处理控制请求，操作与界面共用的调度器和数据库"""
+
+    activate_requested = Signal()
+
+    def __init__(
+        self,
+        db: Database,
+        scheduler: DownloadScheduler,
+        name: Optional[str] = None,
+        flush_interval: int = CONTROL_PROGRESS_FLUSH_MS,
+        role: str = INSTANCE_ROLE_GUI,
+    ) -> None:
+        super().__init__()
+        self.db = db
+        self.scheduler = scheduler
+        self.role = role
+        self.name = name or get_control_server_name(role)
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._subscribers: set[QLocalSocket] = set()
+        # 进行中的批量添加，持有引用直至完成
+        self._import_jobs: set[ImportJob] = set()
+        # 自上次推送以来各任务变化的字段
+        self._pending: dict[int, dict[str, Any]] = {}
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush_progress)
+
+        self._commands: dict[str, Callable[[QLocalSocket, dict[str, Any], Reply], None]] = {
+            "add": self._cmd_add,
+            "bulk-add": self._cmd_bulk_add,
+            "start": self._cmd_start,
+            "stop": self._cmd_stop,
+            "delete": self._cmd_delete,
+            "list": self._cmd_list,
+            "subscribe": self._cmd_subscribe,
+            "activate": self._cmd_activate,
+        }
+
+        scheduler.task_added.connect(lambda task: self._mark(task.id, status=task.status))
+        scheduler.tasks_added.connect(
+            lambda tasks: [self._mark(task.id, status=task.status) for task in tasks]
+        )
+        scheduler.task_status_changed.connect(lambda tid, status: self._mark(tid, status=status))
+        scheduler.tasks_status_changed.connect(self._on_tasks_status_changed)
+        scheduler.task_progress_changed.connect(
+            lambda tid, data: self._mark(tid, **_progress_fields(data))
+        )
+        scheduler.task_title_updated.connect(lambda tid, title: self._mark(tid, title=title))
+        scheduler.task_deleted.connect(lambda tid: self._mark(tid, deleted=True))
+        scheduler.tasks_deleted.connect(
+            lambda tids: [self._mark(tid, deleted=True) for tid in tids]
+        )
+
+    def listen(self) -> bool:
+        """开始监听；已有实例在运行时返回 False"""
+        if ControlClient(self.name).connect():
+            return False
+        # 上次异常退出遗留的套接字文件会导致 listen 失败，先清理
+        QLocalServer.removeServer(self.name)
+        return self._server.listen(self.name)
+
+    def close(self) -> None:
+        self._flush_timer.stop()
+        self._server.close()
+        self._subscribers.clear()
+
+    # ---------- 连接与协议 ----------
+
+    def _on_new_connection(self) -> None:
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._subscribers.discard(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_ready_read(self, socket: QLocalSocket) -> None:
+        while socket.canReadLine():
+            line = bytes(socket.readLine().data()).strip()
+            if line:
+                self._handle_line(socket, line)
+
+    def _handle_line(self, socket: QLocalSocket, line: bytes) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ControlError("请求必须是 JSON 对象")
+            request_id = request.get("id")
+            handler = self._commands.get(request.get("cmd"))
+            if handler is None:
+                raise ControlError(f"未知命令: {request.get('cmd')}")
+            handler(socket, request, lambda result: self._send(socket, request_id, True, result))
+        except (ControlError, ValueError) as e:
+            self._send(socket, request_id, False, str(e))
+        except Exception as e:
+            # 不让异常逃出 Qt 槽函数，客户端也不必等到超时
+            print(f"控制命令执行出错: {e!r}", file=sys.stderr)
+            self._send(socket, request_id, False, f"内部错误: {e}")
+
+    def _send(self, socket: QLocalSocket, request_id: Any, ok: bool, payload: Any) -> None:
+        message = {"id": request_id, "ok": ok, "result" if ok else "error": payload}
+        self._write(socket, message)
+
+    @staticmethod
+    def _write(socket: QLocalSocket, message: dict[str, Any]) -> None:
+        if socket.state() != QLocalSocket.LocalSocketState.ConnectedState:
+            return
+        socket.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        socket.flush()
+
+    # ---------- 命令 ----------
+
+    def _cmd_add(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        url = params.get("url")
+        if not isinstance(url, str) or not url:
+            raise ControlError("缺少 url")
+        task = _task_template(params, self.db)
+        task.url = url
+        task_id = self.scheduler.add_task(task, allow_duplicate=bool(params.get("allow_duplicate")))
+        reply({"id": task_id})
+
+    def _cmd_bulk_add(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        urls = params.get("urls")
+        if not isinstance(urls, list):
+            raise ControlError("urls 必须是字符串列表")
+        lines = [str(u) for u in urls]
+        job = ImportJob(self.db, lambda: lines, _task_template(params, self.db))
+        job.signals.chunk_added.connect(self.scheduler.add_imported_tasks)
+
+        def finished(added: int, skipped: int) -> None:
+            self._import_jobs.discard(job)
+            reply({"added": added, "skipped": skipped})
+
+        def failed(message: str) -> None:
+            self._import_jobs.discard(job)
+            self._send(socket, params.get("id"), False, message)
+
+        job.signals.finished.connect(finished)
+        job.signals.failed.connect(failed)
+        self._import_jobs.add(job)
+        start_import(job)
+
+    def _cmd_start(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        ids = _task_ids(params)
+        self.scheduler.start_many(ids)
+        reply({"count": len(ids)})
+
+    def _cmd_stop(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        ids = _task_ids(params)
+        self.scheduler.stop_many(ids)
+        reply({"count": len(ids)})
+
+    def _cmd_delete(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        ids = _task_ids(params)
+        self.scheduler.delete_many(ids)
+        reply({"count": len(ids)})
+
+    def _cmd_list(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        if params.get("ids") is not None:
+            tasks = self.db.get_tasks(_task_ids(params))
+        else:
+            tasks = self.db.get_all_tasks(sort_col="id", sort_dir="ASC")
+        statuses = params.get("status")
+        if statuses is not None:
+            if not isinstance(statuses, list) or not all(isinstance(s, str) for s in statuses):
+                raise ControlError("status 必须是状态列表")
+            if statuses:
+                wanted = set(statuses)
+                tasks = [t for t in tasks if t.status in wanted]
+        reply([asdict(t) for t in tasks])
+
+    def _cmd_subscribe(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        self._subscribers.add(socket)
+        reply({"interval_ms": self._flush_timer.interval()})
+
+    def _cmd_activate(self, socket: QLocalSocket, params: dict[str, Any], reply: Reply) -> None:
+        window = self.role == INSTANCE_ROLE_GUI
+        if window:
+            self.activate_requested.emit()
+        reply({"window": window})
+
+    # ---------- 进度推送 ----------
+
+    def _on_tasks_status_changed(self, task_ids: list[int], status: str) -> None:
+        for task_id in task_ids:
+            self._mark(task_id, status=status)
+
+    def _mark(self, task_id: Optional[int], **fields: Any) -> None:
+        if task_id is None or not self._subscribers or not fields:
+            return
+        self._pending.setdefault(task_id, {}).update(fields)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush_progress(self) -> None:
+        """把攒下的进度变化整批推送给所有订阅者"""
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        message = {
+            "event": "progress",
+            "tasks": [{"id": task_id, **fields} for task_id, fields in pending.items()],
+        }
+        for socket in list(self._subscribers):
+            self._write(socket, message)
+
+
+class ControlClient:
+    """以阻塞方式访问运行中实例的控制接口（可在没有事件循环的线程中使用）"""
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        connect_timeout: int = CONTROL_CONNECT_TIMEOUT_MS,
+        request_timeout: int = CONTROL_REQUEST_TIMEOUT_MS,
+    ) -> None:
+        self.name = name or get_control_server_name()
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self._socket: Optional[QLocalSocket] = None
+        self._next_id = 0
+        # 等待响应期间收到的推送事件
+        self._events: deque[dict[str, Any]] = deque()
+
+    def connect(self) -> bool:
+        """连接运行中的实例，没有实例在运行时返回 False"""
+        socket = QLocalSocket()
+        socket.connectToServer(self.name)
+        if not socket.waitForConnected(self.connect_timeout):
+            return False
+        self._socket = socket
+        return True
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.disconnectFromServer()
+            self._socket = None
+
+    def request(self, cmd: str, **params: Any) -> Any:
+        """发送请求并等待响应，返回 result；实例返回错误时抛出 ControlError"""
+        if self._socket is None:
+            raise ControlError("未连接到运行中的实例")
+        self._next_id += 1
+        request_id = self._next_id
+        message = {"id": request_id, "cmd": cmd, **params}
+        self._socket.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        if not self._socket.waitForBytesWritten(self.request_timeout):
+            raise ControlError("发送请求超时")
+        while True:
+            response = self._read_message(self.request_timeout)
+            if "event" in response:
+                self._events.append(response)
+            elif response.get("id") == request_id:
+                if not response.get("ok"):
+                    raise ControlError(response.get("error") or "请求失败")
+                return response.get("result")
+
+    def events(self, timeout: int = -1) -> Iterator[dict[str, Any]]:
+        """逐个产出订阅后推送的事件；timeout 毫秒内没有新事件时结束（-1 表示一直等待）"""
+        while True:
+            if self._events:
+                yield self._events.popleft()
+                continue
+            try:
+                yield self._read_message(timeout)
+            except ControlError:
+                return
+
+    def _read_message(self, timeout: int) -> dict[str, Any]:
+        assert self._socket is not None
+        deadline = time.monotonic() + timeout / 1000 if timeout >= 0 else None
+        while not self._socket.canReadLine():
+            if self._socket.state() != QLocalSocket.LocalSocketState.ConnectedState:
+                raise ControlError("与运行中的实例的连接已断开")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise ControlError("等待响应超时")
+            # waitForReadyRead 等待期间不释放 GIL，分段等待以免阻塞同进程中的其他 Python 线程
+            self._socket.waitForReadyRead(_WAIT_STEP_MS)
+        return json.loads(bytes(self._socket.readLine().data()))
+
+
+def connect_running_instance() -> Optional[ControlClient]:
+    """连接运行中的实例（优先图形界面，其次守护进程），没有实例在运行时返回 None"""
+    for role in (INSTANCE_ROLE_GUI, INSTANCE_ROLE_DAEMON):
+        client = ControlClient(get_control_server_name(role))
+        if client.connect():
+            return client
+    return None
+
+
+def forward_to_running_instance(lines: Optional[Iterable[str]] = None) -> bool:
+    """若已有图形界面在运行，激活其窗口并把待导入的链接转发给它，返回是否已转发
+
+    运行中的实例没有窗口时（守护进程）不转发，由调用方启动图形界面；
+    请求超时或被拒绝时抛出 ControlError。
+    """
+    client = ControlClient(get_control_server_name(INSTANCE_ROLE_GUI))
+    if not client.connect():
+        return False
+    try:
+        if not client.request("activate").get("window"):
+            return False
+        if lines is not None:
+            client.request("bulk-add", urls=list(lines))
+    finally:
+        client.close()
+    return True
@@ -9,9 +9,80 @@ import queue
 import sqlite3
 import sys
 import threading
+import time
 from typing import Any, Callable, Optional
 
-from .models import DownloadTask
+from . import metrics, profiling
+from .models import DownloadTask, FormatPreset, Subscription
+from .presets import builtin_presets
+from .utils import canonical_url, guess_video_key
+
+_INSERT_TASK_SQL = """
+    INSERT INTO tasks (
+        url, title, status, save_path, format_preset, proxy,
+        concurrent_fragments, write_subs, download_playlist,
+        playlist_items, playlist_random, max_downloads,
+        impersonate, no_cookies, parallel_streams, preset_id, canonical_key, video_key
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 任务与订阅查询：引用预设的行取预设当前的格式表达式（与音频转换格式）
+_SELECT_TASKS = (
+    "SELECT tasks.*, p.selector AS preset_selector, p.audio_format AS preset_audio_format "
+    "FROM tasks LEFT JOIN format_presets p ON p.id = tasks.preset_id"
+)
+_SELECT_SUBSCRIPTIONS = (
+    "SELECT subscriptions.*, p.selector AS preset_selector "
+    "FROM subscriptions LEFT JOIN format_presets p ON p.id = subscriptions.preset_id"
+)
+
+_PRESET_COLUMNS = (
+    "name",
+    "ext",
+    "codec",
+    "max_height",
+    "audio_only",
+    "max_filesize",
+    "format_spec",
+    "audio_format",
+    "selector",
+)
+
+# 视为"已存在"的任务状态：已完成或仍在进行中（失败/取消的任务可以直接重新添加）
+_DUPLICATE_STATUSES = (
+    "finished",
+    "pending",
+    "queued",
+    "downloading",
+    "merging",
+    "postprocessing",
+    "retrying",
+)
+
+
+def _insert_params(task: DownloadTask, status: str) -> tuple[Any, ...]:
+    return (
+        task.url,
+        task.title or "正在解析...",
+        status,
+        task.save_path,
+        # 引用预设时不再逐行保存格式表达式
+        None if task.preset_id is not None else task.format_preset,
+        task.proxy,
+        task.concurrent_fragments,
+        task.write_subs,
+        task.download_playlist,
+        task.playlist_items,
+        task.playlist_random,
+        task.max_downloads,
+        task.impersonate,
+        task.no_cookies,
+        task.parallel_streams,
+        task.preset_id,
+        task.canonical_key or canonical_url(task.url),
+        # 播放列表任务不对应单个视频，不记录视频键，以免单个视频的链接被误判为重复
+        None if task.download_playlist else task.video_key or guess_video_key(task.url),
+    )
 
 
 class DbTask:
@@ -22,6 +93,8 @@ class DbTask:
         self.sync = sync
         # 结果队列，对于同步任务是必要的，异步任务无需创建以减少开销
         self.result_queue = queue.Queue[tuple[bool, Any]](maxsize=1) if sync else None
+        # 入队时间，仅在启用指标时记录
+        self.enqueued_at = 0.0
 
 
 class Database:
@@ -38,11 +111,26 @@ class Database:
         self._closed = False
         self._close_lock = threading.Lock()
 
+        # 运行时指标：排队等待与执行耗时按同步/异步分别统计，队列长度在读取指标时才计算
+        self._timed = metrics.enabled()
+        self._m_wait = {
+            sync: metrics.histogram(
+                "db_queue_wait_seconds", "数据库任务在队列中等待执行的时间", mode=mode
+            )
+            for sync, mode in ((True, "sync"), (False, "async"))
+        }
+        self._m_exec = {
+            sync: metrics.histogram("db_exec_seconds", "数据库任务的执行时间", mode=mode)
+            for sync, mode in ((True, "sync"), (False, "async"))
+        }
+        metrics.gauge_callback("db_queue_depth", "数据库队列中等待执行的任务数", self._queue.qsize)
+
         # 启动后台持久化数据库工作线程
         self._worker_thread = threading.Thread(target=self._db_worker, daemon=True)
         self._worker_thread.start()
 
-        self._init_db()
+        with profiling.phase("_init_db"):
+            self._init_db()
 
     def _db_worker(self) -> None:
         """后台数据库工作线程的主循环，保证所有 SQL 操作都在单线程内顺序执行"""
@@ -60,6 +148,7 @@ class Database:
                 self._queue.task_done()
                 break
 
+            started = time.perf_counter() if task.enqueued_at else 0.0
             try:
                 # 执行具体 closure 并返回结果
                 result = task.func(conn)
@@ -72,6 +161,9 @@ class Database:
                     # 异步任务出错时，记录日志到 stderr 以免程序崩溃
                     print(f"Database background write error: {e}", file=sys.stderr)
             finally:
+                if started:
+                    self._m_wait[task.sync].observe(started - task.enqueued_at)
+                    self._m_exec[task.sync].observe(time.perf_counter() - started)
                 self._queue.task_done()
 
         conn.close()
@@ -79,6 +171,8 @@ class Database:
     def _execute_sync(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
         """同步执行任务：向队列投递任务并阻塞等待后台线程返回结果"""
         task = DbTask(func, sync=True)
+        if self._timed:
+            task.enqueued_at = time.perf_counter()
         self._queue.put(task)
         assert task.result_queue is not None
         success, result = task.result_queue.get()
@@ -89,6 +183,8 @@ class Database:
     def _execute_async(self, func: Callable[[sqlite3.Connection], Any]) -> None:
         """异步执行任务：向队列投递任务，直接返回不阻塞调用方（火及忘记模式）"""
         task = DbTask(func, sync=False)
+        if self._timed:
+            task.enqueued_at = time.perf_counter()
         self._queue.put(task)
 
     def close(self) -> None:
@@ -102,6 +198,29 @@ class Database:
 
     def _init_db(self) -> None:
         def init_func(conn: sqlite3.Connection) -> None:
+            # 格式预设：任务与订阅只保存预设 ID；selector 是校验过的格式表达式
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS format_presets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE,
+                    ext TEXT,
+                    codec TEXT,
+                    max_height INTEGER,
+                    audio_only BOOLEAN DEFAULT 0,
+                    max_filesize INTEGER,
+                    format_spec TEXT,
+                    audio_format TEXT,
+                    selector TEXT NOT NULL,
+                    builtin BOOLEAN DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            # 内置预设已存在（包括被用户改过）时保持不变
+            conn.executemany(
+                "INSERT OR IGNORE INTO format_presets "
+                "(name, format_spec, audio_format, selector, builtin) VALUES (?, ?, ?, ?, 1)",
+                [(p.name, p.format_spec, p.audio_format, p.selector) for p in builtin_presets()],
+            )
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS tasks (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -122,6 +241,12 @@ class Database:
                     max_downloads INTEGER,
                     impersonate TEXT,
                     no_cookies BOOLEAN DEFAULT 0,
+                    parallel_streams BOOLEAN DEFAULT 0,
+                    preset_id INTEGER,
+                    canonical_key TEXT,
+                    video_key TEXT,
+                    retry_count INTEGER DEFAULT 0,
+                    next_retry_at REAL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
@@ -132,43 +257,119 @@ class Database:
                 conn.execute("ALTER TABLE tasks ADD COLUMN impersonate TEXT")
             if "no_cookies" not in columns:
                 conn.execute("ALTER TABLE tasks ADD COLUMN no_cookies BOOLEAN DEFAULT 0")
+            if "parallel_streams" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN parallel_streams BOOLEAN DEFAULT 0")
+            if "preset_id" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN preset_id INTEGER")
+                _link_presets(conn, "tasks")
+            if "canonical_key" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN canonical_key TEXT")
+            if "video_key" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN video_key TEXT")
+            if "retry_count" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN retry_count INTEGER DEFAULT 0")
+            if "next_retry_at" not in columns:
+                conn.execute("ALTER TABLE tasks ADD COLUMN next_retry_at REAL")
+
+            # 为旧版本创建的任务补齐规范键
+            playlist_col = "download_playlist" if "download_playlist" in columns else "0"
+            rows = conn.execute(
+                f"SELECT id, url, {playlist_col} AS download_playlist FROM tasks "
+                "WHERE canonical_key IS NULL"
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE tasks SET canonical_key = ?, video_key = COALESCE(video_key, ?) "
+                    "WHERE id = ?",
+                    [
+                        (
+                            canonical_url(row["url"]),
+                            None if row["download_playlist"] else guess_video_key(row["url"]),
+                            row["id"],
+                        )
+                        for row in rows
+                    ],
+                )
+            # 下载存档：记录已下载的 (提取器, 视频 ID)，替代 yt-dlp 的文本存档文件
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archive (
+                    extractor TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    task_id INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (extractor, video_id)
+                ) WITHOUT ROWID
+            """)
+            # 订阅：定期同步的频道与播放列表
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    title TEXT,
+                    save_path TEXT,
+                    format_preset TEXT,
+                    preset_id INTEGER,
+                    interval INTEGER NOT NULL DEFAULT 3600,
+                    enabled BOOLEAN NOT NULL DEFAULT 1,
+                    next_check_at REAL NOT NULL DEFAULT 0,
+                    last_checked_at REAL,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor = conn.execute("PRAGMA table_info(subscriptions)")
+            if "preset_id" not in {row["name"] for row in cursor.fetchall()}:
+                conn.execute("ALTER TABLE subscriptions ADD COLUMN preset_id INTEGER")
+                _link_presets(conn, "subscriptions")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_subscriptions_next_check "
+                "ON subscriptions (enabled, next_check_at)"
+            )
+            # 任务租约：正在下载某个任务的进程持有租约并定期续期，
+            # 多个进程共用同一个数据库时不会重复下载同一任务；进程崩溃后租约过期即可被接管
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_leases (
+                    task_id INTEGER PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_task_leases_owner ON task_leases (owner)")
+            # 重复检测只需一次索引查询
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_tasks_canonical_key ON tasks (canonical_key)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_video_key ON tasks (video_key)")
             conn.commit()
 
         self._execute_sync(init_func)
 
     def add_task(self, task: DownloadTask) -> int:
         def add_func(conn: sqlite3.Connection) -> int:
-            query = """
-                INSERT INTO tasks (
-                    url, title, status, save_path, format_preset, proxy,
-                    concurrent_fragments, write_subs, download_playlist,
-                    playlist_items, playlist_random, max_downloads,
-                    impersonate, no_cookies
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            params = (
-                task.url,
-                task.title or "正在解析...",
-                "pending",
-                task.save_path,
-                task.format_preset,
-                task.proxy,
-                task.concurrent_fragments,
-                task.write_subs,
-                task.download_playlist,
-                task.playlist_items,
-                task.playlist_random,
-                task.max_downloads,
-                task.impersonate,
-                task.no_cookies,
-            )
-            cursor = conn.execute(query, params)
+            cursor = conn.execute(_INSERT_TASK_SQL, _insert_params(task, "pending"))
             conn.commit()
             assert cursor.lastrowid is not None
             return cursor.lastrowid
 
         return self._execute_sync(add_func)
 
+    def add_tasks(self, tasks: list[DownloadTask]) -> list[int]:
+        """在一个事务中以 executemany 批量插入任务（保留各任务的 status），返回任务 ID
+
+        tasks 表使用 AUTOINCREMENT 且所有写入都在同一个后台线程中串行执行，
+        因此同一批插入得到的 ID 是连续的，按插入顺序返回。
+        """
+        if not tasks:
+            return []
+
+        def add_many_func(conn: sqlite3.Connection) -> list[int]:
+            conn.executemany(_INSERT_TASK_SQL, (_insert_params(t, t.status) for t in tasks))
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.commit()
+            return list(range(last_id - len(tasks) + 1, last_id + 1))
+
+        return self._execute_sync(add_many_func)
+
     def update_task(self, task_id: int, updates: dict[str, Any]) -> None:
         if not updates:
             return
@@ -189,8 +390,87 @@ class Database:
 
         self._execute_async(delete_func)
 
+    def update_tasks(self, task_ids: list[int], updates: dict[str, Any]) -> None:
+        """以一条 UPDATE 语句批量更新多个任务的相同字段"""
+        if not task_ids or not updates:
+            return
+        ids = list(task_ids)
+
+        def update_many_func(conn: sqlite3.Connection) -> None:
+            _load_ids(conn, ids)
+            columns = [f"{k} = ?" for k in updates.keys()]
+            query = (
+                f"UPDATE tasks SET {', '.join(columns)} WHERE id IN (SELECT id FROM temp.batch_ids)"
+            )
+            conn.execute(query, list(updates.values()))
+            conn.commit()
+
+        self._execute_async(update_many_func)
+
+    def delete_tasks(self, task_ids: list[int]) -> None:
+        """以一条 DELETE 语句批量删除多个任务"""
+        if not task_ids:
+            return
+        ids = list(task_ids)
+
+        def delete_many_func(conn: sqlite3.Connection) -> None:
+            _load_ids(conn, ids)
+            conn.execute("DELETE FROM tasks WHERE id IN (SELECT id FROM temp.batch_ids)")
+            conn.commit()
+
+        self._execute_async(delete_many_func)
+
+    def find_duplicate(self, url: str) -> Optional[DownloadTask]:
+        """查找与 url 指向同一视频、且已完成或仍在进行中的最新任务"""
+        key = canonical_url(url)
+        video_key = guess_video_key(url)
+        placeholders = ", ".join("?" * len(_DUPLICATE_STATUSES))
+
+        def find_func(conn: sqlite3.Connection) -> Optional[DownloadTask]:
+            cursor = conn.execute(
+                f"{_SELECT_TASKS} WHERE (canonical_key = ? OR video_key = ?) "
+                f"AND status IN ({placeholders}) ORDER BY tasks.id DESC LIMIT 1",
+                (key, video_key, *_DUPLICATE_STATUSES),
+            )
+            row = cursor.fetchone()
+            return DownloadTask.from_dict(dict(row)) if row else None
+
+        return self._execute_sync(find_func)
+
+    def find_existing_keys(self, keys: list[str], any_status: bool = False) -> set[str]:
+        """返回 keys 中已被已完成或进行中的任务占用的规范键（批量导入去重用）
+
+        any_status 为 True 时不论任务状态，只要存在对应任务就算占用（订阅去重用，
+        出错或已取消的条目不会在每次检查时被重新添加）。
+        """
+        if not keys:
+            return set()
+        query = (
+            "SELECT DISTINCT canonical_key FROM tasks "
+            "WHERE canonical_key IN (SELECT key FROM temp.batch_keys)"
+        )
+        params: tuple[str, ...] = ()
+        if not any_status:
+            placeholders = ", ".join("?" * len(_DUPLICATE_STATUSES))
+            query += f" AND status IN ({placeholders})"
+            params = _DUPLICATE_STATUSES
+
+        def find_keys_func(conn: sqlite3.Connection) -> set[str]:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_keys (key TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.batch_keys")
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.batch_keys (key) VALUES (?)", ((k,) for k in keys)
+            )
+            cursor = conn.execute(query, params)
+            found = {row[0] for row in cursor.fetchall()}
+            # 结束临时表写入开启的隐式事务
+            conn.commit()
+            return found
+
+        return self._execute_sync(find_keys_func)
+
     # 允许排序的列白名单，防止 SQL 注入
-    _SORT_COLS = frozenset({"created_at", "title", "status", "progress"})
+    _SORT_COLS = frozenset({"id", "created_at", "title", "status", "progress"})
     _SORT_DIRS = frozenset({"ASC", "DESC"})
 
     def get_all_tasks(
@@ -208,15 +488,300 @@ class Database:
         direction = sort_dir if sort_dir in self._SORT_DIRS else "DESC"
 
         def get_all_func(conn: sqlite3.Connection) -> list[DownloadTask]:
-            cursor = conn.execute(f"SELECT * FROM tasks ORDER BY {col} {direction}")  # noqa: S608
+            cursor = conn.execute(f"{_SELECT_TASKS} ORDER BY tasks.{col} {direction}")
             return [DownloadTask.from_dict(dict(row)) for row in cursor.fetchall()]
 
         return self._execute_sync(get_all_func)
 
+    def get_task_ids_by_status(
+        self, statuses: tuple[str, ...], after_id: int = 0, unleased_at: Optional[float] = None
+    ) -> list[int]:
+        """按 ID 升序返回处于给定状态且 ID 大于 after_id 的任务 ID
+
+        指定 unleased_at 时排除在该时间仍持有有效租约（正被其他进程下载）的任务。
+        """
+        placeholders = ", ".join("?" * len(statuses))
+        query = f"SELECT id FROM tasks WHERE id > ? AND status IN ({placeholders})"
+        params: list[Any] = [after_id, *statuses]
+        if unleased_at is not None:
+            query += " AND id NOT IN (SELECT task_id FROM task_leases WHERE expires_at > ?)"
+            params.append(unleased_at)
+
+        def get_ids_func(conn: sqlite3.Connection) -> list[int]:
+            cursor = conn.execute(query + " ORDER BY id", params)
+            return [row[0] for row in cursor.fetchall()]
+
+        return self._execute_sync(get_ids_func)
+
+    def get_retry_schedule(self, unleased_at: float) -> list[tuple[int, Optional[float]]]:
+        """返回等待重试的任务及其计划重试时间 [(id, next_retry_at)]，排除仍被其他进程持有租约的任务"""
+
+        def get_schedule_func(conn: sqlite3.Connection) -> list[tuple[int, Optional[float]]]:
+            cursor = conn.execute(
+                "SELECT id, next_retry_at FROM tasks WHERE status = 'retrying' "
+                "AND id NOT IN (SELECT task_id FROM task_leases WHERE expires_at > ?) ORDER BY id",
+                (unleased_at,),
+            )
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+
+        return self._execute_sync(get_schedule_func)
+
     def get_task(self, task_id: int) -> Optional[DownloadTask]:
         def get_func(conn: sqlite3.Connection) -> Optional[DownloadTask]:
-            cursor = conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
+            cursor = conn.execute(f"{_SELECT_TASKS} WHERE tasks.id = ?", (task_id,))
             row = cursor.fetchone()
             return DownloadTask.from_dict(dict(row)) if row else None
 
         return self._execute_sync(get_func)
+
+    def get_tasks(self, task_ids: list[int]) -> list[DownloadTask]:
+        """批量获取任务，结果按 task_ids 的顺序返回，不存在的任务被忽略"""
+        if not task_ids:
+            return []
+        ids = list(task_ids)
+
+        def get_many_func(conn: sqlite3.Connection) -> list[DownloadTask]:
+            _load_ids(conn, ids)
+            cursor = conn.execute(
+                f"{_SELECT_TASKS} WHERE tasks.id IN (SELECT id FROM temp.batch_ids)"
+            )
+            found = {row["id"]: DownloadTask.from_dict(dict(row)) for row in cursor.fetchall()}
+            # 结束临时表写入开启的隐式事务
+            conn.commit()
+            return [found[tid] for tid in ids if tid in found]
+
+        return self._execute_sync(get_many_func)
+
+    def acquire_lease(self, task_id: int, owner: str, expires_at: float, now: float) -> bool:
+        """尝试获取任务租约：没有租约、租约已过期或本就属于 owner 时成功
+
+        判断与写入在同一条语句中完成，多个进程同时竞争时由 SQLite 的写锁保证只有一个成功。
+        """
+
+        def acquire_func(conn: sqlite3.Connection) -> bool:
+            cursor = conn.execute(
+                "INSERT INTO task_leases (task_id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (task_id) DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at "
+                "WHERE task_leases.owner = excluded.owner OR task_leases.expires_at <= ?",
+                (task_id, owner, expires_at, now),
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+        return self._execute_sync(acquire_func)
+
+    def renew_leases(self, owner: str, expires_at: float) -> None:
+        """心跳：以一条语句续期 owner 持有的全部租约"""
+
+        def renew_func(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "UPDATE task_leases SET expires_at = ? WHERE owner = ?", (expires_at, owner)
+            )
+            conn.commit()
+
+        self._execute_async(renew_func)
+
+    def release_lease(self, task_id: int, owner: str) -> None:
+        def release_func(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "DELETE FROM task_leases WHERE task_id = ? AND owner = ?", (task_id, owner)
+            )
+            conn.commit()
+
+        self._execute_async(release_func)
+
+    def release_leases(self, owner: str) -> None:
+        """释放 owner 持有的全部租约（进程退出时调用）"""
+
+        def release_all_func(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM task_leases WHERE owner = ?", (owner,))
+            conn.commit()
+
+        self._execute_async(release_all_func)
+
+    def get_archive_entries(self) -> list[tuple[str, str]]:
+        """返回下载存档中的全部 (提取器, 视频 ID)"""
+
+        def get_archive_func(conn: sqlite3.Connection) -> list[tuple[str, str]]:
+            cursor = conn.execute("SELECT extractor, video_id FROM archive")
+            return [(row[0], row[1]) for row in cursor.fetchall()]
+
+        return self._execute_sync(get_archive_func)
+
+    def add_archive_entry(self, extractor: str, video_id: str, task_id: Optional[int]) -> None:
+        """记录一个已下载的视频（已存在时忽略）"""
+
+        def add_archive_func(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT OR IGNORE INTO archive (extractor, video_id, task_id) VALUES (?, ?, ?)",
+                (extractor, video_id, task_id),
+            )
+            conn.commit()
+
+        self._execute_async(add_archive_func)
+
+    def add_subscription(self, sub: Subscription) -> int:
+        def add_sub_func(conn: sqlite3.Connection) -> int:
+            cursor = conn.execute(
+                "INSERT INTO subscriptions (url, title, save_path, format_preset, preset_id, "
+                "interval, enabled, next_check_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    sub.url,
+                    sub.title,
+                    sub.save_path,
+                    None if sub.preset_id is not None else sub.format_preset,
+                    sub.preset_id,
+                    sub.interval,
+                    sub.enabled,
+                    sub.next_check_at,
+                ),
+            )
+            conn.commit()
+            assert cursor.lastrowid is not None
+            return cursor.lastrowid
+
+        return self._execute_sync(add_sub_func)
+
+    def get_subscriptions(self) -> list[Subscription]:
+        def get_subs_func(conn: sqlite3.Connection) -> list[Subscription]:
+            cursor = conn.execute(f"{_SELECT_SUBSCRIPTIONS} ORDER BY subscriptions.id")
+            return [Subscription.from_dict(dict(row)) for row in cursor.fetchall()]
+
+        return self._execute_sync(get_subs_func)
+
+    def get_due_subscriptions(self, now: float, limit: int) -> list[Subscription]:
+        """返回已到检查时间的订阅，最早到期的在前"""
+
+        def get_due_func(conn: sqlite3.Connection) -> list[Subscription]:
+            cursor = conn.execute(
+                f"{_SELECT_SUBSCRIPTIONS} WHERE enabled = 1 AND next_check_at <= ? "
+                "ORDER BY next_check_at LIMIT ?",
+                (now, limit),
+            )
+            return [Subscription.from_dict(dict(row)) for row in cursor.fetchall()]
+
+        return self._execute_sync(get_due_func)
+
+    def update_subscription(self, sub_id: int, updates: dict[str, Any]) -> None:
+        if not updates:
+            return
+
+        def update_sub_func(conn: sqlite3.Connection) -> None:
+            columns = [f"{k} = ?" for k in updates.keys()]
+            query = f"UPDATE subscriptions SET {', '.join(columns)} WHERE id = ?"
+            conn.execute(query, [*updates.values(), sub_id])
+            conn.commit()
+
+        self._execute_async(update_sub_func)
+
+    def delete_subscription(self, sub_id: int) -> None:
+        def delete_sub_func(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM subscriptions WHERE id = ?", (sub_id,))
+            conn.commit()
+
+        self._execute_async(delete_sub_func)
+
+    def get_presets(self) -> list[FormatPreset]:
+        """返回全部格式预设，内置预设在前"""
+
+        def get_presets_func(conn: sqlite3.Connection) -> list[FormatPreset]:
+            cursor = conn.execute("SELECT * FROM format_presets ORDER BY builtin DESC, id")
+            return [FormatPreset.from_dict(dict(row)) for row in cursor.fetchall()]
+
+        return self._execute_sync(get_presets_func)
+
+    def find_preset(self, name: str) -> Optional[FormatPreset]:
+        def find_preset_func(conn: sqlite3.Connection) -> Optional[FormatPreset]:
+            row = conn.execute("SELECT * FROM format_presets WHERE name = ?", (name,)).fetchone()
+            return FormatPreset.from_dict(dict(row)) if row else None
+
+        return self._execute_sync(find_preset_func)
+
+    def add_preset(self, preset: FormatPreset) -> int:
+        """保存经 presets.validate_preset 校验的预设，名称已存在时抛出 ValueError"""
+        if not preset.selector:
+            raise ValueError("预设尚未校验")
+        values = [getattr(preset, column) for column in _PRESET_COLUMNS]
+
+        def add_preset_func(conn: sqlite3.Connection) -> int:
+            try:
+                cursor = conn.execute(
+                    f"INSERT INTO format_presets ({', '.join(_PRESET_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_PRESET_COLUMNS))})",
+                    values,
+                )
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"预设名称已存在: {preset.name}") from e
+            conn.commit()
+            assert cursor.lastrowid is not None
+            return cursor.lastrowid
+
+        return self._execute_sync(add_preset_func)
+
+    def update_preset(self, preset: FormatPreset) -> None:
+        """修改自定义预设，引用它的任务与订阅之后使用新的格式表达式"""
+        if not preset.selector or preset.id is None:
+            raise ValueError("预设尚未校验")
+        values = [getattr(preset, column) for column in _PRESET_COLUMNS]
+
+        def update_preset_func(conn: sqlite3.Connection) -> None:
+            columns = ", ".join(f"{column} = ?" for column in _PRESET_COLUMNS)
+            try:
+                cursor = conn.execute(
+                    f"UPDATE format_presets SET {columns} WHERE id = ? AND builtin = 0",
+                    [*values, preset.id],
+                )
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"预设名称已存在: {preset.name}") from e
+            conn.commit()
+            if cursor.rowcount == 0:
+                raise ValueError("内置预设不能修改")
+
+        self._execute_sync(update_preset_func)
+
+    def delete_preset(self, preset_id: int) -> None:
+        """删除自定义预设：引用它的任务与订阅改为保存其格式表达式（不再转换音频）
+
+        内置预设不能删除，抛出 ValueError。
+        """
+
+        def delete_preset_func(conn: sqlite3.Connection) -> None:
+            row = conn.execute(
+                "SELECT selector, builtin FROM format_presets WHERE id = ?", (preset_id,)
+            ).fetchone()
+            if row is None:
+                return
+            if row["builtin"]:
+                raise ValueError("内置预设不能删除")
+            for table in ("tasks", "subscriptions"):
+                conn.execute(
+                    f"UPDATE {table} SET format_preset = ?, preset_id = NULL WHERE preset_id = ?",
+                    (row["selector"], preset_id),
+                )
+            conn.execute("DELETE FROM format_presets WHERE id = ?", (preset_id,))
+            conn.commit()
+
+        self._execute_sync(delete_preset_func)
+
+
+def _link_presets(conn: sqlite3.Connection, table: str) -> None:
+    """旧版本逐行保存的格式表达式与某个预设相同时改为引用该预设"""
+    conn.execute(
+        f"UPDATE {table} SET preset_id = "
+        f"(SELECT MIN(id) FROM format_presets p WHERE p.selector = {table}.format_preset), "
+        "format_preset = NULL "
+        "WHERE preset_id IS NULL AND format_preset IN (SELECT selector FROM format_presets)"
+    )
+
+
+def _load_ids(conn: sqlite3.Connection, task_ids: list[int]) -> None:
+    """把一批任务 ID 写入连接内的临时表，供 WHERE id IN (SELECT ...) 使用
+
+    临时表不受 SQLite 单条语句绑定参数个数的限制，上万个 ID 也只需一条语句。
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_ids (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.batch_ids")
+    conn.executemany(
+        "INSERT OR IGNORE INTO temp.batch_ids (id) VALUES (?)", ((tid,) for tid in task_ids)
+    )
@@ -1,10 +1,12 @@
 import os
-from typing import Callable, Optional
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Optional
 
-import qtawesome as qta
-from PySide6.QtCore import QStandardPaths, Qt, QUrl
-from PySide6.QtGui import QDesktopServices, QFont
+from PySide6.QtCore import Qt, QTimer, QUrl
+from PySide6.QtGui import QDesktopServices, QFont, QTextCursor
 from PySide6.QtWidgets import (
+    QApplication,
     QComboBox,
     QDialog,
     QFileDialog,
@@ -14,78 +16,307 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QListWidget,
+    QListWidgetItem,
     QPlainTextEdit,
     QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
 from .components import Switch
-from .config import FORMAT_PRESETS
-from .models import DownloadTask
+from .config import (
+    AUDIO_CONVERT_FORMATS,
+    LOG_MAX_LINES,
+    LOG_PAGE_LINES,
+    LOG_TAIL_LINES,
+    METRICS_PANEL_REFRESH_MS,
+    SUBSCRIPTION_INTERVALS,
+    get_default_download_path,
+)
+from .icons import icon
+from .importer import LineSource, open_url_lines, text_lines
+from .log_reader import LogReadJob, read_lines_before, submit_read
+from .log_store import SegmentLogStore
+from .log_writer import get_running_log_writer
+from .metrics import Histogram, MetricsRegistry
+from .models import DownloadTask, FormatPreset, Subscription
+from .presets import builtin_presets, describe_preset, validate_preset
+from .utils import format_speed
+
+if TYPE_CHECKING:
+    from .database import Database
+    from .subscriptions import SubscriptionManager
 
 
 class LogDialog(QDialog):
-    def __init__(self, task_id, title, parent=None):
+    """任务日志窗口
+
+    打开时只在后台加载日志文件末尾的若干行，向上滚动到顶部时再分页加载更早的
+    内容；运行中任务的新日志由调度器按批推送到 append_logs，每行带有它在日志流中
+    的偏移量，已从文件读取到的行按偏移量跳过。
+    """
+
+    def __init__(
+        self,
+        task_id,
+        title,
+        log_path: Optional[str] = None,
+        parent=None,
+        log_store: Optional[SegmentLogStore] = None,
+    ):
         super().__init__(parent)
         self.task_id = task_id
+        self.log_path = log_path
+        # 分段存储模式下从 log_store 读取，否则从 log_path 对应的文件读取
+        self.log_store = log_store
+        # 已显示内容在文件中的起始偏移量，向上分页从这里继续读取
+        self._start_offset = 0
+        # 已显示内容在文件中的结束偏移量，推送来的日志中偏移量小于它的行已经显示过
+        self._end_offset = 0
+        # 每个已显示行在文件中占用的字节数，用于裁剪顶部时同步推进 _start_offset
+        self._line_sizes: deque[int] = deque()
+        self._max_lines = LOG_MAX_LINES
+        self._loading_older = False
+        # 已分页加载到日志流开头（轮转丢弃过最旧内容时开头的偏移量大于 0）
+        self._at_start = False
+        # 尾部加载完成前推送来的日志先暂存，加载完成后去重合并
+        self._tail_loaded = log_path is None and log_store is None
+        self._pending: list[tuple[Optional[int], str]] = []
+        # 日志重新开始时递增，此前发起的读取结果不再适用
+        self._generation = 0
+        # 程序内部重置文本时会把滚动条拉到顶部，此时不应触发分页加载
+        self._ignore_scroll = False
+        # 持有进行中的后台读取任务，避免其信号对象被提前回收
+        self._jobs: set[LogReadJob] = set()
+
         self.setWindowTitle(f"任务日志 - {title}")
         self.resize(700, 500)
         self._setup_ui()
 
+        if not self._tail_loaded:
+            self.load_tail()
+
     def _setup_ui(self):
         layout = QVBoxLayout(self)
         self.log_output = QPlainTextEdit()
         self.log_output.setReadOnly(True)
-        self.log_output.setMaximumBlockCount(2000)
+        self.log_output.setUndoRedoEnabled(False)
+        self.log_output.setPlaceholderText("暂无日志信息...")
         self.log_output.setFont(QFont("Courier New", 10) if os.name == "nt" else QFont("Menlo", 10))
         self.log_output.setStyleSheet(
             "background-color: #0F0F0F; color: #FFFFFF; border: 1px solid #000000; border-radius: 3px;"
         )
+        self.log_output.verticalScrollBar().valueChanged.connect(self._on_scrolled)
         layout.addWidget(self.log_output)
 
         btn_close = QPushButton("关闭")
         btn_close.clicked.connect(self.close)
         layout.addWidget(btn_close)
 
-    def append_log(self, message):
-        self.log_output.appendPlainText(message)
-        # 自动滚动到底部
-        self.log_output.verticalScrollBar().setValue(self.log_output.verticalScrollBar().maximum())
+    def _submit(self, func, on_done) -> None:
+        job: LogReadJob
+        generation = self._generation
+
+        def finish(result) -> None:
+            self._jobs.discard(job)
+            if generation == self._generation:
+                on_done(result)
+
+        job = submit_read(func, finish)
+        self._jobs.add(job)
+
+    def _read_before(self, end_offset: Optional[int], max_lines: int):
+        """在后台线程中执行：从 end_offset 向前读取若干行"""
+        if end_offset is None:
+            # 读取尾部前先让写入线程落盘已排队的日志，否则订阅前写入、仍在攒批的行
+            # 既不在文件中也不会被推送
+            writer = get_running_log_writer()
+            if writer is not None:
+                writer.flush()
+        if self.log_store is not None:
+            return self.log_store.read_lines_before(self.task_id, end_offset, max_lines)
+        assert self.log_path is not None
+        return read_lines_before(self.log_path, end_offset, max_lines)
+
+    def load_tail(self) -> None:
+        """在后台读取日志末尾的 LOG_TAIL_LINES 行"""
+        self._tail_loaded = False
+        self._submit(lambda: self._read_before(None, LOG_TAIL_LINES), self._on_tail_loaded)
+
+    def _on_tail_loaded(self, result) -> None:
+        self._tail_loaded = True
+        if result is None:
+            self.log_output.setPlainText("无法读取日志")
+            return
+        lines, start, end = result
+        self._start_offset = start
+        self._end_offset = end
+        self._at_start = False
+        self._line_sizes = deque(_line_size(line) for line in lines)
+        self._max_lines = LOG_MAX_LINES
+        self._ignore_scroll = True
+        self.log_output.setPlainText("\n".join(lines))
+        self._scroll_to_bottom()
+        self._ignore_scroll = False
+
+        # 订阅后、读取尾部前写入的行会同时出现在两边，append_logs 按偏移量跳过
+        pending, self._pending = self._pending, []
+        self.append_logs(pending)
+
+    def _on_scrolled(self, value: int) -> None:
+        if self._ignore_scroll:
+            return
+        if value == self.log_output.verticalScrollBar().minimum():
+            self._load_older()
+
+    def _load_older(self) -> None:
+        """滚动到顶部时分页加载更早的日志"""
+        if self._loading_older or self._at_start or self._start_offset <= 0:
+            return
+        self._loading_older = True
+        offset = self._start_offset
+        self._submit(lambda: self._read_before(offset, LOG_PAGE_LINES), self._on_older_loaded)
+
+    def _on_older_loaded(self, result) -> None:
+        self._loading_older = False
+        if not result:
+            return
+        lines, start, _ = result
+        if not lines:
+            self._at_start = True
+            return
+        scroll_bar = self.log_output.verticalScrollBar()
+        old_max, old_value = scroll_bar.maximum(), scroll_bar.value()
+
+        cursor = QTextCursor(self.log_output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.Start)
+        cursor.insertText("\n".join(lines) + "\n")
+
+        self._max_lines += len(lines)
+        self._line_sizes.extendleft(reversed([_line_size(line) for line in lines]))
+        self._start_offset = start
+        # 保持用户当前看到的内容位置不变
+        scroll_bar.setValue(old_value + scroll_bar.maximum() - old_max)
+
+    def append_logs(self, entries: list[tuple[Optional[int], str]]) -> None:
+        """在一次编辑操作中追加一批日志 [(偏移量, 消息)]，仅当用户停留在底部时自动滚动
+
+        偏移量为日志行在日志流中的起始位置，小于已显示内容结束偏移量的行已从文件
+        读取过而被跳过；偏移量为 None 的行没有写入文件，总是追加。
+        """
+        if not entries:
+            return
+        if not self._tail_loaded:
+            self._pending.extend(entries)
+            return
+
+        messages = []
+        for offset, message in entries:
+            if offset is not None:
+                if offset < self._end_offset:
+                    continue
+                self._end_offset = offset + _line_size(message)
+            messages.append(message)
+        if not messages:
+            return
+
+        lines = _split_lines(messages)
+        scroll_bar = self.log_output.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+        document = self.log_output.document()
+
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        if not document.isEmpty():
+            cursor.insertBlock()
+        cursor.insertText("\n".join(lines))
+        self._line_sizes.extend(_line_size(line) for line in lines)
+        self._trim_top()
+        cursor.endEditBlock()
+
+        if at_bottom:
+            self._scroll_to_bottom()
+
+    def reset_logs(self) -> None:
+        """任务开始新一轮下载、旧日志已被丢弃：清空显示内容，之后的日志都由推送得到"""
+        self._generation += 1
+        self._tail_loaded = True
+        self._loading_older = False
+        self._at_start = False
+        self._pending = []
+        self._start_offset = self._end_offset = 0
+        self._line_sizes.clear()
+        self._max_lines = LOG_MAX_LINES
+        self._ignore_scroll = True
+        self.log_output.clear()
+        self._ignore_scroll = False
+
+    def _trim_top(self) -> None:
+        excess = len(self._line_sizes) - self._max_lines
+        if excess <= 0:
+            return
+        cursor = QTextCursor(self.log_output.document())
+        cursor.movePosition(QTextCursor.MoveOperation.Start)
+        cursor.movePosition(
+            QTextCursor.MoveOperation.NextBlock, QTextCursor.MoveMode.KeepAnchor, excess
+        )
+        cursor.removeSelectedText()
+        self._at_start = False
+        for _ in range(excess):
+            self._start_offset += self._line_sizes.popleft()
 
-    def set_initial_logs(self, logs):
-        self.log_output.setPlainText(logs)
+    def _scroll_to_bottom(self) -> None:
         self.log_output.verticalScrollBar().setValue(self.log_output.verticalScrollBar().maximum())
 
 
+def _split_lines(messages: list[str]) -> list[str]:
+    """把日志消息拆成文件中的物理行（单条消息可能包含换行）"""
+    return "\n".join(messages).split("\n") if messages else []
+
+
+def _line_size(line: str) -> int:
+    """日志行在文件中占用的字节数（含换行符）"""
+    return len(line.encode("utf-8")) + 1
+
+
 class AddTaskDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, presets: Optional[list[FormatPreset]] = None):
         super().__init__(parent)
         self.setWindowTitle("添加下载任务")
         self.setMinimumWidth(600)
         self.selected_download_path = self._get_default_download_path()
+        # 数据库中的格式预设；未提供时使用内置预设（此时任务不引用预设 ID）
+        self.presets = presets or builtin_presets()
         self._setup_ui()
 
     def _get_default_download_path(self) -> str:
-        path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DownloadLocation)
-        return path if path and os.path.exists(path) else "."
-
-    def _setup_ui(self):
-        layout = QVBoxLayout(self)
+        return get_default_download_path()
 
+    def _setup_source(self, layout: QVBoxLayout) -> None:
         # URL Input
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText("粘贴视频链接...")
         layout.addWidget(QLabel("视频链接:"))
         layout.addWidget(self.url_input)
 
+    def _get_url(self) -> str:
+        return self.url_input.text().strip()
+
+    def _setup_ui(self):
+        layout = QVBoxLayout(self)
+        self._setup_source(layout)
+
         # Download Options
         options_group = QGroupBox("下载选项")
         options_layout = QGridLayout()
 
         self.format_combo = QComboBox()
-        for format_name in FORMAT_PRESETS.keys():
-            self.format_combo.addItem(format_name)
+        for preset in self.presets:
+            self.format_combo.addItem(preset.name, preset)
 
         options_layout.addWidget(QLabel("下载格式:"), 0, 0)
         options_layout.addWidget(self.format_combo, 0, 1)
@@ -111,6 +342,10 @@ class AddTaskDialog(QDialog):
         self.no_cookies_checkbox = Switch("禁用 Cookies")
         options_layout.addWidget(self.no_cookies_checkbox, 2, 2, 1, 2)
 
+        self.parallel_streams_checkbox = Switch("并行下载音视频")
+        self.parallel_streams_checkbox.setToolTip("视频与音频分开选择时同时下载两个流，再合并")
+        options_layout.addWidget(self.parallel_streams_checkbox, 3, 0, 1, 2)
+
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
 
@@ -169,11 +404,14 @@ class AddTaskDialog(QDialog):
         impersonate_val = self.impersonate_combo.currentText()
         if impersonate_val == "无":
             impersonate_val = None
+        preset: FormatPreset = self.format_combo.currentData()
 
         return DownloadTask(
-            url=self.url_input.text().strip(),
+            url=self._get_url(),
             save_path=self.dir_input.text(),
-            format_preset=FORMAT_PRESETS[self.format_combo.currentText()],
+            format_preset=preset.selector,
+            preset_id=preset.id,
+            audio_format=preset.audio_format,
             proxy=self.proxy_input.text().strip() or None,
             concurrent_fragments=int(self.concurrent_input.text())
             if self.concurrent_input.text().isdigit()
@@ -186,9 +424,383 @@ class AddTaskDialog(QDialog):
             else None,
             impersonate=impersonate_val,
             no_cookies=self.no_cookies_checkbox.isChecked(),
+            parallel_streams=self.parallel_streams_checkbox.isChecked(),
         )
 
 
+class ImportTasksDialog(AddTaskDialog):
+    """批量导入对话框：链接来自文本框（可粘贴剪贴板）或文本文件，下载选项对全部链接生效"""
+
+    def __init__(self, parent=None, presets: Optional[list[FormatPreset]] = None):
+        self.import_path: Optional[str] = None
+        super().__init__(parent, presets)
+        self.setWindowTitle("批量导入任务")
+
+    def _setup_source(self, layout: QVBoxLayout) -> None:
+        self.urls_input = QPlainTextEdit()
+        self.urls_input.setPlaceholderText("每行一个视频链接...")
+        self.urls_input.setUndoRedoEnabled(False)
+        self.urls_input.setMinimumHeight(140)
+        layout.addWidget(QLabel("视频链接:"))
+        layout.addWidget(self.urls_input)
+
+        source_layout = QHBoxLayout()
+        self.file_input = QLineEdit()
+        self.file_input.setReadOnly(True)
+        self.file_input.setPlaceholderText("或从文本文件导入（大量链接时推荐）")
+        btn_file = QPushButton("选择文件...")
+        btn_file.clicked.connect(self._select_file)
+        btn_paste = QPushButton("粘贴剪贴板")
+        btn_paste.clicked.connect(self._paste_clipboard)
+        source_layout.addWidget(self.file_input)
+        source_layout.addWidget(btn_file)
+        source_layout.addWidget(btn_paste)
+        layout.addLayout(source_layout)
+
+    def _get_url(self) -> str:
+        # 模板任务不携带链接，链接由导入任务逐个填入
+        return ""
+
+    def _select_file(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(
+            self, "选择链接列表文件", "", "文本文件 (*.txt *.list);;所有文件 (*)"
+        )
+        if path:
+            self.import_path = path
+            self.file_input.setText(path)
+
+    def _paste_clipboard(self) -> None:
+        self.urls_input.setPlainText(QApplication.clipboard().text())
+
+    def get_import_source(self) -> Optional[LineSource]:
+        """返回待导入的链接来源：优先使用选择的文件，其次使用文本框内容"""
+        if self.import_path:
+            path = self.import_path
+            return lambda: open_url_lines(path)
+        text = self.urls_input.toPlainText()
+        return text_lines(text) if text.strip() else None
+
+
+class SubscriptionDialog(QDialog):
+    """订阅管理：添加/删除定期同步的频道或播放列表，并可立即检查"""
+
+    def __init__(self, manager: "SubscriptionManager", parent=None) -> None:
+        super().__init__(parent)
+        self.manager = manager
+        self.setWindowTitle("订阅管理")
+        self.setMinimumWidth(640)
+        self._setup_ui()
+        self.refresh()
+        manager.subscription_checked.connect(self.refresh)
+
+    def _setup_ui(self) -> None:
+        layout = QVBoxLayout(self)
+
+        self.sub_list = QListWidget()
+        layout.addWidget(QLabel("已订阅的频道 / 播放列表:"))
+        layout.addWidget(self.sub_list)
+
+        form = QGridLayout()
+        self.url_input = QLineEdit()
+        self.url_input.setPlaceholderText("频道或播放列表链接...")
+        form.addWidget(QLabel("链接:"), 0, 0)
+        form.addWidget(self.url_input, 0, 1, 1, 3)
+
+        self.interval_combo = QComboBox()
+        self.interval_combo.addItems(list(SUBSCRIPTION_INTERVALS))
+        self.interval_combo.setCurrentText("每小时")
+        form.addWidget(QLabel("检查间隔:"), 1, 0)
+        form.addWidget(self.interval_combo, 1, 1)
+
+        self.format_combo = QComboBox()
+        for preset in self.manager.db.get_presets():
+            self.format_combo.addItem(preset.name, preset)
+        form.addWidget(QLabel("下载格式:"), 1, 2)
+        form.addWidget(self.format_combo, 1, 3)
+        layout.addLayout(form)
+
+        btns_layout = QHBoxLayout()
+        btn_add = QPushButton("添加订阅")
+        btn_add.clicked.connect(self._add)
+        btn_check = QPushButton("立即检查")
+        btn_check.clicked.connect(self._check_selected)
+        btn_remove = QPushButton("删除订阅")
+        btn_remove.clicked.connect(self._remove_selected)
+        btn_close = QPushButton("关闭")
+        btn_close.clicked.connect(self.accept)
+        for btn in (btn_add, btn_check, btn_remove, btn_close):
+            btns_layout.addWidget(btn)
+        layout.addLayout(btns_layout)
+
+    def refresh(self, *args) -> None:
+        self.sub_list.clear()
+        for sub in self.manager.db.get_subscriptions():
+            item = QListWidgetItem(_describe_subscription(sub))
+            item.setData(Qt.ItemDataRole.UserRole, sub.id)
+            self.sub_list.addItem(item)
+
+    def _add(self) -> None:
+        url = self.url_input.text().strip()
+        if not url:
+            return
+        preset: FormatPreset = self.format_combo.currentData()
+        self.manager.add_subscription(
+            url,
+            save_path=get_default_download_path(),
+            format_preset=preset.selector,
+            preset_id=preset.id,
+            interval=SUBSCRIPTION_INTERVALS[self.interval_combo.currentText()],
+        )
+        self.url_input.clear()
+        self.refresh()
+
+    def _selected_id(self) -> Optional[int]:
+        item = self.sub_list.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+
+    def _check_selected(self) -> None:
+        sub_id = self._selected_id()
+        if sub_id is not None:
+            self.manager.check_now(sub_id)
+
+    def _remove_selected(self) -> None:
+        sub_id = self._selected_id()
+        if sub_id is not None:
+            self.manager.remove_subscription(sub_id)
+            self.refresh()
+
+
+class FormatPresetDialog(QDialog):
+    """格式预设管理：按扩展名、编码、最大高度、仅音频与大小上限添加自定义预设"""
+
+    def __init__(self, db: "Database", parent=None) -> None:
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("格式预设")
+        self.setMinimumWidth(640)
+        self._setup_ui()
+        self.refresh()
+
+    def _setup_ui(self) -> None:
+        layout = QVBoxLayout(self)
+
+        self.preset_list = QListWidget()
+        layout.addWidget(QLabel("格式预设:"))
+        layout.addWidget(self.preset_list)
+
+        form = QGridLayout()
+        self.name_input = QLineEdit()
+        form.addWidget(QLabel("名称:"), 0, 0)
+        form.addWidget(self.name_input, 0, 1)
+        self.audio_only_checkbox = Switch("仅音频")
+        form.addWidget(self.audio_only_checkbox, 0, 2, 1, 2)
+
+        self.ext_input = QLineEdit()
+        self.ext_input.setPlaceholderText("例如: mp4、webm、m4a")
+        form.addWidget(QLabel("扩展名:"), 1, 0)
+        form.addWidget(self.ext_input, 1, 1)
+        self.codec_input = QLineEdit()
+        self.codec_input.setPlaceholderText("例如: avc1、vp9、opus")
+        form.addWidget(QLabel("编码:"), 1, 2)
+        form.addWidget(self.codec_input, 1, 3)
+
+        self.height_input = QLineEdit()
+        self.height_input.setPlaceholderText("例如: 1080")
+        form.addWidget(QLabel("最大高度:"), 2, 0)
+        form.addWidget(self.height_input, 2, 1)
+        self.size_input = QLineEdit()
+        self.size_input.setPlaceholderText("单个流，单位 MiB")
+        form.addWidget(QLabel("大小上限:"), 2, 2)
+        form.addWidget(self.size_input, 2, 3)
+
+        self.audio_format_combo = QComboBox()
+        self.audio_format_combo.addItem("不转换", None)
+        for fmt in AUDIO_CONVERT_FORMATS:
+            self.audio_format_combo.addItem(fmt, fmt)
+        form.addWidget(QLabel("转换音频:"), 3, 0)
+        form.addWidget(self.audio_format_combo, 3, 1)
+
+        self.spec_input = QLineEdit()
+        self.spec_input.setPlaceholderText(
+            "直接使用 yt-dlp 格式表达式（不能与上面的筛选条件同时设置）"
+        )
+        form.addWidget(QLabel("格式表达式:"), 4, 0)
+        form.addWidget(self.spec_input, 4, 1, 1, 3)
+        layout.addLayout(form)
+
+        self.error_label = QLabel()
+        self.error_label.setObjectName("error_label")
+        self.error_label.setWordWrap(True)
+        layout.addWidget(self.error_label)
+
+        btns_layout = QHBoxLayout()
+        btn_add = QPushButton("添加预设")
+        btn_add.clicked.connect(self._add)
+        btn_remove = QPushButton("删除预设")
+        btn_remove.clicked.connect(self._remove_selected)
+        btn_close = QPushButton("关闭")
+        btn_close.clicked.connect(self.accept)
+        for btn in (btn_add, btn_remove, btn_close):
+            btns_layout.addWidget(btn)
+        layout.addLayout(btns_layout)
+
+    def refresh(self) -> None:
+        self.preset_list.clear()
+        for preset in self.db.get_presets():
+            suffix = "（内置）" if preset.builtin else ""
+            item = QListWidgetItem(f"{preset.name}{suffix}  ·  {describe_preset(preset)}")
+            item.setData(Qt.ItemDataRole.UserRole, preset.id)
+            self.preset_list.addItem(item)
+
+    def _number(self, field: QLineEdit, label: str) -> Optional[int]:
+        text = field.text().strip()
+        if not text:
+            return None
+        if not text.isdigit():
+            raise ValueError(f"{label}必须是正整数")
+        return int(text)
+
+    def _read_form(self) -> FormatPreset:
+        size = self._number(self.size_input, "大小上限")
+        return FormatPreset(
+            name=self.name_input.text(),
+            ext=self.ext_input.text().strip().lower() or None,
+            codec=self.codec_input.text().strip() or None,
+            max_height=self._number(self.height_input, "最大高度"),
+            audio_only=self.audio_only_checkbox.isChecked(),
+            max_filesize=size * 1024 * 1024 if size is not None else None,
+            format_spec=self.spec_input.text().strip() or None,
+            audio_format=self.audio_format_combo.currentData(),
+        )
+
+    def _add(self) -> None:
+        # 保存前生成并编译一次格式表达式，错误直接显示在对话框中
+        try:
+            self.db.add_preset(validate_preset(self._read_form()))
+        except ValueError as e:
+            self.error_label.setText(str(e))
+            return
+        self.error_label.clear()
+        for field in (
+            self.name_input,
+            self.ext_input,
+            self.codec_input,
+            self.height_input,
+            self.size_input,
+            self.spec_input,
+        ):
+            field.clear()
+        self.refresh()
+
+    def _remove_selected(self) -> None:
+        item = self.preset_list.currentItem()
+        if item is None:
+            return
+        try:
+            self.db.delete_preset(item.data(Qt.ItemDataRole.UserRole))
+        except ValueError as e:
+            self.error_label.setText(str(e))
+            return
+        self.error_label.clear()
+        self.refresh()
+
+
+def _describe_subscription(sub: Subscription) -> str:
+    interval = next(
+        (label for label, secs in SUBSCRIPTION_INTERVALS.items() if secs == sub.interval),
+        f"每 {sub.interval} 秒",
+    )
+    status = f"  ⚠ {sub.last_error}" if sub.last_error else ""
+    return f"{sub.title or sub.url}  ·  {interval}{status}"
+
+
+class MetricsPanel(QWidget):
+    """运行指标面板：顶部为汇总（总吞吐、下载中/等待中任务数、数据库队列），下方列出全部指标
+
+    只在面板可见时定时刷新；总吞吐由两次刷新之间 download_bytes_total 的增量计算。
+    """
+
+    def __init__(self, registry: MetricsRegistry, parent=None) -> None:
+        super().__init__(parent)
+        self.registry = registry
+        self._last_sample: Optional[tuple[float, float]] = None
+        self.throughput = 0.0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["指标", "标签", "值"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setColumnWidth(0, 240)
+        layout.addWidget(self.table)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(METRICS_PANEL_REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event) -> None:  # type: ignore[override]
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event) -> None:  # type: ignore[override]
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def _value(self, name: str) -> float:
+        return getattr(self.registry.get(name), "value", 0.0)
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        downloaded = self._value("download_bytes_total")
+        if self._last_sample is not None and now > self._last_sample[0]:
+            last_time, last_bytes = self._last_sample
+            self.throughput = max(0.0, (downloaded - last_bytes) / (now - last_time))
+        self._last_sample = (now, downloaded)
+        self.summary_label.setText(
+            f"总速度 {format_speed(self.throughput)}  ·  "
+            f"下载中 {self._value('downloads_active'):.0f}  ·  "
+            f"等待中 {self._value('downloads_waiting'):.0f}  ·  "
+            f"数据库队列 {self._value('db_queue_depth'):.0f}"
+        )
+
+        rows = [
+            (family.name, ", ".join(f"{k}={v}" for k, v in key), _describe_metric(metric))
+            for family, children in self.registry.collect()
+            for key, metric in children
+        ]
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, text in enumerate(values):
+                item = self.table.item(row, col)
+                if item is None:
+                    self.table.setItem(row, col, QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+
+
+def _describe_metric(metric: object) -> str:
+    if isinstance(metric, Histogram):
+        if not metric.count:
+            return "无数据"
+        return (
+            f"n={metric.count}  平均 {_format_seconds(metric.mean)}  "
+            f"p50 {_format_seconds(metric.quantile(0.5))}  "
+            f"p95 {_format_seconds(metric.quantile(0.95))}"
+        )
+    value = float(getattr(metric, "value", 0.0))
+    return f"{value:.0f}" if value.is_integer() else f"{value:.2f}"
+
+
+def _format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms" if seconds < 1 else f"{seconds:.1f} s"
+
+
 GITHUB_URL = "https://github.com/twn39/yt-dlp-qt-gui"
 
 
@@ -212,9 +824,7 @@ class AboutDialog(QDialog):
         # 应用图标 —— 固定容器尺寸避免被布局裁剪
         icon_container = QLabel()
         icon_container.setFixedSize(64, 64)
-        icon_container.setPixmap(
-            qta.icon("fa5s.cloud-download-alt", color="#4A90E2").pixmap(48, 48)
-        )
+        icon_container.setPixmap(icon("fa5s.cloud-download-alt", color="#4A90E2").pixmap(48, 48))
         icon_container.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(icon_container, alignment=Qt.AlignmentFlag.AlignHCenter)
 
@@ -251,7 +861,7 @@ class AboutDialog(QDialog):
 
         # GitHub 链接按钮 —— 继承主题 QPushButton 样式，仅覆盖文字颜色
         github_btn = QPushButton(
-            qta.icon("fa5b.github", color="#4A90E2"),
+            icon("fa5b.github", color="#4A90E2"),
             f"  {GITHUB_URL.removeprefix('https://')}",
         )
         github_btn.setStyleSheet(
@@ -285,19 +895,54 @@ class DialogManager:
         dialog = AboutDialog(version=version, parent=self.parent)
         dialog.exec()
 
-    def show_add_task(self) -> Optional[DownloadTask]:
+    def show_add_task(self, presets: Optional[list[FormatPreset]] = None) -> Optional[DownloadTask]:
         """显示添加任务对话框，若确认且数据有效，则返回 DownloadTask 实体，否则返回 None"""
-        dialog = AddTaskDialog(parent=self.parent)
+        dialog = AddTaskDialog(parent=self.parent, presets=presets)
         if dialog.exec():
             return dialog.get_task_data()
         return None
 
+    def show_import_tasks(
+        self, presets: Optional[list[FormatPreset]] = None
+    ) -> Optional[tuple[LineSource, DownloadTask]]:
+        """显示批量导入对话框，确认后返回 (链接来源, 下载选项模板)，否则返回 None"""
+        dialog = ImportTasksDialog(parent=self.parent, presets=presets)
+        if dialog.exec():
+            source = dialog.get_import_source()
+            if source is not None:
+                return source, dialog.get_task_data()
+        return None
+
+    def show_subscriptions(self, manager: "SubscriptionManager") -> None:
+        """显示订阅管理对话框"""
+        dialog = SubscriptionDialog(manager, parent=self.parent)
+        dialog.exec()
+
+    def show_format_presets(self, db: "Database") -> None:
+        """显示格式预设管理对话框"""
+        dialog = FormatPresetDialog(db, parent=self.parent)
+        dialog.exec()
+
+    def create_metrics_panel(self, registry: MetricsRegistry) -> MetricsPanel:
+        """创建运行指标面板（由主窗口放入停靠窗口）"""
+        return MetricsPanel(registry, parent=self.parent)
+
     def show_log(
-        self, task_id: int, title: str, logs: str, on_finished: Callable[[], None]
+        self,
+        task_id: int,
+        title: str,
+        log_path: str,
+        on_finished: Callable[[], None],
+        log_store: Optional[SegmentLogStore] = None,
     ) -> QDialog:
-        """显示非模态的任务日志对话框"""
-        dialog = LogDialog(task_id=task_id, title=title, parent=self.parent)
-        dialog.set_initial_logs(logs)
+        """显示非模态的任务日志对话框（日志内容在后台从 log_path 或 log_store 加载）"""
+        dialog = LogDialog(
+            task_id=task_id,
+            title=title,
+            log_path=log_path,
+            parent=self.parent,
+            log_store=log_store,
+        )
         dialog.finished.connect(on_finished)
         dialog.show()
         return dialog
@@ -0,0 +1,229 @@
+"""单个任务的进度、速度与剩余时间估算
+
+yt-dlp 每次回调给出的速度与剩余时间只反映最近一个分片，分片下载时大幅跳动；
+先下载视频再下载音频时，已下载字节数与百分比会从 0 重新开始。ProgressEstimator
+在下载线程中按顺序接收同一任务的全部进度回调：
+
+- 流：下载开始前由 plan() 按 requested_formats 登记各个流（视频、音频）及其预估大小，
+  之后的回调按 info_dict 的 format_id 归入对应的流；未登记时按文件名区分
+- 速度：滑动时间窗口内实际传输的字节数 / 窗口时长，跨流连续计算
+- 百分比：各流已下载字节数之和 / 已知总大小，单调不减，
+  下载阶段最多到 ESTIMATOR_DOWNLOAD_CEILING，余下部分留给合并
+- 剩余时间：剩余字节 / 窗口速度，再与上次估算值按已过时间倒计时的结果加权平均
+
+update() 可以传入时间戳，直接对录制的进度钩子序列做单元测试。
+"""
+
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Optional
+
+from .config import ESTIMATOR_DOWNLOAD_CEILING, ESTIMATOR_ETA_ALPHA, ESTIMATOR_WINDOW_SECONDS
+
+# 流与合并阶段的状态
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+
+
+@dataclass
+class Estimate:
+    percent: float  # 整个任务的进度 (0–100)，单调不减
+    speed: Optional[float]  # 滑动窗口内的平均速度 (B/s)
+    eta: Optional[float]  # 剩余秒数，总大小或速度未知时为 None
+    downloaded: int  # 各流已下载字节数之和
+    total: Optional[int]  # 各流总大小之和，有流大小未知时为 None
+
+
+class StreamProgress:
+    """一个下载流（单个文件）的进度"""
+
+    __slots__ = ("label", "downloaded", "total", "state")
+
+    def __init__(self, label: str, total: Optional[int] = None) -> None:
+        self.label = label
+        self.downloaded = 0
+        self.total = total
+        self.state = PENDING
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "label": self.label,
+            "downloaded": self.downloaded,
+            "total": self.total,
+            "state": self.state,
+        }
+
+
+def format_label(fmt: dict[str, Any]) -> str:
+    """流的显示名称，如「视频 137 (mp4, 1080p)」"""
+    if fmt.get("vcodec") == "none":
+        kind = "音频"
+    elif fmt.get("acodec") == "none":
+        kind = "视频"
+    else:
+        kind = "音视频"
+    details = [str(fmt["ext"])] if fmt.get("ext") else []
+    if fmt.get("height") and kind != "音频":
+        details.append(f"{fmt['height']}p")
+    label = f"{kind} {fmt.get('format_id', '')}".rstrip()
+    return f"{label} ({', '.join(details)})" if details else label
+
+
+class ProgressEstimator:
+    def __init__(
+        self,
+        window: float = ESTIMATOR_WINDOW_SECONDS,
+        eta_alpha: float = ESTIMATOR_ETA_ALPHA,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.window = window
+        self.eta_alpha = eta_alpha
+        self.clock = clock
+
+        # format_id（未登记时为文件名）→ 流
+        self.streams: dict[str, StreamProgress] = {}
+        self._planned = False
+        # 合并阶段：None 表示只有一个流、不需要合并
+        self.merge: Optional[str] = None
+        # 跨流累计实际传输的字节数及其 (时间, 字节数) 采样，用于计算窗口速度
+        self._transferred = 0
+        self._samples: Deque[tuple[float, int]] = deque()
+        self._percent = 0.0
+        self._speed: Optional[float] = None
+        self._eta: Optional[float] = None
+        self._eta_at = 0.0
+
+    @property
+    def percent(self) -> float:
+        return self._percent
+
+    @property
+    def started(self) -> bool:
+        return bool(self.streams)
+
+    @property
+    def multi_stream(self) -> bool:
+        return len(self.streams) > 1
+
+    def plan(self, formats: list[dict[str, Any]]) -> None:
+        """下载开始前登记选中的格式（yt-dlp 的 requested_formats，单个格式时为其本身）"""
+        self.streams = {
+            str(f.get("format_id")): StreamProgress(
+                format_label(f), f.get("filesize") or f.get("filesize_approx")
+            )
+            for f in formats
+        }
+        self._planned = True
+        self.merge = PENDING if len(formats) > 1 else None
+
+    def _stream_for(self, d: dict[str, Any]) -> Optional[StreamProgress]:
+        if self._planned:
+            # 登记之外的下载（如字幕、缩略图）不计入任务进度
+            format_id = (d.get("info_dict") or {}).get("format_id")
+            return self.streams.get(str(format_id))
+        key = d.get("filename") or d.get("tmpfilename") or ""
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = StreamProgress(os.path.basename(key))
+        return stream
+
+    def update(self, d: dict[str, Any], now: Optional[float] = None) -> Estimate:
+        """处理一次 status 为 downloading 的进度回调"""
+        if now is None:
+            now = self.clock()
+        stream = self._stream_for(d)
+        if stream is None:
+            return self._estimate(None)
+        downloaded = d.get("downloaded_bytes") or 0
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+
+        stream.state = RUNNING
+        # 同一个流字节数变小说明从头重新下载，这部分字节同样计入传输量
+        delta = downloaded - stream.downloaded
+        self._transferred += delta if delta >= 0 else downloaded
+        stream.downloaded = downloaded
+        if total:
+            stream.total = total
+
+        self._speed = self._window_speed(now)
+        done, known_total, _ = self._sums()
+        remaining = None
+        if known_total:
+            self._advance(ESTIMATOR_DOWNLOAD_CEILING * done / known_total)
+            remaining = known_total - done
+        self._update_eta(now, remaining)
+        # 窗口中还只有一个采样时暂用 yt-dlp 给出的速度显示，但不用于估算剩余时间
+        return self._estimate(d.get("speed"))
+
+    def finish_stream(self, d: dict[str, Any]) -> bool:
+        """处理一个文件下载完成的回调，返回是否所有流都已下载完成"""
+        stream = self._stream_for(d)
+        if stream is not None:
+            stream.state = FINISHED
+            stream.total = d.get("total_bytes") or max(stream.total or 0, stream.downloaded)
+            stream.downloaded = stream.total
+        return all(s.state == FINISHED for s in self.streams.values())
+
+    def start_merge(self) -> None:
+        self.merge = RUNNING
+        self._advance(ESTIMATOR_DOWNLOAD_CEILING)
+        self._speed = self._eta = None
+
+    def finish_merge(self) -> None:
+        self.merge = FINISHED
+
+    def details(self) -> dict[str, Any]:
+        """各流与合并阶段的进度，随进度事件发出供界面显示"""
+        return {
+            "_streams": [s.to_dict() for s in self.streams.values()],
+            "_merge": self.merge,
+        }
+
+    def _sums(self) -> tuple[int, int, bool]:
+        """(大小已知的流的已下载字节数之和, 这些流的总大小之和, 是否所有流大小已知)"""
+        done = total = 0
+        complete = True
+        for stream in self.streams.values():
+            if stream.total:
+                done += stream.downloaded
+                total += max(stream.total, stream.downloaded)
+            else:
+                complete = False
+        return done, total, complete
+
+    def _estimate(self, fallback_speed: Optional[float]) -> Estimate:
+        done, total, complete = self._sums()
+        downloaded = sum(s.downloaded for s in self.streams.values())
+        speed = self._speed if self._speed is not None else fallback_speed
+        return Estimate(
+            self._percent, speed, self._eta, downloaded, total if complete and total else None
+        )
+
+    def _advance(self, percent: float) -> None:
+        self._percent = max(self._percent, min(percent, 100.0))
+
+    def _window_speed(self, now: float) -> Optional[float]:
+        samples = self._samples
+        samples.append((now, self._transferred))
+        # 保留一个早于窗口起点的采样，使计算跨度接近整个窗口
+        while len(samples) > 2 and samples[1][0] <= now - self.window:
+            samples.popleft()
+        start, start_bytes = samples[0]
+        if now - start <= 0:
+            return None
+        return (self._transferred - start_bytes) / (now - start)
+
+    def _update_eta(self, now: float, remaining: Optional[int]) -> None:
+        speed = self._speed
+        if remaining is None or not speed:
+            return
+        raw = remaining / speed
+        if self._eta is None:
+            self._eta = raw
+        else:
+            countdown = max(self._eta - (now - self._eta_at), 0.0)
+            self._eta = self.eta_alpha * raw + (1 - self.eta_alpha) * countdown
+        self._eta_at = now
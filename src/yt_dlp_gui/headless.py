@@ -0,0 +1,174 @@
+"""无界面守护进程
+
+`yt-dlp-qt-gui daemon` 在 QCoreApplication 事件循环上运行与图形界面相同的
+DownloadScheduler、SubscriptionManager 和数据库，不加载任何 QtWidgets 模块，
+适合 NAS、服务器等无显示环境。任务通过 `yt-dlp-qt-gui add` 以 "queued" 状态
+写入同一个数据库，守护进程定期扫描并接管新的排队任务；守护进程运行期间同样可以
+打开图形界面，两者共用同一个数据库，由任务租约保证同一任务只被一个进程下载。
+守护进程同时提供本地控制接口 (control.py)。
+"""
+
+import signal
+import sys
+from typing import Callable, Optional
+
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+
+from . import metrics
+from .config import (
+    DAEMON_POLL_INTERVAL_MS,
+    DAEMON_RESUME_STATUSES,
+    DAEMON_SIGNAL_WAKEUP_MS,
+    INSTANCE_ROLE_DAEMON,
+    POSTPROCESS_MAX_CONCURRENT,
+)
+from .control import ControlServer
+from .database import Database
+from .info_cache import InfoCache
+from .instance import acquire_instance_lock
+from .log_writer import shutdown_log_writer
+from .scheduler import DownloadScheduler
+from .subscriptions import SubscriptionManager
+
+# 守护进程收到后正常退出的信号
+_QUIT_SIGNALS = (signal.SIGINT, signal.SIGTERM)
+
+
+def _print_line(text: str) -> None:
+    print(text, flush=True)
+
+
+class HeadlessDaemon(QObject):
+    """定期把数据库中新的排队任务交给调度器，并把任务状态变化输出为文本行"""
+
+    idle = Signal()  # exit_when_idle 时，没有待处理的任务后发出
+
+    def __init__(
+        self,
+        db: Database,
+        scheduler: DownloadScheduler,
+        poll_interval: int = DAEMON_POLL_INTERVAL_MS,
+        exit_when_idle: bool = False,
+        output: Callable[[str], None] = _print_line,
+    ) -> None:
+        super().__init__()
+        self.db = db
+        self.scheduler = scheduler
+        self.exit_when_idle = exit_when_idle
+        self.output = output
+        # 已交给调度器的最大任务 ID，之后只扫描更新的任务
+        self._last_seen_id = 0
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_interval)
+        self._poll_timer.timeout.connect(self.poll)
+
+        scheduler.task_status_changed.connect(self._on_status_changed)
+        scheduler.tasks_status_changed.connect(self._on_tasks_status_changed)
+        scheduler.task_title_updated.connect(self._on_title_updated)
+        scheduler.task_finished.connect(self._on_finished)
+
+    def start(self) -> None:
+        """重新排队上次被中断的任务，接管全部排队任务并开始定期扫描"""
+        # 仍由其他存活进程持有租约的任务不是被中断的任务
+        interrupted = self.db.get_task_ids_by_status(
+            DAEMON_RESUME_STATUSES, unleased_at=self.scheduler.clock()
+        )
+        if interrupted:
+            self.db.update_tasks(interrupted, {"status": "queued", "next_retry_at": None})
+            self.output(f"重新排队 {len(interrupted)} 个上次中断的任务")
+        retrying = self.scheduler.resume_retrying()
+        if retrying:
+            self.output(f"{retrying} 个任务按计划时间等待重试")
+        self.poll()
+        self._poll_timer.start()
+
+    def stop(self) -> None:
+        self._poll_timer.stop()
+
+    def poll(self) -> int:
+        """接管 ID 大于上次扫描位置的排队任务，返回接管的数量"""
+        task_ids = self.db.get_task_ids_by_status(("queued",), self._last_seen_id)
+        if task_ids:
+            self._last_seen_id = task_ids[-1]
+            self.scheduler.resume_queued(task_ids[0], task_ids[-1])
+            self.output(f"接管 {len(task_ids)} 个排队任务")
+        self._check_idle()
+        return len(task_ids)
+
+    def _check_idle(self) -> None:
+        if self.exit_when_idle and self.scheduler.is_idle():
+            self.idle.emit()
+
+    def _on_status_changed(self, task_id: int, status: str) -> None:
+        self.output(f"[{task_id}] {status}")
+
+    def _on_tasks_status_changed(self, task_ids: list[int], status: str) -> None:
+        self.output(f"[{len(task_ids)} 个任务] {status}")
+
+    def _on_title_updated(self, task_id: int, title: str) -> None:
+        self.output(f"[{task_id}] {title}")
+
+    def _on_finished(self, task_id: int, success: bool, message: str) -> None:
+        self.output(f"[{task_id}] {'完成' if success else '失败'}: {message}")
+        # 调度器在任务结束的同一轮事件中启动下一个任务，之后再检查是否空闲
+        QTimer.singleShot(0, self._check_idle)
+
+
+def run_daemon(
+    poll_interval: int = DAEMON_POLL_INTERVAL_MS,
+    exit_when_idle: bool = False,
+    max_concurrent_downloads: int = 3,
+    metrics_file: Optional[str] = None,
+    max_concurrent_postprocess: int = POSTPROCESS_MAX_CONCURRENT,
+) -> int:
+    """运行守护进程直到收到 SIGINT/SIGTERM（或 exit_when_idle 时任务全部结束），返回退出码"""
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    lock = acquire_instance_lock(role=INSTANCE_ROLE_DAEMON)
+    if lock is None:
+        _print_line("已有守护进程在运行，本次启动退出（可通过 add 子命令向其添加任务）")
+        return 1
+    db = Database()
+    info_cache = InfoCache()
+    scheduler = DownloadScheduler(
+        db,
+        max_concurrent_downloads=max_concurrent_downloads,
+        info_cache=info_cache,
+        max_concurrent_postprocess=max_concurrent_postprocess,
+    )
+    subscriptions = SubscriptionManager(db, scheduler)
+    daemon = HeadlessDaemon(db, scheduler, poll_interval, exit_when_idle)
+    daemon.idle.connect(app.quit)
+    control = ControlServer(db, scheduler, role=INSTANCE_ROLE_DAEMON)
+
+    # Qt 事件循环运行期间 Python 信号处理函数只有在解释器重新获得控制权时才会执行，
+    # 定时唤醒一次即可及时响应 Ctrl+C 与 SIGTERM
+    previous = {sig: signal.signal(sig, lambda *_: app.quit()) for sig in _QUIT_SIGNALS}
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(DAEMON_SIGNAL_WAKEUP_MS)
+
+    try:
+        control.listen()
+        if metrics_file:
+            metrics.start_export(metrics_file, app)
+        daemon.output(f"守护进程已启动，数据库: {db.db_path}")
+        # 事件循环开始后再接管任务，保证空闲时的退出请求不会在 exec() 之前被丢弃
+        QTimer.singleShot(0, daemon.start)
+        if not exit_when_idle:
+            subscriptions.start()
+        return app.exec()
+    finally:
+        wakeup.stop()
+        daemon.stop()
+        control.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        subscriptions.shutdown()
+        scheduler.shutdown()
+        info_cache.close()
+        db.close()
+        shutdown_log_writer()
+        lock.unlock()
+        if metrics_file:
+            metrics.write_prometheus(metrics_file)
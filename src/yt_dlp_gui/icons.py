@@ -0,0 +1,33 @@
+"""图标的延迟加载
+
+qtawesome 在导入时就会注册并加载图标字体，耗时与创建主窗口本身相当。
+主窗口先以无图标的状态完成首次绘制，随后调用 load_icons() 导入 qtawesome
+并补上图标；对话框、右键菜单等之后才出现的界面直接调用 icon() 按需加载。
+"""
+
+from typing import Any, Optional
+
+from PySide6.QtGui import QIcon
+
+_qta: Any = None
+
+
+def icons_loaded() -> bool:
+    return _qta is not None
+
+
+def load_icons() -> None:
+    """导入 qtawesome（重复调用无开销）"""
+    global _qta
+    if _qta is None:
+        import qtawesome
+
+        _qta = qtawesome
+
+
+def icon(name: str, color: Optional[str] = None) -> QIcon:
+    """返回 Font Awesome 图标，首次调用时加载 qtawesome"""
+    load_icons()
+    if color is None:
+        return _qta.icon(name)
+    return _qta.icon(name, color=color)
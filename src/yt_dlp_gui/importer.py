@@ -0,0 +1,131 @@
+"""批量导入 URL
+
+从文本文件、剪贴板文本或标准输入流式读取链接，规范化并去重后按
+IMPORT_CHUNK_SIZE 分块、每块一个事务 (executemany) 写入数据库。导入在
+QThreadPool 中执行，每写入一块就把该块任务发回主线程，界面不会被阻塞。
+"""
+
+import sys
+from dataclasses import replace
+from typing import Callable, Iterable, Iterator
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from .config import IMPORT_CHUNK_SIZE
+from .database import Database
+from .models import DownloadTask
+from .utils import canonical_url, normalize_url
+
+# 返回待导入文本行的可调用对象，在后台线程中才被调用（文件在此时才打开）
+LineSource = Callable[[], Iterable[str]]
+
+
+def open_url_lines(path: str) -> Iterator[str]:
+    """逐行读取文本文件，path 为 "-" 时读取标准输入"""
+    if path == "-":
+        yield from sys.stdin
+        return
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from f
+
+
+def text_lines(text: str) -> LineSource:
+    """把一段文本（例如剪贴板内容）包装为 LineSource"""
+    return lambda: text.splitlines()
+
+
+class UrlCollector:
+    """从文本行中提取规范化后的链接，按规范键去重，并统计重复与无效的条目
+
+    每行可包含多个以空白分隔的链接，以 # 开头的行视为注释。产出 (链接, 规范键)。
+    """
+
+    def __init__(self) -> None:
+        self.seen: set[str] = set()
+        self.duplicates = 0
+        self.invalid = 0
+
+    def collect(self, lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            for token in line.split():
+                url = normalize_url(token)
+                if url is None:
+                    self.invalid += 1
+                    continue
+                key = canonical_url(url)
+                if key in self.seen:
+                    self.duplicates += 1
+                else:
+                    self.seen.add(key)
+                    yield url, key
+
+
+class ImportSignals(QObject):
+    chunk_added = Signal(list)  # 发送一批已写入数据库的 DownloadTask
+    finished = Signal(int, int)  # 发送 (导入数量, 跳过的重复/无效条目数量)
+    failed = Signal(str)  # 发送错误信息
+
+
+class ImportJob(QRunnable):
+    """在线程池中执行的批量导入任务
+
+    导入的任务以 template 的下载选项为准，状态直接写为 "queued"，
+    由调度器按需从中取出启动。已完成或仍在进行中的视频不会被重复导入。
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        source: LineSource,
+        template: DownloadTask,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+    ) -> None:
+        super().__init__()
+        self.db = db
+        self.source = source
+        self.template = template
+        self.chunk_size = chunk_size
+        self.signals = ImportSignals()
+        # 因已存在于任务列表而跳过的链接数
+        self._existing = 0
+
+    def run(self) -> None:
+        collector = UrlCollector()
+        imported = 0
+        self._existing = 0
+        chunk: list[DownloadTask] = []
+        try:
+            for url, key in collector.collect(self.source()):
+                chunk.append(replace(self.template, url=url, status="queued", canonical_key=key))
+                if len(chunk) >= self.chunk_size:
+                    imported += self._insert(chunk)
+                    chunk = []
+            imported += self._insert(chunk)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        skipped = collector.duplicates + collector.invalid + self._existing
+        self.signals.finished.emit(imported, skipped)
+
+    def _insert(self, chunk: list[DownloadTask]) -> int:
+        # 跳过已下载完成或仍在进行中的视频（每块一次查询）
+        existing = self.db.find_existing_keys([t.canonical_key for t in chunk if t.canonical_key])
+        if existing:
+            self._existing += len(chunk)
+            chunk = [t for t in chunk if t.canonical_key not in existing]
+            self._existing -= len(chunk)
+        if not chunk:
+            return 0
+        for task, task_id in zip(chunk, self.db.add_tasks(chunk)):
+            task.id = task_id
+        self.signals.chunk_added.emit(chunk)
+        return len(chunk)
+
+
+def start_import(job: ImportJob) -> ImportJob:
+    """在全局线程池中启动导入任务（调用方需持有返回的 job 直至完成）"""
+    QThreadPool.globalInstance().start(job)
+    return job
@@ -0,0 +1,166 @@
+"""解析结果缓存
+
+重试失败任务、重新添加同一链接或重新同步时，完整的 extract_info 网络解析往往是
+最慢的一步。InfoCache 把 yt-dlp 解析得到的 info_dict（经 sanitize_info 清理）
+以 zlib 压缩后存入 SQLite，按规范化 URL 索引：
+
+    info_cache(key, extractor, data, size, expires_at, accessed_at)
+
+有效期按提取器配置 (INFO_CACHE_TTLS)，格式链接自带过期时间（如 YouTube 的
+expire 参数）时取较早者；总大小超过上限时按最近使用时间淘汰。
+可在多个下载线程中同时使用。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .config import (
+    INFO_CACHE_DEFAULT_TTL,
+    INFO_CACHE_EXPIRY_MARGIN,
+    INFO_CACHE_MAX_BYTES,
+    INFO_CACHE_TTLS,
+)
+from .utils import canonical_url
+
+
+def get_info_cache_path() -> str:
+    config_dir = os.path.expanduser("~/.yt-dlp-gui")
+    os.makedirs(config_dir, exist_ok=True)
+    return os.path.join(config_dir, "info_cache.db")
+
+
+def is_cacheable(info: Optional[dict[str, Any]]) -> bool:
+    """只缓存已完整解析的单个视频；播放列表的条目是惰性生成的，不缓存"""
+    return bool(info) and info.get("_type", "video") == "video" and bool(info.get("formats"))
+
+
+def url_expiry(info: dict[str, Any]) -> Optional[float]:
+    """格式链接中最早的过期时间戳（查询参数 expire），没有时返回 None"""
+    expiry = None
+    for fmt in info.get("formats") or []:
+        url = fmt.get("url")
+        if not url or "expire" not in url:
+            continue
+        values = parse_qs(urlsplit(url).query).get("expire")
+        try:
+            value = float(values[0]) if values else None
+        except ValueError:
+            value = None
+        if value is not None and (expiry is None or value < expiry):
+            expiry = value
+    return expiry
+
+
+class InfoCache:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = INFO_CACHE_MAX_BYTES,
+        ttls: Optional[dict[str, int]] = None,
+        default_ttl: int = INFO_CACHE_DEFAULT_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path or get_info_cache_path()
+        self.max_bytes = max_bytes
+        self.ttls = INFO_CACHE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS info_cache (
+                key TEXT PRIMARY KEY,
+                extractor TEXT,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_info_cache_accessed ON info_cache (accessed_at)"
+        )
+        conn.commit()
+        self._conn = conn
+        self._closed = False
+
+    def ttl_for(self, extractor: Optional[str]) -> int:
+        return self.ttls.get(extractor or "", self.default_ttl)
+
+    def get(self, url: str) -> Optional[dict[str, Any]]:
+        """返回未过期的缓存结果，并刷新其最近使用时间"""
+        key = canonical_url(url)
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, expires_at FROM info_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM info_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE info_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, url: str, info: dict[str, Any]) -> bool:
+        """缓存已清理的 info_dict；已过期或不可缓存的结果不写入，返回是否写入"""
+        if not is_cacheable(info):
+            return False
+        now = self.clock()
+        extractor = info.get("extractor_key")
+        expires_at = now + self.ttl_for(extractor)
+        link_expiry = url_expiry(info)
+        if link_expiry is not None:
+            expires_at = min(expires_at, link_expiry - INFO_CACHE_EXPIRY_MARGIN)
+        if expires_at <= now:
+            return False
+
+        data = zlib.compress(json.dumps(info, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO info_cache "
+                "(key, extractor, data, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (canonical_url(url), extractor, data, len(data), expires_at, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+        return True
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM info_cache WHERE key = ?", (canonical_url(url),))
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """删除过期条目，并从最久未使用的开始淘汰，直到总大小不超过上限"""
+        self._conn.execute("DELETE FROM info_cache WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM info_cache WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER "
+            "(ORDER BY accessed_at DESC, key ROWS UNBOUNDED PRECEDING) AS total "
+            "FROM info_cache) WHERE total > ?)",
+            (self.max_bytes,),
+        )
+
+    def total_size(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM info_cache").fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._conn.close()
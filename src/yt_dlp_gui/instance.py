@@ -0,0 +1,36 @@
+"""单实例保护与多进程协调
+
+同一配置目录同时只允许一个图形界面和一个守护进程运行：启动时按角色获取
+QLockFile 锁，图形界面的锁被占用时先尝试把参数转发给运行中的窗口 (control.py)。
+守护进程运行时仍可打开图形界面，两者共用同一个数据库；锁文件也无法防止其他
+进程打开数据库（例如不同用户目录指向同一数据库文件，或上一个进程尚未完全退出）。
+因此多个调度器之间由任务租约 (task_leases) 协调：启动每个任务前在数据库中获取租约，
+并通过心跳续期，崩溃进程遗留的过期租约会被自动接管。
+"""
+
+import os
+import socket
+import uuid
+from typing import Optional
+
+from PySide6.QtCore import QLockFile
+
+from .config import INSTANCE_ROLE_GUI, get_instance_lock_path
+
+
+def make_lease_owner() -> str:
+    """生成当前进程的租约持有者标识：主机名:PID:随机后缀"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire_instance_lock(
+    path: Optional[str] = None, role: str = INSTANCE_ROLE_GUI
+) -> Optional[QLockFile]:
+    """获取该角色（图形界面或守护进程）的单实例锁，已被其他存活的进程持有时返回 None
+
+    调用方需持有返回的锁对象直至退出；持有进程崩溃后遗留的锁文件会被自动清理。
+    """
+    lock = QLockFile(path or get_instance_lock_path(role))
+    # 只按持有进程是否存活判断锁是否失效，长时间运行的实例不会因锁文件过旧被误判
+    lock.setStaleLockTime(0)
+    return lock if lock.tryLock(0) else None
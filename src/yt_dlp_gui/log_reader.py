@@ -0,0 +1,173 @@
+"""任务日志读取
+
+长播放列表的日志可达数十 MB，整体读入会卡死界面。这里只从文件末尾反向
+读取最后 N 行，更早的内容按需分页加载；运行中任务的新日志由调度器批量推送。
+轮转出的旧文件和 gzip 压缩后的文件会被拼接成一个连续的逻辑字节流读取。
+所有文件 IO 都通过 LogReadJob 在 QThreadPool 中执行，不占用 GUI 线程。
+"""
+
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Protocol
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from .config import LOG_READ_CHUNK_SIZE, list_log_files, read_log_base
+
+# 已解压的 gzip 日志缓存：(路径, 修改时间) -> 内容；分页时无需重复解压
+_GZIP_CACHE_SIZE = 4
+_gzip_cache: OrderedDict[tuple[str, int], bytes] = OrderedDict()
+_gzip_cache_lock = threading.Lock()
+
+
+def _read_gzip(path: str) -> bytes:
+    key = (path, os.stat(path).st_mtime_ns)
+    with _gzip_cache_lock:
+        if key in _gzip_cache:
+            _gzip_cache.move_to_end(key)
+            return _gzip_cache[key]
+    with gzip.open(path, "rb") as f:
+        data = f.read()
+    with _gzip_cache_lock:
+        _gzip_cache[key] = data
+        while len(_gzip_cache) > _GZIP_CACHE_SIZE:
+            _gzip_cache.popitem(last=False)
+    return data
+
+
+class LogStream(Protocol):
+    """可按逻辑偏移量随机读取的日志字节流，可读区间为 [start, size)"""
+
+    start: int
+    size: int
+
+    def read(self, pos: int, length: int) -> bytes: ...
+
+
+class _FileLogStream:
+    """把一个日志的全部文件（轮转、压缩）按从旧到新拼接成一个可随机读取的字节流"""
+
+    def __init__(self, path: str) -> None:
+        # 每段为 (逻辑起始偏移, 长度, 文件路径, 已解压内容或 None)
+        self._parts: list[tuple[int, int, str, bytes | None]] = []
+        # 轮转覆盖掉的最旧内容不再可读，日志流从记录的起始偏移量开始
+        self.start = read_log_base(path)
+        offset = self.start
+        for file in list_log_files(path):
+            if file.endswith(".gz"):
+                data = _read_gzip(file)
+                self._parts.append((offset, len(data), file, data))
+                offset += len(data)
+            else:
+                size = os.path.getsize(file)
+                self._parts.append((offset, size, file, None))
+                offset += size
+        self.size = offset
+
+    def read(self, pos: int, length: int) -> bytes:
+        """读取逻辑区间 [pos, pos + length)"""
+        chunks = []
+        end = pos + length
+        for start, size, file, data in self._parts:
+            lo, hi = max(pos, start), min(end, start + size)
+            if lo >= hi:
+                continue
+            if data is not None:
+                chunks.append(data[lo - start : hi - start])
+            else:
+                with open(file, "rb") as f:
+                    f.seek(lo - start)
+                    chunks.append(f.read(hi - lo))
+        return b"".join(chunks)
+
+
+def read_lines_before(
+    path: str, end_offset: int | None, max_lines: int
+) -> tuple[list[str], int, int]:
+    """从日志文件的 end_offset 处向前读取最多 max_lines 个完整行。
+
+    Args:
+        path: 日志文件路径（轮转、压缩后的同名文件会一并读取）。
+        end_offset: 读取的结束偏移量（必须位于行边界），None 表示文件末尾。
+            为 None 时会忽略末尾尚未写完的半行。
+        max_lines: 最多返回的行数。
+
+    Returns:
+        (lines, start_offset, end_offset)：读取到的行，以及它们在文件中占据的
+        逻辑字节区间 [start_offset, end_offset)。轮转丢弃最旧的文件后逻辑偏移量
+        不会改变，已被丢弃的区间读取为空。文件不存在时返回 ([], 0, 0)。
+    """
+    try:
+        stream = _FileLogStream(path)
+    except OSError:
+        return [], 0, 0
+    return read_stream_lines_before(stream, end_offset, max_lines)
+
+
+def read_stream_lines_before(
+    stream: LogStream, end_offset: int | None, max_lines: int
+) -> tuple[list[str], int, int]:
+    """read_lines_before 的通用实现，适用于任意 LogStream"""
+    end = stream.size if end_offset is None else min(end_offset, stream.size)
+    end = max(end, stream.start)
+    pos = end
+    buf = b""
+    # 反向按块读取，直到凑够 max_lines 个换行或到达日志流开头
+    while pos > stream.start and buf.count(b"\n") <= max_lines:
+        step = min(LOG_READ_CHUNK_SIZE, pos - stream.start)
+        pos -= step
+        buf = stream.read(pos, step) + buf
+
+    # 文件末尾可能是正在写入的半行，只消费完整行
+    if end_offset is None:
+        cut = buf.rfind(b"\n") + 1
+        end -= len(buf) - cut
+        buf = buf[:cut]
+
+    start = pos
+    if pos > stream.start:
+        # 第一段可能是被截断的行，丢弃并把起点移到下一行开头
+        first_nl = buf.find(b"\n")
+        start += first_nl + 1
+        buf = buf[first_nl + 1 :]
+
+    raw_lines = buf.split(b"\n")[:-1]
+    if len(raw_lines) > max_lines:
+        dropped = raw_lines[: len(raw_lines) - max_lines]
+        start += sum(len(line) + 1 for line in dropped)
+        raw_lines = raw_lines[len(dropped) :]
+
+    lines = [line.decode("utf-8", errors="replace") for line in raw_lines]
+    return lines, start, end
+
+
+class LogReadSignals(QObject):
+    """LogReadJob 的结果信号（QRunnable 本身不能发射信号）"""
+
+    done = Signal(object)  # 发送读取函数的返回值
+
+
+class LogReadJob(QRunnable):
+    """在线程池中执行一次日志读取，并通过信号把结果送回 GUI 线程"""
+
+    def __init__(self, func: Callable[[], object]) -> None:
+        super().__init__()
+        self.func = func
+        self.signals = LogReadSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.func()
+        except Exception:
+            result = None
+        self.signals.done.emit(result)
+
+
+def submit_read(func: Callable[[], object], on_done: Callable[[object], None]) -> LogReadJob:
+    """提交一次后台日志读取，完成后在接收者线程中回调 on_done"""
+    job = LogReadJob(func)
+    job.signals.done.connect(on_done)
+    QThreadPool.globalInstance().start(job)
+    return job
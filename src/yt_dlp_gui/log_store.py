@@ -0,0 +1,317 @@
+"""分段日志存储
+
+任务数量极多时，每个任务一个日志文件会让日志目录膨胀到数十万个文件。
+分段存储把所有任务的日志追加写入少量段文件 (segment_XXXXXX.log)，
+并在 SQLite 索引中记录每批日志的位置：
+
+    records(task_id, task_offset, segment, offset, length)
+
+其中 task_offset 是该批日志在任务自身逻辑日志流中的偏移量，读取任务日志时
+只需按 (task_id, task_offset) 索引定位，不必扫描段文件。删除任务只删除索引，
+被引用数据占比过低的段会在随后的一次压缩整理中被重写。
+
+写入、删除和整理只能在 LogWriter 的后台线程中调用；读取可在任意线程进行。
+"""
+
+import os
+import sqlite3
+import threading
+from typing import BinaryIO, Iterable, Optional
+
+from .config import LOG_COMPACT_RATIO, LOG_SEGMENT_BYTES
+from .log_reader import read_stream_lines_before
+
+# SQLite 单条语句可绑定的参数个数有限，批量删除时分块执行
+_SQL_CHUNK = 500
+
+
+class SegmentLogStore:
+    def __init__(
+        self,
+        root: str,
+        segment_bytes: int = LOG_SEGMENT_BYTES,
+        compact_ratio: float = LOG_COMPACT_RATIO,
+    ) -> None:
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.compact_ratio = compact_ratio
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, "index.db")
+
+        # 读取连接按线程创建（日志窗口在 QThreadPool 中读取），记录下来以便在 close() 中关闭
+        self._local = threading.local()
+        self._reader_conns: list[sqlite3.Connection] = []
+        self._reader_lock = threading.Lock()
+
+        # 写入连接：首次写入时在写入线程中创建
+        self._conn: Optional[sqlite3.Connection] = None
+        self._segment_id = 0
+        self._segment_file = None
+        self._segment_size = 0
+        # 任务逻辑日志流的当前长度缓存
+        self._task_sizes: dict[int, int] = {}
+
+    def segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.root, f"segment_{segment_id:06d}.log")
+
+    # ---------- 写入（仅写入线程） ----------
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.index_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS records (
+                    id INTEGER PRIMARY KEY,
+                    task_id INTEGER NOT NULL,
+                    task_offset INTEGER NOT NULL,
+                    segment INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_records_task ON records (task_id, task_offset)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_segment ON records (segment)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    live INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+
+            row = conn.execute("SELECT MAX(id) FROM segments").fetchone()
+            self._open_segment((row[0] or 0) + 1)
+        return self._conn
+
+    def _open_segment(self, segment_id: int) -> None:
+        """开始写入新的段文件（已有的段文件只读，不再追加）"""
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._segment_id = segment_id
+        self._segment_file = open(self.segment_path(segment_id), "ab")
+        self._segment_size = self._segment_file.tell()
+        assert self._conn is not None
+        self._conn.execute(
+            "INSERT OR IGNORE INTO segments (id, size, live) VALUES (?, ?, 0)",
+            (segment_id, self._segment_size),
+        )
+
+    def _task_size(self, conn: sqlite3.Connection, task_id: int) -> int:
+        size = self._task_sizes.get(task_id)
+        if size is None:
+            row = conn.execute(
+                "SELECT task_offset + length FROM records WHERE task_id = ? "
+                "ORDER BY task_offset DESC LIMIT 1",
+                (task_id,),
+            ).fetchone()
+            size = row[0] if row else 0
+        return size
+
+    def append(self, batches: dict[int, list[str]]) -> None:
+        """追加一批日志：每个任务的日志行作为一条记录写入当前段"""
+        conn = self._writer_conn()
+        # 整批写入同一个段（段文件可能因此略超过上限），便于统一更新段统计
+        if self._segment_size >= self.segment_bytes:
+            self._open_segment(self._segment_id + 1)
+        assert self._segment_file is not None
+
+        records = []
+        for task_id, lines in batches.items():
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            self._segment_file.write(data)
+            task_offset = self._task_size(conn, task_id)
+            records.append((task_id, task_offset, self._segment_id, self._segment_size, len(data)))
+            self._segment_size += len(data)
+            self._task_sizes[task_id] = task_offset + len(data)
+
+        # 先让数据落盘再提交索引，读取端永远不会看到指向未写入数据的记录
+        self._segment_file.flush()
+        conn.executemany(
+            "INSERT INTO records (task_id, task_offset, segment, offset, length) "
+            "VALUES (?, ?, ?, ?, ?)",
+            records,
+        )
+        written = sum(r[4] for r in records)
+        conn.execute(
+            "UPDATE segments SET size = ?, live = live + ? WHERE id = ?",
+            (self._segment_size, written, self._segment_id),
+        )
+        conn.commit()
+
+    def delete_tasks(self, task_ids: Iterable[int], compact: bool = True) -> None:
+        """删除一批任务的日志：删除索引后只做一次压缩整理
+
+        compact=False 时只删除索引（任务重新开始下载时丢弃上一轮日志），
+        释放的空间留到之后删除任务时再整理。
+        """
+        conn = self._writer_conn()
+        ids = list(task_ids)
+        for i in range(0, len(ids), _SQL_CHUNK):
+            chunk = ids[i : i + _SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            freed = conn.execute(
+                f"SELECT segment, SUM(length) FROM records WHERE task_id IN ({marks}) "
+                "GROUP BY segment",
+                chunk,
+            ).fetchall()
+            conn.executemany(
+                "UPDATE segments SET live = live - ? WHERE id = ?",
+                [(size, segment) for segment, size in freed],
+            )
+            conn.execute(f"DELETE FROM records WHERE task_id IN ({marks})", chunk)
+        conn.commit()
+        for task_id in ids:
+            self._task_sizes.pop(task_id, None)
+        if compact:
+            self.compact()
+
+    def compact(self) -> None:
+        """重写被引用数据占比低于 compact_ratio 的段，并删除不再被引用的段"""
+        conn = self._writer_conn()
+        rows = conn.execute(
+            "SELECT id, live FROM segments WHERE id != ? AND (live = 0 OR live < size * ?)",
+            (self._segment_id, self.compact_ratio),
+        ).fetchall()
+        for segment_id, live in rows:
+            if live > 0:
+                self._move_live_records(conn, segment_id)
+            conn.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+            conn.commit()
+            try:
+                os.remove(self.segment_path(segment_id))
+            except OSError:
+                pass
+
+    def _move_live_records(self, conn: sqlite3.Connection, segment_id: int) -> None:
+        """把旧段中仍被引用的记录复制到当前段"""
+        records = conn.execute(
+            "SELECT id, offset, length FROM records WHERE segment = ? ORDER BY offset",
+            (segment_id,),
+        ).fetchall()
+        moved = []
+        with open(self.segment_path(segment_id), "rb") as src:
+            for record_id, offset, length in records:
+                src.seek(offset)
+                data = src.read(length)
+                if self._segment_size >= self.segment_bytes:
+                    self._flush_moved(conn, moved)
+                    moved = []
+                    self._open_segment(self._segment_id + 1)
+                assert self._segment_file is not None
+                self._segment_file.write(data)
+                moved.append((self._segment_id, self._segment_size, record_id))
+                self._segment_size += length
+        self._flush_moved(conn, moved)
+
+    def _flush_moved(self, conn: sqlite3.Connection, moved: list[tuple[int, int, int]]) -> None:
+        if not moved:
+            return
+        assert self._segment_file is not None
+        self._segment_file.flush()
+        conn.executemany("UPDATE records SET segment = ?, offset = ? WHERE id = ?", moved)
+        conn.execute(
+            "UPDATE segments SET size = ?, live = "
+            "(SELECT COALESCE(SUM(length), 0) FROM records WHERE segment = ?) WHERE id = ?",
+            (self._segment_size, self._segment_id, self._segment_id),
+        )
+
+    def close(self) -> None:
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        with self._reader_lock:
+            conns, self._reader_conns = self._reader_conns, []
+            # 各线程之后再读取时重新建立连接
+            self._local = threading.local()
+        for conn in conns:
+            conn.close()
+
+    # ---------- 读取（任意线程） ----------
+
+    def _reader_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 连接由 close() 在写入线程中关闭，因此允许跨线程使用
+            conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            with self._reader_lock:
+                self._local.conn = conn
+                self._reader_conns.append(conn)
+        return conn
+
+    def open_stream(self, task_id: int) -> "_TaskLogStream":
+        return _TaskLogStream(self, task_id)
+
+    def read_lines_before(
+        self, task_id: int, end_offset: int | None, max_lines: int
+    ) -> tuple[list[str], int, int]:
+        """与 log_reader.read_lines_before 相同，但读取分段存储中的任务日志"""
+        if not os.path.exists(self.index_path):
+            return [], 0, 0
+        return read_stream_lines_before(self.open_stream(task_id), end_offset, max_lines)
+
+    def read_lines(self, task_id: int) -> list[str]:
+        """读取任务的全部日志行"""
+        stream = self.open_stream(task_id)
+        data = stream.read(0, stream.size)
+        return data.decode("utf-8", errors="replace").split("\n")[:-1]
+
+
+class _TaskLogStream:
+    """单个任务在分段存储中的逻辑日志流"""
+
+    # 分段存储不轮转，日志流总是从 0 开始
+    start = 0
+
+    def __init__(self, store: SegmentLogStore, task_id: int) -> None:
+        self._store = store
+        self._task_id = task_id
+        row = (
+            store._reader_conn()
+            .execute(
+                "SELECT task_offset + length FROM records WHERE task_id = ? "
+                "ORDER BY task_offset DESC LIMIT 1",
+                (task_id,),
+            )
+            .fetchone()
+        )
+        self.size = row[0] if row else 0
+
+    def read(self, pos: int, length: int) -> bytes:
+        end = pos + length
+        # 定位覆盖 [pos, end) 的记录：起点取 pos 之前最后一条记录
+        rows = (
+            self._store._reader_conn()
+            .execute(
+                "SELECT task_offset, segment, offset, length FROM records "
+                "WHERE task_id = ? AND task_offset < ? AND task_offset >= COALESCE("
+                "(SELECT task_offset FROM records WHERE task_id = ? AND task_offset <= ? "
+                "ORDER BY task_offset DESC LIMIT 1), 0) ORDER BY task_offset",
+                (self._task_id, end, self._task_id, pos),
+            )
+            .fetchall()
+        )
+        chunks = []
+        handles: dict[int, BinaryIO] = {}
+        try:
+            for task_offset, segment, offset, rec_len in rows:
+                lo, hi = max(pos, task_offset), min(end, task_offset + rec_len)
+                if lo >= hi:
+                    continue
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = open(self._store.segment_path(segment), "rb")
+                f.seek(offset + lo - task_offset)
+                chunks.append(f.read(hi - lo))
+        finally:
+            for f in handles.values():
+                f.close()
+        return b"".join(chunks)
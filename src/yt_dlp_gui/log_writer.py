@@ -0,0 +1,306 @@
+"""异步日志写入
+
+所有 DownloadWorker 的日志行都投递到同一个队列，由单个后台线程攒批后写入，
+下载线程不再为每一行日志发起一次 write 系统调用。写入线程同时负责：
+超过 LOG_ROTATE_BYTES 的日志轮转、任务结束后的 gzip 压缩以及日志删除。
+配置为分段存储时 (LOG_STORE_BACKEND = "segments")，日志改为写入 SegmentLogStore。
+"""
+
+import gzip
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Optional
+
+from .config import (
+    LOG_BACKUP_COUNT,
+    LOG_ROTATE_BYTES,
+    LOG_STORE_BACKEND,
+    LOG_WRITE_BATCH_SIZE,
+    LOG_WRITE_BUFFER_SIZE,
+    LOG_WRITE_LINGER_SECONDS,
+    delete_task_log_files,
+    get_log_base_path,
+    get_log_dir,
+    get_task_log_path,
+    list_log_files,
+    read_log_base,
+)
+from .log_store import SegmentLogStore
+
+# 队列条目类型
+_WRITE = "write"
+_OPEN = "open"
+_FINISH = "finish"
+_REMOVE = "remove"
+_FLUSH = "flush"
+
+
+class LogWriter:
+    """后台日志写入线程，队列条目为 (kind, task_id, payload) 或用于停止的 None (毒丸)"""
+
+    def __init__(
+        self,
+        max_bytes: int = LOG_ROTATE_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        compress: bool = True,
+        store: Optional[SegmentLogStore] = None,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        # 设置后所有日志写入分段存储，不再按任务创建文件
+        self.store = store
+
+        # 条目为 (kind, task_id, payload)；_REMOVE 的 task_id 为任务 ID 列表
+        self._queue = queue.Queue[Optional[tuple[str, Any, Any]]]()
+        self._handles: dict[int, BinaryIO] = {}
+        self._sizes: dict[int, int] = {}
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ---------- 对外接口（任意线程调用） ----------
+
+    def write(self, task_id: int, line: str) -> None:
+        """投递一行日志，立即返回"""
+        self._queue.put((_WRITE, task_id, line))
+
+    def open_task(self, task_id: int) -> None:
+        """任务开始新一轮下载：丢弃该任务旧的日志文件"""
+        self._queue.put((_OPEN, task_id, None))
+
+    def finish_task(self, task_id: int) -> None:
+        """任务结束：写完已排队的日志、关闭文件并压缩"""
+        self._queue.put((_FINISH, task_id, None))
+
+    def remove_task(self, task_id: int, wait: bool = True) -> None:
+        """删除任务日志（在该任务已排队的日志处理完之后执行）"""
+        self.remove_tasks([task_id], wait)
+
+    def remove_tasks(self, task_ids: list[int], wait: bool = True) -> None:
+        """批量删除任务日志，分段存储模式下整批只做一次压缩整理"""
+        self._submit(_REMOVE, list(task_ids), wait)
+
+    def flush(self, wait: bool = True) -> None:
+        """把所有已排队的日志写入磁盘"""
+        self._submit(_FLUSH, 0, wait)
+
+    def close(self) -> None:
+        """写完剩余日志并停止后台线程"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout=3)
+
+    @property
+    def is_running(self) -> bool:
+        return not self._closed and self._thread.is_alive()
+
+    def _submit(self, kind: str, task_id: Any, wait: bool) -> None:
+        done = threading.Event() if wait else None
+        self._queue.put((kind, task_id, done))
+        if done is not None and self.is_running:
+            done.wait(timeout=5)
+
+    # ---------- 后台线程 ----------
+
+    def _run(self) -> None:
+        while True:
+            if self._process(self._collect_batch()):
+                break
+
+        for task_id in list(self._handles):
+            self._close_handle(task_id)
+        if self.store is not None:
+            self.store.close()
+
+    def _collect_batch(self) -> list[Optional[tuple[str, Any, Any]]]:
+        """阻塞等待第一条，然后在 LOG_WRITE_LINGER_SECONDS 内继续攒批"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + LOG_WRITE_LINGER_SECONDS
+        # 只有普通日志行才值得等待，控制命令需要尽快执行
+        while len(batch) < LOG_WRITE_BATCH_SIZE and _is_write(batch[-1]):
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch: list[Optional[tuple[str, Any, Any]]]) -> bool:
+        """处理一批条目，返回是否收到停止信号
+
+        每个条目单独捕获错误：一次写入或删除失败不影响同批中之后的日志行，
+        等待中的 remove_tasks() / flush() 也总会被唤醒。
+        """
+        pending: dict[int, list[str]] = {}
+        for item in batch:
+            if item is None:
+                self._write_pending(pending)
+                return True
+            kind, task_id, payload = item
+            if kind == _WRITE:
+                pending.setdefault(task_id, []).append(payload)
+                continue
+
+            # 控制命令前先落盘已攒下的日志，保证顺序
+            self._write_pending(pending)
+            pending = {}
+            try:
+                if kind == _OPEN:
+                    # 每次开始或重试都会丢弃旧日志，不在这里做压缩整理
+                    self._remove([task_id], compact=False)
+                elif kind == _FINISH:
+                    self._close_handle(task_id)
+                    if self.compress and self.store is None:
+                        self._compress(task_id)
+                elif kind == _REMOVE:
+                    self._remove(task_id)
+            except Exception as e:
+                _report_error(e)
+            finally:
+                if payload is not None:
+                    payload.set()
+
+        self._write_pending(pending)
+        return False
+
+    def _remove(self, task_ids: list[int], compact: bool = True) -> None:
+        if self.store is not None:
+            self.store.delete_tasks(task_ids, compact=compact)
+            return
+        for task_id in task_ids:
+            self._close_handle(task_id)
+            delete_task_log_files(task_id)
+
+    def _write_pending(self, pending: dict[int, list[str]]) -> None:
+        if self.store is not None:
+            if pending:
+                try:
+                    self.store.append(pending)
+                except Exception as e:
+                    _report_error(e)
+            return
+        for task_id, lines in pending.items():
+            try:
+                self._write_lines(task_id, lines)
+            except Exception as e:
+                _report_error(e)
+
+    def _write_lines(self, task_id: int, lines: list[str]) -> None:
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        handle = self._get_handle(task_id)
+        handle.write(data)
+        handle.flush()
+        self._sizes[task_id] += len(data)
+        if self._sizes[task_id] >= self.max_bytes:
+            self._rotate(task_id)
+
+    def _get_handle(self, task_id: int) -> BinaryIO:
+        handle = self._handles.get(task_id)
+        if handle is None:
+            path = get_task_log_path(task_id)
+            handle = open(path, "ab", buffering=LOG_WRITE_BUFFER_SIZE)
+            self._handles[task_id] = handle
+            self._sizes[task_id] = handle.tell()
+        return handle
+
+    def _close_handle(self, task_id: int) -> None:
+        handle = self._handles.pop(task_id, None)
+        self._sizes.pop(task_id, None)
+        if handle is not None:
+            try:
+                handle.close()
+            except OSError:
+                pass
+
+    def _rotate(self, task_id: int) -> None:
+        """task_N.log → task_N.log.1 → ... → task_N.log.{backup_count}，最旧的被覆盖
+
+        被覆盖的字节数累加到日志流的起始偏移量（见 get_log_base_path），
+        读取端据此保持已有行的逻辑偏移量不变。
+        """
+        self._close_handle(task_id)
+        path = get_task_log_path(task_id)
+        oldest = f"{path}.{self.backup_count}" if self.backup_count > 0 else path
+        dropped = os.path.getsize(oldest) if os.path.exists(oldest) else 0
+        for i in range(self.backup_count - 1, 0, -1):
+            for suffix in ("", ".gz"):
+                src = f"{path}.{i}{suffix}"
+                if os.path.exists(src):
+                    os.replace(src, f"{path}.{i + 1}{suffix}")
+        if self.backup_count > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        if dropped:
+            base_path = get_log_base_path(path)
+            with open(base_path + ".tmp", "w", encoding="ascii") as f:
+                f.write(str(read_log_base(path) + dropped))
+            os.replace(base_path + ".tmp", base_path)
+
+    def _compress(self, task_id: int) -> None:
+        for path in list_log_files(get_task_log_path(task_id)):
+            if path.endswith(".gz"):
+                continue
+            with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+
+
+def _report_error(error: Exception) -> None:
+    # 日志写入失败不应影响下载，记录到 stderr 后继续
+    print(f"Log writer error: {error}", file=sys.stderr)
+
+
+def _is_write(item: Optional[tuple[str, Any, Any]]) -> bool:
+    return item is not None and item[0] == _WRITE
+
+
+# 进程内共享的日志写入线程，首次使用时启动
+_log_writer: Optional[LogWriter] = None
+_log_writer_lock = threading.Lock()
+
+
+def get_log_writer() -> LogWriter:
+    """获取（必要时启动）共享的日志写入线程"""
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None or not _log_writer.is_running:
+            store = None
+            if LOG_STORE_BACKEND == "segments":
+                store = SegmentLogStore(os.path.join(get_log_dir(), "segments"))
+            _log_writer = LogWriter(store=store)
+        return _log_writer
+
+
+def get_log_store() -> Optional[SegmentLogStore]:
+    """分段存储模式下返回共享的日志存储，否则返回 None"""
+    if LOG_STORE_BACKEND != "segments":
+        return None
+    return get_log_writer().store
+
+
+def get_running_log_writer() -> Optional[LogWriter]:
+    """返回正在运行的共享日志写入线程，未启动时返回 None"""
+    writer = _log_writer
+    return writer if writer is not None and writer.is_running else None
+
+
+def shutdown_log_writer() -> None:
+    """停止共享的日志写入线程（应用退出时调用）"""
+    global _log_writer
+    with _log_writer_lock:
+        writer, _log_writer = _log_writer, None
+    if writer is not None:
+        writer.close()
@@ -2,10 +2,8 @@ import os
 import sys
 from importlib.metadata import PackageNotFoundError
 from importlib.metadata import version as _pkg_version
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
-import click
-import qtawesome as qta
 from PySide6.QtCore import (
     QModelIndex,
     QPersistentModelIndex,
@@ -13,6 +11,7 @@ from PySide6.QtCore import (
     QSize,
     QSortFilterProxyModel,
     Qt,
+    QTimer,
     QUrl,
     Slot,
 )
@@ -20,6 +19,7 @@ from PySide6.QtGui import QAction, QColor, QDesktopServices, QLinearGradient, QP
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QApplication,
+    QDockWidget,
     QFrame,
     QHeaderView,
     QLabel,
@@ -37,12 +37,29 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
-from .config import STYLESHEET_FILE, get_task_log_path
+from . import metrics, profiling
+from .config import (
+    STYLESHEET_FILE,
+    THROUGHPUT_REFRESH_MS,
+    get_default_download_path,
+    get_task_log_path,
+)
+from .control import ControlServer
 from .database import Database
-from .dialogs import DialogManager
+from .icons import icon, load_icons
+from .importer import ImportJob, LineSource, open_url_lines, start_import
+from .info_cache import InfoCache
+from .instance import acquire_instance_lock
+from .log_writer import get_log_store, shutdown_log_writer
 from .models import DownloadTask, TaskTableModel
 from .scheduler import DownloadScheduler
-from .utils import clean_ansi, format_eta, format_speed
+from .subscriptions import SubscriptionManager
+from .throughput import QueueThroughput
+from .utils import clean_ansi, format_eta, format_postprocessor, format_size, format_speed
+from .worker import preload_yt_dlp
+
+if TYPE_CHECKING:
+    from .dialogs import DialogManager
 
 try:
     __version__ = _pkg_version("yt-dlp-qt-gui")
@@ -143,24 +160,40 @@ class MainWindow(QMainWindow):
         self,
         db: Database,
         scheduler: DownloadScheduler,
-        dialog_manager: Optional[DialogManager] = None,
+        dialog_manager: Optional["DialogManager"] = None,
+        subscriptions: Optional[SubscriptionManager] = None,
     ):
         super().__init__()
         self.db = db
         self.scheduler = scheduler
-        self.dialog_manager = dialog_manager or DialogManager(self)
+        # 对话框模块在首次使用时才导入
+        self._dialog_manager = dialog_manager
+        self.subscriptions = subscriptions or SubscriptionManager(db, scheduler)
+        self.subscriptions.subscription_checked.connect(self._on_subscription_checked)
         self.active_log_dialogs: Dict[int, Any] = {}  # 跟踪打开的日志窗口
+        self._import_jobs: set[ImportJob] = set()  # 进行中的批量导入
+        self._startup_finished = False
+        self._metrics_dock: Optional[QDockWidget] = None
 
         # 数据模型初始化
         self.table_model = TaskTableModel()
+        # 状态栏的总速度与队列剩余时间：由进度增量维护，定时采样刷新
+        self.throughput = QueueThroughput(scheduler.max_concurrent_downloads)
+        self._throughput_timer = QTimer(self)
+        self._throughput_timer.setInterval(THROUGHPUT_REFRESH_MS)
+        self._throughput_timer.timeout.connect(self._update_throughput)
 
         # 连接调度器信号
         self.scheduler.task_added.connect(self._add_task_to_table)
+        self.scheduler.tasks_added.connect(self._add_tasks_to_table)
         self.scheduler.task_status_changed.connect(self._on_scheduler_status_changed)
         self.scheduler.task_progress_changed.connect(self._on_scheduler_progress)
         self.scheduler.task_title_updated.connect(self._on_scheduler_title_updated)
-        self.scheduler.task_log_emitted.connect(self._on_log)
         self.scheduler.task_deleted.connect(self._on_scheduler_deleted)
+        self.scheduler.tasks_status_changed.connect(self._on_scheduler_tasks_status_changed)
+        self.scheduler.tasks_deleted.connect(self._on_scheduler_tasks_deleted)
+        self.scheduler.task_log_chunk.connect(self._on_log_chunk)
+        self.scheduler.task_log_reset.connect(self._on_log_reset)
 
         # 排序选项：显示文本 → (sort_col, sort_dir)
         self._sort_options: dict[str, tuple[str, str]] = {
@@ -177,7 +210,42 @@ class MainWindow(QMainWindow):
         self._setup_ui()
         self._setup_toolbar()
         self._apply_dark_theme()
-        self._load_tasks_from_db()
+        with profiling.phase("_load_tasks_from_db"):
+            self._load_tasks_from_db()
+
+    @property
+    def dialog_manager(self) -> "DialogManager":
+        if self._dialog_manager is None:
+            from .dialogs import DialogManager
+
+            self._dialog_manager = DialogManager(self)
+        return self._dialog_manager
+
+    @dialog_manager.setter
+    def dialog_manager(self, manager: "DialogManager") -> None:
+        self._dialog_manager = manager
+
+    def bring_to_front(self) -> None:
+        """再次启动应用时由控制接口调用：恢复并激活已打开的主窗口"""
+        if self.isMinimized():
+            self.showNormal()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def finish_startup(self) -> None:
+        """首次绘制之后执行的启动工作：加载图标，并在后台预加载 yt-dlp"""
+        if self._startup_finished:
+            return
+        self._startup_finished = True
+        # 在 show() 之后的第一轮事件循环中调用，此时首帧已经绘制
+        profiling.mark("first_paint")
+        load_icons()
+        for target, name, color in self._deferred_icons:
+            target.setIcon(icon(name, color=color))
+        self.table_model.refresh_icons()
+        preload_yt_dlp()
+        profiling.mark("startup_complete")
 
     def _setup_ui(self):
         central_widget = QWidget()
@@ -237,37 +305,67 @@ class MainWindow(QMainWindow):
         # 状态栏信息
         self.status_info = QLabel(" 准备就绪")
         self.statusBar().addWidget(self.status_info)
+        self.throughput_info = QLabel()
+        self.statusBar().addPermanentWidget(self.throughput_info)
         self.task_count_info = QLabel("0 个项目, 已选择 0 个  ")
         self.statusBar().addPermanentWidget(self.task_count_info)
         self.table.selectionModel().selectionChanged.connect(self._update_status_counts)
 
     def _setup_toolbar(self):
+        # 工具栏图标在首次绘制之后由 finish_startup() 补上（见 icons.py）
+        self._deferred_icons: list[tuple[Any, str, str]] = []
         toolbar = QToolBar("Main Toolbar")
         toolbar.setIconSize(QSize(24, 24))
         toolbar.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextUnderIcon)
         self.addToolBar(toolbar)
 
-        add_action = QAction(qta.icon("fa5s.plus-circle", color="#FFFFFF"), "添加", self)
+        add_action = QAction("添加", self)
+        self._deferred_icons.append((add_action, "fa5s.plus-circle", "#FFFFFF"))
         add_action.triggered.connect(self._show_add_dialog)
         toolbar.addAction(add_action)
 
+        import_action = QAction("导入", self)
+        self._deferred_icons.append((import_action, "fa5s.file-import", "#FFFFFF"))
+        import_action.triggered.connect(self._show_import_dialog)
+        toolbar.addAction(import_action)
+
+        subscriptions_action = QAction("订阅", self)
+        self._deferred_icons.append((subscriptions_action, "fa5s.rss", "#FFFFFF"))
+        subscriptions_action.triggered.connect(self._show_subscriptions_dialog)
+        toolbar.addAction(subscriptions_action)
+
+        presets_action = QAction("格式", self)
+        self._deferred_icons.append((presets_action, "fa5s.sliders-h", "#FFFFFF"))
+        presets_action.triggered.connect(self._show_presets_dialog)
+        toolbar.addAction(presets_action)
+
+        if metrics.enabled():
+            metrics_action = QAction("指标", self)
+            self._deferred_icons.append((metrics_action, "fa5s.chart-line", "#FFFFFF"))
+            metrics_action.triggered.connect(self._toggle_metrics_panel)
+            toolbar.addAction(metrics_action)
+
         toolbar.addSeparator()
 
-        start_action = QAction(qta.icon("fa5s.play-circle", color="#FFFFFF"), "开始", self)
+        start_action = QAction("开始", self)
+        self._deferred_icons.append((start_action, "fa5s.play-circle", "#FFFFFF"))
         start_action.triggered.connect(self._start_selected_task)
         toolbar.addAction(start_action)
 
-        stop_action = QAction(qta.icon("fa5s.stop-circle", color="#FFFFFF"), "停止", self)
+        stop_action = QAction("停止", self)
+        self._deferred_icons.append((stop_action, "fa5s.stop-circle", "#FFFFFF"))
         stop_action.triggered.connect(self._stop_selected_task)
         toolbar.addAction(stop_action)
 
         toolbar.addSeparator()
 
-        delete_action = QAction(qta.icon("fa5s.trash-alt", color="#FFFFFF"), "删除", self)
+        delete_action = QAction("删除", self)
+        self._deferred_icons.append((delete_action, "fa5s.trash-alt", "#FFFFFF"))
         delete_action.triggered.connect(self._delete_selected_task)
         toolbar.addAction(delete_action)
 
-        info_action = QAction(qta.icon("fa5s.info-circle", color="#FFFFFF"), "关于", self)
+        info_action = QAction("关于", self)
+        self._deferred_icons.append((info_action, "fa5s.info-circle", "#FFFFFF"))
         info_action.triggered.connect(self._show_about_dialog)
         toolbar.addAction(info_action)
 
@@ -284,14 +382,15 @@ class MainWindow(QMainWindow):
         self.search_input.setClearButtonEnabled(True)
 
         # 搜索框内置放大镜图标
-        search_action = QAction(qta.icon("fa5s.search", color="#888888"), "", self)
+        search_action = QAction("", self)
+        self._deferred_icons.append((search_action, "fa5s.search", "#888888"))
         self.search_input.addAction(search_action, QLineEdit.ActionPosition.LeadingPosition)
         self.search_input.textChanged.connect(self._on_search_changed)
 
         toolbar.addWidget(self.search_input)
 
         self.sort_button = QToolButton(self)
-        self.sort_button.setIcon(qta.icon("fa5s.sort-amount-down", color="#BBBBBB"))
+        self._deferred_icons.append((self.sort_button, "fa5s.sort-amount-down", "#BBBBBB"))
         self.sort_button.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
         self.sort_button.setPopupMode(QToolButton.ToolButtonPopupMode.InstantPopup)
         self.sort_button.setText(next(iter(self._sort_options)))  # 默认“创建时间 ↓”
@@ -310,6 +409,35 @@ class MainWindow(QMainWindow):
         selected = len(self.table.selectionModel().selectedRows())
         self.task_count_info.setText(f"{total} 个项目, 已选择 {selected} 个  ")
 
+    def _track_status(self, task_ids: list[int], status: Optional[str]) -> None:
+        """把状态变化同步给吞吐量统计"""
+        for task_id in task_ids:
+            self.throughput.set_status(task_id, status)
+        self._start_throughput_refresh()
+
+    def _start_throughput_refresh(self) -> None:
+        """有任务下载或排队时启动状态栏刷新，队列清空后定时器自行停止"""
+        if self._throughput_timer.isActive():
+            return
+        snapshot = self.throughput.snapshot()
+        if snapshot.active or snapshot.queued:
+            self._throughput_timer.start()
+            self._update_throughput()
+
+    def _update_throughput(self) -> None:
+        snapshot = self.throughput.tick()
+        if not snapshot.active and not snapshot.queued:
+            self._throughput_timer.stop()
+            self.throughput_info.clear()
+            return
+        remaining = format_size(snapshot.remaining_bytes)
+        if snapshot.estimated:
+            remaining = "≈" + remaining
+        self.throughput_info.setText(
+            f"总速度 {format_speed(snapshot.speed)} · 剩余 {remaining} · "
+            f"预计 {format_eta(snapshot.eta)}  "
+        )
+
     def _apply_dark_theme(self):
         qss = load_stylesheet()
         if qss:
@@ -334,22 +462,34 @@ class MainWindow(QMainWindow):
         sort_col, sort_dir = self._sort_options.get(current, ("created_at", "DESC"))
         tasks = self.db.get_all_tasks(sort_col=sort_col, sort_dir=sort_dir)
         self.table_model.set_tasks(tasks)
+        self.throughput.reset((t.id, t.status) for t in tasks if t.id is not None)
+        self._start_throughput_refresh()
         self._update_status_counts()
 
     def _add_task_to_table(self, task: DownloadTask) -> None:
         self.table_model.add_task(task)
+        if task.id is not None:
+            self._track_status([task.id], task.status)
+        self._update_status_counts()
+
+    def _add_tasks_to_table(self, tasks: list[DownloadTask]) -> None:
+        self.table_model.add_tasks(tasks)
+        for task in tasks:
+            if task.id is not None:
+                self.throughput.set_status(task.id, task.status)
+        self._start_throughput_refresh()
         self._update_status_counts()
 
     def _show_context_menu(self, pos):
         menu = QMenu(self)
         open_folder_action = menu.addAction(
-            qta.icon("fa5s.folder-open", color="#FFFFFF"), "打开保存文件夹"
+            icon("fa5s.folder-open", color="#FFFFFF"), "打开保存文件夹"
         )
-        view_log_action = menu.addAction(qta.icon("fa5s.file-alt", color="#FFFFFF"), "查看详细日志")
+        view_log_action = menu.addAction(icon("fa5s.file-alt", color="#FFFFFF"), "查看详细日志")
         menu.addSeparator()
-        start_action = menu.addAction(qta.icon("fa5s.play", color="#FFFFFF"), "开始 / 重试")
-        stop_action = menu.addAction(qta.icon("fa5s.stop", color="#FFFFFF"), "停止")
-        delete_action = menu.addAction(qta.icon("fa5s.trash-alt", color="#FFFFFF"), "删除任务")
+        start_action = menu.addAction(icon("fa5s.play", color="#FFFFFF"), "开始 / 重试")
+        stop_action = menu.addAction(icon("fa5s.stop", color="#FFFFFF"), "停止")
+        delete_action = menu.addAction(icon("fa5s.trash-alt", color="#FFFFFF"), "删除任务")
 
         action = menu.exec(self.table.viewport().mapToGlobal(pos))
         if action == open_folder_action:
@@ -400,55 +540,127 @@ class MainWindow(QMainWindow):
             self.active_log_dialogs[task_id].activateWindow()
             return
 
-        logs = "暂无日志信息...\n"
-        try:
-            log_path = get_task_log_path(task_id)
-            if os.path.exists(log_path):
-                with open(log_path, "r", encoding="utf-8", errors="replace") as f:
-                    logs = f.read()
-        except Exception as e:
-            logs = f"无法读取日志: {e}\n"
-
+        # 先订阅再加载尾部，LogDialog 按日志偏移量跳过两者重叠的部分
+        self.scheduler.subscribe_logs(task_id)
         dialog = self.dialog_manager.show_log(
             task_id,
             title,
-            logs,
-            on_finished=lambda: self.active_log_dialogs.pop(task_id, None),
+            get_task_log_path(task_id),
+            on_finished=lambda: self._on_log_dialog_closed(task_id),
+            log_store=get_log_store(),
         )
         self.active_log_dialogs[task_id] = dialog
 
+    def _on_log_dialog_closed(self, task_id: int) -> None:
+        self.active_log_dialogs.pop(task_id, None)
+        self.scheduler.unsubscribe_logs(task_id)
+
     @Slot()
     def _show_add_dialog(self) -> None:
-        task = self.dialog_manager.show_add_task()
-        if task:
-            self.scheduler.add_task(task)
+        task = self.dialog_manager.show_add_task(self.db.get_presets())
+        if not task:
+            return
+        # 重复检查已在此处完成（并由用户确认），调度器无需再查询一次
+        existing = self.db.find_duplicate(task.url)
+        if existing is None or self._confirm_redownload(existing):
+            self.scheduler.add_task(task, allow_duplicate=True)
+
+    def _confirm_redownload(self, existing: DownloadTask) -> bool:
+        """同一视频已存在时询问用户：跳过还是重新下载"""
+        title = existing.title or existing.url
+        if existing.status == "finished":
+            msg = f"该视频已下载完成：\n{title}\n\n是否重新下载？"
+        else:
+            msg = (
+                f"该视频已在任务列表中（状态：{existing.status}）：\n{title}\n\n是否仍要重复添加？"
+            )
+        confirm = QMessageBox.question(
+            self,
+            "重复的任务",
+            msg,
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        return confirm == QMessageBox.StandardButton.Yes
+
+    def _show_import_dialog(self) -> None:
+        result = self.dialog_manager.show_import_tasks(self.db.get_presets())
+        if result:
+            self.import_urls(*result)
+
+    def import_urls(self, source: LineSource, template: DownloadTask) -> None:
+        """在后台批量导入链接，每写入一块就交给调度器按需启动"""
+        job = ImportJob(self.db, source, template)
+        job.signals.chunk_added.connect(self.scheduler.add_imported_tasks)
+        job.signals.finished.connect(
+            lambda imported, skipped: self._on_import_finished(job, imported, skipped)
+        )
+        job.signals.failed.connect(lambda message: self._on_import_failed(job, message))
+        self._import_jobs.add(job)
+        self.status_info.setText(" 正在导入链接...")
+        start_import(job)
+
+    def _on_import_finished(self, job: ImportJob, imported: int, skipped: int) -> None:
+        self._import_jobs.discard(job)
+        self.status_info.setText(
+            f" 导入完成：新增 {imported} 个任务，跳过 {skipped} 个重复或无效链接"
+        )
+
+    def _on_import_failed(self, job: ImportJob, message: str) -> None:
+        self._import_jobs.discard(job)
+        self.status_info.setText(" 导入失败")
+        QMessageBox.warning(self, "导入失败", message)
+
+    def _toggle_metrics_panel(self) -> None:
+        """显示或隐藏运行指标停靠面板（首次打开时创建）"""
+        registry = metrics.get_registry()
+        if registry is None:
+            return
+        if self._metrics_dock is None:
+            dock = QDockWidget("运行指标", self)
+            dock.setObjectName("metrics_dock")
+            dock.setWidget(self.dialog_manager.create_metrics_panel(registry))
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+            dock.show()
+            self._metrics_dock = dock
+        else:
+            self._metrics_dock.setVisible(not self._metrics_dock.isVisible())
+
+    def _show_subscriptions_dialog(self) -> None:
+        self.dialog_manager.show_subscriptions(self.subscriptions)
+
+    def _show_presets_dialog(self) -> None:
+        self.dialog_manager.show_format_presets(self.db)
+
+    def _on_subscription_checked(self, sub_id: int, new_count: int, error: str) -> None:
+        if error:
+            self.status_info.setText(f" 订阅检查失败: {error}")
+        elif new_count:
+            self.status_info.setText(f" 订阅发现 {new_count} 个新视频，已加入下载队列")
 
     def _get_task_id_from_row(self, row):
         index = self.proxy_model.index(row, 0)
         return index.data(Qt.ItemDataRole.UserRole) if index.isValid() else None
 
-    def _start_selected_task(self):
+    def _get_selected_task_ids(self) -> list[int]:
         indices = self.table.selectionModel().selectedRows()
-        for idx in indices:
-            tid = self._get_task_id_from_row(idx.row())
-            if tid:
-                self.scheduler.start_task(tid)
+        tids = [self._get_task_id_from_row(idx.row()) for idx in indices]
+        return [tid for tid in tids if tid]
+
+    def _start_selected_task(self):
+        tids = self._get_selected_task_ids()
+        if tids:
+            self.scheduler.start_many(tids)
 
     def _stop_selected_task(self):
-        indices = self.table.selectionModel().selectedRows()
-        for idx in indices:
-            tid = self._get_task_id_from_row(idx.row())
-            if tid:
-                self.scheduler.stop_task(tid)
+        tids = self._get_selected_task_ids()
+        if tids:
+            self.scheduler.stop_many(tids)
 
     def _delete_selected_task(self) -> None:
-        indices = self.table.selectionModel().selectedRows()
-        if not indices:
+        tids = self._get_selected_task_ids()
+        if not tids:
             return
 
-        tids = [self._get_task_id_from_row(idx.row()) for idx in indices]
-        tids = [tid for tid in tids if tid is not None]
-
         # 分类：静止任务 vs 运行中任务
         running_tids = [tid for tid in tids if tid in self.scheduler.threads]
         idle_tids = [tid for tid in tids if tid not in self.scheduler.threads]
@@ -476,25 +688,57 @@ class MainWindow(QMainWindow):
             if confirm != QMessageBox.StandardButton.Yes:
                 return
 
-        # 循环删除所有选中的任务
-        for tid in tids:
-            self.scheduler.delete_task(tid)
+        # 一次批量删除所有选中的任务
+        self.scheduler.delete_many(tids)
 
-    def _on_scheduler_status_changed(self, task_id: int, status: str) -> None:
-        updates = {"status": status}
+    @staticmethod
+    def _status_updates(status: str) -> dict[str, Any]:
+        updates: dict[str, Any] = {"status": status}
         if status == "finished":
             updates.update({"progress": 100, "speed": "--", "eta": "--"})
-        elif status in ("cancelled", "error"):
+        elif status in ("cancelled", "error", "retrying"):
             updates.update({"progress": 0, "speed": "--", "eta": "--"})
         elif status in ("downloading", "queued"):
             updates.update({"speed": "--", "eta": "--"})
-        self._update_table_row(task_id, updates)
+        elif status == "postprocessing":
+            updates.update({"speed": format_postprocessor(None), "eta": "--"})
+        return updates
+
+    def _on_scheduler_status_changed(self, task_id: int, status: str) -> None:
+        self._on_scheduler_tasks_status_changed([task_id], status)
+
+    def _on_scheduler_tasks_status_changed(self, task_ids: list[int], status: str) -> None:
+        if len(task_ids) == 1:
+            self._update_table_row(task_ids[0], self._status_updates(status))
+        else:
+            self.table_model.update_tasks_data(task_ids, self._status_updates(status))
+        if status not in ("downloading", "merging", "postprocessing"):
+            self.table_model.clear_stream_details(task_ids)
+        self._track_status(task_ids, status)
 
     @Slot(int, dict)
     def _on_scheduler_progress(self, task_id: int, data: dict[str, Any]) -> None:
         if data["status"] == "downloading":
             total = data.get("total_bytes") or data.get("total_bytes_estimate")
             downloaded = data.get("downloaded_bytes")
+            if "_overall_downloaded" in data:
+                # 视频与音频分开下载时按所有流合计
+                downloaded, total = data["_overall_downloaded"], data.get("_overall_total")
+            self.throughput.update(task_id, downloaded, total)
+            if "_streams" in data:
+                self.table_model.set_stream_details(task_id, data["_streams"], data.get("_merge"))
+
+            if "_overall_percent" in data:
+                # Worker 中 ProgressEstimator 跨文件平滑后的结果
+                self._update_table_row(
+                    task_id,
+                    {
+                        "progress": int(data["_overall_percent"]),
+                        "speed": format_speed(data.get("_smoothed_speed")),
+                        "eta": format_eta(data.get("_smoothed_eta")),
+                    },
+                )
+                return
 
             progress = 0
             if total and downloaded:
@@ -516,26 +760,52 @@ class MainWindow(QMainWindow):
                 task_id, {"progress": progress, "speed": speed_str, "eta": eta_str}
             )
         elif data["status"] == "merging":
-            self._update_table_row(
-                task_id, {"status": "merging", "speed": "Merging...", "eta": "--"}
-            )
+            updates: dict[str, Any] = {"status": "merging", "speed": "Merging...", "eta": "--"}
+            if "_overall_percent" in data:
+                updates["progress"] = int(data["_overall_percent"])
+            if "_streams" in data:
+                self.table_model.set_stream_details(task_id, data["_streams"], data.get("_merge"))
+            self._update_table_row(task_id, updates)
+            self.throughput.set_status(task_id, "merging")
+        elif data["status"] == "postprocessing":
+            # 后处理队列中的任务：速度列显示当前执行的后处理步骤
+            updates = {"speed": format_postprocessor(data.get("postprocessor"))}
+            if "_overall_percent" in data:
+                updates["progress"] = int(data["_overall_percent"])
+            if "_streams" in data:
+                self.table_model.set_stream_details(task_id, data["_streams"], data.get("_merge"))
+            self._update_table_row(task_id, updates)
 
     def _on_scheduler_title_updated(self, task_id: int, title: str) -> None:
         self._update_table_row(task_id, {"title": title})
 
     def _on_scheduler_deleted(self, task_id: int) -> None:
         self.table_model.remove_task(task_id)
+        self.table_model.clear_stream_details([task_id])
+        self.throughput.set_status(task_id, None)
+        self._update_status_counts()
+
+    def _on_scheduler_tasks_deleted(self, task_ids: list[int]) -> None:
+        self.table_model.remove_tasks(task_ids)
+        self.table_model.clear_stream_details(task_ids)
+        self._track_status(task_ids, None)
         self._update_status_counts()
 
     def _update_table_row(self, task_id: int, data: dict[str, Any]) -> None:
         """更新模型中的任务数据，由视图自动重绘"""
         self.table_model.update_task_data(task_id, data)
 
-    @Slot(int, str)
-    def _on_log(self, task_id, msg):
-        # 如果日志窗口打开，实时更新
-        if task_id in self.active_log_dialogs:
-            self.active_log_dialogs[task_id].append_log(msg)
+    @Slot(int, list)
+    def _on_log_chunk(self, task_id: int, entries: list[tuple[Optional[int], str]]) -> None:
+        dialog = self.active_log_dialogs.get(task_id)
+        if dialog is not None:
+            dialog.append_logs(entries)
+
+    @Slot(int)
+    def _on_log_reset(self, task_id: int) -> None:
+        dialog = self.active_log_dialogs.get(task_id)
+        if dialog is not None:
+            dialog.reset_logs()
 
     def closeEvent(self, event) -> None:  # type: ignore[override]
         """窗口关闭事件处理"""
@@ -549,30 +819,78 @@ class MainWindow(QMainWindow):
         self.proxy_model.setFilterFixedString(text.strip())
 
 
-def run_gui():
-    app = QApplication(sys.argv)
-    db = Database()
-    scheduler = DownloadScheduler(db)
+def run_gui(import_path: Optional[str] = None, metrics_file: Optional[str] = None):
+    with profiling.phase("QApplication"):
+        app = QApplication(sys.argv)
+    # 同一配置目录只允许一个图形界面运行（cli 已先尝试把参数转发给运行中的窗口）；
+    # 守护进程可以同时运行，两者通过任务租约共用数据库
+    lock = acquire_instance_lock()
+    if lock is None:
+        QMessageBox.warning(None, "yt-dlp GUI", "已有一个窗口正在运行。")
+        sys.exit(1)
+    with profiling.phase("Database.__init__"):
+        db = Database()
+    info_cache = InfoCache()
+    scheduler = DownloadScheduler(db, info_cache=info_cache)
+
+    subscriptions = SubscriptionManager(db, scheduler)
 
     # 绑定生命周期（当事件循环正常退出时，在 app 销毁前触发）
+    app.aboutToQuit.connect(subscriptions.shutdown)
     app.aboutToQuit.connect(scheduler.shutdown)
+    app.aboutToQuit.connect(info_cache.close)
     app.aboutToQuit.connect(db.close)
+    app.aboutToQuit.connect(shutdown_log_writer)
 
     try:
-        window = MainWindow(db, scheduler)
-        window.show()
+        with profiling.phase("MainWindow.__init__"):
+            window = MainWindow(db, scheduler, subscriptions=subscriptions)
+        with profiling.phase("show"):
+            window.show()
+        control = ControlServer(db, scheduler)
+        control.activate_requested.connect(window.bring_to_front)
+        if control.listen():
+            app.aboutToQuit.connect(control.close)
+        else:
+            print(f"本地控制接口启动失败: {control.name}", file=sys.stderr)
+        if metrics_file:
+            metrics.start_export(metrics_file, app)
+        # 主窗口绘制完成后再加载图标字体与 yt-dlp
+        QTimer.singleShot(0, window.finish_startup)
+        profiler = profiling.get_profiler()
+        if profiler is not None and profiler.exit_after_startup:
+            QTimer.singleShot(0, app.quit)
+        subscriptions.start()
+        # 上次运行遗留的排队任务重新交给调度器，等待重试的任务按计划时间继续等待
+        scheduler.resume_all_queued()
+        scheduler.resume_retrying()
+        if import_path:
+            preset = db.get_presets()[0]
+            template = DownloadTask(
+                url="",
+                save_path=get_default_download_path(),
+                format_preset=preset.selector,
+                preset_id=preset.id,
+                audio_format=preset.audio_format,
+            )
+            window.import_urls(lambda: open_url_lines(import_path), template)
         sys.exit(app.exec())
     finally:
         # 双重保障，确保在非 GUI 环境下或在异常退出时也能正确释放资源
+        subscriptions.shutdown()
         scheduler.shutdown()
+        info_cache.close()
         db.close()
-
-
-@click.command()
-@click.version_option(version=__version__)
-def cli() -> None:
-    run_gui()
+        shutdown_log_writer()
+        lock.unlock()
+        if metrics_file:
+            metrics.write_prometheus(metrics_file)
+        report = profiling.stop_profiling()
+        if report is not None:
+            print(f"剖析报告已写入: {report['output']}", file=sys.stderr)
 
 
 if __name__ == "__main__":
+    from .cli import cli
+
     cli()
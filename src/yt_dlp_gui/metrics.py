@@ -0,0 +1,371 @@
+"""运行时指标
+
+命令行 --metrics / --metrics-file 启用 MetricsRegistry 后，调度器、下载 Worker 与数据库
+工作线程通过 counter() / gauge() / histogram() 取得指标并更新，主窗口的指标面板与
+Prometheus 文本文件导出读取同一份数据：
+
+    yt_dlp_gui_download_bytes_total 1.2e+09
+    yt_dlp_gui_db_queue_wait_seconds_bucket{mode="async",le="0.005"} 9731
+
+未启用时这些函数返回共享的空指标，更新操作是空方法调用；需要额外计时或复制数据的
+调用方在创建时用 enabled() 判断一次，之后不再产生任何开销。
+指标在创建对象时取得，因此必须在创建 Database 与调度器之前调用 enable()。
+"""
+
+import bisect
+import math
+import os
+import sys
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Sequence, Union
+
+from .config import METRICS_EXPORT_INTERVAL_MS, METRICS_LATENCY_BUCKETS
+
+if TYPE_CHECKING:
+    from PySide6.QtCore import QObject, QTimer
+
+# 导出为 Prometheus 格式时所有指标名称的前缀
+PREFIX = "yt_dlp_gui_"
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class Counter:
+    """只增不减的计数器（线程安全）"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """可增可减的当前值；传入 fn 时在读取时调用 fn 取值（如队列长度），更新时无开销"""
+
+    def __init__(self, fn: Optional[Callable[[], float]] = None) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._fn = fn
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    @property
+    def value(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class Histogram:
+    """按固定桶统计观测值的分布（线程安全），quantile() 在桶内线性插值估算分位数"""
+
+    def __init__(self, buckets: Sequence[float] = METRICS_LATENCY_BUCKETS) -> None:
+        self._lock = threading.Lock()
+        self.buckets = tuple(sorted(buckets))
+        # 每个桶（含最后的 +Inf）落入的观测数（非累计）
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative_counts(self) -> list[int]:
+        """各桶上限（最后一个为 +Inf）对应的累计观测数"""
+        with self._lock:
+            counts = list(self._counts)
+        total, result = 0, []
+        for count in counts:
+            total += count
+            result.append(total)
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """估算 q 分位数；落在 +Inf 桶中时返回最大的有限桶上限"""
+        cumulative = self.cumulative_counts()
+        total = cumulative[-1]
+        if total == 0:
+            return 0.0
+        rank = q * total
+        lower, below = 0.0, 0
+        for upper, count in zip(self.buckets, cumulative):
+            if count >= rank:
+                in_bucket = count - below
+                return lower + (upper - lower) * ((rank - below) / in_bucket if in_bucket else 0)
+            lower, below = upper, count
+        return self.buckets[-1] if self.buckets else 0.0
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class _NullMetric:
+    """未启用指标时返回的空指标，所有更新都是空操作"""
+
+    value = 0.0
+    count = 0
+    sum = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def dec(self, amount: float = 1.0) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+NULL_METRIC = _NullMetric()
+
+
+class MetricFamily:
+    """同名指标：类型、说明以及按标签区分的各个子指标"""
+
+    def __init__(self, name: str, kind: str, help: str) -> None:
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.children: dict[LabelKey, Metric] = {}
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._families: dict[str, MetricFamily] = {}
+
+    def _get(
+        self,
+        name: str,
+        kind: str,
+        help: str,
+        labels: dict[str, object],
+        factory: Callable[[], Metric],
+    ) -> Metric:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, kind, help)
+            elif family.kind != kind:
+                raise ValueError(f"指标 {name} 已注册为 {family.kind}")
+            metric = family.children.get(key)
+            if metric is None:
+                metric = family.children[key] = factory()
+            return metric
+
+    def counter(self, name: str, help: str = "", **labels: object) -> Counter:
+        metric = self._get(name, COUNTER, help, labels, Counter)
+        assert isinstance(metric, Counter)
+        return metric
+
+    def gauge(self, name: str, help: str = "", **labels: object) -> Gauge:
+        metric = self._get(name, GAUGE, help, labels, Gauge)
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def gauge_callback(
+        self, name: str, help: str, fn: Callable[[], float], **labels: object
+    ) -> Gauge:
+        """注册读取时才计算的指标；同名同标签再次注册时替换为新的 fn"""
+        self.remove(name, **labels)
+        metric = self._get(name, GAUGE, help, labels, lambda: Gauge(fn))
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+        **labels: object,
+    ) -> Histogram:
+        metric = self._get(name, HISTOGRAM, help, labels, lambda: Histogram(buckets))
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def remove(self, name: str, **labels: object) -> None:
+        """删除一个子指标（如已结束任务的速度）"""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is not None:
+                family.children.pop(key, None)
+
+    def get(self, name: str, **labels: object) -> Optional[Metric]:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            return family.children.get(key) if family is not None else None
+
+    def collect(self) -> list[tuple[MetricFamily, list[tuple[LabelKey, Metric]]]]:
+        """按名称排序的指标快照（子指标列表为副本，可在其他线程继续更新时遍历）"""
+        with self._lock:
+            return [
+                (family, sorted(family.children.items()))
+                for _, family in sorted(self._families.items())
+            ]
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: list[str] = []
+        for family, children in self.collect():
+            name = PREFIX + family.name
+            if family.help:
+                lines.append(f"# HELP {name} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {name} {family.kind}")
+            for key, metric in children:
+                if isinstance(metric, Histogram):
+                    bounds = [_format_value(b) for b in metric.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, metric.cumulative_counts()):
+                        labels = _format_labels(key + (("le", bound),))
+                        lines.append(f"{name}_bucket{labels} {count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(metric.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {metric.count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(metric.value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """写出 Prometheus 文本文件（先写临时文件再替换，供 node_exporter textfile 收集）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: Iterable[tuple[str, str]]) -> str:
+    pairs = [f'{k}="{_escape_label(v)}"' for k, v in key]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def enable() -> MetricsRegistry:
+    """启用指标（已启用时返回现有的注册表）"""
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
+
+
+def disable() -> None:
+    global _registry
+    _registry = None
+
+
+def enabled() -> bool:
+    return _registry is not None
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    return _registry
+
+
+def counter(name: str, help: str = "", **labels: object) -> Union[Counter, _NullMetric]:
+    if _registry is None:
+        return NULL_METRIC
+    return _registry.counter(name, help, **labels)
+
+
+def gauge(name: str, help: str = "", **labels: object) -> Union[Gauge, _NullMetric]:
+    if _registry is None:
+        return NULL_METRIC
+    return _registry.gauge(name, help, **labels)
+
+
+def gauge_callback(name: str, help: str, fn: Callable[[], float], **labels: object) -> None:
+    if _registry is not None:
+        _registry.gauge_callback(name, help, fn, **labels)
+
+
+def histogram(
+    name: str,
+    help: str = "",
+    buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+    **labels: object,
+) -> Union[Histogram, _NullMetric]:
+    if _registry is None:
+        return NULL_METRIC
+    return _registry.histogram(name, help, buckets, **labels)
+
+
+def remove(name: str, **labels: object) -> None:
+    if _registry is not None:
+        _registry.remove(name, **labels)
+
+
+def write_prometheus(path: str) -> None:
+    """立即写出一次指标文件（退出前调用）；未启用指标或写入失败时忽略"""
+    if _registry is None:
+        return
+    try:
+        _registry.write_prometheus(path)
+    except OSError as e:
+        print(f"写入指标文件失败: {e}", file=sys.stderr)
+
+
+def start_export(
+    path: str, parent: Optional["QObject"] = None, interval_ms: int = METRICS_EXPORT_INTERVAL_MS
+) -> Optional["QTimer"]:
+    """定期把指标写入 Prometheus 文本文件；未启用指标时返回 None"""
+    from PySide6.QtCore import QTimer
+
+    if _registry is None:
+        return None
+    timer = QTimer(parent)
+    timer.setInterval(interval_ms)
+    timer.timeout.connect(lambda: write_prometheus(path))
+    timer.start()
+    write_prometheus(path)
+    return timer
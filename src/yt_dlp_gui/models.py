@@ -1,10 +1,15 @@
 from dataclasses import asdict, dataclass
 from typing import Any, Optional
 
-import qtawesome as qta
 from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt
 from PySide6.QtGui import QIcon
 
+from .icons import icon, icons_loaded
+from .utils import format_size
+
+# 各流与合并阶段状态的显示文本
+_STAGE_TEXT = {"pending": "等待", "running": "进行中", "finished": "完成"}
+
 
 @dataclass
 class DownloadTask:
@@ -26,6 +31,18 @@ class DownloadTask:
     max_downloads: Optional[int] = None
     impersonate: Optional[str] = None
     no_cookies: bool = False
+    # 视频与音频分开选择时同时下载各个流
+    parallel_streams: bool = False
+    # 引用的格式预设：数据库只保存预设 ID，读取时 format_preset 与 audio_format 取自预设
+    preset_id: Optional[int] = None
+    # 下载后转换的音频格式（来自格式预设），None 表示不转换
+    audio_format: Optional[str] = None
+    # 重复检测用：规范化后的链接与 "提取器:视频 ID"（解析后才能确定）
+    canonical_key: Optional[str] = None
+    video_key: Optional[str] = None
+    # 临时错误已自动重试的次数与下次重试时间 (Unix 时间戳)
+    retry_count: int = 0
+    next_retry_at: Optional[float] = None
     created_at: Optional[str] = None
 
     @classmethod
@@ -52,7 +69,8 @@ class DownloadTask:
             speed=data.get("speed") if data.get("speed") is not None else "--",
             eta=data.get("eta") if data.get("eta") is not None else "--",
             save_path=data.get("save_path", ""),
-            format_preset=data.get("format_preset", ""),
+            # 引用预设的任务取预设当前的格式表达式（见 Database 中的任务查询）
+            format_preset=data.get("preset_selector") or data.get("format_preset") or "",
             proxy=data.get("proxy") or None,  # Treat empty string as None
             concurrent_fragments=concurrent_fragments,
             write_subs=bool(data.get("write_subs", False)),
@@ -62,6 +80,13 @@ class DownloadTask:
             max_downloads=max_downloads,
             impersonate=data.get("impersonate") or None,
             no_cookies=bool(data.get("no_cookies", False)),
+            parallel_streams=bool(data.get("parallel_streams", False)),
+            preset_id=data.get("preset_id"),
+            audio_format=data.get("preset_audio_format") or data.get("audio_format") or None,
+            canonical_key=data.get("canonical_key"),
+            video_key=data.get("video_key"),
+            retry_count=int(data.get("retry_count") or 0),
+            next_retry_at=data.get("next_retry_at"),
             created_at=data.get("created_at"),
         )
 
@@ -69,6 +94,86 @@ class DownloadTask:
         return asdict(self)
 
 
+@dataclass
+class Subscription:
+    """定期同步的频道或播放列表"""
+
+    url: str
+    save_path: str
+    format_preset: str
+    id: Optional[int] = None
+    title: Optional[str] = None
+    # 新任务使用的格式预设，设置时 format_preset 取自预设
+    preset_id: Optional[int] = None
+    interval: int = 3600  # 检查间隔（秒）
+    enabled: bool = True
+    next_check_at: float = 0.0  # 下次检查的时间戳
+    last_checked_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Subscription":
+        return cls(
+            id=data.get("id"),
+            url=data.get("url", ""),
+            title=data.get("title"),
+            save_path=data.get("save_path", ""),
+            format_preset=data.get("preset_selector") or data.get("format_preset") or "",
+            preset_id=data.get("preset_id"),
+            interval=int(data.get("interval") or 3600),
+            enabled=bool(data.get("enabled", True)),
+            next_check_at=float(data.get("next_check_at") or 0.0),
+            last_checked_at=data.get("last_checked_at"),
+            last_error=data.get("last_error"),
+        )
+
+
+@dataclass
+class FormatPreset:
+    """格式预设：按筛选条件生成格式表达式，或直接使用自定义的格式表达式
+
+    selector 是校验通过后实际使用的格式表达式（见 presets.validate_preset），
+    任务与订阅只保存预设 ID，读取时取预设当前的 selector。
+    """
+
+    name: str
+    id: Optional[int] = None
+    # 筛选条件：文件扩展名、编码（仅音频时为音频编码）、最大高度、仅音频、单个流的大小上限（字节）
+    ext: Optional[str] = None
+    codec: Optional[str] = None
+    max_height: Optional[int] = None
+    audio_only: bool = False
+    max_filesize: Optional[int] = None
+    # 自定义格式表达式，设置时不能同时设置筛选条件
+    format_spec: Optional[str] = None
+    # 下载后用 FFmpeg 转换为该音频格式（如 mp3），None 表示不转换
+    audio_format: Optional[str] = None
+    selector: str = ""
+    builtin: bool = False
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(
+            self.ext or self.codec or self.max_height or self.audio_only or self.max_filesize
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "FormatPreset":
+        return cls(
+            id=data.get("id"),
+            name=data.get("name", ""),
+            ext=data.get("ext") or None,
+            codec=data.get("codec") or None,
+            max_height=data.get("max_height") or None,
+            audio_only=bool(data.get("audio_only", False)),
+            max_filesize=data.get("max_filesize") or None,
+            format_spec=data.get("format_spec") or None,
+            audio_format=data.get("audio_format") or None,
+            selector=data.get("selector") or "",
+            builtin=bool(data.get("builtin", False)),
+        )
+
+
 class TaskTableModel(QAbstractTableModel):
     """数据模型，用于在 QTableView 中展示和管理 DownloadTask 列表"""
 
@@ -76,6 +181,8 @@ class TaskTableModel(QAbstractTableModel):
         super().__init__()
         self._tasks = tasks or []
         self._icon_cache: dict[tuple[str, str], QIcon] = {}
+        # 视频与音频分开下载的任务：task_id → (各流进度, 合并阶段状态)，悬停时显示
+        self._stream_details: dict[int, tuple[list[dict[str, Any]], Optional[str]]] = {}
 
     def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
         return len(self._tasks)
@@ -84,11 +191,23 @@ class TaskTableModel(QAbstractTableModel):
         return 5
 
     def _get_cached_icon(self, name: str, color: str) -> QIcon:
+        # 图标字体加载前不显示图标，加载完成后由 refresh_icons() 通知视图重绘
+        if not icons_loaded():
+            return QIcon()
         key = (name, color)
         if key not in self._icon_cache:
-            self._icon_cache[key] = qta.icon(name, color=color)
+            self._icon_cache[key] = icon(name, color=color)
         return self._icon_cache[key]
 
+    def refresh_icons(self) -> None:
+        """图标加载完成后重绘图标所在的列"""
+        if self._tasks:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(len(self._tasks) - 1, 1),
+                [Qt.ItemDataRole.DecorationRole],
+            )
+
     def _get_status_icon(self, status: str) -> QIcon:
         if status == "downloading":
             return self._get_cached_icon("fa5s.download", "#FFFFFF")
@@ -98,8 +217,12 @@ class TaskTableModel(QAbstractTableModel):
             return self._get_cached_icon("fa5s.exclamation-circle", "#FFFFFF")
         elif status == "merging":
             return self._get_cached_icon("fa5s.layer-group", "#FFFFFF")
+        elif status == "postprocessing":
+            return self._get_cached_icon("fa5s.cogs", "#FFFFFF")
         elif status == "cancelled":
             return self._get_cached_icon("fa5s.stop-circle", "#FFFFFF")
+        elif status == "retrying":
+            return self._get_cached_icon("fa5s.redo", "#FFFFFF")
         return self._get_cached_icon("fa5s.clock", "#FFFFFF")
 
     def data(
@@ -134,6 +257,11 @@ class TaskTableModel(QAbstractTableModel):
         elif role == Qt.ItemDataRole.UserRole:
             return task.id
 
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            details = self._stream_details.get(task.id) if task.id is not None else None
+            if details is not None:
+                return format_stream_details(*details)
+
         elif role == Qt.ItemDataRole.TextAlignmentRole:
             if col in (1, 3, 4):
                 return Qt.AlignmentFlag.AlignCenter
@@ -162,6 +290,15 @@ class TaskTableModel(QAbstractTableModel):
         self._tasks.append(task)
         self.endInsertRows()
 
+    def add_tasks(self, tasks: list[DownloadTask]) -> None:
+        """批量追加任务，只发出一次行插入通知"""
+        if not tasks:
+            return
+        row = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+        self._tasks.extend(tasks)
+        self.endInsertRows()
+
     def remove_task(self, task_id: int) -> None:
         row = self.find_row_by_id(task_id)
         if row is not None:
@@ -169,6 +306,39 @@ class TaskTableModel(QAbstractTableModel):
             self._tasks.pop(row)
             self.endRemoveRows()
 
+    def remove_tasks(self, task_ids: list[int]) -> None:
+        """批量移除任务：被删除的行连续时发出一次范围删除，否则整体重置一次模型"""
+        ids = set(task_ids)
+        rows = [row for row, task in enumerate(self._tasks) if task.id in ids]
+        if not rows:
+            return
+        first, last = rows[0], rows[-1]
+        if last - first + 1 == len(rows):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._tasks[first : last + 1]
+            self.endRemoveRows()
+        else:
+            self.beginResetModel()
+            self._tasks = [task for task in self._tasks if task.id not in ids]
+            self.endResetModel()
+
+    def update_tasks_data(self, task_ids: list[int], updates: dict[str, Any]) -> None:
+        """批量更新多个任务的相同字段，只发出一次覆盖受影响行的 dataChanged"""
+        ids = set(task_ids)
+        rows = []
+        for row, task in enumerate(self._tasks):
+            if task.id in ids:
+                for key, value in updates.items():
+                    setattr(task, key, value)
+                rows.append(row)
+        if not rows:
+            return
+        self.dataChanged.emit(
+            self.index(rows[0], 0),
+            self.index(rows[-1], 4),
+            [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.DecorationRole],
+        )
+
     def update_task_data(self, task_id: int, updates: dict[str, Any]) -> None:
         row = self.find_row_by_id(task_id)
         if row is None:
@@ -183,7 +353,38 @@ class TaskTableModel(QAbstractTableModel):
             start_index, end_index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.DecorationRole]
         )
 
+    def set_stream_details(
+        self, task_id: int, streams: list[dict[str, Any]], merge: Optional[str]
+    ) -> None:
+        """记录任务各流的进度（提示文本在悬停时才生成，不触发重绘）"""
+        self._stream_details[task_id] = (streams, merge)
+
+    def clear_stream_details(self, task_ids: list[int]) -> None:
+        for task_id in task_ids:
+            self._stream_details.pop(task_id, None)
+
     def set_tasks(self, tasks: list[DownloadTask]) -> None:
         self.beginResetModel()
         self._tasks = list(tasks)
         self.endResetModel()
+
+
+def format_stream_details(streams: list[dict[str, Any]], merge: Optional[str]) -> str:
+    """多流任务的提示文本：每个流一行（大小与百分比），最后一行为合并阶段"""
+    lines = []
+    for stream in streams:
+        total, downloaded = stream.get("total"), stream.get("downloaded") or 0
+        state = stream.get("state")
+        if state == "pending":
+            progress = _STAGE_TEXT[state]
+        elif total:
+            progress = (
+                f"{format_size(downloaded)} / {format_size(total)} "
+                f"({min(downloaded / total, 1.0) * 100:.0f}%)"
+            )
+        else:
+            progress = format_size(downloaded)
+        lines.append(f"{stream.get('label')}: {progress}")
+    if merge is not None:
+        lines.append(f"合并: {_STAGE_TEXT.get(merge, merge)}")
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+"""后处理队列
+
+合并音视频、转封装、字幕转换等后处理由 ffmpeg 完成，主要占用 CPU，而下载槽位只受网络
+限制。调度器创建的 Worker 推迟 yt-dlp 的后处理（defer_postprocessing）：原始的流下载完成后
+Worker 发出 downloaded 信号并结束下载线程，调度器随即释放下载槽位，把 Worker 交给
+PostProcessQueue。队列在独立的线程池中执行 Worker.run_postprocessing()，线程数单独设置
+（默认按 CPU 核心数），完成后 Worker 照常发出 finished 信号。
+"""
+
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from PySide6.QtCore import QRunnable, QThreadPool
+
+from .config import POSTPROCESS_MAX_CONCURRENT, POSTPROCESS_SHUTDOWN_WAIT_MS
+
+if TYPE_CHECKING:
+    from .worker import DownloadWorker
+
+
+class PostProcessJob(QRunnable):
+    """在线程池中执行一个任务推迟的后处理"""
+
+    def __init__(self, queue: "PostProcessQueue", worker: "DownloadWorker") -> None:
+        super().__init__()
+        self.queue = queue
+        self.worker = worker
+
+    def run(self) -> None:
+        self.queue._mark_running(self.worker.task_id)
+        self.worker.run_postprocessing()
+
+
+class PostProcessQueue:
+    """等待与正在执行后处理的任务（在主线程中提交与结束，计数可从任意线程读取）"""
+
+    def __init__(self, max_concurrent: int = POSTPROCESS_MAX_CONCURRENT) -> None:
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max(1, max_concurrent))
+        self.workers: dict[int, "DownloadWorker"] = {}
+        self._running: set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def max_concurrent(self) -> int:
+        return self.pool.maxThreadCount()
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self.workers
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+    @property
+    def running(self) -> int:
+        """正在执行后处理的任务数"""
+        with self._lock:
+            return len(self._running)
+
+    @property
+    def waiting(self) -> int:
+        """等待线程池空闲的任务数"""
+        return len(self.workers) - self.running
+
+    def get(self, task_id: int) -> Optional["DownloadWorker"]:
+        return self.workers.get(task_id)
+
+    def submit(self, worker: "DownloadWorker") -> None:
+        """提交 Worker 推迟的后处理，线程池已满时排队等待"""
+        self.workers[worker.task_id] = worker
+        self.pool.start(PostProcessJob(self, worker))
+
+    def finish(self, task_id: int) -> Optional["DownloadWorker"]:
+        """Worker 发出 finished 后移除该任务，返回其 Worker（不在队列中时返回 None）"""
+        with self._lock:
+            self._running.discard(task_id)
+        return self.workers.pop(task_id, None)
+
+    def _mark_running(self, task_id: int) -> None:
+        with self._lock:
+            self._running.add(task_id)
+
+    def shutdown(self, timeout_ms: int = POSTPROCESS_SHUTDOWN_WAIT_MS) -> None:
+        """取消全部后处理（正在执行的 ffmpeg 步骤结束后中断），等待线程池空闲"""
+        for worker in list(self.workers.values()):
+            worker.cancel()
+        self.pool.waitForDone(timeout_ms)
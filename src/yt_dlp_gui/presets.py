@@ -0,0 +1,195 @@
+"""格式预设与编译后的格式选择器缓存
+
+格式预设保存在数据库中（见 Database.add_preset），任务只引用预设 ID。预设按扩展名、
+编码、最大高度、仅音频与大小上限生成格式表达式，或直接使用自定义的表达式；保存前由
+validate_preset() 生成并编译一次，表达式错误在添加预设时就报告，而不是等到下载时。
+
+yt-dlp 在每个 YoutubeDL 创建时把 format 参数解析、编译为选择函数。compiled_selector()
+按 (表达式, 影响选择结果的参数) 缓存编译结果，Worker 把缓存的选择函数直接作为 format
+参数交给 yt-dlp，同一表达式在进程中只编译一次。
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+from .config import (
+    AUDIO_CONVERT_FORMATS,
+    FORMAT_AUDIO_EXTS,
+    FORMAT_PRESET_AUDIO_FORMATS,
+    FORMAT_PRESETS,
+)
+from .models import FormatPreset
+
+if TYPE_CHECKING:
+    import yt_dlp
+
+# 编译出的选择函数会读取的 YoutubeDL 参数，参数不同的编译结果分别缓存
+_SELECTOR_PARAMS = (
+    "merge_output_format",
+    "prefer_free_formats",
+    "allow_unplayable_formats",
+    "check_formats",
+    "allow_multiple_video_streams",
+    "allow_multiple_audio_streams",
+)
+
+# 当前线程中正在选择格式的 YoutubeDL（见 selecting_with）
+_active = threading.local()
+
+
+def builtin_presets() -> list[FormatPreset]:
+    """config.FORMAT_PRESETS 中的内置预设（首次启动时写入数据库）"""
+    return [
+        FormatPreset(
+            name=name,
+            format_spec=spec,
+            audio_format=FORMAT_PRESET_AUDIO_FORMATS.get(name),
+            selector=spec,
+            builtin=True,
+        )
+        for name, spec in FORMAT_PRESETS.items()
+    ]
+
+
+def _alternatives(*specs: str) -> str:
+    """以 / 连接回退选项，去掉重复的"""
+    return "/".join(dict.fromkeys(specs))
+
+
+def build_format_spec(preset: FormatPreset) -> str:
+    """按预设的筛选条件生成格式表达式
+
+    扩展名与编码是偏好：不可用时依次回退到只满足高度与大小上限的格式；
+    高度与大小上限是硬性限制，任何回退选项都不会超出。
+    """
+    size = ""
+    if preset.max_filesize:
+        # 大小未知的格式不排除；大多数网站只给出估算大小
+        size = f"[filesize<?{preset.max_filesize}][filesize_approx<?{preset.max_filesize}]"
+
+    if preset.audio_only:
+        preferred = size
+        if preset.ext:
+            preferred += f"[ext={preset.ext}]"
+        if preset.codec:
+            preferred += f"[acodec^={preset.codec}]"
+        return _alternatives(f"bestaudio{preferred}", f"bestaudio{size}", f"best{size}")
+
+    limits = size + (f"[height<=?{preset.max_height}]" if preset.max_height else "")
+    video = limits
+    audio = size
+    if preset.ext:
+        video += f"[ext={preset.ext}]"
+        if preset.ext in FORMAT_AUDIO_EXTS:
+            audio += f"[ext={FORMAT_AUDIO_EXTS[preset.ext]}]"
+    if preset.codec:
+        video += f"[vcodec^={preset.codec}]"
+    return _alternatives(
+        f"bestvideo{video}+bestaudio{audio}",
+        f"bestvideo{limits}+bestaudio{size}",
+        f"best{limits}",
+    )
+
+
+def validate_format_spec(spec: str) -> str:
+    """编译一次格式表达式，无效时抛出 ValueError；返回去掉首尾空白的表达式"""
+    spec = spec.strip()
+    if not spec:
+        raise ValueError("格式表达式不能为空")
+    try:
+        compiled_selector(spec)
+    except (SyntaxError, ValueError) as e:
+        raise ValueError(f"格式表达式无效: {e}") from e
+    return spec
+
+
+def validate_preset(preset: FormatPreset) -> FormatPreset:
+    """检查预设并生成、编译其格式表达式，返回填好 selector 的预设；无效时抛出 ValueError"""
+    name = preset.name.strip()
+    if not name:
+        raise ValueError("预设名称不能为空")
+    if preset.max_height is not None and preset.max_height <= 0:
+        raise ValueError("最大高度必须是正整数")
+    if preset.max_filesize is not None and preset.max_filesize <= 0:
+        raise ValueError("大小上限必须是正整数")
+    if preset.format_spec and preset.has_filters:
+        raise ValueError("自定义格式表达式与筛选条件不能同时设置")
+    if not preset.format_spec and not preset.has_filters:
+        raise ValueError("请设置筛选条件或自定义格式表达式")
+    if preset.audio_format and preset.audio_format not in AUDIO_CONVERT_FORMATS:
+        raise ValueError(f"不支持的音频格式: {preset.audio_format}")
+
+    if preset.format_spec:
+        selector = validate_format_spec(preset.format_spec)
+        return replace(preset, name=name, format_spec=selector, selector=selector)
+    return replace(preset, name=name, selector=validate_format_spec(build_format_spec(preset)))
+
+
+def describe_preset(preset: FormatPreset) -> str:
+    """预设的简短说明，如「mp4 · ≤1080p · 转为 mp3」"""
+    if preset.format_spec:
+        parts = [preset.format_spec]
+    else:
+        parts = ["仅音频" if preset.audio_only else "视频"]
+        if preset.ext:
+            parts.append(preset.ext)
+        if preset.codec:
+            parts.append(preset.codec)
+        if preset.max_height:
+            parts.append(f"≤{preset.max_height}p")
+        if preset.max_filesize:
+            parts.append(f"每个流 ≤{preset.max_filesize // (1024 * 1024)} MiB")
+    if preset.audio_format:
+        parts.append(f"转为 {preset.audio_format}")
+    return " · ".join(parts)
+
+
+@contextmanager
+def selecting_with(ydl: "yt_dlp.YoutubeDL") -> Iterator[None]:
+    """在此期间，当前线程中缓存的选择函数需要试下载格式时改用 ydl
+
+    编译出的选择函数属于编译它的 YoutubeDL。个别网站的格式需要先试下载确认可用，
+    这一步应使用本次下载的 YoutubeDL（代理、Cookies 与日志），而不是编译用的实例。
+    """
+    previous = getattr(_active, "ydl", None)
+    _active.ydl = ydl
+    try:
+        yield
+    finally:
+        _active.ydl = previous
+
+
+@functools.lru_cache(maxsize=None)
+def _compiler(values: tuple[Any, ...]) -> "yt_dlp.YoutubeDL":
+    """只用于编译格式表达式的 YoutubeDL，每组选择参数一个"""
+    # 从子模块导入：测试中替换 yt_dlp.YoutubeDL 时不影响这里
+    from yt_dlp.YoutubeDL import YoutubeDL
+
+    class SelectorCompiler(YoutubeDL):
+        def _check_formats(self, formats, warning=True):  # type: ignore[no-untyped-def]
+            ydl = getattr(_active, "ydl", None)
+            if ydl is None:
+                return super()._check_formats(formats, warning)
+            return ydl._check_formats(formats, warning)
+
+    params = {k: v for k, v in zip(_SELECTOR_PARAMS, values) if v is not None}
+    return SelectorCompiler({"quiet": True, "no_warnings": True, **params})
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(spec: str, values: tuple[Any, ...]) -> Callable[[dict[str, Any]], Any]:
+    return _compiler(values).build_format_selector(spec)
+
+
+def compiled_selector(
+    spec: str, params: Optional[dict[str, Any]] = None
+) -> Callable[[dict[str, Any]], Any]:
+    """返回 spec 编译后的格式选择函数（可直接作为 YoutubeDL 的 format 参数），结果被缓存
+
+    params 为本次下载的 YoutubeDL 参数，其中影响选择结果的部分（合并格式等）是缓存键的一部分。
+    """
+    values = tuple((params or {}).get(key) for key in _SELECTOR_PARAMS)
+    return _compile(spec, values)
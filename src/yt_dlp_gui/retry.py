@@ -0,0 +1,145 @@
+"""下载失败的重试策略
+
+调度器在任务失败时用 classify_error 判断错误类型：
+- TRANSIENT：超时、连接中断、5xx 等临时错误，按带抖动的指数退避延迟重试；
+- RATE_LIMITED：429，除了退避外还让同一主机进入冷却期，冷却期内该主机的任务都不启动；
+- PERMANENT：私有视频、地区限制、不支持的链接等，重试没有意义，直接标记为错误。
+无法识别的错误按 PERMANENT 处理，避免对站点反复发起无效请求。
+"""
+
+import random
+import re
+from typing import Callable, Iterator, Optional
+from urllib.parse import urlsplit
+
+from .config import (
+    RETRY_BASE_DELAY,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY,
+    RETRY_RATE_LIMIT_COOLDOWN,
+)
+
+TRANSIENT = "transient"
+RATE_LIMITED = "rate_limited"
+PERMANENT = "permanent"
+
+# 视为临时错误的 HTTP 状态码（429 单独处理）
+_TRANSIENT_STATUSES = {408, 500, 502, 503, 504, 520, 521, 522, 524}
+
+# 只有错误信息可用时（如 yt-dlp 只给出文本的 DownloadError）按关键字判断
+_RATE_LIMITED_PATTERN = re.compile(r"HTTP Error 429|Too Many Requests", re.IGNORECASE)
+_TRANSIENT_PATTERN = re.compile(
+    r"HTTP Error 5\d\d|HTTP Error 408|timed out|timeout|Connection (reset|refused|aborted)"
+    r"|Temporary failure|Remote end closed|IncompleteRead|Network is unreachable",
+    re.IGNORECASE,
+)
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """依次给出错误本身及其包装的底层原因（DownloadError.exc_info、ExtractorError.cause 等）"""
+    seen: set[int] = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        exc_info = getattr(current, "exc_info", None)
+        cause = getattr(current, "cause", None)
+        if exc_info and isinstance(exc_info[1], BaseException):
+            current = exc_info[1]
+        elif isinstance(cause, BaseException):
+            current = cause
+        else:
+            current = current.__cause__ or current.__context__
+
+
+def classify_error(error: BaseException) -> str:
+    # 任务失败时 yt_dlp 早已导入；放在函数内避免调度器在启动时加载 yt_dlp
+    from yt_dlp.networking.exceptions import HTTPError, TransportError
+    from yt_dlp.utils import ExtractorError, GeoRestrictedError, UnsupportedError
+
+    for exc in _error_chain(error):
+        if isinstance(exc, HTTPError):
+            if exc.status == 429:
+                return RATE_LIMITED
+            return TRANSIENT if exc.status in _TRANSIENT_STATUSES else PERMANENT
+        if isinstance(exc, (GeoRestrictedError, UnsupportedError)):
+            return PERMANENT
+        if isinstance(exc, (TransportError, TimeoutError, ConnectionError)):
+            return TRANSIENT
+
+    message = str(error)
+    if _RATE_LIMITED_PATTERN.search(message):
+        return RATE_LIMITED
+    if _TRANSIENT_PATTERN.search(message):
+        return TRANSIENT
+    for exc in _error_chain(error):
+        # 非预期的提取错误（如页面结构临时变化或网络抖动）值得再试一次
+        if isinstance(exc, ExtractorError) and not exc.expected:
+            return TRANSIENT
+    return PERMANENT
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """429 响应中 Retry-After 头给出的等待秒数"""
+    from yt_dlp.networking.exceptions import HTTPError
+
+    for exc in _error_chain(error):
+        if isinstance(exc, HTTPError):
+            value = exc.response.headers.get("Retry-After")
+            if value and value.strip().isdigit():
+                return float(value)
+    return None
+
+
+def host_of(url: str) -> str:
+    host = urlsplit(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class RetryPolicy:
+    """带抖动的指数退避：第 n 次重试等待 [d/2, d]，其中 d = min(最大延迟, 基础延迟 × 2^(n-1))"""
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        rate_limit_cooldown: float = RETRY_RATE_LIMIT_COOLDOWN,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.rng = rng
+
+    def should_retry(self, kind: str, attempt: int) -> bool:
+        """attempt 为即将进行的重试序号（从 1 开始）"""
+        return kind != PERMANENT and attempt <= self.max_attempts
+
+    def delay(self, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return ceiling / 2 + self.rng() * ceiling / 2
+
+
+class HostCooldowns:
+    """记录收到 429 的主机及其冷却结束时间"""
+
+    def __init__(self) -> None:
+        self._until: dict[str, float] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._until)
+
+    def cool_down(self, host: str, until: float) -> None:
+        if host and until > self._until.get(host, 0.0):
+            self._until[host] = until
+
+    def remaining(self, host: str, now: float) -> float:
+        until = self._until.get(host)
+        if until is None:
+            return 0.0
+        if until <= now:
+            del self._until[host]
+            return 0.0
+        return until - now
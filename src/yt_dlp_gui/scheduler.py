@@ -1,40 +1,159 @@
-from typing import Any, Dict, List, Set
-
-from PySide6.QtCore import QObject, QThread, Signal, Slot
-
-from .config import remove_task_log
+import heapq
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from PySide6.QtCore import QObject, QThread, QTimer, Signal, Slot
+
+from . import metrics
+from .archive import DownloadArchive
+from .config import (
+    LEASE_HEARTBEAT_MS,
+    LEASE_TTL_SECONDS,
+    LOG_FLUSH_INTERVAL_MS,
+    METRICS_QUEUE_WAIT_BUCKETS,
+    POSTPROCESS_MAX_CONCURRENT,
+    SCHEDULER_FEED_SIZE,
+    remove_task_log,
+    remove_task_logs,
+)
 from .database import Database
+from .info_cache import InfoCache
+from .instance import make_lease_owner
 from .models import DownloadTask
-from .utils import clean_ansi
+from .postprocess import PostProcessQueue
+from .retry import RATE_LIMITED, HostCooldowns, RetryPolicy, classify_error, host_of, retry_after
+from .utils import clean_ansi, video_key_from_info
 from .worker import DownloadWorker
 
+# 已结束的任务状态：等待租约的任务变为这些状态时说明其他进程已经处理完毕
+_SETTLED_STATUSES = ("finished", "cancelled", "error")
+
 
 class DownloadScheduler(QObject):
     """下载调度管理器，负责并发控制、等待队列及线程生命周期管理"""
 
     task_added = Signal(DownloadTask)  # 发送完整的任务实体
+    tasks_added = Signal(list)  # 批量导入：发送一批 DownloadTask
     task_status_changed = Signal(int, str)  # 发送 (task_id, status)
     task_progress_changed = Signal(int, dict)  # 发送 (task_id, progress_data)
     task_title_updated = Signal(int, str)  # 发送 (task_id, title)
-    task_log_emitted = Signal(int, str)  # 发送 (task_id, log_msg)
+    task_log_chunk = Signal(int, list)  # 发送 (task_id, 一批日志 [(偏移量, 消息)])
+    task_log_reset = Signal(int)  # 已订阅日志的任务开始新一轮下载，旧日志被丢弃
     task_finished = Signal(int, bool, str)  # 发送 (task_id, success, message)
     task_deleted = Signal(int)  # 发送 task_id
-
-    def __init__(self, db: Database, max_concurrent_downloads: int = 3) -> None:
+    tasks_status_changed = Signal(list, str)  # 批量操作：发送 (task_ids, status)
+    tasks_deleted = Signal(list)  # 批量操作：发送 task_ids
+
+    def __init__(
+        self,
+        db: Database,
+        max_concurrent_downloads: int = 3,
+        info_cache: Optional[InfoCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        clock: Callable[[], float] = time.time,
+        lease_owner: Optional[str] = None,
+        worker_class: Type[DownloadWorker] = DownloadWorker,
+        max_concurrent_postprocess: int = POSTPROCESS_MAX_CONCURRENT,
+    ) -> None:
         super().__init__()
         self.db = db
         self.max_concurrent_downloads = max_concurrent_downloads
+        # 所有下载任务共享的解析结果缓存（可选）
+        self.info_cache = info_cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.clock = clock
+        # 创建下载 Worker 的类，测试中替换为连接本地假站点的子类
+        self.worker_class = worker_class
+
+        # 所有下载任务共享的数据库下载存档
+        self.archive = DownloadArchive(db)
 
+        # workers 包含下载中与后处理中的任务，threads 只包含仍在下载的任务
         self.workers: Dict[int, DownloadWorker] = {}
         self.threads: Dict[int, QThread] = {}
+        # 下载完成后在独立线程池中执行后处理，不占用下载槽位
+        self.postprocess = PostProcessQueue(max_concurrent_postprocess)
 
         self._waiting_queue: List[int] = []
         self._active_task_ids: Set[int] = set()
         self._pending_delete_tids: Set[int] = set()
+        # 批量导入的任务 ID 区间 [next_id, last_id]，等待队列为空时才按需取出，
+        # 避免一次导入数万个任务时把它们全部放进等待队列
+        self._import_ranges: Deque[List[int]] = deque()
+        # 本轮运行中已记录过视频键的任务
+        self._identified_task_ids: Set[int] = set()
         self._is_shutdown = False
 
-    def add_task(self, task: DownloadTask) -> int:
-        """添加新任务到数据库，并调度启动"""
+        # 等待重试或等待主机冷却结束的任务：task_id → 到期时间。它们不占用槽位，
+        # 到期后由定时器放回等待队列；堆中的过期条目在弹出时按 _delayed 校验后丢弃
+        self._delayed: Dict[int, float] = {}
+        self._delay_heap: List[Tuple[float, int]] = []
+        # 其中因其他进程持有租约而等待的任务：不改写它们在共用数据库中的状态，
+        # 租约可能到期时再检查，其他进程已经结束的任务不再启动
+        self._lease_waits: Set[int] = set()
+        self._host_cooldowns = HostCooldowns()
+        self._retry_timer = QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._release_delayed)
+
+        # 打开了日志窗口的任务；仅对这些任务缓冲并批量转发日志
+        self._log_subscribers: Set[int] = set()
+        self._log_flush_timer = QTimer(self)
+        self._log_flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self._log_flush_timer.timeout.connect(self._flush_logs)
+
+        # 任务租约：启动任务前在数据库中获取，运行期间定期续期，
+        # 共用同一数据库的其他进程不会重复下载同一任务
+        self.lease_owner = lease_owner or make_lease_owner()
+        self._lease_timer = QTimer(self)
+        self._lease_timer.setInterval(LEASE_HEARTBEAT_MS)
+        self._lease_timer.timeout.connect(self._renew_leases)
+
+        # 运行时指标（未启用时均为空操作，排队时间与字节数的记录也一并跳过）
+        self._timed = metrics.enabled()
+        self._queued_at: Dict[int, float] = {}
+        self._last_bytes: Dict[int, int] = {}
+        self._m_queue_wait = metrics.histogram(
+            "queue_wait_seconds", "任务从排队到开始下载的等待时间", METRICS_QUEUE_WAIT_BUCKETS
+        )
+        self._m_signal_latency = metrics.histogram(
+            "progress_signal_latency_seconds", "进度信号从下载线程发出到调度器处理的延迟"
+        )
+        self._m_bytes = metrics.counter("download_bytes_total", "全部任务累计下载的字节数")
+        self._m_started = metrics.counter("downloads_started_total", "启动的下载次数")
+        self._m_retries = metrics.counter("download_retries_total", "安排的自动重试次数")
+        metrics.gauge_callback(
+            "downloads_active", "正在下载的任务数", lambda: len(self._active_task_ids)
+        )
+        metrics.gauge_callback(
+            "downloads_waiting", "等待队列中的任务数", lambda: len(self._waiting_queue)
+        )
+        metrics.gauge_callback(
+            "downloads_delayed", "等待重试或主机冷却的任务数", lambda: len(self._delayed)
+        )
+        metrics.gauge_callback(
+            "postprocess_active", "正在后处理的任务数", lambda: self.postprocess.running
+        )
+        metrics.gauge_callback(
+            "postprocess_waiting", "等待后处理的任务数", lambda: self.postprocess.waiting
+        )
+
+    def find_duplicate(self, task: DownloadTask) -> Optional[DownloadTask]:
+        """查找与 task 指向同一视频、已完成或仍在进行中的任务"""
+        return self.db.find_duplicate(task.url)
+
+    def add_task(self, task: DownloadTask, allow_duplicate: bool = False) -> int:
+        """添加新任务到数据库，并调度启动
+
+        若同一视频已下载完成或仍在进行中，默认跳过添加并返回已有任务的 ID；
+        allow_duplicate=True 时仍然重新下载。
+        """
+        if not allow_duplicate:
+            existing = self.find_duplicate(task)
+            if existing is not None and existing.id is not None:
+                return existing.id
+
         task_id = self.db.add_task(task)
         db_task = self.db.get_task(task_id)
         if db_task:
@@ -42,34 +161,190 @@ class DownloadScheduler(QObject):
             self.start_task(task_id)
         return task_id
 
+    def add_imported_tasks(self, tasks: List[DownloadTask]) -> None:
+        """接收一批已以 "queued" 状态写入数据库的导入任务（ID 连续），按空闲槽位启动"""
+        if not tasks:
+            return
+        first_id, last_id = tasks[0].id, tasks[-1].id
+        assert first_id is not None and last_id is not None
+        self._import_ranges.append([first_id, last_id])
+        self._mark_queued(t.id for t in tasks if t.id is not None)
+        self.tasks_added.emit(tasks)
+        self._fill_slots()
+
+    def resume_queued(self, first_id: int, last_id: int) -> None:
+        """接管 ID 区间内已处于 "queued" 状态的任务（如上次运行遗留或由其他进程写入），按空闲槽位启动
+
+        与导入任务共用区间队列，区间内非排队状态的任务在补充等待队列时被跳过，
+        因此 ID 不必连续。
+        """
+        self._import_ranges.append([first_id, last_id])
+        self._fill_slots()
+
+    def resume_all_queued(self) -> int:
+        """接管数据库中全部处于 "queued" 状态的任务（上次运行遗留），返回任务数
+
+        仍由其他存活进程持有租约的任务不接管。
+        """
+        task_ids = self.db.get_task_ids_by_status(("queued",), unleased_at=self.clock())
+        if task_ids:
+            self.resume_queued(task_ids[0], task_ids[-1])
+        return len(task_ids)
+
+    def resume_retrying(self) -> int:
+        """接管上次运行遗留的等待重试任务：按数据库中的计划重试时间继续等待，返回任务数
+
+        已过计划时间的任务在定时器下一次触发时放回等待队列。
+        """
+        now = self.clock()
+        schedule = self.db.get_retry_schedule(unleased_at=now)
+        for task_id, next_retry_at in schedule:
+            if task_id not in self._delayed and not self._is_running(task_id):
+                self._delay_task(task_id, next_retry_at if next_retry_at is not None else now)
+        return len(schedule)
+
+    def is_idle(self) -> bool:
+        """没有运行中、后处理中、等待中、待导入或等待重试的任务"""
+        return not (
+            self._active_task_ids
+            or self.postprocess
+            or self._waiting_queue
+            or self._import_ranges
+            or self._delayed
+        )
+
+    def _is_running(self, task_id: int) -> bool:
+        """任务正在下载或正在（等待）后处理"""
+        return task_id in self.threads or task_id in self.postprocess
+
+    def _queued_imports(self, task_ids: Iterable[int]) -> List[int]:
+        """返回尚未取出到等待队列、仍处于排队状态的导入任务"""
+        if not self._import_ranges:
+            return []
+        candidates = [
+            tid
+            for tid in task_ids
+            if tid not in self.workers
+            and any(first <= tid <= last for first, last in self._import_ranges)
+        ]
+        return [t.id for t in self.db.get_tasks(candidates) if t.id and t.status == "queued"]
+
+    def _feed_from_imports(self) -> None:
+        """从导入区间中取出下一批仍处于排队状态的任务，补充到等待队列"""
+        while self._import_ranges and not self._waiting_queue:
+            span = self._import_ranges[0]
+            first, last = span
+            end = min(first + SCHEDULER_FEED_SIZE - 1, last)
+            if end == last:
+                self._import_ranges.popleft()
+            else:
+                span[0] = end + 1
+            # 期间被删除、停止或手动启动过的任务不再处于 queued 状态，直接跳过
+            tasks = self.db.get_tasks(list(range(first, end + 1)))
+            fed = [
+                t.id
+                for t in tasks
+                if t.id is not None and t.status == "queued" and not self._is_running(t.id)
+            ]
+            self._waiting_queue.extend(fed)
+            self._mark_queued(fed)
+
+    def _mark_queued(self, task_ids: Iterable[int]) -> None:
+        """启用指标时记录任务进入等待队列的时间（已记录的保留最早的时间）"""
+        if self._timed:
+            now = time.monotonic()
+            for tid in task_ids:
+                self._queued_at.setdefault(tid, now)
+
+    def _fill_slots(self) -> None:
+        """持续从等待队列启动任务，直到没有空闲槽位或没有待启动的任务"""
+        while len(self._active_task_ids) < self.max_concurrent_downloads:
+            if not self._waiting_queue and not self._import_ranges:
+                return
+            active = len(self._active_task_ids)
+            self._schedule_next()
+            if len(self._active_task_ids) == active:
+                return
+
     def start_task(self, task_id: int) -> None:
         """启动特定任务（若达到并发上限则加入等待队列）"""
-        if task_id in self.threads or task_id in self._waiting_queue:
+        if self._is_running(task_id) or task_id in self._waiting_queue:
             return
 
         task = self.db.get_task(task_id)
         if not task:
             return
+        # 手动启动时立即开始，并重新计算自动重试次数
+        self._delayed.pop(task_id, None)
+        if task.retry_count:
+            self.db.update_task(task_id, {"retry_count": 0})
 
-        # 判断是否可以在当前执行
+        # 判断是否可以在当前执行（任务正被其他进程下载时不启动）
         if len(self._active_task_ids) < self.max_concurrent_downloads:
+            if not self._claim(task_id):
+                self._wait_for_lease(task)
+                return
             self._active_task_ids.add(task_id)
             self._run_task_thread(task)
         else:
             # 达到并发上限，标记为排队中，加入等待队列
             self.db.update_task(task_id, {"status": "queued"})
             self._waiting_queue.append(task_id)
+            self._mark_queued([task_id])
             self.task_status_changed.emit(task_id, "queued")
 
+    def start_many(self, task_ids: List[int]) -> None:
+        """批量启动任务：一次查询取出任务，超出并发上限的部分以一条语句标记为排队"""
+        waiting = set(self._waiting_queue)
+        candidates = [
+            tid
+            for tid in dict.fromkeys(task_ids)
+            if not self._is_running(tid) and tid not in waiting
+        ]
+        tasks = self.db.get_tasks(candidates)
+        # 手动启动时立即开始，并重新计算自动重试次数
+        reset: List[int] = []
+        for task in tasks:
+            assert task.id is not None
+            self._delayed.pop(task.id, None)
+            if task.retry_count:
+                reset.append(task.id)
+        if reset:
+            self.db.update_tasks(reset, {"retry_count": 0})
+
+        queued: List[int] = []
+        for task in tasks:
+            assert task.id is not None
+            if len(self._active_task_ids) < self.max_concurrent_downloads:
+                if not self._claim(task.id):
+                    self._wait_for_lease(task)
+                    continue
+                self._active_task_ids.add(task.id)
+                self._run_task_thread(task)
+            else:
+                queued.append(task.id)
+
+        if queued:
+            self.db.update_tasks(queued, {"status": "queued"})
+            self._waiting_queue.extend(queued)
+            self._mark_queued(queued)
+            self.tasks_status_changed.emit(queued, "queued")
+
     def _run_task_thread(self, task: DownloadTask) -> None:
         """在 QThread 中实际创建并启动下载任务"""
         task_id = task.id
         assert task_id is not None
         self.db.update_task(task_id, {"status": "downloading"})
         self.task_status_changed.emit(task_id, "downloading")
+        self._m_started.inc()
+        if self._timed:
+            # 有空闲槽位时直接启动的任务等待时间为 0
+            queued_at = self._queued_at.pop(task_id, None)
+            wait = time.monotonic() - queued_at if queued_at is not None else 0.0
+            self._m_queue_wait.observe(wait)
 
         thread = QThread()
-        worker = DownloadWorker(
+        worker = self.worker_class(
             task_id=task_id,
             url=task.url,
             download_path=task.save_path,
@@ -81,13 +356,23 @@ class DownloadScheduler(QObject):
             playlist_items=task.playlist_items,
             impersonate=task.impersonate,
             no_cookies=task.no_cookies,
+            parallel_streams=task.parallel_streams,
+            audio_format=task.audio_format,
+            defer_postprocessing=True,
+            # 播放列表重新同步时跳过已下载的条目；单个视频只记录不跳过，以便重新下载
+            download_archive=self.archive.for_task(task_id, skip_known=task.download_playlist),
+            info_cache=self.info_cache,
         )
+        worker.log_subscribed = task_id in self._log_subscribers
+        if worker.log_subscribed:
+            # 新一轮下载会丢弃旧日志，已打开的日志窗口改为从头显示
+            self.task_log_reset.emit(task_id)
         worker.moveToThread(thread)
 
         # 连接 Worker 内部信号
         worker.progress.connect(self._on_worker_progress)
+        worker.downloaded.connect(self._on_worker_downloaded)
         worker.finished.connect(self._on_worker_finished)
-        worker.log_message.connect(self._on_worker_log)
 
         # 启动与销毁逻辑
         thread.started.connect(worker.run)
@@ -99,17 +384,65 @@ class DownloadScheduler(QObject):
 
     def stop_task(self, task_id: int) -> None:
         """停止特定下载任务（若在队列中则直接移除并标记为取消）"""
-        if task_id in self._waiting_queue:
-            self._waiting_queue.remove(task_id)
+        if (
+            task_id in self._waiting_queue
+            or task_id in self._delayed
+            or self._queued_imports([task_id])
+        ):
+            self._remove_from_waiting_queue([task_id])
             updates = {"status": "cancelled", "progress": 0, "speed": "--", "eta": "--"}
             self.db.update_task(task_id, updates)
             self.task_status_changed.emit(task_id, "cancelled")
         elif task_id in self.workers:
             self.workers[task_id].cancel()
 
+    def stop_many(self, task_ids: List[int]) -> None:
+        """批量停止任务：排队中的任务以一条语句标记为取消，运行中的任务逐个取消"""
+        ids = set(task_ids)
+        dequeued = [tid for tid in self._waiting_queue if tid in ids]
+        dequeued += [tid for tid in ids if tid in self._delayed]
+        self._remove_from_waiting_queue(dequeued)
+        dequeued += self._queued_imports(ids)
+        for tid in dequeued:
+            self._queued_at.pop(tid, None)
+        if dequeued:
+            updates = {"status": "cancelled", "progress": 0, "speed": "--", "eta": "--"}
+            self.db.update_tasks(dequeued, updates)
+            self.tasks_status_changed.emit(dequeued, "cancelled")
+        for tid in ids:
+            worker = self.workers.get(tid)
+            if worker is not None:
+                worker.cancel()
+
+    def delete_many(self, task_ids: List[int]) -> None:
+        """批量删除任务：静止任务以一条语句删除并整批清理日志，运行中的任务先取消"""
+        idle: List[int] = []
+        for tid in dict.fromkeys(task_ids):
+            if self._is_running(tid):
+                self._pending_delete_tids.add(tid)
+                self.workers[tid].cancel()
+            else:
+                idle.append(tid)
+        if not idle:
+            return
+
+        self._remove_from_waiting_queue(idle)
+        self.db.delete_tasks(idle)
+        remove_task_logs(idle)
+        self.tasks_deleted.emit(idle)
+
+    def _remove_from_waiting_queue(self, task_ids: List[int]) -> None:
+        """从等待队列以及等待重试的任务中移除"""
+        ids = set(task_ids)
+        self._waiting_queue = [tid for tid in self._waiting_queue if tid not in ids]
+        for tid in ids:
+            self._delayed.pop(tid, None)
+            self._lease_waits.discard(tid)
+            self._queued_at.pop(tid, None)
+
     def delete_task(self, task_id: int) -> None:
-        """删除特定下载任务（若运行中则先取消，待线程退出后自动清除数据）"""
-        if task_id in self.threads:
+        """删除特定下载任务（若运行中则先取消，待下载或后处理结束后自动清除数据）"""
+        if self._is_running(task_id):
             self._pending_delete_tids.add(task_id)
             self.workers[task_id].cancel()
         elif task_id in self._waiting_queue:
@@ -118,6 +451,7 @@ class DownloadScheduler(QObject):
             remove_task_log(task_id)
             self.task_deleted.emit(task_id)
         else:
+            self._delayed.pop(task_id, None)
             self.db.delete_task(task_id)
             remove_task_log(task_id)
             self.task_deleted.emit(task_id)
@@ -128,41 +462,226 @@ class DownloadScheduler(QObject):
         if "info_dict" in data and data["info_dict"].get("title"):
             title = data["info_dict"]["title"]
             cleaned_title = clean_ansi(title)
-            self.db.update_task(task_id, {"title": cleaned_title})
+            updates = {"title": cleaned_title}
+            if task_id not in self._identified_task_ids:
+                # 解析出视频 ID 后记录视频键，供之后添加任务时识别重复（播放列表任务除外）
+                self._identified_task_ids.add(task_id)
+                worker = self.workers.get(task_id)
+                video_key = video_key_from_info(data["info_dict"])
+                if video_key and worker is not None and not worker.download_playlist:
+                    updates["video_key"] = video_key
+            self.db.update_task(task_id, updates)
             self.task_title_updated.emit(task_id, cleaned_title)
 
+        if self._timed:
+            self._record_progress(task_id, data)
         self.task_progress_changed.emit(task_id, data)
 
-    @Slot(int, str)
-    def _on_worker_log(self, task_id: int, msg: str) -> None:
-        """转发 Worker 的日志消息"""
-        self.task_log_emitted.emit(task_id, msg)
+    def _record_progress(self, task_id: int, data: Dict[str, Any]) -> None:
+        """更新信号延迟、累计字节数与任务速度指标"""
+        emitted_at = data.get("_emitted_at")
+        if emitted_at is not None:
+            self._m_signal_latency.observe(time.perf_counter() - emitted_at)
+        downloaded = data.get("downloaded_bytes")
+        if downloaded is not None:
+            last = self._last_bytes.get(task_id, 0)
+            # 已下载字节数变小说明开始下载下一个格式（如视频之后的音频），从头计算
+            self._m_bytes.inc(downloaded - last if downloaded >= last else downloaded)
+            self._last_bytes[task_id] = downloaded
+        speed = data.get("speed")
+        if speed is not None:
+            metrics.gauge(
+                "task_speed_bytes_per_second", "各任务的当前下载速度", task_id=task_id
+            ).set(speed)
+
+    def subscribe_logs(self, task_id: int) -> None:
+        """开始向外批量转发该任务的实时日志（日志窗口打开时调用）"""
+        self._log_subscribers.add(task_id)
+        worker = self.workers.get(task_id)
+        if worker is not None:
+            worker.log_subscribed = True
+        if not self._log_flush_timer.isActive():
+            self._log_flush_timer.start()
+
+    def unsubscribe_logs(self, task_id: int) -> None:
+        """停止转发该任务的实时日志（日志窗口关闭时调用）"""
+        self._log_subscribers.discard(task_id)
+        worker = self.workers.get(task_id)
+        if worker is not None:
+            worker.log_subscribed = False
+            worker.drain_logs()
+        if not self._log_subscribers:
+            self._log_flush_timer.stop()
+
+    def _flush_logs(self) -> None:
+        """定时取走已订阅任务在 Worker 中缓冲的日志，按任务整批发出"""
+        for task_id in list(self._log_subscribers):
+            self._flush_task_logs(task_id)
+
+    def _flush_task_logs(self, task_id: int) -> None:
+        worker = self.workers.get(task_id)
+        if worker is None:
+            return
+        lines = worker.drain_logs()
+        if lines:
+            self.task_log_chunk.emit(task_id, lines)
+
+    @Slot(int)
+    def _on_worker_downloaded(self, task_id: int) -> None:
+        """下载阶段结束、后处理待执行：交给后处理队列，结束下载线程以释放槽位"""
+        worker = self.workers.get(task_id)
+        if worker is None:
+            return
+        self.db.update_task(task_id, {"status": "postprocessing", "speed": "--", "eta": "--"})
+        self.task_status_changed.emit(task_id, "postprocessing")
+        self.postprocess.submit(worker)
+        if task_id in self.threads:
+            self.threads[task_id].quit()
 
     @Slot(int, bool, str)
     def _on_worker_finished(self, task_id: int, success: bool, message: str) -> None:
-        """处理 Worker 执行完毕的逻辑"""
+        """处理 Worker 执行完毕的逻辑（临时错误转入延迟重试，不再占用槽位）"""
         status = "finished" if success else ("cancelled" if "用户取消" in message else "error")
+        worker = self.workers.get(task_id)
+        error = worker.error if worker is not None else None
+        if status == "error" and error is not None and self._schedule_retry(task_id, error):
+            self._flush_task_logs(task_id)
+            self.task_status_changed.emit(task_id, "retrying")
+        else:
+            updates = {
+                "status": status,
+                "progress": 100 if success else 0,
+                "speed": "--",
+                "eta": "--",
+            }
+            self.db.update_task(task_id, updates)
+            self._flush_task_logs(task_id)
+            metrics.counter("downloads_finished_total", "结束的下载数", result=status).inc()
+            self.task_status_changed.emit(task_id, status)
+            self.task_finished.emit(task_id, success, message)
+
+        # 后处理结束时总是移出后处理队列；下载线程与后处理两者中后结束的一方释放任务
+        postprocessed = self.postprocess.finish(task_id) is not None
+        if task_id in self.threads:
+            # 下载线程尚未退出（或后处理先于线程的 finished 信号完成），由 _cleanup_thread 释放
+            self.threads[task_id].quit()
+        elif postprocessed:
+            # 后处理结束时下载线程已经退出，槽位早已释放
+            self._release_task(task_id)
+            self._schedule_next()
+
+    def _schedule_retry(self, task_id: int, error: BaseException) -> bool:
+        """按错误类型安排延迟重试，返回是否已安排"""
+        if self._is_shutdown or task_id in self._pending_delete_tids:
+            return False
+        kind = classify_error(error)
+        task = self.db.get_task(task_id)
+        attempt = (task.retry_count if task else 0) + 1
+        if task is None or not self.retry_policy.should_retry(kind, attempt):
+            return False
+
+        now = self.clock()
+        host = host_of(task.url)
+        if kind == RATE_LIMITED:
+            cooldown = retry_after(error) or self.retry_policy.rate_limit_cooldown
+            self._host_cooldowns.cool_down(host, now + cooldown)
+        delay = max(self.retry_policy.delay(attempt), self._host_cooldowns.remaining(host, now))
+
         updates = {
-            "status": status,
-            "progress": 100 if success else 0,
+            "status": "retrying",
+            "retry_count": attempt,
+            "next_retry_at": now + delay,
+            "progress": 0,
             "speed": "--",
             "eta": "--",
         }
         self.db.update_task(task_id, updates)
-        self.task_status_changed.emit(task_id, status)
-        self.task_finished.emit(task_id, success, message)
-
-        if task_id in self.threads:
-            self.threads[task_id].quit()
+        self._delay_task(task_id, now + delay)
+        self._m_retries.inc()
+        return True
+
+    def _delay_task(self, task_id: int, due: float) -> None:
+        self._delayed[task_id] = due
+        heapq.heappush(self._delay_heap, (due, task_id))
+        self._arm_retry_timer()
+
+    def _arm_retry_timer(self) -> None:
+        """让定时器在最早到期的延迟任务到期时触发"""
+        heap = self._delay_heap
+        while heap and self._delayed.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        if not heap:
+            self._retry_timer.stop()
+            return
+        wait_ms = max(0, int((heap[0][0] - self.clock()) * 1000) + 1)
+        self._retry_timer.start(wait_ms)
+
+    def _release_delayed(self) -> None:
+        """把已到期的延迟任务放回等待队列"""
+        now = self.clock()
+        ready: List[int] = []
+        while self._delay_heap and self._delay_heap[0][0] <= now:
+            due, task_id = heapq.heappop(self._delay_heap)
+            if self._delayed.get(task_id) == due:
+                del self._delayed[task_id]
+                ready.append(task_id)
+        if ready:
+            # 等待租约的任务保持其他进程写入的状态，在 _schedule_next 中重新检查
+            retried = [tid for tid in ready if tid not in self._lease_waits]
+            if retried:
+                self.db.update_tasks(retried, {"status": "queued"})
+                self.tasks_status_changed.emit(retried, "queued")
+            self._waiting_queue.extend(ready)
+            self._mark_queued(ready)
+            self._fill_slots()
+        self._arm_retry_timer()
+
+    def _claim(self, task_id: int) -> bool:
+        """获取任务租约，任务正被其他进程下载时返回 False"""
+        now = self.clock()
+        if not self.db.acquire_lease(task_id, self.lease_owner, now + LEASE_TTL_SECONDS, now):
+            return False
+        self._lease_waits.discard(task_id)
+        if not self._lease_timer.isActive():
+            self._lease_timer.start()
+        return True
+
+    def _wait_for_lease(self, task: DownloadTask) -> None:
+        """任务正被共用数据库的其他进程下载：界面显示其在数据库中的状态，租约可能到期时再检查"""
+        assert task.id is not None
+        self._lease_waits.add(task.id)
+        self._delay_task(task.id, self.clock() + LEASE_TTL_SECONDS)
+        self.task_status_changed.emit(task.id, task.status)
+
+    def _renew_leases(self) -> None:
+        """心跳：续期本进程持有的全部租约"""
+        self.db.renew_leases(self.lease_owner, self.clock() + LEASE_TTL_SECONDS)
 
     def _cleanup_thread(self, task_id: int) -> None:
-        """清理线程资源，并调度执行等待队列中的任务"""
+        """清理线程资源，释放下载槽位，并调度执行等待队列中的任务
+
+        任务仍在后处理队列中时保留其 Worker 与租约，后处理结束后再释放。
+        """
         thread = self.threads.pop(task_id, None)
-        self.workers.pop(task_id, None)
         if thread is not None:
             thread.deleteLater()
-
         self._active_task_ids.discard(task_id)
+        if task_id not in self.postprocess:
+            self._release_task(task_id)
+
+        # 执行等待队列中的下一个任务
+        self._schedule_next()
+
+    def _release_task(self, task_id: int) -> None:
+        """任务彻底结束（下载与后处理均已完成）：移除 Worker、释放租约并处理挂起的删除"""
+        self.workers.pop(task_id, None)
+        self._identified_task_ids.discard(task_id)
+        if self._timed:
+            self._last_bytes.pop(task_id, None)
+            metrics.remove("task_speed_bytes_per_second", task_id=task_id)
+        self.db.release_lease(task_id, self.lease_owner)
+        if not self._active_task_ids and not self.postprocess:
+            self._lease_timer.stop()
 
         # 处理停止后删除挂起的状态
         if task_id in self._pending_delete_tids:
@@ -171,28 +690,48 @@ class DownloadScheduler(QObject):
             remove_task_log(task_id)
             self.task_deleted.emit(task_id)
 
-        # 执行等待队列中的下一个任务
-        self._schedule_next()
-
     def _schedule_next(self) -> None:
-        """从等待队列中提取任务并启动"""
-        if not self._waiting_queue:
-            return
-        if len(self._active_task_ids) < self.max_concurrent_downloads:
+        """从等待队列中提取任务并启动（等待队列为空时先从导入任务中补充）
+
+        所属主机处于 429 冷却期的任务转为延迟任务，冷却结束后再放回等待队列。
+        """
+        while len(self._active_task_ids) < self.max_concurrent_downloads:
+            if not self._waiting_queue:
+                self._feed_from_imports()
+            if not self._waiting_queue:
+                return
             next_task_id = self._waiting_queue.pop(0)
             task = self.db.get_task(next_task_id)
-            if task:
-                self._active_task_ids.add(next_task_id)
-                self._run_task_thread(task)
-            else:
-                # 递归提取（处理已从数据库删除的任务）
-                self._schedule_next()
+            if not task:
+                # 继续提取（处理已从数据库删除的任务）
+                continue
+            if next_task_id in self._lease_waits:
+                self._lease_waits.discard(next_task_id)
+                if task.status in _SETTLED_STATUSES:
+                    # 其他进程已经结束了这个任务
+                    self.task_status_changed.emit(next_task_id, task.status)
+                    continue
+            if self._host_cooldowns:
+                now = self.clock()
+                wait = self._host_cooldowns.remaining(host_of(task.url), now)
+                if wait > 0:
+                    self._delay_task(next_task_id, now + wait)
+                    continue
+            if not self._claim(next_task_id):
+                # 已被共用数据库的其他进程接管
+                self._wait_for_lease(task)
+                continue
+            self._active_task_ids.add(next_task_id)
+            self._run_task_thread(task)
+            return
 
     def shutdown(self) -> None:
         """优雅关闭所有运行中的下载线程"""
         if self._is_shutdown:
             return
         self._is_shutdown = True
+        self._retry_timer.stop()
+        self._lease_timer.stop()
 
         # 取消所有 Worker 运行
         for worker in list(self.workers.values()):
@@ -202,3 +741,8 @@ class DownloadScheduler(QObject):
         for thread in list(self.threads.values()):
             thread.quit()
             thread.wait(3000)
+        # 正在执行的后处理步骤结束后中断
+        self.postprocess.shutdown()
+
+        # 仍未退出的下载不再续期，释放租约以便下次启动（或其他进程）立即接管
+        self.db.release_leases(self.lease_owner)
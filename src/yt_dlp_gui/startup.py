@@ -0,0 +1,96 @@
+"""启动导入耗时报告
+
+整理 `python -X importtime` 的输出，按累计耗时列出启动路径上最慢的模块，
+并检查应当延迟加载的重量级依赖（yt_dlp、qtawesome、对话框模块）没有在
+主窗口显示前被导入：
+
+    python -m yt_dlp_gui.startup --top 30
+"""
+
+import os
+import re
+import subprocess
+import sys
+from typing import NamedTuple
+
+import click
+
+# 主窗口显示前不应导入的模块
+DEFERRED_MODULES = ("yt_dlp", "qtawesome", "yt_dlp_gui.dialogs")
+
+_LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(text: str) -> list[ImportRecord]:
+    """解析 -X importtime 的输出（微秒），忽略表头与其他输出"""
+    records = []
+    for line in text.splitlines():
+        match = _LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # 顶层模块前有 1 个空格，每深一层多 2 个空格
+            depth = (len(indent) - 1) // 2
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def measure_imports(module: str = "yt_dlp_gui.main") -> list[ImportRecord]:
+    """在新的解释器中导入 module，返回其导入耗时记录"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def loaded_deferred_modules(records: list[ImportRecord]) -> list[str]:
+    """records 中出现的应当延迟加载的模块"""
+    imported = {record.module for record in records}
+    return [module for module in DEFERRED_MODULES if module in imported]
+
+
+def format_import_report(records: list[ImportRecord], top: int = 25) -> str:
+    total_us = sum(record.cumulative_us for record in records if record.depth == 0)
+    lines = [
+        f"启动导入总耗时: {total_us / 1000:.1f} ms（{len(records)} 个模块）",
+        "",
+        f"{'累计 (ms)':>10} {'自身 (ms)':>10}  模块",
+    ]
+    slowest = sorted(records, key=lambda record: record.cumulative_us, reverse=True)[:top]
+    for record in slowest:
+        lines.append(
+            f"{record.cumulative_us / 1000:>10.1f} {record.self_us / 1000:>10.1f}  "
+            f"{'  ' * record.depth}{record.module}"
+        )
+
+    lines.append("")
+    deferred = loaded_deferred_modules(records)
+    if deferred:
+        lines.append(f"警告: 以下模块应延迟加载，却在启动时被导入: {', '.join(deferred)}")
+    else:
+        lines.append(f"延迟加载检查通过: {', '.join(DEFERRED_MODULES)} 均未在启动时导入")
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option("--top", default=25, show_default=True, help="列出累计耗时最长的模块数")
+@click.argument("module", default="yt_dlp_gui.main")
+def main(top: int, module: str) -> None:
+    """输出导入 MODULE 的耗时报告"""
+    records = measure_imports(module)
+    click.echo(format_import_report(records, top))
+
+
+if __name__ == "__main__":
+    main()
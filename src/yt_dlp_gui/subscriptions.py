@@ -0,0 +1,235 @@
+"""频道与播放列表订阅
+
+SubscriptionManager 与 DownloadScheduler 并列运行：定时找出到期的订阅，在一个
+有界线程池中以扁平提取 (extract_flat) 获取条目列表，与下载存档和任务列表比对
+后只把新条目作为任务交给调度器。每个订阅的检查时间带有由 ID 决定的相位偏移，
+大量订阅不会在同一时刻集中触发。提取函数与时钟均可注入，便于测试。
+"""
+
+import math
+import time
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .config import (
+    SUBSCRIPTION_DEFAULT_INTERVAL,
+    SUBSCRIPTION_POLL_WORKERS,
+    SUBSCRIPTION_STAGGER_SECONDS,
+    SUBSCRIPTION_TICK_MS,
+)
+from .database import Database
+from .models import DownloadTask, Subscription
+from .scheduler import DownloadScheduler
+from .utils import canonical_url, normalize_url
+
+# 输入订阅链接，返回条目列表（yt-dlp 扁平提取得到的 entry 字典）
+FeedExtractor = Callable[[str], list[dict[str, Any]]]
+Clock = Callable[[], float]
+
+# 黄金分割比的小数部分：连续 ID 乘以它取小数，得到在 [0, 1) 内均匀分布的相位
+_GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+def flat_extract(url: str) -> list[dict[str, Any]]:
+    """用 yt-dlp 扁平提取频道或播放列表的条目，不解析每个视频"""
+    import yt_dlp
+
+    params = {
+        "extract_flat": "in_playlist",
+        "skip_download": True,
+        "quiet": True,
+        "no_warnings": True,
+    }
+    with yt_dlp.YoutubeDL(params) as ydl:
+        info = ydl.extract_info(url, download=False) or {}
+    if "entries" not in info:
+        return [info]
+    return [dict(entry) for entry in info["entries"] or [] if entry]
+
+
+def entry_archive_id(entry: dict[str, Any]) -> Optional[str]:
+    """条目在下载存档中的 ID（与 yt-dlp 的格式一致："<小写提取器名> <视频 ID>"）"""
+    extractor = entry.get("ie_key") or entry.get("extractor_key")
+    video_id = entry.get("id")
+    if extractor and video_id:
+        return f"{extractor.lower()} {video_id}"
+    return None
+
+
+def stagger_offset(sub_id: int, window: float) -> float:
+    """由订阅 ID 决定的相位偏移，相邻 ID 的检查时间在窗口内均匀错开"""
+    return ((sub_id * _GOLDEN_RATIO_FRACTION) % 1.0) * window
+
+
+def next_check_time(scheduled: float, interval: int, now: float) -> float:
+    """按原计划时间推进整数个间隔，得到晚于 now 的下次检查时间（保持订阅的相位）"""
+    if scheduled > now:
+        return scheduled
+    return scheduled + interval * (math.floor((now - scheduled) / interval) + 1)
+
+
+class PollSignals(QObject):
+    done = Signal(int, object, str)  # 发送 (subscription_id, 新任务列表或 None, 错误信息)
+
+
+class PollJob(QRunnable):
+    """在订阅线程池中检查一个订阅"""
+
+    def __init__(self, sub: Subscription, func: Callable[[], list[DownloadTask]]) -> None:
+        super().__init__()
+        self.sub = sub
+        self.func = func
+        self.signals = PollSignals()
+
+    def run(self) -> None:
+        assert self.sub.id is not None
+        try:
+            tasks: Optional[list[DownloadTask]] = self.func()
+            error = ""
+        except Exception as e:
+            tasks, error = None, str(e)
+        self.signals.done.emit(self.sub.id, tasks, error)
+
+
+class SubscriptionManager(QObject):
+    """订阅同步引擎"""
+
+    subscription_checked = Signal(int, int, str)  # 发送 (subscription_id, 新条目数, 错误信息)
+
+    def __init__(
+        self,
+        db: Database,
+        scheduler: DownloadScheduler,
+        extractor: FeedExtractor = flat_extract,
+        clock: Clock = time.time,
+        max_workers: int = SUBSCRIPTION_POLL_WORKERS,
+    ) -> None:
+        super().__init__()
+        self.db = db
+        self.scheduler = scheduler
+        self.extractor = extractor
+        self.clock = clock
+
+        # 独立的有界线程池，订阅检查不会占用日志读取等使用的全局线程池
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_workers)
+        self._in_flight: dict[int, PollJob] = {}
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(SUBSCRIPTION_TICK_MS)
+        self._timer.timeout.connect(self.poll_due)
+
+    def start(self) -> None:
+        self._timer.start()
+        self.poll_due()
+
+    def shutdown(self) -> None:
+        self._timer.stop()
+        self._pool.clear()
+        self._pool.waitForDone(3000)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """等待进行中的检查结束（结果信号仍需事件循环派发）"""
+        return self._pool.waitForDone(msecs)
+
+    def add_subscription(
+        self,
+        url: str,
+        save_path: str,
+        format_preset: str,
+        interval: int = SUBSCRIPTION_DEFAULT_INTERVAL,
+        title: Optional[str] = None,
+        preset_id: Optional[int] = None,
+    ) -> Subscription:
+        """添加订阅，首次检查时间在错开窗口内按 ID 分散"""
+        sub = Subscription(
+            url=normalize_url(url) or url.strip(),
+            save_path=save_path,
+            format_preset=format_preset,
+            preset_id=preset_id,
+            title=title,
+            interval=interval,
+        )
+        sub.id = self.db.add_subscription(sub)
+        window = min(interval, SUBSCRIPTION_STAGGER_SECONDS)
+        sub.next_check_at = self.clock() + stagger_offset(sub.id, window)
+        self.db.update_subscription(sub.id, {"next_check_at": sub.next_check_at})
+        return sub
+
+    def remove_subscription(self, sub_id: int) -> None:
+        self.db.delete_subscription(sub_id)
+
+    def check_now(self, sub_id: int) -> None:
+        """立即检查某个订阅（之后以本次检查时间为新的相位）"""
+        self.db.update_subscription(sub_id, {"next_check_at": self.clock()})
+        self.poll_due()
+
+    def poll_due(self) -> int:
+        """启动到期订阅的检查，同时进行的检查数不超过线程池容量；返回本次启动的数量"""
+        free = self._pool.maxThreadCount() - len(self._in_flight)
+        if free <= 0:
+            return 0
+        due = self.db.get_due_subscriptions(self.clock(), free + len(self._in_flight))
+        started = 0
+        for sub in due:
+            if started >= free:
+                break
+            if sub.id is None or sub.id in self._in_flight:
+                continue
+            job = PollJob(sub, lambda sub=sub: self._collect_new_tasks(sub))
+            job.signals.done.connect(self._on_polled)
+            self._in_flight[sub.id] = job
+            self._pool.start(job)
+            started += 1
+        return started
+
+    def _collect_new_tasks(self, sub: Subscription) -> list[DownloadTask]:
+        """在线程池中执行：提取条目，跳过存档中已下载的和任务列表中已存在的，写入新任务"""
+        archive = self.scheduler.archive
+        candidates: dict[str, DownloadTask] = {}
+        for entry in self.extractor(sub.url):
+            archive_id = entry_archive_id(entry)
+            if archive_id is not None and archive_id in archive:
+                continue
+            url = entry.get("webpage_url") or entry.get("url")
+            if not url:
+                continue
+            key = canonical_url(url)
+            candidates.setdefault(
+                key,
+                DownloadTask(
+                    url=url,
+                    save_path=sub.save_path,
+                    format_preset=sub.format_preset,
+                    preset_id=sub.preset_id,
+                    title=entry.get("title") or "正在解析...",
+                    status="queued",
+                    canonical_key=key,
+                ),
+            )
+
+        # 出错或已取消的条目也算已存在，由用户决定是否重试，否则每次检查都会重新添加
+        existing = self.db.find_existing_keys(list(candidates), any_status=True)
+        tasks = [task for key, task in candidates.items() if key not in existing]
+        for task, task_id in zip(tasks, self.db.add_tasks(tasks)):
+            task.id = task_id
+        return tasks
+
+    def _on_polled(self, sub_id: int, tasks: Optional[list[DownloadTask]], error: str) -> None:
+        job = self._in_flight.pop(sub_id, None)
+        if job is None:
+            return
+        now = self.clock()
+        sub = job.sub
+        self.db.update_subscription(
+            sub_id,
+            {
+                "next_check_at": next_check_time(sub.next_check_at, sub.interval, now),
+                "last_checked_at": now,
+                "last_error": error or None,
+            },
+        )
+        if tasks:
+            self.scheduler.add_imported_tasks(tasks)
+        self.subscription_checked.emit(sub_id, len(tasks or []), error)
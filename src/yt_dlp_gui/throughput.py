@@ -0,0 +1,177 @@
+"""全局吞吐量与队列剩余时间估算
+
+主窗口把任务状态变化与进度回调交给 QueueThroughput。它增量维护各任务的已下载/总字节数
+以及活动与排队任务的剩余字节之和，每次进度回调只做常数次运算，不会遍历全部任务。
+总速度由定时 tick() 时两次采样之间的字节增量计算，并做指数加权平均 (EWMA) 平滑，
+队列剩余时间据此与并发上限一起估算。
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from .config import THROUGHPUT_EWMA_ALPHA
+
+# 占用下载槽位的状态
+ACTIVE_STATUSES = frozenset({"downloading", "merging"})
+# 尚未开始但终将下载的状态（等待队列中或等待自动重试）
+PENDING_STATUSES = frozenset({"queued", "retrying"})
+
+
+@dataclass
+class QueueSnapshot:
+    """某一时刻的全局下载汇总"""
+
+    speed: float  # 平滑后的总速度 (B/s)
+    remaining_bytes: float  # 活动与排队任务的剩余字节数，大小未知的任务按平均大小估算
+    estimated: bool  # remaining_bytes 是否包含按平均大小估算的部分
+    active: int
+    queued: int
+    eta: Optional[float]  # 队列全部完成的预计剩余秒数，无法估算时为 None
+
+
+class _TaskBytes:
+    __slots__ = ("downloaded", "total")
+
+    def __init__(self) -> None:
+        self.downloaded = 0
+        self.total: Optional[int] = None
+
+    @property
+    def remaining(self) -> int:
+        return max((self.total or 0) - self.downloaded, 0)
+
+
+class QueueThroughput:
+    def __init__(
+        self,
+        max_concurrent: int,
+        alpha: float = THROUGHPUT_EWMA_ALPHA,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.alpha = alpha
+        self.clock = clock
+        self.speed = 0.0
+
+        self._status: dict[int, str] = {}
+        self._bytes: dict[int, _TaskBytes] = {}
+        # 活动与排队任务中大小已知者的剩余字节之和与任务数
+        self._remaining = 0
+        self._known = 0
+        self._active = 0
+        self._queued = 0
+        # 所有见过的任务大小之和与个数，用于估算大小未知的排队任务
+        self._size_sum = 0
+        self._size_count = 0
+        # 上次采样以来下载的字节数
+        self._interval_bytes = 0
+        self._last_tick = clock()
+
+    @staticmethod
+    def _tracked(status: Optional[str]) -> bool:
+        return status in ACTIVE_STATUSES or status in PENDING_STATUSES
+
+    def _count(self, status: Optional[str], sign: int) -> None:
+        if status in ACTIVE_STATUSES:
+            self._active += sign
+        elif status in PENDING_STATUSES:
+            self._queued += sign
+
+    def _account(self, entry: Optional[_TaskBytes], sign: int) -> None:
+        """把一个任务的剩余字节计入 (sign=1) 或移出 (sign=-1) 汇总"""
+        if entry is not None and entry.total:
+            self._remaining += sign * entry.remaining
+            self._known += sign
+
+    def reset(self, tasks: Iterable[tuple[int, str]]) -> None:
+        """按 (task_id, status) 重新建立状态（从数据库重新加载任务列表时调用）"""
+        self._status.clear()
+        self._bytes.clear()
+        self._remaining = self._known = self._active = self._queued = 0
+        for task_id, status in tasks:
+            self.set_status(task_id, status)
+
+    def set_status(self, task_id: int, status: Optional[str]) -> None:
+        """更新任务状态；status 为 None 表示任务已删除"""
+        old = self._status.get(task_id)
+        if old == status:
+            return
+        was_tracked, tracked = self._tracked(old), self._tracked(status)
+        self._count(old, -1)
+        self._count(status, 1)
+        entry = self._bytes.get(task_id)
+        if was_tracked and not tracked:
+            self._account(entry, -1)
+        elif tracked and not was_tracked:
+            self._account(entry, 1)
+
+        if status is None:
+            self._status.pop(task_id, None)
+        else:
+            self._status[task_id] = status
+        if not tracked:
+            # 已结束的任务不再需要字节记录；重新下载时从头开始计算
+            self._bytes.pop(task_id, None)
+
+    def update(self, task_id: int, downloaded: Optional[int], total: Optional[int]) -> None:
+        """处理一次下载进度回调（已结束任务迟到的回调被忽略）"""
+        if not self._tracked(self._status.get(task_id)):
+            return
+        entry = self._bytes.get(task_id)
+        if entry is None:
+            entry = self._bytes[task_id] = _TaskBytes()
+        self._account(entry, -1)
+
+        if downloaded is not None:
+            # 已下载字节数变小说明开始下载下一个文件（如视频之后的音频）
+            delta = downloaded - entry.downloaded if downloaded >= entry.downloaded else downloaded
+            self._interval_bytes += delta
+            entry.downloaded = downloaded
+        if total:
+            if entry.total:
+                self._size_sum += total - entry.total
+            else:
+                self._size_sum += total
+                self._size_count += 1
+            entry.total = total
+        self._account(entry, 1)
+
+    def tick(self) -> QueueSnapshot:
+        """采样一次吞吐量并返回当前汇总，由定时器按固定间隔调用"""
+        now = self.clock()
+        elapsed = now - self._last_tick
+        if elapsed > 0:
+            rate = self._interval_bytes / elapsed
+            if self._active == 0:
+                self.speed = 0.0
+            elif self.speed == 0.0:
+                self.speed = rate
+            else:
+                self.speed = self.alpha * rate + (1 - self.alpha) * self.speed
+            self._interval_bytes = 0
+            self._last_tick = now
+        return self.snapshot()
+
+    def snapshot(self) -> QueueSnapshot:
+        pending = self._active + self._queued
+        unknown = pending - self._known
+        remaining = float(self._remaining)
+        if unknown and self._size_count:
+            remaining += unknown * self._size_sum / self._size_count
+        return QueueSnapshot(
+            speed=self.speed,
+            remaining_bytes=remaining,
+            estimated=bool(unknown),
+            active=self._active,
+            queued=self._queued,
+            eta=self._eta(remaining, pending, unknown),
+        )
+
+    def _eta(self, remaining: float, pending: int, unknown: int) -> Optional[float]:
+        if not pending or self.speed <= 0 or (unknown and not self._size_count):
+            return None
+        # 假设每个下载槽位的速度相同：当前每任务速度 × 队列能占满的槽位数
+        per_slot = self.speed / max(self._active, 1)
+        slots = min(max(self.max_concurrent, 1), pending)
+        return remaining / (per_slot * slots)
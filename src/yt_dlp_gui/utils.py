@@ -1,5 +1,6 @@
 import re
-from typing import Any
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 # Pre-compile the regex at module level for efficiency
 _ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
@@ -32,6 +33,41 @@ def format_speed(speed: Any) -> str:
     return f"{speed_val:.1f} TB/s"
 
 
+def format_size(num_bytes: Any) -> str:
+    """格式化字节数"""
+    try:
+        size = float(num_bytes)
+    except (ValueError, TypeError):
+        return "--"
+
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
+
+# 后处理步骤的显示文本（yt-dlp 后处理器的 pp_key）
+_POSTPROCESSOR_TEXT = {
+    "Merger": "合并中",
+    "VideoRemuxer": "转封装中",
+    "VideoConvertor": "转码中",
+    "ExtractAudio": "提取音频",
+    "SubtitlesConvertor": "转换字幕",
+    "EmbedSubtitle": "嵌入字幕",
+    "EmbedThumbnail": "嵌入封面",
+    "Metadata": "写入元数据",
+    "MoveFiles": "移动文件",
+}
+
+
+def format_postprocessor(name: Optional[str]) -> str:
+    """后处理步骤的显示文本，尚未开始时为「等待后处理」"""
+    if not name:
+        return "等待后处理"
+    return _POSTPROCESSOR_TEXT.get(name, name)
+
+
 def format_eta(seconds: Any) -> str:
     """格式化剩余时间"""
     if seconds is None:
@@ -49,3 +85,103 @@ def format_eta(seconds: Any) -> str:
         return f"{m:02d}:{s:02d}"
     except (ValueError, TypeError):
         return "--"
+
+
+def normalize_url(text: str) -> Optional[str]:
+    """规范化用户输入的链接：去除空白与包裹符号、补全协议、小写协议和域名、去掉 #片段
+
+    不是 http(s) 链接时返回 None。
+    """
+    url = text.strip().strip("<>\"'")
+    if not url:
+        return None
+    if "://" not in url:
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ""
+    if scheme not in ("http", "https") or " " in url:
+        return None
+    # 没有协议的普通单词不应被当作链接
+    if "." not in host and host != "localhost":
+        return None
+    return urlunsplit((scheme, parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+# 不影响所指向内容的跟踪/分享参数，生成规范键时去除
+_TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "igshid",
+        "si",
+        "feature",
+        "pp",
+        "ab_channel",
+        "spm_id_from",
+        "vd_source",
+        "share_source",
+        "share_medium",
+        "share_plat",
+        "share_from",
+        "ref",
+        "ref_src",
+    }
+)
+
+# YouTube 短链接与各类页面中直接携带视频 ID 的路径前缀
+_YOUTUBE_ID_PATHS = ("/shorts/", "/live/", "/embed/", "/v/")
+
+
+def canonical_url(url: str) -> str:
+    """生成链接的规范键，用于识别同一视频的不同写法
+
+    忽略协议、www./m. 前缀、末尾斜杠、跟踪参数和参数顺序，并把 youtu.be、
+    /shorts/ 等 YouTube 链接统一为 youtube.com/watch?v=ID。
+    """
+    normalized = normalize_url(url) or url.strip()
+    parts = urlsplit(normalized)
+    host = parts.netloc.lower().removeprefix("www.").removeprefix("m.")
+    path = parts.path.rstrip("/")
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _TRACKING_PARAMS and not k.startswith("utm_")
+    ]
+
+    if host == "youtu.be" and path:
+        query.append(("v", path[1:]))
+        host, path = "youtube.com", "/watch"
+    elif host in ("youtube.com", "music.youtube.com") and path.startswith(_YOUTUBE_ID_PATHS):
+        query.append(("v", path.split("/")[2]))
+        host, path = "youtube.com", "/watch"
+    elif host == "music.youtube.com":
+        host = "youtube.com"
+    if host == "youtube.com" and path == "/watch":
+        # 播放位置 (t)、列表序号 (index) 等参数不改变所指向的视频
+        query = [(k, v) for k, v in query if k in ("v", "list")]
+
+    query.sort()
+    return host + path + ("?" + urlencode(query) if query else "")
+
+
+def guess_video_key(url: str) -> Optional[str]:
+    """在不运行提取器的情况下，尽可能从链接推断 "提取器:视频 ID" 形式的视频键"""
+    key = canonical_url(url)
+    if key.startswith("youtube.com/watch?"):
+        video_id = dict(parse_qsl(key.partition("?")[2])).get("v")
+        if video_id:
+            return f"Youtube:{video_id}"
+    return None
+
+
+def video_key_from_info(info: dict[str, Any]) -> Optional[str]:
+    """由 yt-dlp 的 info_dict 生成视频键"""
+    extractor = info.get("extractor_key")
+    video_id = info.get("id")
+    if extractor and video_id:
+        return f"{extractor}:{video_id}"
+    return None
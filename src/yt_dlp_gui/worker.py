@@ -1,11 +1,45 @@
+import importlib
 import os
-from typing import Any
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable
 
-import yt_dlp
 from PySide6.QtCore import QObject, Signal, Slot
-from yt_dlp.utils import DownloadCancelled
 
-from .config import DEFAULT_FORMAT, NO_PROGRESS, OUTPUT_TEMPLATE, get_task_log_path
+from . import metrics
+from .config import AUDIO_CONVERT_QUALITY, DEFAULT_FORMAT, NO_PROGRESS, OUTPUT_TEMPLATE
+from .estimator import ProgressEstimator
+from .info_cache import InfoCache, is_cacheable
+from .log_writer import LogWriter, get_log_writer
+from .presets import compiled_selector, selecting_with
+
+if TYPE_CHECKING:
+    import yt_dlp
+    from yt_dlp.utils import DownloadError
+
+# 缓存的格式链接失效时下载返回的 HTTP 状态码
+_EXPIRED_LINK_STATUSES = (403, 404, 410)
+
+# 下载完成后不触发合并状态的附属文件（字幕、元数据）
+_SIDECAR_EXTENSIONS = (".srt", ".vtt", ".ass", ".ssa", ".json")
+
+
+def preload_yt_dlp() -> threading.Thread | None:
+    """在后台线程中导入 yt_dlp
+
+    yt_dlp 导入时要注册上千个提取器，耗时远超创建主窗口。程序启动时不导入它，
+    主窗口显示后再调用本函数预加载；若任务在预加载完成前启动，下载线程中的
+    import 会等待同一个模块导入完成，不会重复导入，也不会阻塞界面线程。
+    """
+    if "yt_dlp" in sys.modules:
+        return None
+    thread = threading.Thread(
+        target=importlib.import_module, args=("yt_dlp",), name="yt-dlp-preload", daemon=True
+    )
+    thread.start()
+    return thread
 
 
 class DownloadWorker(QObject):
@@ -13,7 +47,8 @@ class DownloadWorker(QObject):
 
     progress = Signal(int, dict)  # 发送 (task_id, 进度信息字典)
     finished = Signal(int, bool, str)  # 发送 (task_id, 成功/失败, 消息/文件路径)
-    log_message = Signal(int, str)  # 发送 (task_id, 普通日志消息)
+    # 推迟后处理时，原始的流下载完成、后处理待执行时发送 task_id（之后由 run_postprocessing 发出 finished）
+    downloaded = Signal(int)
 
     def __init__(
         self,
@@ -31,6 +66,12 @@ class DownloadWorker(QObject):
         max_downloads: int | None = None,
         impersonate: str | None = None,
         no_cookies: bool = False,
+        parallel_streams: bool = False,
+        audio_format: str | None = None,
+        defer_postprocessing: bool = False,
+        log_writer: LogWriter | None = None,
+        download_archive: Any = None,
+        info_cache: InfoCache | None = None,
     ) -> None:
         """
         初始化下载工作器
@@ -55,40 +96,226 @@ class DownloadWorker(QObject):
         self.max_downloads = max_downloads
         self.impersonate = impersonate
         self.no_cookies = no_cookies
+        # 视频与音频分开选择时同时下载各个流（见 _install_parallel_dl）
+        self.parallel_streams = parallel_streams
+        # 下载后用 FFmpeg 转换为该音频格式（来自格式预设）
+        self.audio_format = audio_format
+        # 不在下载线程中执行后处理，下载完成后交给后处理队列（见 postprocess.py）
+        self.defer_postprocessing = defer_postprocessing
+        # 支持 `in` 与 add() 的存档对象（见 archive.TaskArchive），为 None 时不使用存档
+        self.download_archive = download_archive
+        # 解析结果缓存，为 None 时每次都重新解析
+        self.info_cache = info_cache
         self._is_cancelled = False
-        self._log_file = None
+        # 下载失败时的异常，供调度器判断是否重试
+        self.error: BaseException | None = None
+        # 日志文件由共享的后台写入线程负责写入，run() 开始后才启用
+        self._log_writer = log_writer
+        self._log_to_file = False
+        # 有日志窗口订阅时才缓冲日志，由调度器定时批量取走，避免逐行跨线程发信号
+        # 缓冲的日志为 (在日志流中的逻辑偏移量, 消息)，未写入文件的行偏移量为 None，
+        # 日志窗口据此跳过已从文件读取的行
+        self.log_subscribed = False
+        self._log_buffer: list[tuple[int | None, str]] = []
+        self._log_lock = threading.Lock()
+        # 下一行日志的逻辑偏移量，每轮下载开始（旧日志被丢弃）时归零
+        self._log_offset = 0
+        # 跨流平滑的整体进度、速度与剩余时间，随进度事件一并发出；
+        # 下载播放列表时每个视频开始前换用新的估算器
+        self._estimator = ProgressEstimator()
+        # 并行下载多个流时进度钩子在多个线程中调用，估算器的更新与事件发出需要串行
+        self._hook_lock = threading.Lock()
+        # 当前视频待并行下载的流，为 None 时按 yt-dlp 原本的方式逐个下载
+        self._stream_group: _StreamGroup | None = None
+        # 并行下载的某个流失败后，其余的流在下一次进度回调时中断
+        self._abort_streams = False
+        # 推迟的后处理：(文件名, info, 待移动的文件)，以及 yt-dlp 原本的 post_process
+        self._deferred: list[tuple[str, dict[str, Any], dict[str, Any] | None]] = []
+        self._post_process: Callable[..., Any] | None = None
+        # 正在后处理队列中执行推迟的后处理
+        self._postprocessing = False
+        # 启用指标时为进度事件附加发出时间，由调度器统计信号送达延迟
+        self._stamp_progress = metrics.enabled()
+        self._m_hooks = metrics.counter("progress_hooks_total", "yt-dlp 进度钩子的调用次数")
 
     def _write_log(self, msg: str) -> None:
-        """写日志到文件并发出信号"""
-        if self._log_file:
-            try:
-                self._log_file.write(msg + "\n")
-            except Exception:
-                pass
-        self.log_message.emit(self.task_id, msg)
+        """写日志到文件，有订阅者时同时放入缓冲区"""
+        # 多个线程都可能写日志，偏移量的分配与入队顺序必须一致
+        with self._log_lock:
+            offset = None
+            if self._log_to_file and self._log_writer is not None:
+                offset = self._log_offset
+                self._log_offset += len(msg.encode("utf-8")) + 1
+                self._log_writer.write(self.task_id, msg)
+            if self.log_subscribed:
+                self._log_buffer.append((offset, msg))
+
+    def drain_logs(self) -> list[tuple[int | None, str]]:
+        """取走并清空缓冲区中的日志 [(偏移量, 消息)]（可从其他线程调用）"""
+        with self._log_lock:
+            lines, self._log_buffer = self._log_buffer, []
+        return lines
 
     def _progress_hook(self, d: dict[str, Any]) -> None:
         """yt-dlp 进度钩子函数"""
+        self._m_hooks.inc()
         # 检查取消标志
         if self._is_cancelled:
+            from yt_dlp.utils import DownloadCancelled
+
             self._write_log("正在中断下载...")
             raise DownloadCancelled("用户取消下载")
+        if self._abort_streams:
+            from yt_dlp.utils import DownloadCancelled
+
+            raise DownloadCancelled("同时下载的其他流失败")
 
+        with self._hook_lock:
+            self._handle_progress(d)
+
+    def _handle_progress(self, d: dict[str, Any]) -> None:
         if d["status"] == "downloading":
+            estimator = self._estimator
+            estimate = estimator.update(d)
+            d = dict(
+                d,
+                _overall_percent=estimate.percent,
+                _overall_downloaded=estimate.downloaded,
+                _overall_total=estimate.total,
+                _smoothed_speed=estimate.speed,
+                _smoothed_eta=estimate.eta,
+            )
+            if estimator.multi_stream:
+                d.update(estimator.details())
+            if self._stamp_progress:
+                d["_emitted_at"] = time.perf_counter()
             self.progress.emit(self.task_id, d)
         elif d["status"] == "finished":
             if "filename" in d:
                 filename = d.get("filename", "")
                 self._write_log(f"文件下载完成: {os.path.basename(filename)}")
-                if filename and not any(
-                    filename.endswith(ext) for ext in [".srt", ".vtt", ".ass", ".ssa", ".json"]
+                # 视频与音频分开下载时，最后一个流完成后才进入合并状态；
+                # 推迟后处理时合并在后处理队列中进行，由后处理钩子报告
+                if (
+                    filename
+                    and not filename.endswith(_SIDECAR_EXTENSIONS)
+                    and self._estimator.finish_stream(d)
+                    and not self.defer_postprocessing
                 ):
-                    self.progress.emit(self.task_id, {"status": "merging"})
+                    self.progress.emit(self.task_id, self._merging_event())
             else:
                 self._write_log(f"处理步骤完成: {d.get('info_dict', {}).get('title', '未知任务')}")
         elif d["status"] == "error":
             self._write_log(f"下载错误: {d.get('filename', '未知文件')}")
 
+    def _merging_event(self) -> dict[str, Any]:
+        event = {"status": "merging", "_overall_percent": self._estimator.percent}
+        if self._estimator.multi_stream:
+            event.update(self._estimator.details())
+        return event
+
+    def _postprocessor_hook(self, d: dict[str, Any]) -> None:
+        """yt-dlp 后处理钩子：合并开始与结束时更新合并阶段的进度
+
+        在后处理队列中执行时报告每个后处理步骤的开始与结束，并在步骤之间响应取消。
+        """
+        if self._postprocessing and self._is_cancelled:
+            from yt_dlp.utils import DownloadCancelled
+
+            raise DownloadCancelled("用户取消后处理")
+
+        merger = d.get("postprocessor") == "Merger"
+        if merger and d["status"] == "started":
+            self._estimator.start_merge()
+        elif merger and d["status"] == "finished":
+            self._estimator.finish_merge()
+        elif not self._postprocessing:
+            return
+
+        if self._postprocessing:
+            event = self._postprocessing_event()
+            event.update(postprocessor=d.get("postprocessor"), _pp_status=d["status"])
+            self.progress.emit(self.task_id, event)
+        else:
+            self.progress.emit(self.task_id, self._merging_event())
+
+    def _postprocessing_event(self) -> dict[str, Any]:
+        event = {"status": "postprocessing", "_overall_percent": self._estimator.percent}
+        if self._estimator.multi_stream:
+            event.update(self._estimator.details())
+        return event
+
+    def _plan_streams(self, info: dict[str, Any]) -> None:
+        """开始下载一个视频前登记选中的格式，用于计算多个流合计的进度"""
+        if self._estimator.started:
+            self._estimator = ProgressEstimator()
+        formats = info.get("requested_formats") or [info]
+        self._estimator.plan(formats)
+        self._stream_group = None
+        self._abort_streams = False
+        if self.parallel_streams and len(formats) > 1:
+            self._stream_group = _StreamGroup(info, formats)
+
+    def _install_parallel_dl(self, ydl: "yt_dlp.YoutubeDL") -> None:
+        """替换 ydl.dl：视频与音频分开下载时，第一个流开始下载时同时下载全部流
+
+        yt-dlp 在 process_info 中按 requested_formats 的顺序逐个调用 dl()，全部返回后
+        再交给 FFmpegMergerPP 合并。这里只改变下载方式：第一次调用时并行下载所有流并
+        保存结果，之后的调用直接返回对应的结果，合并等后续步骤仍由 yt-dlp 完成。
+        """
+        sequential_dl = ydl.dl
+
+        def dl(
+            name: str, info: dict[str, Any], subtitle: bool = False, test: bool = False
+        ) -> tuple[bool, bool]:
+            group = self._stream_group
+            format_id = str(info.get("format_id"))
+            if group is None or subtitle or test or format_id not in group.formats:
+                return sequential_dl(name, info, subtitle=subtitle, test=test)
+            if group.results is None:
+                filenames = group.filenames(name, format_id)
+                if filenames is None:
+                    # 文件名不是预期的 <名称>.f<格式>.<扩展名>（如输出到标准输出），逐个下载
+                    self._stream_group = None
+                    return sequential_dl(name, info, subtitle=subtitle, test=test)
+                group.results = self._download_streams(ydl, group, filenames)
+            return group.results[format_id]
+
+        ydl.dl = dl  # type: ignore[method-assign]
+
+    def _download_streams(
+        self, ydl: "yt_dlp.YoutubeDL", group: "_StreamGroup", filenames: dict[str, str]
+    ) -> dict[str, tuple[bool, bool]]:
+        """在线程池中同时下载各个流，返回 format_id → (是否成功, 是否实际下载)"""
+        from yt_dlp.downloader import get_suitable_downloader
+
+        formats = list(group.formats.values())
+        self._write_log(f"同时下载 {len(formats)} 个流")
+        # 与 YoutubeDL.dl 相同，只是每个流使用按比例分配的限速与分片并发数
+        hooks = getattr(ydl, "_progress_hooks", [self._progress_hook])
+
+        def download(fmt: dict[str, Any], params: dict[str, Any]) -> tuple[bool, bool]:
+            info = dict(group.base, **fmt)
+            fd = get_suitable_downloader(info, params)(ydl, params)
+            for hook in hooks:
+                fd.add_progress_hook(hook)
+            return fd.download(filenames[str(fmt.get("format_id"))], info)
+
+        with ThreadPoolExecutor(
+            max_workers=len(formats), thread_name_prefix=f"task-{self.task_id}-stream"
+        ) as pool:
+            futures = {
+                str(fmt.get("format_id")): pool.submit(download, fmt, params)
+                for fmt, params in zip(formats, _stream_params(ydl.params, formats))
+            }
+            done, _ = wait(futures.values(), return_when=FIRST_EXCEPTION)
+            failed = next((f for f in done if f.exception() is not None), None)
+            if failed is not None:
+                self._abort_streams = True
+        if failed is not None:
+            raise failed.exception()  # type: ignore[misc]
+        return {format_id: future.result() for format_id, future in futures.items()}
+
     @Slot()
     def run(self) -> None:
         """执行下载"""
@@ -96,19 +323,25 @@ class DownloadWorker(QObject):
             self.finished.emit(self.task_id, False, "URL 不能为空")
             return
 
-        # 使用行缓冲 (buffering=1) 打开日志文件，确保实时写入且性能最佳
-        log_path = get_task_log_path(self.task_id)
-        try:
-            self._log_file = open(log_path, "w", encoding="utf-8", buffering=1)
-        except Exception:
-            pass
+        # 日志行交给后台写入线程攒批落盘，下载线程只做一次入队
+        if self._log_writer is None:
+            self._log_writer = get_log_writer()
+        with self._log_lock:
+            self._log_writer.open_task(self.task_id)
+            self._log_offset = 0
+            self._log_to_file = True
 
+        # 程序启动时不导入 yt_dlp（见 preload_yt_dlp），此时通常已在后台加载完成
+        from yt_dlp.utils import DownloadCancelled
+
+        handed_off = False
         try:
             # 使用配置文件中的常量
             base_options: Any = {
                 "format": self.format_preset,
                 "outtmpl": os.path.join(self.download_path, OUTPUT_TEMPLATE),
                 "progress_hooks": [self._progress_hook],
+                "postprocessor_hooks": [self._postprocessor_hook],
                 "noplaylist": not self.download_playlist,
                 "logger": self.YtdlpLogger(self.task_id, self._write_log),
                 "noprogress": NO_PROGRESS,
@@ -127,7 +360,7 @@ class DownloadWorker(QObject):
                 base_options["proxy"] = self.proxy
 
             if self.concurrent_fragments is not None:
-                base_options["concurrent_fragments"] = self.concurrent_fragments
+                base_options["concurrent_fragment_downloads"] = self.concurrent_fragments
 
             if self.write_subs:
                 base_options["writesubtitles"] = True
@@ -154,27 +387,143 @@ class DownloadWorker(QObject):
                 self._write_log("已启用无 Cookies 模式")
                 base_options["no_cookies"] = True
 
+            if self.download_archive is not None:
+                base_options["download_archive"] = self.download_archive
+
+            if self.audio_format:
+                base_options["postprocessors"] = [
+                    {
+                        "key": "FFmpegExtractAudio",
+                        "preferredcodec": self.audio_format,
+                        "preferredquality": AUDIO_CONVERT_QUALITY,
+                    }
+                ]
+
             base_options.update(self.ydl_opts)
+            if isinstance(base_options["format"], str):
+                # 同一格式表达式在进程中只编译一次，yt-dlp 直接使用编译好的选择函数
+                base_options["format"] = compiled_selector(base_options["format"], base_options)
 
-            with yt_dlp.YoutubeDL(base_options) as ydl:
-                ydl.extract_info(self.url, download=True)
+            with self._create_ydl(base_options) as ydl:
+                ydl.add_post_processor(_stream_planner(self._plan_streams), when="before_dl")
+                if self.parallel_streams:
+                    self._install_parallel_dl(ydl)
+                if self.defer_postprocessing:
+                    self._install_deferred_postprocess(ydl)
+                with selecting_with(ydl):
+                    self._download(ydl)
 
             if self._is_cancelled:
+                self._deferred.clear()
                 self.finished.emit(self.task_id, False, "用户取消")
             else:
-                self.finished.emit(self.task_id, True, "完成")
+                handed_off = self._hand_off()
+                if not handed_off:
+                    self.finished.emit(self.task_id, True, "完成")
         except DownloadCancelled:
+            self._deferred.clear()
             self.finished.emit(self.task_id, False, "已取消")
         except Exception as e:
+            self.error = e
             self._write_log(f"下载出错: {e}")
-            self.finished.emit(self.task_id, False, str(e))
+            # 播放列表中已下载完成的视频仍然执行后处理，之后再按此错误结束
+            handed_off = self._hand_off()
+            if not handed_off:
+                self.finished.emit(self.task_id, False, str(e))
+        finally:
+            # 交给后处理队列后由 run_postprocessing() 结束本轮日志；发出 downloaded 之后
+            # 后处理可能已在线程池中开始并清空 _deferred，这里只看本线程的交接结果
+            if not handed_off:
+                self._log_to_file = False
+                self._log_writer.finish_task(self.task_id)
+
+    def _install_deferred_postprocess(self, ydl: "yt_dlp.YoutubeDL") -> None:
+        """替换 ydl.post_process：只记录每个视频的后处理，下载结束后交给后处理队列执行
+
+        yt-dlp 在 process_info 中下载完一个视频的全部流后调用 post_process，依次执行合并、
+        修复、格式转换与移动文件等后处理器。这里记录调用参数后立即返回，下载线程接着
+        下载下一个视频或结束，后处理由 run_postprocessing() 在后处理线程池中完成。
+        """
+        self._post_process = ydl.post_process
+
+        def post_process(
+            filename: str, info: dict[str, Any], files_to_move: dict[str, Any] | None = None
+        ) -> dict[str, Any]:
+            info["filepath"] = filename
+            # yt-dlp 之后还会修改 info（如下载存档标记），后处理使用副本
+            self._deferred.append((filename, dict(info), files_to_move))
+            return info
+
+        ydl.post_process = post_process  # type: ignore[method-assign]
+
+    def _hand_off(self) -> bool:
+        """有推迟的后处理时发出 downloaded 并返回 True，由调度器交给后处理队列"""
+        if not self._deferred:
+            return False
+        self._write_log(f"下载完成，等待后处理（{len(self._deferred)} 个文件）")
+        self.downloaded.emit(self.task_id)
+        return True
+
+    def run_postprocessing(self) -> None:
+        """执行下载阶段推迟的后处理，由后处理队列在其线程池中调用，结束后发出 finished"""
+        from yt_dlp.utils import DownloadCancelled
+
+        assert self._post_process is not None and self._log_writer is not None
+        self._postprocessing = True
+        items = self._deferred
+        success, message = True, "完成"
+        try:
+            self.progress.emit(self.task_id, self._postprocessing_event())
+            for filename, info, files_to_move in items:
+                if self._is_cancelled:
+                    raise DownloadCancelled("用户取消后处理")
+                self._post_process(filename, info, files_to_move)
+        except DownloadCancelled:
+            success, message = False, "用户取消"
+        except Exception as e:
+            self.error = e
+            self._write_log(f"后处理出错: {e}")
+            success, message = False, str(e)
         finally:
-            if self._log_file:
+            self._postprocessing = False
+            self._deferred = []
+            self._log_to_file = False
+            self._log_writer.finish_task(self.task_id)
+
+        if success and self.error is not None:
+            # 下载阶段已出错（播放列表中的部分视频），完成其余视频的后处理后按该错误结束
+            success, message = False, str(self.error)
+        self.finished.emit(self.task_id, success, message)
+
+    def _create_ydl(self, options: dict[str, Any]) -> "yt_dlp.YoutubeDL":
+        """创建本次下载使用的 YoutubeDL，子类可覆盖以调整选项或注册额外的提取器"""
+        import yt_dlp
+
+        return yt_dlp.YoutubeDL(options)
+
+    def _download(self, ydl: "yt_dlp.YoutubeDL") -> None:
+        """优先使用缓存的解析结果下载，缓存的格式链接失效时重新解析"""
+        from yt_dlp.utils import DownloadError
+
+        cache = self.info_cache
+        if cache is not None:
+            info = cache.get(self.url)
+            if info is not None:
+                self._write_log("使用缓存的解析结果")
                 try:
-                    self._log_file.close()
-                except Exception:
-                    pass
-                self._log_file = None
+                    ydl.process_ie_result(info, download=True)
+                    return
+                except DownloadError as e:
+                    if self._is_cancelled or not _is_expired_link_error(e):
+                        raise
+                    self._write_log("缓存的格式链接已失效，重新解析")
+                    cache.invalidate(self.url)
+
+        # 先只解析不处理，缓存提取器的原始结果，再交给 process_ie_result 选择格式并下载
+        ie_result = ydl.extract_info(self.url, download=False, process=False)
+        if cache is not None and is_cacheable(ie_result):
+            cache.put(self.url, ydl.sanitize_info(dict(ie_result), remove_private_keys=True))
+        ydl.process_ie_result(ie_result, download=True)
 
     def cancel(self) -> None:
         """请求取消下载"""
@@ -202,3 +551,62 @@ class DownloadWorker(QObject):
         def info(self, msg: str) -> None:
             if not msg.startswith("[download]"):
                 self.write_func(msg)
+
+
+class _StreamGroup:
+    """一个视频中需要并行下载的多个流（yt-dlp 的 requested_formats）"""
+
+    def __init__(self, info: dict[str, Any], formats: list[dict[str, Any]]) -> None:
+        # 与 yt-dlp 逐个下载时相同：每个流的 info 为视频的 info 加上该格式的字段
+        self.base = {k: v for k, v in info.items() if k != "requested_formats"}
+        self.formats = {str(f.get("format_id")): f for f in formats}
+        self.results: dict[str, tuple[bool, bool]] | None = None
+
+    def filenames(self, name: str, format_id: str) -> dict[str, str] | None:
+        """由第一个流的文件名推出全部流的文件名，不符合 yt-dlp 的命名方式时返回 None"""
+        suffix = f".f{format_id}.{self.formats[format_id].get('ext')}"
+        if not name.endswith(suffix):
+            return None
+        stem = name[: -len(suffix)]
+        return {fid: f"{stem}.f{fid}.{f.get('ext')}" for fid, f in self.formats.items()}
+
+
+def _stream_params(params: dict[str, Any], formats: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """把任务的限速与分片并发数按各流的大小分给同时下载的流（每个流至少一个分片连接）"""
+    sizes = [f.get("filesize") or f.get("filesize_approx") or 0 for f in formats]
+    total = sum(sizes)
+    ratelimit = params.get("ratelimit")
+    fragments = params.get("concurrent_fragment_downloads") or 1
+    result = []
+    for size in sizes:
+        # 有流的大小未知时平均分配
+        share = size / total if total and all(sizes) else 1 / len(formats)
+        stream_params = dict(params, concurrent_fragment_downloads=max(int(fragments * share), 1))
+        if ratelimit:
+            stream_params["ratelimit"] = max(int(ratelimit * share), 1)
+        result.append(stream_params)
+    return result
+
+
+def _stream_planner(callback: Callable[[dict[str, Any]], None]) -> Any:
+    """创建 before_dl 阶段的后处理器：每个视频下载前把选中格式后的 info 交给 callback
+
+    逐个流下载时 yt-dlp 进度回调中的 info_dict 已不含 requested_formats，只能在这里取得。
+    """
+    from yt_dlp.postprocessor import PostProcessor
+
+    class StreamPlanner(PostProcessor):
+        def run(self, info: dict[str, Any]) -> tuple[list[str], dict[str, Any]]:
+            callback(info)
+            return [], info
+
+    return StreamPlanner()
+
+
+def _is_expired_link_error(error: "DownloadError") -> bool:
+    """判断下载错误是否由格式链接过期或失效引起"""
+    cause = error.exc_info[1] if error.exc_info else None
+    status = getattr(cause, "status", None) or getattr(cause, "code", None)
+    if status in _EXPIRED_LINK_STATUSES:
+        return True
+    return any(f"HTTP Error {code}" in str(error) for code in _EXPIRED_LINK_STATUSES)
@@ -0,0 +1,74 @@
+import pytest
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from yt_dlp_gui.archive import DownloadArchive
+from yt_dlp_gui.database import Database
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    db = Database(db_path=str(tmp_path / "test_downloads.db"))
+    yield db
+    db.close()
+
+
+class FakeVideoIE(InfoExtractor):
+    _VALID_URL = r"fakevideo:(?P<id>\d+)"
+    extracted: list[str] = []
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        self.extracted.append(video_id)
+        return {"id": video_id, "title": f"video {video_id}", "url": "http://127.0.0.1/none.mp4"}
+
+
+class FakePlaylistIE(InfoExtractor):
+    _VALID_URL = r"fakeplaylist:"
+
+    def _real_extract(self, url):
+        entries = [
+            self.url_result(f"fakevideo:{i}", FakeVideoIE.ie_key(), str(i)) for i in range(1, 4)
+        ]
+        return self.playlist_result(entries, "pl", "playlist")
+
+
+def test_download_archive_persists_and_checks_membership(temp_db):
+    """测试存档记录写回数据库，重新载入后成员检查仍然有效"""
+    archive = DownloadArchive(temp_db)
+    assert "youtube abc" not in archive
+    archive.add("youtube abc", task_id=7)
+    archive.add("youtube abc", task_id=8)
+    assert "youtube abc" in archive
+
+    reloaded = DownloadArchive(temp_db)
+    assert "youtube abc" in reloaded
+    assert len(reloaded) == 1
+    assert temp_db.get_archive_entries() == [("youtube", "abc")]
+
+
+def test_task_archive_skip_known(temp_db):
+    """测试任务视图：skip_known=False 时只记录不跳过"""
+    archive = DownloadArchive(temp_db)
+    archive.add("youtube abc")
+
+    assert "youtube abc" in archive.for_task(1)
+    record_only = archive.for_task(2, skip_known=False)
+    assert "youtube abc" not in record_only
+    record_only.add("youtube def")
+    assert "youtube def" in archive
+
+
+def test_playlist_resync_skips_archived_entries(temp_db):
+    """测试 yt-dlp 使用数据库存档时，已下载的播放列表条目在解析前就被跳过"""
+    archive = DownloadArchive(temp_db)
+    archive.add("fakevideo 2")
+    FakeVideoIE.extracted = []
+
+    params = {"download_archive": archive.for_task(1), "simulate": True, "quiet": True}
+    with yt_dlp.YoutubeDL(params, auto_init=False) as ydl:
+        ydl.add_info_extractor(FakePlaylistIE())
+        ydl.add_info_extractor(FakeVideoIE())
+        ydl.extract_info("fakeplaylist:", download=True)
+
+    assert FakeVideoIE.extracted == ["1", "3"]
@@ -0,0 +1,55 @@
+import json
+
+from click.testing import CliRunner
+
+from benchmarks import suite
+from benchmarks.__main__ import compare, main
+from benchmarks.fake_worker import load_trace, synthetic_trace
+
+
+def test_synthetic_trace_shape(tmp_path):
+    """测试合成序列匀速推进到 100%，且可以按 JSON Lines 读回"""
+    trace = synthetic_trace(ticks=4, total_bytes=400)
+    assert [e["downloaded_bytes"] for e in trace] == [100, 200, 300, 400]
+    assert all(e["status"] == "downloading" and "info_dict" in e for e in trace)
+
+    path = tmp_path / "trace.jsonl"
+    path.write_text("\n".join(json.dumps(e) for e in trace) + "\n", encoding="utf-8")
+    assert load_trace(str(path)) == trace
+
+
+def test_progress_pipeline_delivers_all_events(qtbot):
+    """测试进度回放把全部事件送达调度器并给出吞吐指标"""
+    result = suite.bench_progress_pipeline(20, tasks=2, trace=synthetic_trace(ticks=5))
+    assert result["events"] == 20
+    assert result["events_per_sec"] > 0
+
+
+def test_db_benchmarks_report_metrics():
+    """测试数据库基准在小规模下返回完整指标"""
+    commits = suite.bench_db_commits(50, 100)
+    assert commits["updates"] == 50 and commits["commits_per_sec"] > 0
+    tasks = suite.bench_get_all_tasks(100, repeat=1)
+    assert tasks["rows"] == 100 and tasks["get_all_tasks_ms"] > 0
+
+
+def test_compare_flags_regressions():
+    """测试对比报告按指标方向判断提升或退化，小于阈值的变化不标记"""
+    before = {"results": {"a": {"events_per_sec": 100.0, "load_ms": 10.0, "rows": 5}}}
+    after = {"results": {"a": {"events_per_sec": 50.0, "load_ms": 10.5, "rows": 9}}}
+    lines = compare(before, after)
+    assert len(lines) == 3
+    assert lines[1].startswith("a.events_per_sec") and lines[1].endswith("退化")
+    assert lines[2].startswith("a.load_ms") and lines[2].rstrip().endswith("+5.0%")
+
+
+def test_cli_writes_json(tmp_path):
+    """测试命令行只运行选中的基准并写出带元信息的 JSON"""
+    output = tmp_path / "result.json"
+    result = CliRunner().invoke(
+        main, ["--only", "get_all_tasks", "--rows", "50", "-o", str(output)]
+    )
+    assert result.exit_code == 0, result.output
+    data = json.loads(output.read_text(encoding="utf-8"))
+    assert set(data["results"]) == {"get_all_tasks_50"}
+    assert data["meta"]["python"]
@@ -0,0 +1,232 @@
+import threading
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from yt_dlp_gui import control
+from yt_dlp_gui.control import ControlClient, ControlError, ControlServer
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+
+@pytest.fixture
+def server(qtbot, tmp_path):
+    """在临时数据库上启动控制接口，调度器不真正启动下载线程"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    with patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread"):
+        scheduler = DownloadScheduler(db, max_concurrent_downloads=1)
+        server = ControlServer(db, scheduler, name=f"yt-dlp-gui-test-{uuid.uuid4().hex[:8]}")
+        assert server.listen()
+        yield server
+        server.close()
+        scheduler.shutdown()
+    db.close()
+
+
+def _run_client(qtbot, name, func):
+    """在独立线程中以阻塞方式访问控制接口，主线程继续处理事件"""
+    outcome = {}
+
+    def target():
+        client = ControlClient(name, request_timeout=5000)
+        try:
+            assert client.connect()
+            outcome["result"] = func(client)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            client.close()
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    qtbot.waitUntil(lambda: not thread.is_alive(), timeout=10000)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def test_control_add_list_and_manage(qtbot, server, tmp_path):
+    """测试通过控制接口添加、批量添加、查询和停止任务，错误请求返回错误信息"""
+
+    def script(client):
+        first = client.request("add", url="https://example.com/v1", path=str(tmp_path))
+        bulk = client.request(
+            "bulk-add",
+            urls=[
+                "https://example.com/v2 https://example.com/v3",
+                "# 注释",
+                "https://example.com/v1",
+            ],
+            path=str(tmp_path),
+        )
+        queued = client.request("list", status=["queued"])
+        stopped = client.request("stop", ids=[queued[0]["id"]])
+        tasks = client.request("list")
+        errors = []
+        for cmd, params in (
+            ("unknown", {}),
+            ("start", {"ids": "1"}),
+            ("add", {}),
+            ("add", {"url": "https://example.com/v4", "format": 123}),
+            ("add", {"url": "https://example.com/v4", "path": ["/tmp"]}),
+            ("add", {"url": "https://example.com/v4", "playlist": "yes"}),
+            ("list", {"status": "downloading"}),
+        ):
+            try:
+                client.request(cmd, **params)
+            except ControlError as e:
+                errors.append(str(e))
+        return first, bulk, stopped, tasks, errors
+
+    first, bulk, stopped, tasks, errors = _run_client(qtbot, server.name, script)
+
+    # 已在进行中的 v1 被跳过，一行中的多个链接都被导入
+    assert bulk == {"added": 2, "skipped": 1}
+    assert stopped == {"count": 1}
+    assert [t["url"] for t in tasks] == [
+        "https://example.com/v1",
+        "https://example.com/v2",
+        "https://example.com/v3",
+    ]
+    assert tasks[0]["id"] == first["id"]
+    # 排队中的任务被直接停止，正在下载的 v1 不受影响
+    assert [t["status"] for t in tasks] == ["pending", "cancelled", "queued"]
+    assert all(t["save_path"] == str(tmp_path) for t in tasks)
+    assert errors == [
+        "未知命令: unknown",
+        "ids 必须是任务 ID 列表",
+        "缺少 url",
+        "format 必须是字符串",
+        "path 必须是字符串",
+        "playlist 必须是布尔值",
+        "status 必须是状态列表",
+    ]
+
+
+def test_control_unexpected_error_is_reported(qtbot, server, monkeypatch):
+    """测试命令执行中的意外异常以错误响应返回，客户端不必等到超时"""
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server.db, "get_all_tasks", broken)
+
+    def script(client):
+        with pytest.raises(ControlError, match="内部错误: boom"):
+            client.request("list")
+        return client.request("list", ids=[])
+
+    assert _run_client(qtbot, server.name, script) == []
+
+
+def test_control_progress_stream_is_batched(qtbot, server):
+    """测试进度订阅按批推送：同一任务的多次进度变化合并为一条增量"""
+    ready = threading.Event()
+    release = threading.Event()
+
+    def script(client):
+        client.request("subscribe")
+        ready.set()
+        release.wait(5)
+        return list(client.events(timeout=1000))
+
+    outcome = {}
+    thread = threading.Thread(
+        target=lambda: outcome.update(events=_client_events(server.name, script))
+    )
+    thread.start()
+    qtbot.waitUntil(ready.is_set, timeout=5000)
+
+    scheduler = server.scheduler
+    for downloaded in range(0, 100, 10):
+        scheduler.task_progress_changed.emit(
+            7, {"status": "downloading", "downloaded_bytes": downloaded, "total_bytes": 100}
+        )
+    scheduler.task_title_updated.emit(7, "标题")
+    scheduler.task_deleted.emit(8)
+    server.flush_progress()
+    release.set()
+    qtbot.waitUntil(lambda: not thread.is_alive(), timeout=10000)
+
+    events = outcome["events"]
+    assert len(events) == 1
+    tasks = {t["id"]: t for t in events[0]["tasks"]}
+    assert tasks[7]["progress"] == 90
+    assert tasks[7]["title"] == "标题"
+    assert tasks[8] == {"id": 8, "deleted": True}
+
+
+def _client_events(name, script):
+    client = ControlClient(name, request_timeout=5000)
+    assert client.connect()
+    try:
+        return script(client)
+    finally:
+        client.close()
+
+
+def test_second_launch_forwards_to_running_instance(qtbot, server, monkeypatch):
+    """测试第二次启动时把待导入的链接转发给运行中的实例并请求激活窗口"""
+    monkeypatch.setattr(control, "get_control_server_name", lambda role="gui": server.name)
+    activated = []
+    server.activate_requested.connect(lambda: activated.append(True))
+
+    outcome = {}
+    thread = threading.Thread(
+        target=lambda: outcome.update(
+            forwarded=control.forward_to_running_instance(["https://example.com/a"])
+        )
+    )
+    thread.start()
+    qtbot.waitUntil(lambda: not thread.is_alive(), timeout=10000)
+
+    assert outcome["forwarded"] is True
+    assert activated == [True]
+    assert [t.url for t in server.db.get_all_tasks()] == ["https://example.com/a"]
+
+
+def test_forward_skips_daemon_without_window(qtbot, server, monkeypatch):
+    """测试运行中的实例是守护进程时 activate 报告没有窗口，不转发链接，由 cli 启动图形界面"""
+    daemon = ControlServer(server.db, server.scheduler, name=f"{server.name}-daemon", role="daemon")
+    assert daemon.listen()
+    monkeypatch.setattr(control, "get_control_server_name", lambda role="gui": daemon.name)
+    activated = []
+    daemon.activate_requested.connect(lambda: activated.append(True))
+
+    outcome = {}
+    thread = threading.Thread(
+        target=lambda: outcome.update(
+            forwarded=control.forward_to_running_instance(["https://example.com/a"])
+        )
+    )
+    thread.start()
+    qtbot.waitUntil(lambda: not thread.is_alive(), timeout=10000)
+    daemon.close()
+
+    assert outcome["forwarded"] is False
+    assert activated == []
+    assert server.db.get_all_tasks() == []
+
+
+def test_cli_reports_forward_errors(monkeypatch):
+    """测试转发请求超时时 cli 报告错误，而不是抛出异常堆栈"""
+    from click.testing import CliRunner
+
+    from yt_dlp_gui.cli import cli
+
+    def timeout(lines):
+        raise ControlError("等待响应超时")
+
+    monkeypatch.setattr(control, "forward_to_running_instance", timeout)
+    result = CliRunner().invoke(cli, [])
+    assert result.exit_code == 1
+    assert "无法转发给运行中的窗口: 等待响应超时" in result.output
+
+
+def test_forward_without_running_instance(monkeypatch):
+    """测试没有实例运行时不转发"""
+    monkeypatch.setattr(
+        control, "get_control_server_name", lambda role="gui": "yt-dlp-gui-test-none"
+    )
+    assert control.forward_to_running_instance(None) is False
@@ -0,0 +1,147 @@
+import pytest
+
+from benchmarks.fake_worker import synthetic_trace
+from yt_dlp_gui.config import ESTIMATOR_DOWNLOAD_CEILING
+from yt_dlp_gui.estimator import ProgressEstimator, format_label
+
+MB = 1024 * 1024
+
+
+def _fragment_trace(name, total, fragment, start=0.0, interval=1.0):
+    """分片下载的回调序列：每隔 interval 秒一次到达一个分片，yt-dlp 给出的速度忽高忽低"""
+    events, downloaded, t = [], 0, start
+    while downloaded < total:
+        t += interval
+        downloaded = min(downloaded + fragment, total)
+        events.append(
+            {
+                "status": "downloading",
+                "tmpfilename": f"{name}.part",
+                "downloaded_bytes": downloaded,
+                "total_bytes": total,
+                "speed": 50.0 * MB if len(events) % 2 else 0.1 * MB,
+                "_t": t,
+            }
+        )
+    return events
+
+
+def _replay(estimator, trace):
+    return [estimator.update(e, now=e["_t"]) for e in trace]
+
+
+def test_speed_and_eta_are_smoothed_over_fragments():
+    """测试分片突发到达时窗口速度接近真实平均速度，剩余时间稳定"""
+    trace = _fragment_trace("video.f137.mp4", total=60 * MB, fragment=MB)
+    estimates = _replay(ProgressEstimator(window=5.0), trace)
+
+    for event, estimate in list(zip(trace, estimates))[5:-1]:
+        assert estimate.speed == pytest.approx(MB, rel=0.01)
+        actual = 60 - event["_t"]
+        assert estimate.eta == pytest.approx(actual, rel=0.1)
+    etas = [e.eta for e in estimates[5:]]
+    assert all(abs(a - b) < 1.5 for a, b in zip(etas, etas[1:]))
+
+
+def test_percent_is_monotonic_across_streams():
+    """测试视频之后下载音频时整体进度不回退，速度跨文件连续计算"""
+    video = _fragment_trace("clip.f137.mp4", total=8 * MB, fragment=MB)
+    audio = _fragment_trace("clip.f140.m4a", total=2 * MB, fragment=MB // 2, start=8.0)
+    estimates = _replay(ProgressEstimator(window=3.0), video + audio)
+
+    percents = [e.percent for e in estimates]
+    assert percents == sorted(percents)
+    assert percents[-1] == ESTIMATOR_DOWNLOAD_CEILING
+    # 音频的第一个回调仍沿用跨文件窗口的速度
+    assert estimates[len(video)].speed == pytest.approx(MB * 2.5 / 3, rel=0.01)
+
+
+def test_restarted_stream_counts_transferred_bytes():
+    """测试同一文件从头重新下载时传输量继续累计，进度保持不变"""
+    estimator = ProgressEstimator(window=10.0)
+    estimator.update({"tmpfilename": "a.part", "downloaded_bytes": 500, "total_bytes": 1000}, 0.0)
+    first = estimator.update(
+        {"tmpfilename": "a.part", "downloaded_bytes": 600, "total_bytes": 1000}, 1.0
+    )
+    restarted = estimator.update(
+        {"tmpfilename": "a.part", "downloaded_bytes": 100, "total_bytes": 1000}, 2.0
+    )
+    assert restarted.percent == first.percent
+    assert restarted.speed == pytest.approx(100.0)
+
+
+def test_unknown_total_keeps_percent():
+    """测试总大小未知时不推进百分比，剩余时间未知"""
+    estimate = ProgressEstimator().update({"tmpfilename": "a.part", "downloaded_bytes": 10}, 0.0)
+    assert (estimate.percent, estimate.eta) == (0.0, None)
+
+
+def test_replay_recorded_trace():
+    """测试按 elapsed 回放录制格式的进度序列：剩余时间与实际相符并随进度递减"""
+    trace = synthetic_trace(ticks=50, total_bytes=50 * MB)
+    estimator = ProgressEstimator(window=1.0)
+    estimates = [estimator.update(e, now=e["elapsed"]) for e in trace]
+
+    assert estimates[-1].percent == ESTIMATOR_DOWNLOAD_CEILING
+    # 每 0.1 秒 1 MiB
+    assert estimates[20].speed == pytest.approx(10 * MB)
+    assert estimates[20].eta == pytest.approx((50 - 21) / 10, rel=0.05)
+    etas = [e.eta for e in estimates[1:]]
+    assert etas == sorted(etas, reverse=True)
+
+
+VIDEO = {"format_id": "137", "ext": "mp4", "vcodec": "avc1", "acodec": "none", "height": 1080}
+AUDIO = {"format_id": "140", "ext": "m4a", "vcodec": "none", "acodec": "mp4a"}
+
+
+def _stream_trace(fmt, total, fragment, start=0.0):
+    trace = _fragment_trace(f"clip.f{fmt['format_id']}.{fmt['ext']}", total, fragment, start)
+    for event in trace:
+        event["info_dict"] = dict(fmt)
+    return trace
+
+
+def test_planned_streams_give_combined_progress():
+    """测试按 requested_formats 登记后，视频与音频合计计算进度，切换到音频时不停滞"""
+    estimator = ProgressEstimator(window=3.0)
+    estimator.plan([dict(VIDEO, filesize=8 * MB), dict(AUDIO, filesize_approx=2 * MB)])
+    video = _stream_trace(VIDEO, 8 * MB, MB)
+    audio = _stream_trace(AUDIO, 2 * MB, MB // 2, start=8.0)
+
+    estimates = _replay(estimator, video)
+    assert estimates[-1].percent == pytest.approx(ESTIMATOR_DOWNLOAD_CEILING * 0.8)
+    assert estimates[-1].total == 10 * MB
+    assert not estimator.finish_stream(video[-1])
+    assert estimator.details()["_streams"][1] == {
+        "label": "音频 140 (m4a)",
+        "downloaded": 0,
+        "total": 2 * MB,
+        "state": "pending",
+    }
+
+    estimates += _replay(estimator, audio)
+    percents = [e.percent for e in estimates]
+    assert percents == sorted(percents)
+    assert percents[len(video)] > percents[len(video) - 1]
+    assert estimates[-1].downloaded == 10 * MB
+    assert estimator.finish_stream(audio[-1])
+
+    assert estimator.merge == "pending"
+    estimator.start_merge()
+    assert (estimator.merge, estimator.percent) == ("running", ESTIMATOR_DOWNLOAD_CEILING)
+
+
+def test_unplanned_downloads_are_ignored():
+    """测试登记格式后，字幕等其他下载不计入任务进度"""
+    estimator = ProgressEstimator()
+    estimator.plan([dict(VIDEO, filesize=1000)])
+    subtitle = {"filename": "clip.en.vtt", "downloaded_bytes": 900, "total_bytes": 1000}
+    assert estimator.update(dict(subtitle, info_dict={"ext": "vtt"}), now=0.0).percent == 0.0
+    assert not estimator.multi_stream and estimator.merge is None
+
+
+def test_format_label():
+    """测试流的显示名称区分视频、音频与音视频"""
+    assert format_label(VIDEO) == "视频 137 (mp4, 1080p)"
+    assert format_label(AUDIO) == "音频 140 (m4a)"
+    assert format_label({"format_id": "18", "ext": "mp4", "height": 360}) == "音视频 18 (mp4, 360p)"
@@ -0,0 +1,223 @@
+import os
+import sys
+
+import PySide6
+import pytest
+
+from benchmarks.fake_site import (
+    DASH_INIT_SIZE,
+    FakeSite,
+    FakeSiteConfig,
+    FakeSiteWorker,
+    payload,
+)
+from yt_dlp_gui.config import DEFAULT_FORMAT
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.retry import RetryPolicy
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+# PySide6 6.12.0 在 Python 3.11 上每次 Signal.emit 都会多释放一次 True 的引用，
+# 真实下载发出的上千次进度信号会让解释器崩溃，端到端的下载测试在该组合下跳过
+requires_sound_emit = pytest.mark.skipif(
+    PySide6.__version__ == "6.12.0" and sys.version_info < (3, 12),
+    reason="PySide6 6.12.0 在 Python 3.11 上 Signal.emit 引用计数错误",
+)
+
+
+def _run_worker(site, tmp_path, video_id, kind, **kwargs):
+    worker = FakeSiteWorker(
+        task_id=1, url=site.url(video_id, kind), download_path=str(tmp_path), **kwargs
+    )
+    results = []
+    worker.finished.connect(lambda *args: results.append(args))
+    worker.run()
+    return results[0], worker
+
+
+def _downloaded(tmp_path, video_id):
+    path = tmp_path / f"Fake video {video_id} [{video_id}].mp4"
+    return path.read_bytes()
+
+
+def test_fake_site_urls_and_fragments():
+    """测试页面地址与分片划分：各分片依次拼接即为完整媒体"""
+    with FakeSite(FakeSiteConfig(media_size=1000, fragments=3)) as site:
+        assert site.url("v1", "hls") == f"{site.base_url}/watch/hls/v1"
+        assert site.expected_size("dash") == 1000 + DASH_INIT_SIZE
+        joined = b"".join(site.fragment("v1", i) for i in range(1, 4))
+        assert joined == payload("v1", 1000)
+        with pytest.raises(ValueError):
+            site.url("v1", "rtmp")
+
+
+@requires_sound_emit
+@pytest.mark.parametrize("kind", ["file", "hls", "dash"])
+def test_worker_downloads_each_kind(qtbot, tmp_path, kind):
+    """测试真实的 DownloadWorker 经 FakeSiteIE 下载单文件、HLS 与 DASH 分片并拼接完整"""
+    with FakeSite(FakeSiteConfig(media_size=64 * 1024, fragments=4)) as site:
+        (_, success, message), worker = _run_worker(site, tmp_path, f"v-{kind}", kind)
+
+    assert success, message
+    # 下载前由 before_dl 阶段的后处理器登记了选中的格式
+    assert [s.state for s in worker._estimator.streams.values()] == ["finished"]
+    expected = payload(f"v-{kind}", 64 * 1024)
+    if kind == "dash":
+        expected = payload(f"init-v-{kind}", DASH_INIT_SIZE) + expected
+    assert _downloaded(tmp_path, f"v-{kind}") == expected
+
+
+@requires_sound_emit
+def test_fragment_concurrency_is_bounded(qtbot, tmp_path):
+    """测试 concurrent_fragments 生效：同一视频的分片并发下载且不超过设定值"""
+    config = FakeSiteConfig(media_size=32 * 1024, fragments=8, latency=0.1)
+    with FakeSite(config) as site:
+        (_, success, message), _ = _run_worker(site, tmp_path, "v1", "hls", concurrent_fragments=4)
+
+    assert success, message
+    assert 1 < site.stats.peak_by_video["v1"] <= 4
+
+
+@requires_sound_emit
+def test_transient_errors_are_retried(qtbot, tmp_path):
+    """测试媒体请求的临时错误由 yt-dlp 自动重试后下载成功"""
+    with FakeSite(FakeSiteConfig(media_size=16 * 1024, fail_first=2)) as site:
+        (_, success, message), _ = _run_worker(site, tmp_path, "v1", "file")
+
+    assert success, message
+    assert site.stats.errors == 2
+    assert _downloaded(tmp_path, "v1") == payload("v1", 16 * 1024)
+
+
+@requires_sound_emit
+def test_scheduler_retries_after_worker_gives_up(qtbot, tmp_path):
+    """测试 yt-dlp 重试耗尽后调度器按临时错误延迟重试，第二次运行下载成功"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    scheduler = DownloadScheduler(
+        db, retry_policy=RetryPolicy(base_delay=0.05), worker_class=FakeSiteWorker
+    )
+    # yt-dlp 对同一地址最多请求 11 次（retries=10），第 12 次请求才会成功
+    with FakeSite(FakeSiteConfig(media_size=16 * 1024, fail_first=11)) as site:
+        task = DownloadTask(
+            url=site.url("v1"), save_path=str(tmp_path), format_preset=DEFAULT_FORMAT
+        )
+        with qtbot.waitSignal(scheduler.task_finished, timeout=30000) as blocker:
+            task_id = scheduler.add_task(task)
+
+    assert blocker.args[1] is True, blocker.args[2]
+    assert db.get_task(task_id).retry_count == 1
+    assert site.stats.errors == 11
+    scheduler.shutdown()
+    db.close()
+
+
+@requires_sound_emit
+@pytest.mark.slow
+def test_hundred_concurrent_downloads(qtbot, tmp_path):
+    """测试 100 个下载同时进行：单文件、HLS、DASH 混合，随机注入错误，全部下载完整"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    scheduler = DownloadScheduler(db, max_concurrent_downloads=100, worker_class=FakeSiteWorker)
+    config = FakeSiteConfig(
+        media_size=32 * 1024, fragments=4, latency=0.05, error_rate=0.05, seed=42
+    )
+    kinds = ["file", "hls", "dash"]
+    finished = {}
+    scheduler.task_finished.connect(lambda tid, ok, msg: finished.__setitem__(tid, (ok, msg)))
+
+    with FakeSite(config) as site:
+        tasks = [
+            DownloadTask(
+                url=site.url(f"v{i:03d}", kinds[i % 3]),
+                save_path=str(tmp_path),
+                format_preset=DEFAULT_FORMAT,
+                concurrent_fragments=2,
+            )
+            for i in range(100)
+        ]
+        task_ids = db.add_tasks(tasks)
+        scheduler.start_many(task_ids)
+        qtbot.waitUntil(lambda: len(finished) == 100, timeout=120000)
+
+    assert all(ok for ok, _ in finished.values()), finished
+    assert site.stats.peak_active >= 50
+    assert site.stats.errors > 0
+    for i in range(100):
+        size = len(_downloaded(tmp_path, f"v{i:03d}"))
+        assert size == site.expected_size(kinds[i % 3])
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".part")]
+    scheduler.shutdown()
+    db.close()
+
+
+@requires_sound_emit
+def test_parallel_streams_download_together(qtbot, tmp_path):
+    """测试并行模式下分开的视频与音频流同时下载（音频在视频下载过程中就有进度），内容完整"""
+    config = FakeSiteConfig(media_size=512 * 1024, audio_size=128 * 1024, speed=1024 * 1024)
+    with FakeSite(config) as site:
+        worker = FakeSiteWorker(
+            task_id=1,
+            url=site.url("v1", "split"),
+            download_path=str(tmp_path),
+            parallel_streams=True,
+        )
+        order = []
+        worker.progress.connect(
+            lambda _, d: (
+                order.append(d["info_dict"]["format_id"]) if d["status"] == "downloading" else None
+            )
+        )
+        results = []
+        worker.finished.connect(lambda *args: results.append(args))
+        worker.run()
+
+    assert results[0][1], results[0][2]
+    # 下载线程池中发出的进度信号经事件循环送达
+    qtbot.waitUntil(lambda: "video" in order and "audio" in order, timeout=5000)
+    # 逐个下载时音频的进度全部排在视频之后
+    last_video = len(order) - order[::-1].index("video") - 1
+    assert order.index("audio") < last_video
+    assert [s.state for s in worker._estimator.streams.values()] == ["finished", "finished"]
+    assert (tmp_path / "Fake video v1 [v1].fvideo.mp4").read_bytes() == payload("v1", 512 * 1024)
+    assert (tmp_path / "Fake video v1 [v1].faudio.m4a").read_bytes() == payload(
+        "audio-v1", 128 * 1024
+    )
+
+
+@requires_sound_emit
+def test_parallel_streams_benchmark(qtbot):
+    """测试并行与逐个下载的吞吐对比基准在小规模下运行，并行下载更快"""
+    from benchmarks import suite
+
+    result = suite.bench_parallel_streams(
+        videos=1, media_size=256 * 1024, audio_size=128 * 1024, speed=512 * 1024, latency=0.1
+    )
+    assert result["parallel_seconds"] < result["sequential_seconds"]
+    assert result["parallel_bytes_per_sec"] > result["sequential_bytes_per_sec"]
+
+
+@requires_sound_emit
+def test_scheduler_postprocesses_after_download(qtbot, tmp_path):
+    """测试调度器中的真实下载：流下载完成后转入后处理队列，后处理步骤执行后任务完成"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    scheduler = DownloadScheduler(db, worker_class=FakeSiteWorker)
+    statuses = []
+    steps = []
+    scheduler.task_status_changed.connect(lambda tid, status: statuses.append(status))
+    scheduler.task_progress_changed.connect(
+        lambda tid, d: (
+            steps.append(d.get("postprocessor")) if d["status"] == "postprocessing" else None
+        )
+    )
+    with FakeSite(FakeSiteConfig(media_size=64 * 1024, audio_size=16 * 1024)) as site:
+        task = DownloadTask(
+            url=site.url("v1", "split"), save_path=str(tmp_path), format_preset=DEFAULT_FORMAT
+        )
+        with qtbot.waitSignal(scheduler.task_finished, timeout=30000) as blocker:
+            scheduler.add_task(task)
+
+    assert blocker.args[1] is True, blocker.args[2]
+    assert statuses == ["downloading", "postprocessing", "finished"]
+    assert "MoveFiles" in steps
+    assert (tmp_path / "Fake video v1 [v1].faudio.m4a").exists()
+    scheduler.shutdown()
+    db.close()
@@ -0,0 +1,158 @@
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from yt_dlp_gui import metrics
+from yt_dlp_gui.cli import cli
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.headless import HeadlessDaemon
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    """把 ~/.yt-dlp-gui 重定向到临时目录"""
+    monkeypatch.setattr(os.path, "expanduser", lambda path: path.replace("~", str(tmp_path)))
+    return tmp_path
+
+
+def _queued(url):
+    return DownloadTask(url=url, save_path=".", format_preset="best", status="queued")
+
+
+def test_cli_add_and_list(home):
+    """测试 add 以排队状态写入共享数据库并去重，list 按状态筛选输出"""
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "add",
+            "https://example.com/v1",
+            "https://example.com/v1",
+            "https://example.com/v2",
+            "--path",
+            str(home),
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert "已添加 2 个任务" in result.output
+
+    # 已在排队中的视频不会被重复添加
+    result = runner.invoke(cli, ["add", "https://example.com/v2", "--path", str(home)])
+    assert "已添加 0 个任务" in result.output
+
+    result = runner.invoke(cli, ["list", "--status", "queued", "--json"])
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [row["url"] for row in rows] == ["https://example.com/v1", "https://example.com/v2"]
+    assert all(row["save_path"] == str(home) for row in rows)
+
+    result = runner.invoke(cli, ["list", "--status", "finished"])
+    assert result.output == ""
+
+
+def test_cli_presets_and_add_with_preset(home):
+    """测试 presets 子命令添加、列出与删除预设，add 按预设名称或格式表达式添加任务"""
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["presets", "add", "mp3 小文件", "--audio-only", "--audio-format", "mp3"]
+    )
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["presets", "add", "mp3 小文件", "--ext", "mp4"])
+    assert "已存在" in result.output
+
+    result = runner.invoke(cli, ["presets", "list"])
+    assert "mp3 小文件  仅音频 · 转为 mp3" in result.output
+
+    result = runner.invoke(cli, ["add", "https://example.com/a", "--format", "mp3 小文件"])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["add", "https://example.com/b", "--format", "worst"])
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(cli, ["add", "https://example.com/c", "--format", "bestvideo+"])
+    assert result.exit_code != 0
+    assert "格式表达式无效" in result.output
+
+    db = Database()
+    first, second = db.get_all_tasks(sort_col="id", sort_dir="ASC")
+    assert first.preset_id == db.find_preset("mp3 小文件").id
+    assert first.audio_format == "mp3"
+    assert (second.preset_id, second.format_preset) == (None, "worst")
+    db.close()
+
+    result = runner.invoke(cli, ["presets", "remove", "720p"])
+    assert "内置预设不能删除" in result.output
+    result = runner.invoke(cli, ["presets", "remove", "mp3 小文件"])
+    assert result.exit_code == 0, result.output
+
+
+def test_cli_add_requires_urls(home):
+    """测试 add 不带链接时报告用法错误"""
+    result = CliRunner().invoke(cli, ["add"])
+    assert result.exit_code != 0
+    assert "请提供至少一个链接" in result.output
+
+
+def test_headless_commands_do_not_load_widgets():
+    """测试命令行与守护进程模块不会加载 QtWidgets、图形界面模块与 yt_dlp"""
+    code = (
+        "import sys, yt_dlp_gui.cli, yt_dlp_gui.headless; "
+        "print(','.join(m for m in ('PySide6.QtWidgets', 'yt_dlp_gui.main', 'yt_dlp') "
+        "if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    assert result.stdout.strip() == ""
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_daemon_picks_up_queued_tasks(mock_run, qtbot, tmp_path):
+    """测试守护进程重新排队被中断的任务，并在扫描时接管其他进程新写入的排队任务"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    interrupted = db.add_tasks([_queued("https://example.com/v1")])[0]
+    db.update_task(interrupted, {"status": "downloading"})
+    scheduler = DownloadScheduler(db, max_concurrent_downloads=1)
+    lines: list[str] = []
+    daemon = HeadlessDaemon(db, scheduler, exit_when_idle=True, output=lines.append)
+
+    daemon.start()
+    assert scheduler._active_task_ids == {interrupted}
+
+    # 模拟另一个进程 (add 子命令) 写入新任务，下一次扫描时接管
+    later = db.add_tasks([_queued("https://example.com/v2"), _queued("https://example.com/v3")])
+    assert daemon.poll() == 2
+    assert daemon.poll() == 0
+    assert scheduler._active_task_ids == {interrupted}
+
+    with qtbot.waitSignal(daemon.idle, timeout=2000):
+        for task_id in [interrupted, *later]:
+            scheduler._cleanup_thread(task_id)
+    assert [call.args[0].id for call in mock_run.call_args_list] == [interrupted, *later]
+    assert lines[0] == "重新排队 1 个上次中断的任务"
+
+    daemon.stop()
+    scheduler.shutdown()
+    db.close()
+
+
+def test_daemon_writes_metrics_file(home, qtbot):
+    """测试守护进程 --metrics-file 启用指标，退出时写出 Prometheus 文本文件"""
+    path = home / "metrics.prom"
+    try:
+        result = CliRunner().invoke(
+            cli, ["daemon", "--exit-when-idle", "--metrics-file", str(path)]
+        )
+    finally:
+        metrics.disable()
+
+    assert result.exit_code == 0, result.output
+    text = path.read_text(encoding="utf-8")
+    assert "# TYPE yt_dlp_gui_db_exec_seconds histogram" in text
+    assert "yt_dlp_gui_downloads_active 0" in text
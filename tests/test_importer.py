@@ -0,0 +1,123 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.importer import ImportJob, UrlCollector, open_url_lines, text_lines
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    db = Database(db_path=str(tmp_path / "test_downloads.db"))
+    yield db
+    db.close()
+
+
+def _template() -> DownloadTask:
+    return DownloadTask(url="", save_path="/downloads", format_preset="best", proxy="http://p")
+
+
+def _run_job(db, source, chunk_size=2):
+    """在当前线程同步执行导入任务，收集发出的块与结果"""
+    job = ImportJob(db, source, _template(), chunk_size=chunk_size)
+    chunks, results = [], []
+    job.signals.chunk_added.connect(chunks.append)
+    job.signals.finished.connect(lambda imported, skipped: results.append((imported, skipped)))
+    job.run()
+    return chunks, results
+
+
+def test_url_collector_dedupes_and_skips_invalid():
+    """测试按规范键去重，跳过注释、空行与无效条目"""
+    collector = UrlCollector()
+    lines = [
+        "# comment",
+        "",
+        "https://example.com/a https://EXAMPLE.com/a#frag",
+        "example.com/b",
+        "not a url",
+        "https://youtu.be/xyz https://www.youtube.com/watch?v=xyz&si=share",
+    ]
+    assert list(collector.collect(lines)) == [
+        ("https://example.com/a", "example.com/a"),
+        ("https://example.com/b", "example.com/b"),
+        ("https://youtu.be/xyz", "youtube.com/watch?v=xyz"),
+    ]
+    assert collector.duplicates == 2
+    assert collector.invalid == 3
+
+
+def test_import_job_inserts_chunks(temp_db, tmp_path):
+    """测试从文件导入：按块写入数据库，任务继承模板选项并以排队状态保存"""
+    path = tmp_path / "urls.txt"
+    path.write_text("https://e.com/1\nhttps://e.com/2\nhttps://e.com/1\nhttps://e.com/3\n")
+
+    chunks, results = _run_job(temp_db, lambda: open_url_lines(str(path)))
+
+    assert [len(c) for c in chunks] == [2, 1]
+    assert results == [(3, 1)]
+    tasks = [t for chunk in chunks for t in chunk]
+    stored = temp_db.get_tasks([t.id for t in tasks])
+    assert [t.url for t in stored] == ["https://e.com/1", "https://e.com/2", "https://e.com/3"]
+    assert {(t.status, t.save_path, t.proxy) for t in stored} == {
+        ("queued", "/downloads", "http://p")
+    }
+
+
+def test_import_job_skips_existing_tasks(temp_db):
+    """测试导入时跳过任务列表中已完成或进行中的同一视频，失败的任务可重新导入"""
+    finished = DownloadTask(url="https://youtu.be/aaa", save_path=".", format_preset="best")
+    failed = DownloadTask(url="https://e.com/failed", save_path=".", format_preset="best")
+    temp_db.update_task(temp_db.add_task(finished), {"status": "finished"})
+    temp_db.update_task(temp_db.add_task(failed), {"status": "error"})
+
+    text = "https://www.youtube.com/watch?v=aaa\nhttps://e.com/failed\nhttps://e.com/new"
+    chunks, results = _run_job(temp_db, text_lines(text), chunk_size=10)
+
+    assert [t.url for t in chunks[0]] == ["https://e.com/failed", "https://e.com/new"]
+    assert results == [(2, 1)]
+
+
+def test_import_job_large_batch_is_fast(temp_db):
+    """测试 10 万个链接的导入在数秒内完成"""
+    text = "\n".join(f"https://example.com/watch?v={i}" for i in range(100_000))
+
+    start = time.perf_counter()
+    chunks, results = _run_job(temp_db, text_lines(text), chunk_size=2000)
+    elapsed = time.perf_counter() - start
+
+    assert results == [(100_000, 0)]
+    assert len(chunks) == 50
+    assert elapsed < 10
+
+
+@patch("yt_dlp_gui.scheduler.SCHEDULER_FEED_SIZE", 3)
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_scheduler_feeds_imported_tasks_lazily(mock_run, temp_db):
+    """测试调度器按需从导入任务中补充等待队列，而不是一次放入全部任务"""
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=2)
+    chunks, _ = _run_job(
+        temp_db, text_lines("\n".join(f"https://e.com/{i}" for i in range(10))), 10
+    )
+    tasks = chunks[0]
+
+    scheduler.add_imported_tasks(tasks)
+    assert mock_run.call_count == 2
+    # 只取出了一批（3 个）中剩余的 1 个任务放入等待队列
+    assert scheduler._waiting_queue == [tasks[2].id]
+
+    # 停止尚未取出的导入任务，之后不会再被启动
+    scheduler.stop_many([tasks[3].id])
+    assert temp_db.get_task(tasks[3].id).status == "cancelled"
+
+    # 运行中的任务陆续结束后，其余导入任务被依次取出启动
+    for _ in range(10):
+        scheduler._active_task_ids.clear()
+        scheduler._fill_slots()
+
+    started = [call.args[0].id for call in mock_run.call_args_list]
+    assert started == [t.id for t in tasks if t.id != tasks[3].id]
+    assert not scheduler._import_ranges
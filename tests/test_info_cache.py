@@ -0,0 +1,167 @@
+from unittest.mock import MagicMock
+
+import pytest
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import DownloadError
+
+from yt_dlp_gui.info_cache import InfoCache, url_expiry
+from yt_dlp_gui.worker import DownloadWorker
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _info(video_id="abc", extractor="Youtube", url="http://127.0.0.1/v.mp4", **extra):
+    return {
+        "id": video_id,
+        "title": f"video {video_id}",
+        "extractor_key": extractor,
+        "formats": [{"format_id": "18", "url": url, "ext": "mp4"}],
+        **extra,
+    }
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = InfoCache(str(tmp_path / "info_cache.db"), ttls={"Youtube": 100}, clock=clock)
+    yield cache
+    cache.close()
+
+
+def test_info_cache_keyed_by_canonical_url(cache):
+    """测试同一视频的不同链接写法命中同一条缓存，且数据经过压缩"""
+    info = _info(description="x" * 10_000)
+    assert cache.put("https://www.youtube.com/watch?v=abc&utm_source=feed", info)
+    assert cache.get("https://youtu.be/abc") == info
+    assert cache.total_size() < 10_000
+    assert cache.get("https://youtu.be/other") is None
+
+    # 不缓存播放列表与没有格式信息的结果
+    assert not cache.put("https://e.com/pl", {"_type": "playlist", "entries": []})
+    assert not cache.put("https://e.com/v", {"id": "v"})
+
+
+def test_info_cache_ttl_and_link_expiry(cache, clock):
+    """测试按提取器设置有效期，格式链接的 expire 参数更早时以其为准"""
+    cache.put("https://youtu.be/a", _info("a"))
+    cache.put("https://e.com/b", _info("b", extractor="Other"))
+    clock.now += 101
+    assert cache.get("https://youtu.be/a") is None
+    # 未单独配置的提取器使用默认有效期
+    assert cache.get("https://e.com/b") is not None
+
+    expire = int(clock.now) + 400
+    info = _info("c", url=f"https://cdn.example.com/v?expire={expire}&sig=1")
+    assert url_expiry(info) == expire
+    cache.put("https://youtu.be/c", info)
+    clock.now += 99
+    assert cache.get("https://youtu.be/c") is not None
+
+    # 距离链接过期不足预留时间时不写入缓存
+    soon = _info("d", url=f"https://cdn.example.com/v?expire={int(clock.now) + 60}")
+    assert not cache.put("https://youtu.be/d", soon)
+
+
+def test_info_cache_lru_eviction(tmp_path, clock):
+    """测试总大小超过上限时淘汰最久未使用的条目"""
+    probe = InfoCache(str(tmp_path / "probe.db"), clock=clock)
+    probe.put("https://youtu.be/probe", _info("probe"))
+    entry_size = probe.total_size()
+    probe.close()
+
+    cache = InfoCache(str(tmp_path / "lru.db"), max_bytes=entry_size * 2 + 8, clock=clock)
+    cache.put("https://youtu.be/a", _info("a"))
+    clock.now += 1
+    cache.put("https://youtu.be/b", _info("b"))
+    clock.now += 1
+    assert cache.get("https://youtu.be/a") is not None
+    clock.now += 1
+    cache.put("https://youtu.be/c", _info("c"))
+
+    assert cache.get("https://youtu.be/a") is not None
+    assert cache.get("https://youtu.be/b") is None
+    assert cache.get("https://youtu.be/c") is not None
+    cache.close()
+
+
+class CountingIE(InfoExtractor):
+    _VALID_URL = r"countme:(?P<id>\w+)"
+    extracted: list[str] = []
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        self.extracted.append(video_id)
+        return {
+            "id": video_id,
+            "title": f"video {video_id}",
+            "formats": [{"format_id": "0", "url": "http://127.0.0.1/none.mp4", "ext": "mp4"}],
+        }
+
+
+def test_worker_uses_cached_info(qtbot, tmp_path, monkeypatch):
+    """测试第二次下载同一链接时使用缓存结果，不再调用提取器"""
+    real_ydl = yt_dlp.YoutubeDL
+
+    def fake_ydl(params):
+        ydl = real_ydl(params, auto_init=False)
+        ydl.add_info_extractor(CountingIE())
+        return ydl
+
+    monkeypatch.setattr(yt_dlp, "YoutubeDL", fake_ydl)
+    CountingIE.extracted = []
+    cache = InfoCache(str(tmp_path / "info_cache.db"))
+
+    for _ in range(2):
+        worker = DownloadWorker(
+            task_id=1,
+            url="countme:xyz",
+            download_path=str(tmp_path),
+            ydl_opts={"simulate": True, "quiet": True},
+            log_writer=MagicMock(),
+            info_cache=cache,
+        )
+        with qtbot.waitSignal(worker.finished) as blocker:
+            worker.run()
+        assert blocker.args[1] is True, blocker.args
+
+    assert CountingIE.extracted == ["xyz"]
+    cache.close()
+
+
+def test_worker_refetches_when_cached_links_expired(cache):
+    """测试缓存的格式链接失效 (HTTP 403) 时丢弃缓存并重新解析"""
+    cache.put("https://youtu.be/abc", _info())
+    fresh = _info(title="fresh")
+
+    ydl = MagicMock()
+    ydl.sanitize_info = yt_dlp.YoutubeDL.sanitize_info
+    ydl.extract_info.return_value = fresh
+    ydl.process_ie_result.side_effect = [
+        DownloadError("ERROR: unable to download video data: HTTP Error 403: Forbidden"),
+        None,
+    ]
+
+    worker = DownloadWorker(task_id=1, url="https://youtu.be/abc", info_cache=cache)
+    worker._download(ydl)
+
+    ydl.extract_info.assert_called_once_with("https://youtu.be/abc", download=False, process=False)
+    assert ydl.process_ie_result.call_args_list[-1].args[0] is fresh
+    assert cache.get("https://youtu.be/abc")["title"] == "fresh"
+
+    # 其他下载错误不触发重新解析
+    ydl.reset_mock()
+    ydl.process_ie_result.side_effect = DownloadError("ERROR: disk full")
+    with pytest.raises(DownloadError):
+        worker._download(ydl)
+    ydl.extract_info.assert_not_called()
@@ -0,0 +1,195 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.headless import HeadlessDaemon
+from yt_dlp_gui.instance import acquire_instance_lock
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+
+def _queued(url):
+    return DownloadTask(url=url, save_path=".", format_preset="best", status="queued")
+
+
+def test_instance_lock_is_exclusive(tmp_path):
+    """测试单实例锁被持有时无法再次获取，释放后可以获取"""
+    path = str(tmp_path / "instance.lock")
+    lock = acquire_instance_lock(path)
+    assert lock is not None
+    assert acquire_instance_lock(path) is None
+    lock.unlock()
+    again = acquire_instance_lock(path)
+    assert again is not None
+    again.unlock()
+
+
+def test_instance_lock_is_per_role(tmp_path, monkeypatch):
+    """测试图形界面与守护进程的锁互不影响，同一角色仍只允许一个实例"""
+    monkeypatch.setattr(os.path, "expanduser", lambda path: path.replace("~", str(tmp_path)))
+    daemon_lock = acquire_instance_lock(role="daemon")
+    assert daemon_lock is not None
+    gui_lock = acquire_instance_lock(role="gui")
+    assert gui_lock is not None
+    assert acquire_instance_lock(role="gui") is None
+    assert acquire_instance_lock(role="daemon") is None
+    gui_lock.unlock()
+    daemon_lock.unlock()
+
+
+def test_gui_starts_while_daemon_runs(tmp_path):
+    """测试守护进程运行（持有其锁与控制接口）时仍能打开图形界面并共用数据库"""
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(sys.path),
+        QT_QPA_PLATFORM="offscreen",
+        HOME=str(tmp_path),
+    )
+    run_cli = [sys.executable, "-c", "from yt_dlp_gui.cli import cli; cli()"]
+    daemon = subprocess.Popen(
+        [*run_cli, "daemon"], env=env, stdout=subprocess.PIPE, text=True, encoding="utf-8"
+    )
+    try:
+        assert "守护进程已启动" in daemon.stdout.readline()
+        report = tmp_path / "profile.json"
+        gui = subprocess.run(
+            [*run_cli, "--profile-startup", "--profile-output", str(report)],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        assert gui.returncode == 0, gui.stderr
+        assert report.exists()
+        assert daemon.poll() is None
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=30)
+
+
+def test_instance_lock_reclaimed_after_crash(tmp_path):
+    """测试持有锁的进程崩溃后遗留的锁文件会被自动接管"""
+    path = str(tmp_path / "instance.lock")
+    code = (
+        "import os, sys; from yt_dlp_gui.instance import acquire_instance_lock; "
+        "lock = acquire_instance_lock(sys.argv[1]); assert lock is not None; os._exit(0)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.run([sys.executable, "-c", code, path], env=env, check=True, timeout=30)
+    assert os.path.exists(path)
+
+    lock = acquire_instance_lock(path)
+    assert lock is not None
+    lock.unlock()
+
+
+def test_task_lease_exclusive_and_expiry(tmp_path):
+    """测试两个数据库连接（模拟两个进程）竞争同一任务租约，过期后可被接管"""
+    path = str(tmp_path / "downloads.db")
+    db_a, db_b = Database(db_path=path), Database(db_path=path)
+    task_id = db_a.add_tasks([_queued("https://example.com/v1")])[0]
+
+    assert db_a.acquire_lease(task_id, "a", expires_at=160, now=100)
+    assert not db_b.acquire_lease(task_id, "b", expires_at=170, now=110)
+    # 持有者可以重复获取（续期）
+    assert db_a.acquire_lease(task_id, "a", expires_at=170, now=110)
+
+    # 心跳续期后在原到期时间之后仍然有效
+    db_a.renew_leases("a", expires_at=250)
+    db_a.get_task(task_id)
+    assert not db_b.acquire_lease(task_id, "b", expires_at=260, now=200)
+    # 持有者停止心跳（崩溃）后租约过期，被其他进程接管
+    assert db_b.acquire_lease(task_id, "b", expires_at=320, now=260)
+    assert not db_a.acquire_lease(task_id, "a", expires_at=330, now=270)
+
+    db_b.release_lease(task_id, "b")
+    # 释放是异步写入，同步查询一次以等待其提交
+    db_b.get_task(task_id)
+    assert db_a.acquire_lease(task_id, "a", expires_at=340, now=280)
+    db_a.close()
+    db_b.close()
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_two_schedulers_never_run_same_task(mock_run, qtbot, tmp_path):
+    """测试两个调度器接管同一批排队任务时，每个任务只被其中一个启动"""
+    path = str(tmp_path / "downloads.db")
+    db_a, db_b = Database(db_path=path), Database(db_path=path)
+    ids = db_a.add_tasks([_queued(f"https://example.com/v{i}") for i in range(6)])
+    scheduler_a = DownloadScheduler(db_a, max_concurrent_downloads=3, lease_owner="a")
+    scheduler_b = DownloadScheduler(db_b, max_concurrent_downloads=3, lease_owner="b")
+
+    scheduler_a.resume_queued(ids[0], ids[-1])
+    scheduler_b.resume_queued(ids[0], ids[-1])
+    assert scheduler_a._active_task_ids == set(ids[:3])
+    assert scheduler_b._active_task_ids == set(ids[3:])
+
+    # A 完成一个任务后，剩余的排队任务都由仍在运行的 B 持有，A 不会重复启动它们
+    scheduler_a._cleanup_thread(ids[0])
+    assert scheduler_a._active_task_ids == set(ids[1:3])
+    started = [call.args[0].id for call in mock_run.call_args_list]
+    assert sorted(started) == ids
+
+    scheduler_b.shutdown()
+    scheduler_a.shutdown()
+    db_a.close()
+    db_b.close()
+
+
+def test_daemon_skips_tasks_leased_by_live_process(qtbot, tmp_path):
+    """测试守护进程启动时不会把其他存活进程正在下载的任务当作中断任务重新排队"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    leased, orphaned = db.add_tasks(
+        [_queued("https://example.com/v1"), _queued("https://example.com/v2")]
+    )
+    db.update_tasks([leased, orphaned], {"status": "downloading"})
+    scheduler = DownloadScheduler(db, max_concurrent_downloads=0, clock=lambda: 1000.0)
+    assert db.acquire_lease(leased, "other", expires_at=1060, now=1000)
+
+    HeadlessDaemon(db, scheduler, output=lambda line: None).start()
+    assert [t.status for t in db.get_tasks([leased, orphaned])] == ["downloading", "queued"]
+
+    scheduler.shutdown()
+    db.close()
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_task_leased_elsewhere_is_rechecked(mock_run, qtbot, tmp_path):
+    """测试任务正被其他进程下载时保留其状态并同步到界面，租约到期后再检查：
+    其他进程完成的任务不再启动，租约过期（其他进程已退出）的任务由本进程接管"""
+    from yt_dlp_gui.config import LEASE_TTL_SECONDS
+
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    done, orphaned = db.add_tasks(
+        [_queued("https://example.com/v1"), _queued("https://example.com/v2")]
+    )
+    db.update_tasks([done, orphaned], {"status": "downloading"})
+    now = [1000.0]
+    scheduler = DownloadScheduler(db, clock=lambda: now[0], lease_owner="a")
+    statuses = []
+    scheduler.task_status_changed.connect(lambda tid, status: statuses.append((tid, status)))
+    for task_id in (done, orphaned):
+        assert db.acquire_lease(task_id, "other", expires_at=now[0] + 5, now=now[0])
+
+    scheduler.start_many([done, orphaned])
+    scheduler.start_task(done)
+    mock_run.assert_not_called()
+    assert statuses == [(done, "downloading"), (orphaned, "downloading"), (done, "downloading")]
+    assert [t.status for t in db.get_tasks([done, orphaned])] == ["downloading", "downloading"]
+    assert set(scheduler._delayed) == {done, orphaned}
+
+    # 其他进程完成了 v1 并释放租约，v2 的租约未续期而过期
+    db.update_task(done, {"status": "finished"})
+    db.release_lease(done, "other")
+    now[0] += LEASE_TTL_SECONDS + 1
+    statuses.clear()
+    scheduler._release_delayed()
+
+    assert statuses == [(done, "finished")]
+    assert [call.args[0].id for call in mock_run.call_args_list] == [orphaned]
+    assert db.get_task(done).status == "finished"
+    assert not scheduler._delayed and not scheduler._lease_waits
+    scheduler.shutdown()
+    db.close()
@@ -0,0 +1,223 @@
+from yt_dlp_gui import log_reader
+from yt_dlp_gui.log_reader import read_lines_before
+
+
+def _write_lines(path, count, prefix="line"):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(f"{prefix} {i}\n")
+
+
+def test_read_lines_before_tail(tmp_path, monkeypatch):
+    """测试从文件末尾反向读取最后 N 行，并跨越多个读取块"""
+    monkeypatch.setattr(log_reader, "LOG_READ_CHUNK_SIZE", 16)
+    path = tmp_path / "task.log"
+    _write_lines(path, 100)
+
+    lines, start, end = read_lines_before(str(path), None, 5)
+    assert lines == [f"line {i}" for i in range(95, 100)]
+    assert end == path.stat().st_size
+
+    data = path.read_bytes()
+    assert data[start:end].decode().splitlines() == lines
+
+
+def test_read_lines_before_paging(tmp_path, monkeypatch):
+    """测试以上一页的起始偏移量继续向前分页，直到文件开头"""
+    monkeypatch.setattr(log_reader, "LOG_READ_CHUNK_SIZE", 32)
+    path = tmp_path / "task.log"
+    _write_lines(path, 12)
+
+    collected: list[str] = []
+    lines, start, _ = read_lines_before(str(path), None, 5)
+    collected = lines + collected
+    while start > 0:
+        lines, start, _ = read_lines_before(str(path), start, 5)
+        collected = lines + collected
+
+    assert collected == [f"line {i}" for i in range(12)]
+
+
+def test_read_lines_before_ignores_partial_last_line(tmp_path):
+    """测试末尾正在写入的半行不会被读取"""
+    path = tmp_path / "task.log"
+    path.write_bytes("完成 1\n完成 2\n写入中".encode())
+
+    lines, start, end = read_lines_before(str(path), None, 10)
+    assert lines == ["完成 1", "完成 2"]
+    assert start == 0
+    assert end == len("完成 1\n完成 2\n".encode())
+
+
+def test_read_lines_before_missing_file(tmp_path):
+    """测试日志文件不存在时返回空结果"""
+    assert read_lines_before(str(tmp_path / "missing.log"), None, 10) == ([], 0, 0)
+
+
+def test_log_dialog_tail_and_paging(qtbot, tmp_path, monkeypatch):
+    """测试 LogDialog 加载尾部并向上分页直到文件开头"""
+    from yt_dlp_gui import dialogs
+    from yt_dlp_gui.dialogs import LogDialog
+
+    monkeypatch.setattr(dialogs, "LOG_TAIL_LINES", 10)
+    monkeypatch.setattr(dialogs, "LOG_PAGE_LINES", 10)
+
+    path = tmp_path / "task.log"
+    _write_lines(path, 25)
+
+    dialog = LogDialog(1, "title", log_path=str(path))
+    qtbot.addWidget(dialog)
+
+    qtbot.waitUntil(lambda: dialog.log_output.blockCount() == 10)
+    assert dialog.log_output.toPlainText().splitlines()[0] == "line 15"
+
+    # 向上分页两次后应加载完整个文件
+    dialog._load_older()
+    qtbot.waitUntil(lambda: dialog.log_output.blockCount() == 20)
+    dialog._load_older()
+    qtbot.waitUntil(lambda: dialog.log_output.blockCount() == 25)
+    assert dialog._start_offset == 0
+    assert dialog.log_output.toPlainText().splitlines() == [f"line {i}" for i in range(25)]
+    dialog.close()
+
+
+def test_log_dialog_paging_stops_at_rotated_start(qtbot, tmp_path, monkeypatch):
+    """测试轮转丢弃过最旧内容时，向上分页到日志流开头后不再继续读取"""
+    from yt_dlp_gui import dialogs
+    from yt_dlp_gui.dialogs import LogDialog
+
+    monkeypatch.setattr(dialogs, "LOG_TAIL_LINES", 1)
+    monkeypatch.setattr(dialogs, "LOG_PAGE_LINES", 1)
+    path = tmp_path / "task.log"
+    path.write_text("line 2\nline 3\n", encoding="utf-8")
+    # line 0、line 1 已被轮转丢弃
+    (tmp_path / "task.log.base").write_text("14", encoding="ascii")
+
+    dialog = LogDialog(1, "title", log_path=str(path))
+    qtbot.addWidget(dialog)
+    qtbot.waitUntil(lambda: dialog._tail_loaded)
+    assert (dialog._start_offset, dialog._end_offset) == (21, 28)
+
+    dialog._load_older()
+    qtbot.waitUntil(lambda: dialog.log_output.blockCount() == 2)
+    assert dialog._start_offset == 14
+    dialog._load_older()
+    qtbot.waitUntil(lambda: dialog._at_start)
+    dialog._load_older()
+    assert not dialog._loading_older
+    assert dialog.log_output.toPlainText().splitlines() == ["line 2", "line 3"]
+    dialog.close()
+
+
+def test_log_dialog_merges_chunks_pushed_before_tail(qtbot, tmp_path):
+    """测试尾部加载完成前推送的日志块按偏移量与尾部内容去重合并，相同内容的行不被误删"""
+    from yt_dlp_gui.dialogs import LogDialog
+
+    path = tmp_path / "task.log"
+    path.write_text("same\nsame\nline 2\n", encoding="utf-8")
+
+    dialog = LogDialog(1, "title", log_path=str(path))
+    qtbot.addWidget(dialog)
+    # 此时尾部尚未加载：line 2 同时存在于文件和推送块中，之后的 same 是新的一行
+    dialog.append_logs([(10, "line 2"), (17, "same"), (22, "new 1\nnew 2")])
+
+    qtbot.waitUntil(lambda: dialog._tail_loaded)
+    assert dialog.log_output.toPlainText().splitlines() == [
+        "same",
+        "same",
+        "line 2",
+        "same",
+        "new 1",
+        "new 2",
+    ]
+    # 尾部加载后才送达、但已在文件中的行同样被跳过；未写入文件的行总是追加
+    dialog.append_logs([(17, "same"), (34, "new 3"), (None, "请求取消下载...")])
+    assert dialog.log_output.toPlainText().splitlines()[-2:] == ["new 3", "请求取消下载..."]
+    assert dialog.log_output.blockCount() == 8
+    dialog.close()
+
+
+def test_log_dialog_flushes_writer_before_tail(qtbot, tmp_path, monkeypatch):
+    """测试读取尾部前先让写入线程落盘仍在攒批的日志，订阅前写入的行不会丢失"""
+    from yt_dlp_gui import dialogs, log_writer
+    from yt_dlp_gui.dialogs import LogDialog
+    from yt_dlp_gui.log_writer import LogWriter
+
+    monkeypatch.setattr(log_writer, "LOG_WRITE_LINGER_SECONDS", 30)
+    monkeypatch.setattr(log_writer, "get_task_log_path", lambda tid: str(tmp_path / "task.log"))
+    writer = LogWriter(compress=False)
+    monkeypatch.setattr(dialogs, "get_running_log_writer", lambda: writer)
+    writer.write(1, "line 0")
+    writer.write(1, "line 1")
+
+    dialog = LogDialog(1, "title", log_path=str(tmp_path / "task.log"))
+    qtbot.addWidget(dialog)
+    qtbot.waitUntil(lambda: dialog._tail_loaded, timeout=3000)
+    assert dialog.log_output.toPlainText().splitlines() == ["line 0", "line 1"]
+    assert dialog._end_offset == len(b"line 0\nline 1\n")
+    dialog.close()
+    writer.close()
+
+
+def test_log_dialog_reset_discards_old_content(qtbot, tmp_path):
+    """测试任务重新开始下载时清空旧内容，之后从偏移量 0 开始的日志全部显示"""
+    from yt_dlp_gui.dialogs import LogDialog
+
+    path = tmp_path / "task.log"
+    _write_lines(path, 3)
+
+    dialog = LogDialog(1, "title", log_path=str(path))
+    qtbot.addWidget(dialog)
+    qtbot.waitUntil(lambda: dialog._tail_loaded)
+
+    dialog.reset_logs()
+    dialog.append_logs([(0, "retry 0"), (8, "retry 1")])
+    assert dialog.log_output.toPlainText().splitlines() == ["retry 0", "retry 1"]
+    assert dialog._start_offset == 0
+    dialog.close()
+
+
+def test_log_dialog_autoscroll_only_at_bottom(qtbot):
+    """测试只有停留在底部时追加日志才会自动滚动"""
+    from yt_dlp_gui.dialogs import LogDialog
+
+    dialog = LogDialog(1, "title")
+    qtbot.addWidget(dialog)
+    dialog.show()
+
+    dialog.append_logs([(None, f"line {i}") for i in range(200)])
+    scroll_bar = dialog.log_output.verticalScrollBar()
+    assert scroll_bar.value() == scroll_bar.maximum() > 0
+
+    # 用户向上滚动后，新日志不应把视图拉回底部
+    dialog._ignore_scroll = True
+    scroll_bar.setValue(10)
+    dialog.append_logs([(None, "more")])
+    assert scroll_bar.value() == 10
+    dialog.close()
+
+
+def test_log_dialog_trims_top_and_advances_offset(qtbot, tmp_path, monkeypatch):
+    """测试超出保留行数时裁剪顶部内容，并同步推进起始偏移量"""
+    from yt_dlp_gui import dialogs
+    from yt_dlp_gui.dialogs import LogDialog
+
+    monkeypatch.setattr(dialogs, "LOG_MAX_LINES", 5)
+
+    path = tmp_path / "task.log"
+    _write_lines(path, 5)
+
+    dialog = LogDialog(1, "title", log_path=str(path))
+    qtbot.addWidget(dialog)
+    qtbot.waitUntil(lambda: dialog.log_output.blockCount() == 5)
+
+    dialog.append_logs([(35, "extra 1"), (43, "extra 2")])
+    assert dialog.log_output.toPlainText().splitlines() == [
+        "line 2",
+        "line 3",
+        "line 4",
+        "extra 1",
+        "extra 2",
+    ]
+    assert dialog._start_offset == len(b"line 0\nline 1\n")
+    dialog.close()
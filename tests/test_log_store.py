@@ -0,0 +1,131 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from yt_dlp_gui.log_store import SegmentLogStore
+from yt_dlp_gui.log_writer import LogWriter
+
+
+def _segment_files(root):
+    return sorted(f for f in os.listdir(root) if f.startswith("segment_"))
+
+
+def test_segment_store_append_and_read(tmp_path):
+    """测试多个任务的日志交错写入同一段后可按任务读取"""
+    store = SegmentLogStore(str(tmp_path))
+    store.append({1: ["a1", "a2"], 2: ["b1"]})
+    store.append({1: ["a3"], 2: ["b2", "b3"]})
+
+    assert store.read_lines(1) == ["a1", "a2", "a3"]
+    assert store.read_lines(2) == ["b1", "b2", "b3"]
+    assert store.read_lines(3) == []
+    assert len(_segment_files(tmp_path)) == 1
+
+    # 尾部与分页读取沿用 read_lines_before 的偏移量语义
+    lines, start, end = store.read_lines_before(2, None, 2)
+    assert lines == ["b2", "b3"]
+    older, older_start, _ = store.read_lines_before(2, start, 10)
+    assert older == ["b1"]
+    assert older_start == 0
+    store.close()
+
+
+def test_segment_store_bulk_delete_compacts(tmp_path):
+    """测试批量删除后一次压缩整理即可回收旧段，且保留任务的日志完整"""
+    store = SegmentLogStore(str(tmp_path), segment_bytes=64)
+    for i in range(20):
+        store.append({task_id: [f"task {task_id} line {i}"] for task_id in (1, 2, 3)})
+    before = len(_segment_files(tmp_path))
+    assert before > 3
+
+    store.delete_tasks([1, 2])
+
+    assert store.read_lines(1) == []
+    assert store.read_lines(2) == []
+    assert store.read_lines(3) == [f"task 3 line {i}" for i in range(20)]
+    # 旧段被重写后删除，段文件与索引中的段一一对应
+    assert len(_segment_files(tmp_path)) < before
+    conn = store._writer_conn()
+    segment_ids = {row[0] for row in conn.execute("SELECT id FROM segments")}
+    assert _segment_files(tmp_path) == sorted(
+        os.path.basename(store.segment_path(i)) for i in segment_ids
+    )
+    store.close()
+
+
+def test_segment_store_survives_reopen(tmp_path):
+    """测试重新打开存储后继续追加，任务日志的逻辑偏移量保持连续"""
+    store = SegmentLogStore(str(tmp_path))
+    store.append({1: ["first"]})
+    store.close()
+
+    reopened = SegmentLogStore(str(tmp_path))
+    reopened.append({1: ["second"]})
+    assert reopened.read_lines(1) == ["first", "second"]
+    reopened.close()
+
+
+def test_segment_store_close_releases_reader_connections(tmp_path):
+    """测试各读取线程建立的连接在 close() 时关闭，之后的读取重新建立连接"""
+    store = SegmentLogStore(str(tmp_path / "segments"))
+    store.append({1: ["a"]})
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(lambda _: store.read_lines(1), range(4))) == [["a"]] * 4
+    conns = list(store._reader_conns)
+    assert conns
+
+    store.close()
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert store.read_lines(1) == ["a"]
+    store.close()
+
+
+def test_log_writer_with_segment_store(tmp_path):
+    """测试 LogWriter 使用分段存储时写入、重新开始与删除都作用于存储"""
+    store = SegmentLogStore(str(tmp_path))
+    writer = LogWriter(store=store)
+    writer.open_task(1)
+    writer.write(1, "old")
+    writer.open_task(1)
+    writer.write(1, "new")
+    writer.write(2, "other")
+    writer.flush()
+
+    assert store.read_lines(1) == ["new"]
+    assert store.read_lines(2) == ["other"]
+
+    writer.remove_tasks([1, 2])
+    assert store.read_lines(1) == []
+    assert store.read_lines(2) == []
+    writer.close()
+
+
+def test_log_writer_open_task_skips_compaction(tmp_path, monkeypatch):
+    """测试任务重新开始只删除该任务的索引，压缩整理留到删除任务时执行"""
+    store = SegmentLogStore(str(tmp_path), segment_bytes=64)
+    compactions = []
+    compact = store.compact
+    monkeypatch.setattr(store, "compact", lambda: (compactions.append(1), compact()))
+    writer = LogWriter(store=store)
+    for i in range(20):
+        writer.write(1, f"task 1 line {i}")
+        writer.write(2, f"task 2 line {i}")
+        # 每行单独落盘，写满多个段
+        writer.flush()
+    before = len(_segment_files(tmp_path))
+    assert before > 3
+
+    writer.open_task(1)
+    writer.flush()
+    assert store.read_lines(1) == []
+    assert compactions == []
+    assert len(_segment_files(tmp_path)) == before
+
+    writer.remove_tasks([2])
+    assert compactions == [1]
+    assert len(_segment_files(tmp_path)) < before
+    writer.close()
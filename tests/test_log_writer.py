@@ -0,0 +1,153 @@
+import gzip
+import os
+
+import pytest
+
+from yt_dlp_gui.config import get_task_log_path, list_log_files, remove_task_log
+from yt_dlp_gui.log_reader import read_lines_before
+from yt_dlp_gui.log_writer import LogWriter
+
+
+@pytest.fixture
+def log_home(tmp_path, monkeypatch):
+    """把日志目录重定向到临时目录"""
+    monkeypatch.setattr(os.path, "expanduser", lambda path: path.replace("~", str(tmp_path)))
+    return tmp_path
+
+
+def test_log_writer_batches_and_flushes(log_home):
+    """测试多任务日志经队列写入各自文件"""
+    writer = LogWriter()
+    writer.open_task(1)
+    writer.open_task(2)
+    for i in range(100):
+        writer.write(1, f"a{i}")
+        writer.write(2, f"b{i}")
+    writer.flush()
+
+    with open(get_task_log_path(1), encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"a{i}" for i in range(100)]
+    with open(get_task_log_path(2), encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"b{i}" for i in range(100)]
+    writer.close()
+
+
+def test_log_writer_open_task_discards_previous_run(log_home):
+    """测试任务重新开始时旧日志被清空"""
+    writer = LogWriter()
+    writer.open_task(1)
+    writer.write(1, "old run")
+    writer.finish_task(1)
+    writer.open_task(1)
+    writer.write(1, "new run")
+    writer.flush()
+
+    assert list_log_files(get_task_log_path(1)) == [get_task_log_path(1)]
+    with open(get_task_log_path(1), encoding="utf-8") as f:
+        assert f.read() == "new run\n"
+    writer.close()
+
+
+def test_log_writer_rotation_compression_and_reader(log_home):
+    """测试超过大小上限时轮转、结束后压缩，且读取端能跨文件读取压缩日志"""
+    writer = LogWriter(max_bytes=100, backup_count=2)
+    path = get_task_log_path(7)
+    writer.open_task(7)
+    for i in range(30):
+        writer.write(7, f"line {i:02d}")
+        # 逐行落盘以触发多次轮转
+        writer.flush()
+
+    files = list_log_files(path)
+    assert files == [f"{path}.2", f"{path}.1", path]
+
+    writer.finish_task(7)
+    writer.flush()
+    files = list_log_files(path)
+    assert files == [f"{path}.2.gz", f"{path}.1.gz", f"{path}.gz"]
+    with gzip.open(files[-1], "rt", encoding="utf-8") as f:
+        assert f.read().splitlines()[-1] == "line 29"
+
+    # 读取端把轮转和压缩后的文件拼接成一个连续的流
+    lines, start, _ = read_lines_before(path, None, 5)
+    assert lines == [f"line {i:02d}" for i in range(25, 30)]
+    older, _, _ = read_lines_before(path, start, 3)
+    assert older == [f"line {i:02d}" for i in range(22, 25)]
+    writer.close()
+
+
+def test_log_rotation_keeps_logical_offsets(log_home):
+    """测试轮转覆盖最旧的文件后，已有行的逻辑偏移量不变，被丢弃的区间读取为空"""
+    writer = LogWriter(max_bytes=40, backup_count=1, compress=False)
+    path = get_task_log_path(8)
+    writer.open_task(8)
+
+    def write(first, last):
+        for i in range(first, last):
+            # 每行 8 字节，逐行落盘：每写满 5 行轮转一次
+            writer.write(8, f"line {i:02d}")
+            writer.flush()
+
+    write(0, 12)
+    lines, start, end = read_lines_before(path, None, 2)
+    assert (lines, start, end) == (["line 10", "line 11"], 80, 96)
+
+    # 再次轮转丢弃 line 05 - 09 后，之前取得的偏移量仍指向相同的行
+    write(12, 16)
+    assert read_lines_before(path, end, 2) == (["line 10", "line 11"], 80, 96)
+    assert read_lines_before(path, start, 5) == ([], 80, 80)
+    lines, start, end = read_lines_before(path, None, 100)
+    assert lines == [f"line {i:02d}" for i in range(10, 16)]
+    assert (start, end) == (80, 128)
+
+    # 重新开始下载时日志流从 0 开始
+    writer.open_task(8)
+    writer.write(8, "new run")
+    writer.flush()
+    assert read_lines_before(path, None, 10) == (["new run"], 0, 8)
+    writer.close()
+
+
+def test_remove_task_log_through_running_writer(log_home, monkeypatch):
+    """测试写入线程运行时，remove_task_log 交由写入线程在已排队日志写完后再删除"""
+    from yt_dlp_gui import log_writer
+
+    writer = LogWriter()
+    monkeypatch.setattr(log_writer, "_log_writer", writer)
+
+    writer.open_task(3)
+    writer.write(3, "pending line")
+    writer.finish_task(3)
+    # remove_task_log 不阻塞调用方，flush 等待写入线程处理完删除命令
+    remove_task_log(3)
+    writer.flush()
+
+    assert list_log_files(get_task_log_path(3)) == []
+    writer.close()
+    assert log_writer.get_running_log_writer() is None
+
+
+def test_log_writer_failure_does_not_drop_batch(log_home, monkeypatch):
+    """测试一个任务写入失败时同批中其他任务的日志照常写入，等待删除的调用方立即返回"""
+    import time
+
+    writer = LogWriter()
+    get_handle = writer._get_handle
+
+    def failing_handle(task_id):
+        if task_id == 9:
+            raise OSError("disk full")
+        return get_handle(task_id)
+
+    monkeypatch.setattr(writer, "_get_handle", failing_handle)
+    writer.write(9, "lost")
+    writer.write(1, "kept")
+    started = time.monotonic()
+    writer.remove_tasks([2])
+    assert time.monotonic() - started < 1
+    writer.write(1, "after")
+    writer.flush()
+
+    with open(get_task_log_path(1), encoding="utf-8") as f:
+        assert f.read().splitlines() == ["kept", "after"]
+    writer.close()
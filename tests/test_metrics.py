@@ -0,0 +1,201 @@
+import time
+
+import pytest
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QToolBar
+
+from yt_dlp_gui import metrics
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.dialogs import MetricsPanel
+from yt_dlp_gui.main import MainWindow
+from yt_dlp_gui.metrics import NULL_METRIC, Histogram, MetricsRegistry
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+
+@pytest.fixture
+def registry():
+    """启用全局指标，测试结束后关闭"""
+    reg = metrics.enable()
+    yield reg
+    metrics.disable()
+
+
+class InstantWorker(QObject):
+    """启动后立即成功结束的假 Worker"""
+
+    progress = Signal(int, dict)
+    downloaded = Signal(int)
+    finished = Signal(int, bool, str)
+
+    def __init__(self, task_id, **kwargs):
+        super().__init__()
+        self.task_id = task_id
+        self.download_playlist = False
+        self.log_subscribed = False
+        self.error = None
+
+    def run(self):
+        self.finished.emit(self.task_id, True, "完成")
+
+    def cancel(self):
+        pass
+
+    def drain_logs(self):
+        return []
+
+
+def _task(i):
+    return DownloadTask(url=f"https://example.com/v{i}", save_path=".", format_preset="best")
+
+
+def test_disabled_metrics_are_noops(app_window):
+    """测试未启用指标时返回共享的空指标，不注册任何内容，主窗口也不显示指标按钮"""
+    assert not metrics.enabled()
+    toolbar = app_window.findChild(QToolBar)
+    assert "指标" not in [action.text() for action in toolbar.actions()]
+    assert metrics.counter("a") is NULL_METRIC
+    assert metrics.histogram("b") is metrics.gauge("c")
+    metrics.counter("a").inc()
+    metrics.gauge_callback("d", "", lambda: 1)
+    metrics.remove("a")
+    assert metrics.get_registry() is None
+
+
+def test_registry_metrics_and_labels():
+    """测试计数器、仪表、回调仪表与带标签的指标，同名不同类型时报错"""
+    reg = MetricsRegistry()
+    reg.counter("requests_total", result="ok").inc()
+    reg.counter("requests_total", result="ok").inc(2)
+    reg.counter("requests_total", result="error").inc()
+    gauge = reg.gauge("speed", task_id=1)
+    gauge.set(5)
+    gauge.dec(2)
+    depth = [3]
+    reg.gauge_callback("depth", "队列长度", lambda: depth[0])
+    depth[0] = 7
+
+    assert reg.get("requests_total", result="ok").value == 3
+    assert reg.get("speed", task_id="1").value == 3
+    assert reg.get("depth").value == 7
+    with pytest.raises(ValueError):
+        reg.histogram("requests_total")
+
+    reg.remove("speed", task_id=1)
+    assert reg.get("speed", task_id=1) is None
+
+
+def test_histogram_quantiles():
+    """测试直方图的计数、均值与桶内插值估算的分位数"""
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+        hist.observe(value)
+
+    assert hist.count == 5
+    assert hist.mean == pytest.approx(16.5 / 5)
+    assert hist.cumulative_counts() == [1, 3, 4, 5]
+    assert hist.quantile(0.5) == pytest.approx(1.75)
+    assert hist.quantile(0.99) == 4.0
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_prometheus_export(tmp_path):
+    """测试 Prometheus 文本格式：带前缀、说明、类型与累计桶，标签值被转义"""
+    reg = MetricsRegistry()
+    reg.counter("bytes_total", "已下载字节数").inc(1024)
+    reg.gauge("speed", "速度", title='a "b"').set(1.5)
+    reg.histogram("wait_seconds", "等待", buckets=(0.1, 1.0)).observe(0.5)
+
+    assert reg.to_prometheus() == (
+        "# HELP yt_dlp_gui_bytes_total 已下载字节数\n"
+        "# TYPE yt_dlp_gui_bytes_total counter\n"
+        "yt_dlp_gui_bytes_total 1024\n"
+        "# HELP yt_dlp_gui_speed 速度\n"
+        "# TYPE yt_dlp_gui_speed gauge\n"
+        'yt_dlp_gui_speed{title="a \\"b\\""} 1.5\n'
+        "# HELP yt_dlp_gui_wait_seconds 等待\n"
+        "# TYPE yt_dlp_gui_wait_seconds histogram\n"
+        'yt_dlp_gui_wait_seconds_bucket{le="0.1"} 0\n'
+        'yt_dlp_gui_wait_seconds_bucket{le="1"} 1\n'
+        'yt_dlp_gui_wait_seconds_bucket{le="+Inf"} 1\n'
+        "yt_dlp_gui_wait_seconds_sum 0.5\n"
+        "yt_dlp_gui_wait_seconds_count 1\n"
+    )
+
+    path = tmp_path / "metrics.prom"
+    reg.write_prometheus(str(path))
+    assert path.read_text(encoding="utf-8") == reg.to_prometheus()
+    assert not (tmp_path / "metrics.prom.tmp").exists()
+
+
+def test_database_and_scheduler_metrics(qtbot, tmp_path, registry):
+    """测试数据库排队/执行耗时、调度器排队时间、吞吐字节数与信号延迟的记录"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    scheduler = DownloadScheduler(db, max_concurrent_downloads=1, worker_class=InstantWorker)
+    task_ids = db.add_tasks([_task(i) for i in range(3)])
+
+    with qtbot.waitSignals([scheduler.task_finished] * 3, timeout=5000):
+        scheduler.start_many(task_ids)
+    qtbot.waitUntil(lambda: not scheduler.threads, timeout=5000)
+
+    assert registry.get("downloads_started_total").value == 3
+    assert registry.get("downloads_finished_total", result="finished").value == 3
+    # 第一个任务直接启动，其余两个在等待队列中排队
+    assert registry.get("queue_wait_seconds").count == 3
+    assert registry.get("downloads_active").value == 0
+    assert registry.get("db_queue_wait_seconds", mode="sync").count > 0
+    assert registry.get("db_exec_seconds", mode="async").count > 0
+    assert registry.get("db_queue_depth").value >= 0
+
+    # 视频下载到 300 字节后开始下载音频，已下载字节数从头计算
+    scheduler._active_task_ids.add(99)
+    for downloaded in (100, 300, 50, 80):
+        scheduler._on_worker_progress(
+            99,
+            {
+                "status": "downloading",
+                "downloaded_bytes": downloaded,
+                "speed": 1000.0,
+                "_emitted_at": time.perf_counter() - 0.01,
+            },
+        )
+    assert registry.get("download_bytes_total").value == 380
+    assert registry.get("task_speed_bytes_per_second", task_id=99).value == 1000.0
+    assert registry.get("progress_signal_latency_seconds").quantile(0.5) >= 0.01
+
+    scheduler._cleanup_thread(99)
+    assert registry.get("task_speed_bytes_per_second", task_id=99) is None
+    scheduler.shutdown()
+    db.close()
+
+
+def test_metrics_panel(qtbot, tmp_path, registry):
+    """测试启用指标时主窗口提供指标面板，面板列出指标并计算总速度"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    scheduler = DownloadScheduler(db)
+    window = MainWindow(db, scheduler)
+    qtbot.addWidget(window)
+    window.show()
+
+    toolbar = window.findChild(QToolBar)
+    assert "指标" in [action.text() for action in toolbar.actions()]
+    window._toggle_metrics_panel()
+    dock = window._metrics_dock
+    panel = dock.widget()
+    assert isinstance(panel, MetricsPanel)
+    assert dock.isVisible()
+
+    counter = registry.counter("download_bytes_total")
+    panel.refresh()
+    counter.inc(1024 * 1024)
+    panel._last_sample = (panel._last_sample[0] - 1.0, panel._last_sample[1])
+    panel.refresh()
+    assert panel.throughput == pytest.approx(1024 * 1024, rel=0.1)
+    assert "总速度" in panel.summary_label.text()
+    names = {panel.table.item(row, 0).text() for row in range(panel.table.rowCount())}
+    assert {"download_bytes_total", "downloads_active", "db_queue_depth"} <= names
+
+    window._toggle_metrics_panel()
+    assert not dock.isVisible()
+    scheduler.shutdown()
+    db.close()
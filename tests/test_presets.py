@@ -0,0 +1,163 @@
+import sqlite3
+
+import pytest
+
+from yt_dlp_gui.config import FORMAT_PRESETS
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.models import DownloadTask, FormatPreset
+from yt_dlp_gui.presets import (
+    build_format_spec,
+    compiled_selector,
+    describe_preset,
+    validate_format_spec,
+    validate_preset,
+)
+
+
+def _fmt(format_id, ext, vcodec="none", acodec="none", height=None, tbr=100):
+    return {
+        "format_id": format_id,
+        "ext": ext,
+        "vcodec": vcodec,
+        "acodec": acodec,
+        "height": height,
+        "tbr": tbr,
+        "url": f"https://example.com/{format_id}",
+        "protocol": "https",
+    }
+
+
+# 按 yt-dlp 的排序由差到好
+FORMATS = [
+    _fmt("a-m4a", "m4a", acodec="mp4a.40.2", tbr=128),
+    _fmt("a-webm", "webm", acodec="opus", tbr=160),
+    _fmt("v-720", "mp4", vcodec="avc1", height=720, tbr=1000),
+    _fmt("w-720", "webm", vcodec="vp9", height=720, tbr=1100),
+    _fmt("v-1080", "mp4", vcodec="avc1", height=1080, tbr=3000),
+]
+
+
+def _select(spec, formats=FORMATS):
+    ctx = {"formats": formats, "has_merged_format": False, "incomplete_formats": False}
+    return [f["format_id"] for f in compiled_selector(spec)(ctx)]
+
+
+def test_build_format_spec_preferences_and_limits():
+    """测试筛选条件生成的表达式：扩展名与编码为偏好可回退，高度为硬性上限"""
+    preset = validate_preset(FormatPreset(name="720p mp4", ext="mp4", max_height=720))
+    assert _select(preset.selector) == ["v-720+a-m4a"]
+
+    # 没有满足偏好的格式时回退，但仍不超过最大高度
+    webm = validate_preset(FormatPreset(name="720p av1", codec="av01", max_height=720))
+    assert _select(webm.selector) == ["w-720+a-webm"]
+
+    audio = validate_preset(FormatPreset(name="m4a", audio_only=True, ext="m4a"))
+    assert _select(audio.selector) == ["a-m4a"]
+    assert build_format_spec(FormatPreset(name="x", audio_only=True)) == "bestaudio/best"
+
+    capped = build_format_spec(FormatPreset(name="x", max_filesize=10 * 1024 * 1024))
+    assert "[filesize<?10485760][filesize_approx<?10485760]" in capped
+    assert describe_preset(audio) == "仅音频 · m4a"
+
+
+def test_validate_preset_errors():
+    """测试无效的预设在保存前就被拒绝"""
+    with pytest.raises(ValueError, match="名称"):
+        validate_preset(FormatPreset(name=" ", ext="mp4"))
+    with pytest.raises(ValueError, match="筛选条件"):
+        validate_preset(FormatPreset(name="x"))
+    with pytest.raises(ValueError, match="不能同时设置"):
+        validate_preset(FormatPreset(name="x", ext="mp4", format_spec="best"))
+    with pytest.raises(ValueError, match="最大高度"):
+        validate_preset(FormatPreset(name="x", max_height=0))
+    with pytest.raises(ValueError, match="音频格式"):
+        validate_preset(FormatPreset(name="x", audio_only=True, audio_format="wma"))
+    with pytest.raises(ValueError, match="格式表达式无效"):
+        validate_format_spec("bestvideo+")
+    assert validate_format_spec(" best ") == "best"
+
+
+def test_compiled_selector_is_cached_per_params():
+    """测试同一表达式只编译一次，影响选择结果的参数不同时分别编译"""
+    spec = "bestvideo[height<=?480]+bestaudio/best"
+    selector = compiled_selector(spec)
+    assert compiled_selector(spec, {"quiet": True, "proxy": "http://p"}) is selector
+    assert compiled_selector(spec, {"merge_output_format": "mkv"}) is not selector
+
+
+def test_database_presets_are_referenced_by_id(tmp_path):
+    """测试预设保存在数据库中：任务只保存预设 ID，读取时带出格式表达式与音频转换"""
+    db = Database(db_path=str(tmp_path / "downloads.db"))
+    presets = db.get_presets()
+    assert [p.name for p in presets] == list(FORMAT_PRESETS)
+    assert all(p.builtin for p in presets)
+    assert db.find_preset("仅音频 (MP3)").audio_format == "mp3"
+
+    preset = validate_preset(
+        FormatPreset(name="小体积", max_height=480, audio_format="m4a", max_filesize=50 << 20)
+    )
+    preset_id = db.add_preset(preset)
+    with pytest.raises(ValueError, match="已存在"):
+        db.add_preset(preset)
+
+    task_id = db.add_task(
+        DownloadTask(
+            url="https://example.com/v",
+            save_path=".",
+            format_preset=preset.selector,
+            preset_id=preset_id,
+        )
+    )
+    task = db.get_task(task_id)
+    assert task.preset_id == preset_id
+    assert task.format_preset == preset.selector
+    assert task.audio_format == "m4a"
+    conn = sqlite3.connect(db.db_path)
+    assert conn.execute("SELECT format_preset FROM tasks").fetchone() == (None,)
+
+    # 修改预设后引用它的任务使用新的表达式
+    updated = validate_preset(FormatPreset(name="小体积", id=preset_id, max_height=360))
+    db.update_preset(updated)
+    task = db.get_task(task_id)
+    assert task.format_preset == updated.selector
+    assert task.audio_format is None
+
+    builtin = presets[0]
+    with pytest.raises(ValueError, match="内置"):
+        db.delete_preset(builtin.id)
+    with pytest.raises(ValueError, match="内置"):
+        db.update_preset(validate_preset(FormatPreset(name="x", id=builtin.id, ext="mp4")))
+
+    # 删除预设后任务保留当时的格式表达式
+    db.delete_preset(preset_id)
+    task = db.get_task(task_id)
+    assert task.preset_id is None
+    assert task.format_preset == updated.selector
+    assert db.find_preset("小体积") is None
+    conn.close()
+    db.close()
+
+
+def test_database_links_legacy_format_strings(tmp_path):
+    """测试旧数据库迁移：逐行保存的内置格式表达式改为引用对应的预设"""
+    db_file = tmp_path / "old.db"
+    conn = sqlite3.connect(str(db_file))
+    conn.execute(
+        "CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, "
+        "title TEXT, status TEXT DEFAULT 'pending', save_path TEXT, format_preset TEXT, "
+        "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    mp3 = FORMAT_PRESETS["仅音频 (MP3)"]
+    conn.execute("INSERT INTO tasks (url, format_preset) VALUES ('https://a', ?)", (mp3,))
+    conn.execute("INSERT INTO tasks (url, format_preset) VALUES ('https://b', 'worst')")
+    conn.commit()
+    conn.close()
+
+    db = Database(db_path=str(db_file))
+    linked, custom = db.get_all_tasks(sort_col="id", sort_dir="ASC")
+    assert linked.preset_id == db.find_preset("仅音频 (MP3)").id
+    assert linked.format_preset == mp3
+    assert linked.audio_format == "mp3"
+    assert custom.preset_id is None
+    assert custom.format_preset == "worst"
+    db.close()
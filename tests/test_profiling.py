@@ -0,0 +1,105 @@
+import json
+import os
+import pstats
+import subprocess
+import sys
+
+import pytest
+
+from yt_dlp_gui import profiling
+
+
+@pytest.fixture(autouse=True)
+def clean_profiler(monkeypatch):
+    """每个测试使用独立的全局状态"""
+    monkeypatch.setattr(profiling, "_early_phases", [])
+    monkeypatch.setattr(profiling, "_active", None)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_phase_is_noop_when_disabled():
+    """测试未启用剖析时 phase() 与 mark() 不记录任何内容"""
+    assert profiling.phase("a") is profiling.phase("b")
+    with profiling.phase("a"):
+        profiling.mark("first_paint")
+    assert profiling.stop_profiling() is None
+
+
+def test_profiler_records_nested_phases_and_marks(tmp_path):
+    """测试阶段嵌套深度、时间点与参数解析前记录的阶段都写入 JSON 报告"""
+    clock = FakeClock()
+    profiling.record_phase("imports", 99.5, 99.9)
+    profiler = profiling.StartupProfiler(str(tmp_path / "report.json"), clock=clock)
+    profiling._active = profiler
+    profiler.start()
+
+    with profiling.phase("Database.__init__"):
+        clock.now += 0.010
+        with profiling.phase("_init_db"):
+            clock.now += 0.005
+    profiling.mark("first_paint")
+    clock.now += 1
+    profiling.mark("first_paint")
+
+    report = profiling.stop_profiling()
+    assert report == json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    assert [(p["name"], p["start_ms"], p["duration_ms"], p["depth"]) for p in report["phases"]] == [
+        ("imports", 0.0, 400.0, 0),
+        ("Database.__init__", 500.0, 15.0, 0),
+        ("_init_db", 510.0, 5.0, 1),
+    ]
+    assert report["marks"] == {"first_paint": 515.0}
+    assert "pstats" not in report
+
+
+def test_profiler_cprofile_and_tracemalloc(tmp_path):
+    """测试 --profile 写出可被 pstats 读取的统计文件与 tracemalloc 摘要"""
+    profiler = profiling.start_profiling(str(tmp_path / "report.json"), cprofile=True)
+    with profiling.phase("work"):
+        data = [str(i) * 10 for i in range(10_000)]
+    assert data
+    report = profiling.stop_profiling()
+
+    assert report["pstats"] == profiler.pstats_path == str(tmp_path / "report.pstats")
+    assert pstats.Stats(report["pstats"]).total_calls > 0
+    assert report["tracemalloc"]["peak_bytes"] > 0
+    assert report["tracemalloc"]["top"]
+
+
+def test_cli_profile_startup_writes_report(tmp_path):
+    """测试 --profile-startup 在首帧绘制后退出，并记录各启动阶段"""
+    output = tmp_path / "startup.json"
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(sys.path),
+        QT_QPA_PLATFORM="offscreen",
+        HOME=str(tmp_path),
+    )
+    subprocess.run(
+        [sys.executable, "-m", "yt_dlp_gui", "--profile-startup", "--profile-output", str(output)],
+        env=env,
+        cwd=tmp_path,
+        check=True,
+        capture_output=True,
+        timeout=60,
+    )
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    names = [p["name"] for p in report["phases"]]
+    for name in (
+        "environment",
+        "imports",
+        "Database.__init__",
+        "_init_db",
+        "MainWindow.__init__",
+        "_load_tasks_from_db",
+    ):
+        assert name in names
+    assert 0 < report["marks"]["first_paint"] <= report["marks"]["startup_complete"]
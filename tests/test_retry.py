@@ -0,0 +1,207 @@
+import io
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+from yt_dlp.networking import Response
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+from yt_dlp.utils import DownloadError, ExtractorError, GeoRestrictedError
+
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.retry import (
+    PERMANENT,
+    RATE_LIMITED,
+    TRANSIENT,
+    HostCooldowns,
+    RetryPolicy,
+    classify_error,
+    retry_after,
+)
+from yt_dlp_gui.scheduler import DownloadScheduler
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    db = Database(db_path=str(tmp_path / "test_downloads.db"))
+    yield db
+    db.close()
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _http_error(status: int, headers=None) -> HTTPError:
+    response = Response(io.BytesIO(b""), "https://e.com/v", headers or {}, status=status)
+    return HTTPError(response)
+
+
+def _wrapped(error: Exception) -> DownloadError:
+    """模拟 yt-dlp 的 report_error：DownloadError 通过 exc_info 携带底层异常"""
+    try:
+        raise error
+    except Exception:
+        return DownloadError(f"ERROR: {error}", sys.exc_info())
+
+
+def test_classify_error():
+    """测试按底层异常与错误信息区分临时、限流与永久错误"""
+    assert classify_error(_wrapped(_http_error(503))) == TRANSIENT
+    assert classify_error(_wrapped(_http_error(429))) == RATE_LIMITED
+    assert classify_error(_wrapped(_http_error(404))) == PERMANENT
+    assert classify_error(_wrapped(TransportError("connection reset"))) == TRANSIENT
+    assert classify_error(ExtractorError("oops", cause=TimeoutError())) == TRANSIENT
+    assert classify_error(GeoRestrictedError("not available in your country")) == PERMANENT
+    assert classify_error(ExtractorError("Private video", expected=True)) == PERMANENT
+    # 只有错误信息时按关键字判断
+    assert classify_error(DownloadError("ERROR: HTTP Error 429: Too Many Requests")) == RATE_LIMITED
+    assert classify_error(DownloadError("ERROR: The read operation timed out")) == TRANSIENT
+    assert classify_error(DownloadError("ERROR: something odd")) == PERMANENT
+
+    assert retry_after(_wrapped(_http_error(429, {"Retry-After": "120"}))) == 120
+    assert retry_after(_wrapped(_http_error(429))) is None
+
+
+def test_retry_policy_backoff_and_cooldowns():
+    """测试退避延迟带抖动且有上限，永久错误与超过次数时不重试"""
+    low = RetryPolicy(base_delay=2, max_delay=30, max_attempts=3, rng=lambda: 0.0)
+    high = RetryPolicy(base_delay=2, max_delay=30, max_attempts=3, rng=lambda: 1.0)
+    assert [low.delay(n) for n in (1, 2, 3, 6)] == [1, 2, 4, 15]
+    assert [high.delay(n) for n in (1, 2, 3, 6)] == [2, 4, 8, 30]
+
+    assert low.should_retry(TRANSIENT, 3)
+    assert not low.should_retry(TRANSIENT, 4)
+    assert not low.should_retry(PERMANENT, 1)
+
+    cooldowns = HostCooldowns()
+    assert not cooldowns
+    cooldowns.cool_down("e.com", 100)
+    cooldowns.cool_down("e.com", 50)
+    assert cooldowns.remaining("e.com", 40) == 60
+    assert cooldowns.remaining("e.com", 100) == 0
+    assert not cooldowns
+
+
+def _fail(scheduler: DownloadScheduler, task_id: int, error: Exception) -> None:
+    """模拟运行中的任务以指定异常失败并退出线程"""
+    scheduler.workers[task_id] = MagicMock(error=error)
+    scheduler._on_worker_finished(task_id, False, str(error))
+    scheduler._cleanup_thread(task_id)
+
+
+def _task(url: str) -> DownloadTask:
+    return DownloadTask(url=url, save_path=".", format_preset="best")
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_transient_failure_retries_without_holding_slot(mock_run, qtbot, temp_db):
+    """测试临时错误转入延迟重试：记录重试次数、释放槽位，到期后重新排队启动"""
+    clock = FakeClock()
+    policy = RetryPolicy(base_delay=10, max_attempts=2, rng=lambda: 1.0)
+    scheduler = DownloadScheduler(
+        temp_db, max_concurrent_downloads=1, retry_policy=policy, clock=clock
+    )
+
+    tid1 = scheduler.add_task(_task("https://a.com/1"))
+    tid2 = scheduler.add_task(_task("https://b.com/2"))
+    _fail(scheduler, tid1, _wrapped(_http_error(503)))
+
+    # 等待重试的任务不占用槽位，排队的任务 2 立即启动
+    assert scheduler._active_task_ids == {tid2}
+    task1 = temp_db.get_task(tid1)
+    assert task1.status == "retrying"
+    assert task1.retry_count == 1
+    assert task1.next_retry_at == 1010
+    assert scheduler._retry_timer.isActive()
+
+    # 未到期时不放回等待队列
+    clock.now = 1005
+    scheduler._release_delayed()
+    assert tid1 not in scheduler._waiting_queue
+
+    clock.now = 1010
+    scheduler._release_delayed()
+    assert scheduler._waiting_queue == [tid1]
+    assert temp_db.get_task(tid1).status == "queued"
+    scheduler._cleanup_thread(tid2)
+    assert scheduler._active_task_ids == {tid1}
+
+    # 第二次失败的退避加倍，超过最大次数后标记为错误
+    _fail(scheduler, tid1, _wrapped(_http_error(503)))
+    assert temp_db.get_task(tid1).next_retry_at == 1030
+    clock.now = 1030
+    scheduler._release_delayed()
+    _fail(scheduler, tid1, _wrapped(_http_error(503)))
+    assert temp_db.get_task(tid1).status == "error"
+    assert not scheduler._delayed
+    assert mock_run.call_count == 4
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_permanent_failure_and_stop_cancel_retry(mock_run, temp_db):
+    """测试永久错误直接标记为错误；停止等待重试的任务会取消重试"""
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=2, clock=FakeClock())
+    tid1 = scheduler.add_task(_task("https://a.com/1"))
+    tid2 = scheduler.add_task(_task("https://a.com/2"))
+
+    _fail(scheduler, tid1, ExtractorError("Private video", expected=True))
+    assert temp_db.get_task(tid1).status == "error"
+
+    _fail(scheduler, tid2, _wrapped(TransportError("connection reset")))
+    assert tid2 in scheduler._delayed
+    scheduler.stop_task(tid2)
+    assert tid2 not in scheduler._delayed
+    assert temp_db.get_task(tid2).status == "cancelled"
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_rate_limit_cools_down_host(mock_run, temp_db):
+    """测试 429 后同一主机进入冷却期：该主机的排队任务延后，其他主机的任务照常启动"""
+    clock = FakeClock()
+    policy = RetryPolicy(base_delay=1, rng=lambda: 0.0)
+    scheduler = DownloadScheduler(
+        temp_db, max_concurrent_downloads=1, retry_policy=policy, clock=clock
+    )
+
+    tid1 = scheduler.add_task(_task("https://www.site.com/1"))
+    tid2 = scheduler.add_task(_task("https://site.com/2"))
+    tid3 = scheduler.add_task(_task("https://other.com/3"))
+    _fail(scheduler, tid1, _wrapped(_http_error(429, {"Retry-After": "90"})))
+
+    assert scheduler._active_task_ids == {tid3}
+    assert scheduler._delayed == {tid1: 1090, tid2: 1090}
+    assert temp_db.get_task(tid1).next_retry_at == 1090
+    assert temp_db.get_task(tid2).status == "queued"
+
+    clock.now = 1090
+    scheduler._release_delayed()
+    assert sorted(scheduler._waiting_queue) == [tid1, tid2]
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_restart_resumes_retrying_tasks(mock_run, temp_db):
+    """测试重新启动后等待重试的任务按数据库中的计划时间继续等待，到期后启动"""
+    clock = FakeClock()
+    overdue, later, no_time = temp_db.add_tasks(
+        [_task("https://a.com/1"), _task("https://a.com/2"), _task("https://a.com/3")]
+    )
+    temp_db.update_task(overdue, {"status": "retrying", "next_retry_at": 900})
+    temp_db.update_task(later, {"status": "retrying", "next_retry_at": 1060})
+    temp_db.update_task(no_time, {"status": "retrying"})
+
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=3, clock=clock)
+    assert scheduler.resume_retrying() == 3
+    assert scheduler._delayed == {overdue: 900, later: 1060, no_time: 1000}
+    assert not scheduler.is_idle()
+
+    scheduler._release_delayed()
+    assert scheduler._active_task_ids == {overdue, no_time}
+    clock.now = 1060
+    scheduler._release_delayed()
+    assert scheduler._active_task_ids == {overdue, later, no_time}
+    assert temp_db.get_task(later).status == "queued"
@@ -119,6 +119,165 @@ def test_scheduler_delete_task(mock_run, temp_db):
     worker_mock.cancel.assert_called_once()
 
 
+def test_database_bulk_operations(temp_db):
+    """测试按 ID 列表批量查询、更新和删除任务"""
+    tids = [
+        temp_db.add_task(
+            DownloadTask(url=f"https://example.com/v{i}", save_path=".", format_preset="best")
+        )
+        for i in range(5)
+    ]
+
+    # 结果按传入顺序返回，忽略不存在的 ID
+    tasks = temp_db.get_tasks([tids[3], 9999, tids[1]])
+    assert [t.id for t in tasks] == [tids[3], tids[1]]
+
+    temp_db.update_tasks(tids[:3], {"status": "queued"})
+    temp_db.delete_tasks(tids[3:])
+
+    remaining = temp_db.get_all_tasks()
+    assert sorted(t.id for t in remaining) == sorted(tids[:3])
+    assert {t.status for t in remaining} == {"queued"}
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_scheduler_start_many_and_stop_many(mock_run, temp_db):
+    """测试批量启动超出并发上限时整批排队，批量停止时整批取消排队任务"""
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=2)
+    tids = [
+        temp_db.add_task(
+            DownloadTask(url=f"https://example.com/v{i}", save_path=".", format_preset="best")
+        )
+        for i in range(5)
+    ]
+    status_batches = []
+    scheduler.tasks_status_changed.connect(lambda ids, status: status_batches.append((ids, status)))
+
+    scheduler.start_many(tids + [tids[0]])
+    assert mock_run.call_count == 2
+    assert scheduler._waiting_queue == tids[2:]
+    assert status_batches == [(tids[2:], "queued")]
+    assert temp_db.get_task(tids[4]).status == "queued"
+
+    # 已在运行或排队的任务不会被重复启动
+    running = MagicMock()
+    scheduler.threads[tids[0]] = scheduler.threads[tids[1]] = MagicMock()
+    scheduler.workers[tids[0]] = running
+    scheduler.start_many(tids)
+    assert mock_run.call_count == 2
+    assert scheduler._waiting_queue == tids[2:]
+
+    scheduler.stop_many([tids[0], tids[3], tids[4]])
+    running.cancel.assert_called_once()
+    assert scheduler._waiting_queue == [tids[2]]
+    assert status_batches[-1] == ([tids[3], tids[4]], "cancelled")
+    assert temp_db.get_task(tids[3]).status == "cancelled"
+
+
+@patch("yt_dlp_gui.scheduler.remove_task_logs")
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_scheduler_delete_many(mock_run, mock_remove_logs, temp_db):
+    """测试批量删除：静止任务一次删除并整批清理日志，运行中的任务挂起到退出后删除"""
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=1)
+    tids = [
+        scheduler.add_task(
+            DownloadTask(url=f"https://example.com/v{i}", save_path=".", format_preset="best")
+        )
+        for i in range(3)
+    ]
+    scheduler.threads[tids[0]] = MagicMock()
+    worker = scheduler.workers[tids[0]] = MagicMock()
+    deleted = []
+    scheduler.tasks_deleted.connect(deleted.append)
+
+    scheduler.delete_many(tids)
+
+    worker.cancel.assert_called_once()
+    assert scheduler._pending_delete_tids == {tids[0]}
+    assert scheduler._waiting_queue == []
+    assert deleted == [tids[1:]]
+    mock_remove_logs.assert_called_once_with(tids[1:])
+    assert [t.id for t in temp_db.get_all_tasks()] == [tids[0]]
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_scheduler_add_task_detects_duplicates(mock_run, temp_db):
+    """测试同一视频的不同链接写法被识别为重复：默认跳过，allow_duplicate 时重新下载"""
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=2)
+    first = DownloadTask(url="https://youtu.be/abc?si=x", save_path=".", format_preset="best")
+    tid = scheduler.add_task(first)
+
+    again = DownloadTask(
+        url="https://www.youtube.com/watch?v=abc&t=10", save_path=".", format_preset="best"
+    )
+    assert scheduler.find_duplicate(again).id == tid
+    assert scheduler.add_task(again) == tid
+    assert len(temp_db.get_all_tasks()) == 1
+
+    new_tid = scheduler.add_task(again, allow_duplicate=True)
+    assert new_tid != tid
+    assert len(temp_db.get_all_tasks()) == 2
+
+    # 失败或取消的任务不算重复
+    temp_db.update_tasks([tid, new_tid], {"status": "error"})
+    assert scheduler.find_duplicate(again) is None
+
+
+def test_database_video_key_duplicate_and_migration(tmp_path):
+    """测试按解析出的视频键识别重复，以及旧数据库升级时补齐规范键"""
+    import sqlite3
+
+    db_file = tmp_path / "old.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, "
+        "title TEXT, status TEXT DEFAULT 'pending', progress INTEGER DEFAULT 0, speed TEXT, "
+        "eta TEXT, save_path TEXT, format_preset TEXT, proxy TEXT, concurrent_fragments INTEGER, "
+        "write_subs BOOLEAN, download_playlist BOOLEAN, playlist_items TEXT, "
+        "playlist_random BOOLEAN, max_downloads INTEGER, "
+        "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    conn.execute(
+        "INSERT INTO tasks (url, status) VALUES ('https://www.example.com/v/1/', 'finished')"
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(db_path=str(db_file))
+    existing = db.find_duplicate("http://example.com/v/1")
+    assert existing is not None
+    assert existing.canonical_key == "example.com/v/1"
+
+    # 链接写法无法归一时，依靠下载时记录的视频键识别
+    scheduler = DownloadScheduler(db)
+    task_id = db.add_task(
+        DownloadTask(url="https://short.link/xyz", save_path=".", format_preset="best")
+    )
+    scheduler.workers[task_id] = MagicMock(download_playlist=False)
+    info = {"title": "Video", "extractor_key": "Youtube", "id": "abc"}
+    scheduler._on_worker_progress(task_id, {"status": "downloading", "info_dict": info})
+    db.update_task(task_id, {"status": "finished"})
+
+    duplicate = db.find_duplicate("https://youtu.be/abc")
+    assert duplicate is not None
+    assert duplicate.id == task_id
+    assert duplicate.video_key == "Youtube:abc"
+
+    # 播放列表任务不记录视频键，列表中单个视频的链接不被视为重复
+    playlist_id = db.add_task(
+        DownloadTask(
+            url="https://www.youtube.com/watch?v=def&list=PL1",
+            save_path=".",
+            format_preset="best",
+            download_playlist=True,
+        )
+    )
+    db.update_task(playlist_id, {"status": "finished"})
+    assert db.get_task(playlist_id).video_key is None
+    assert db.find_duplicate("https://youtu.be/def") is None
+    db.close()
+
+
 def test_task_impersonate_and_no_cookies_db(temp_db):
     """测试任务的浏览器伪装和禁用 Cookies 属性在数据库中的持久化"""
     task = DownloadTask(
@@ -221,12 +380,14 @@ def test_database_defaults_and_migration(tmp_path, monkeypatch):
         format_preset="best",
         impersonate="chrome",
         no_cookies=True,
+        parallel_streams=True,
     )
     tid = db_migrated.add_task(task)
     retrieved = db_migrated.get_task(tid)
     assert retrieved is not None
     assert retrieved.impersonate == "chrome"
     assert retrieved.no_cookies is True
+    assert retrieved.parallel_streams is True
 
     # 5. 测试重复 close 不抛错
     db_migrated.close()
@@ -262,6 +423,7 @@ def test_remove_task_log_exceptions(tmp_path, monkeypatch):
     import os
 
     from yt_dlp_gui.config import get_task_log_path, remove_task_log
+    from yt_dlp_gui.log_writer import get_running_log_writer
 
     monkeypatch.setattr(os.path, "expanduser", lambda path: str(tmp_path / "user_home"))
     log_path = get_task_log_path(999)
@@ -271,8 +433,11 @@ def test_remove_task_log_exceptions(tmp_path, monkeypatch):
         f.write("some logs")
     assert os.path.exists(log_path)
 
-    # 成功删除
+    # 成功删除（之前的测试启动过日志写入线程时由它异步删除，等它处理完）
     remove_task_log(999)
+    writer = get_running_log_writer()
+    if writer is not None:
+        writer.flush()
     assert not os.path.exists(log_path)
 
     # 异常安全保护
@@ -311,11 +476,18 @@ def test_scheduler_real_run_task_thread(mock_run, temp_db, qtbot):
     assert blocker.args[1]["status"] == "downloading"
     assert temp_db.get_task(task_id).title == "My Title"
 
-    # 2. 日志通知
-    with qtbot.waitSignal(scheduler.task_log_emitted, timeout=1000) as blocker:
-        worker.log_message.emit(task_id, "my log line")
+    # 2. 日志通知：仅订阅后才缓冲，并由定时器整批发出
+    worker._write_log("unsubscribed line")
+    scheduler.subscribe_logs(task_id)
+    worker._write_log("my log line")
+    worker._write_log("second line")
+    with qtbot.waitSignal(scheduler.task_log_chunk, timeout=1000) as blocker:
+        pass
     assert blocker.args[0] == task_id
-    assert blocker.args[1] == "my log line"
+    assert blocker.args[1] == [(None, "my log line"), (None, "second line")]
+    scheduler.unsubscribe_logs(task_id)
+    assert worker.log_subscribed is False
+    assert not scheduler._log_flush_timer.isActive()
 
     # 3. 完成通知（正常成功）
     with qtbot.waitSignal(scheduler.task_finished, timeout=1000) as blocker:
@@ -328,6 +500,22 @@ def test_scheduler_real_run_task_thread(mock_run, temp_db, qtbot):
     scheduler.shutdown()
 
 
+@patch("yt_dlp_gui.scheduler.DownloadWorker.run")
+def test_scheduler_resets_subscribed_logs_on_new_run(mock_run, temp_db, qtbot):
+    """测试已订阅日志的任务开始新一轮下载（旧日志被丢弃）时通知日志窗口从头显示"""
+    scheduler = DownloadScheduler(temp_db)
+    task = DownloadTask(url="http://x.com", save_path=".", format_preset="best")
+    task.id = temp_db.add_task(task)
+    scheduler.subscribe_logs(task.id)
+
+    with qtbot.waitSignal(scheduler.task_log_reset, timeout=1000) as blocker:
+        scheduler._run_task_thread(task)
+    assert blocker.args == [task.id]
+    assert scheduler.workers[task.id].log_subscribed
+    scheduler.unsubscribe_logs(task.id)
+    scheduler.shutdown()
+
+
 @patch("yt_dlp_gui.scheduler.DownloadWorker.run")
 def test_scheduler_worker_finished_failure_and_cancel(mock_run, temp_db, qtbot):
     """测试 Worker 失败或者用户主动取消下载在 Scheduler 里的流转"""
@@ -362,3 +550,127 @@ def test_scheduler_worker_finished_failure_and_cancel(mock_run, temp_db, qtbot):
     assert temp_db.get_task(task3_id).status == "cancelled"
 
     scheduler.shutdown()
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_postprocessing_finished_before_thread_cleanup(mock_run, temp_db):
+    """测试后处理先于下载线程的 finished 信号结束：线程清理时仍释放 Worker、租约与挂起的删除"""
+    scheduler = DownloadScheduler(temp_db)
+    tid = scheduler.add_task(
+        DownloadTask(url="https://example.com/v1", save_path=".", format_preset="best")
+    )
+    worker = MagicMock(task_id=tid, error=None)
+    worker.drain_logs.return_value = []
+    scheduler.workers[tid] = worker
+    scheduler.threads[tid] = MagicMock()
+    scheduler.postprocess.workers[tid] = worker
+    scheduler._pending_delete_tids.add(tid)
+    assert scheduler._lease_timer.isActive()
+
+    # 线程池中的 finished 先送达，下载线程的 finished 还在事件队列中
+    scheduler._on_worker_finished(tid, True, "完成")
+    assert tid not in scheduler.postprocess
+    assert tid in scheduler.workers
+    scheduler.threads[tid].quit.assert_called_once()
+
+    scheduler._cleanup_thread(tid)
+    assert not scheduler.workers and not scheduler.threads
+    assert not scheduler._lease_timer.isActive()
+    assert temp_db.get_task(tid) is None
+    assert scheduler.is_idle()
+    scheduler.shutdown()
+
+
+def test_postprocessing_releases_download_slot(temp_db, qtbot):
+    """测试下载完成后任务转入后处理队列：下载槽位立即释放给下一个任务，后处理结束后任务才完成"""
+    import threading
+
+    from PySide6.QtCore import QObject, Signal
+
+    release = threading.Event()
+
+    class DeferredWorker(QObject):
+        progress = Signal(int, dict)
+        downloaded = Signal(int)
+        finished = Signal(int, bool, str)
+
+        def __init__(self, task_id, **kwargs):
+            super().__init__()
+            self.task_id = task_id
+            self.download_playlist = False
+            self.log_subscribed = False
+            self.error = None
+            self.cancelled = False
+
+        def run(self):
+            self.downloaded.emit(self.task_id)
+
+        def run_postprocessing(self):
+            release.wait(5)
+            self.finished.emit(self.task_id, not self.cancelled, "完成")
+
+        def cancel(self):
+            self.cancelled = True
+
+        def drain_logs(self):
+            return []
+
+    scheduler = DownloadScheduler(
+        temp_db,
+        max_concurrent_downloads=1,
+        worker_class=DeferredWorker,
+        max_concurrent_postprocess=1,
+    )
+    statuses = []
+    scheduler.task_status_changed.connect(lambda tid, status: statuses.append((tid, status)))
+    tid1, tid2, tid3 = (
+        scheduler.add_task(
+            DownloadTask(url=f"https://example.com/v{i}", save_path=".", format_preset="best")
+        )
+        for i in range(3)
+    )
+
+    # 两个任务依次下载完成，第一个占用后处理线程，第二个等待
+    qtbot.waitUntil(lambda: (tid3, "postprocessing") in statuses, timeout=3000)
+    assert temp_db.get_task(tid1).status == "postprocessing"
+    assert tid1 in scheduler.workers and tid1 not in scheduler.threads
+    assert scheduler.postprocess.running == 1 and scheduler.postprocess.waiting == 2
+    assert not scheduler._active_task_ids and not scheduler.is_idle()
+    # 后处理中的任务不会被重复启动
+    scheduler.start_task(tid1)
+    assert tid1 not in scheduler.threads
+
+    scheduler.delete_task(tid3)
+    release.set()
+    qtbot.waitUntil(scheduler.is_idle, timeout=3000)
+    assert temp_db.get_task(tid1).status == "finished"
+    assert temp_db.get_task(tid2).status == "finished"
+    assert temp_db.get_task(tid3) is None
+    assert not scheduler.workers and not scheduler.postprocess
+    scheduler.shutdown()
+
+
+@patch("yt_dlp_gui.scheduler.DownloadScheduler._run_task_thread")
+def test_scheduler_resumes_queued_tasks_after_restart(mock_run, temp_db):
+    """测试重新启动后接管上次遗留的排队任务：按并发数启动，其余进入等待队列"""
+    ids = temp_db.add_tasks(
+        [
+            DownloadTask(
+                url=f"https://example.com/v{i}",
+                save_path=".",
+                format_preset="best",
+                status="queued",
+            )
+            for i in range(3)
+        ]
+    )
+    temp_db.update_task(ids[1], {"status": "completed"})
+
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=1)
+    assert scheduler.resume_all_queued() == 2
+    assert scheduler._active_task_ids == {ids[0]}
+    assert not scheduler.is_idle()
+
+    scheduler._cleanup_thread(ids[0])
+    assert scheduler._active_task_ids == {ids[2]}
+    assert [call.args[0].id for call in mock_run.call_args_list] == [ids[0], ids[2]]
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+from yt_dlp_gui.startup import (
+    format_import_report,
+    loaded_deferred_modules,
+    measure_imports,
+    parse_importtime,
+)
+
+# 从解释器启动到主窗口完成首次绘制的时间预算（秒），包含导入 PySide6 的时间
+STARTUP_BUDGET_SECONDS = 3.0
+
+_FIRST_WINDOW_SCRIPT = textwrap.dedent("""
+    import time
+
+    start = time.perf_counter()
+    import sys
+
+    from PySide6.QtWidgets import QApplication
+
+    from yt_dlp_gui.database import Database
+    from yt_dlp_gui.main import MainWindow
+    from yt_dlp_gui.scheduler import DownloadScheduler
+
+    app = QApplication([])
+    db = Database(db_path=sys.argv[1])
+    scheduler = DownloadScheduler(db)
+    window = MainWindow(db, scheduler)
+    window.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    deferred = [m for m in ("yt_dlp", "qtawesome", "yt_dlp_gui.dialogs") if m in sys.modules]
+    print(elapsed, ",".join(deferred))
+
+    window.finish_startup()
+    scheduler.shutdown()
+    db.close()
+""")
+
+
+def test_parse_importtime():
+    """测试解析 -X importtime 输出的模块层级与耗时"""
+    text = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   _abc",
+            "import time:       250 |        350 | abc",
+            "something else",
+            "import time:      1000 |       1500 | yt_dlp",
+        ]
+    )
+    records = parse_importtime(text)
+    assert [(r.module, r.self_us, r.cumulative_us, r.depth) for r in records] == [
+        ("_abc", 100, 100, 1),
+        ("abc", 250, 350, 0),
+        ("yt_dlp", 1000, 1500, 0),
+    ]
+    assert loaded_deferred_modules(records) == ["yt_dlp"]
+    report = format_import_report(records, top=2)
+    assert report.splitlines()[0].startswith("启动导入总耗时: 1.9 ms")
+    assert "警告" in report
+
+
+def test_main_module_defers_heavy_imports():
+    """测试导入主模块时不会加载 yt_dlp、qtawesome 与对话框模块"""
+    records = measure_imports("yt_dlp_gui.main")
+    assert any(r.module == "yt_dlp_gui.main" for r in records)
+    assert loaded_deferred_modules(records) == []
+
+
+def test_time_to_first_window_within_budget(tmp_path):
+    """测试主窗口首次绘制在时间预算内完成，且此时尚未加载重量级依赖"""
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join(sys.path),
+        QT_QPA_PLATFORM="offscreen",
+        HOME=str(tmp_path),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", _FIRST_WINDOW_SCRIPT, str(tmp_path / "downloads.db")],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+        timeout=60,
+    )
+    elapsed, _, deferred = result.stdout.strip().splitlines()[-1].partition(" ")
+    assert deferred == ""
+    assert float(elapsed) < STARTUP_BUDGET_SECONDS
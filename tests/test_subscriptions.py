@@ -0,0 +1,193 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from yt_dlp_gui.database import Database
+from yt_dlp_gui.models import DownloadTask
+from yt_dlp_gui.scheduler import DownloadScheduler
+from yt_dlp_gui.subscriptions import (
+    SubscriptionManager,
+    entry_archive_id,
+    next_check_time,
+    stagger_offset,
+)
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    db = Database(db_path=str(tmp_path / "test_downloads.db"))
+    yield db
+    db.close()
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _entry(video_id: str) -> dict:
+    return {
+        "id": video_id,
+        "ie_key": "Youtube",
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "title": f"Video {video_id}",
+    }
+
+
+def _manager(db, feeds, clock, max_workers=2):
+    scheduler = DownloadScheduler(db, max_concurrent_downloads=0)
+    scheduler.add_imported_tasks = MagicMock()
+    manager = SubscriptionManager(
+        db, scheduler, extractor=lambda url: feeds[url], clock=clock, max_workers=max_workers
+    )
+    return manager, scheduler
+
+
+def test_stagger_and_next_check_time():
+    """测试相位偏移在窗口内分散，错过多个周期后仍保持原相位"""
+    offsets = [stagger_offset(i, 600) for i in range(1, 11)]
+    assert all(0 <= o < 600 for o in offsets)
+    # 10 个连续 ID 分散到窗口的 10 个等分区间中，没有两个落在同一区间
+    assert len({int(o // 60) for o in offsets}) == 10
+
+    assert next_check_time(100.0, 60, 50.0) == 100.0
+    assert next_check_time(100.0, 60, 100.0) == 160.0
+    assert next_check_time(100.0, 60, 345.0) == 400.0
+
+
+def test_entry_archive_id():
+    """测试条目存档 ID 与 yt-dlp 的格式一致"""
+    assert entry_archive_id(_entry("abc")) == "youtube abc"
+    assert entry_archive_id({"url": "https://e.com/x"}) is None
+
+
+def test_poll_skips_archived_and_existing(qtbot, temp_db):
+    """测试检查订阅时跳过存档中已下载与任务列表中已存在的条目，只添加新条目"""
+    clock = FakeClock()
+    feed = "https://www.youtube.com/@channel/videos"
+    manager, scheduler = _manager(temp_db, {feed: [_entry(v) for v in "abcd"]}, clock)
+
+    scheduler.archive.add("youtube a")
+    scheduler.add_task(
+        DownloadTask(url="https://youtu.be/b", save_path="/d", format_preset="best"),
+    )
+
+    sub = manager.add_subscription(feed, save_path="/subs", format_preset="best", interval=3600)
+    assert clock.now <= sub.next_check_at < clock.now + 600
+    clock.now = sub.next_check_at
+
+    with qtbot.waitSignal(manager.subscription_checked) as blocker:
+        assert manager.poll_due() == 1
+    assert blocker.args == [sub.id, 2, ""]
+
+    tasks = scheduler.add_imported_tasks.call_args[0][0]
+    assert [t.url for t in tasks] == [
+        "https://www.youtube.com/watch?v=c",
+        "https://www.youtube.com/watch?v=d",
+    ]
+    assert all(t.save_path == "/subs" and t.status == "queued" for t in tasks)
+
+    stored = temp_db.get_subscriptions()[0]
+    assert stored.next_check_at == sub.next_check_at + 3600
+    assert stored.last_checked_at == clock.now
+    assert stored.last_error is None
+
+    # 再次检查时新条目已在任务列表中，不会重复添加
+    with qtbot.waitSignal(manager.subscription_checked) as blocker:
+        manager.check_now(sub.id)
+    assert blocker.args == [sub.id, 0, ""]
+    manager.shutdown()
+
+
+def test_poll_skips_failed_and_cancelled_entries(qtbot, temp_db):
+    """测试订阅条目的任务出错或被取消后，之后的检查不会重新添加它"""
+    clock = FakeClock()
+    feed = "https://www.youtube.com/@channel/videos"
+    manager, scheduler = _manager(temp_db, {feed: [_entry("a"), _entry("b")]}, clock)
+    sub = manager.add_subscription(feed, save_path="/subs", format_preset="best", interval=3600)
+
+    with qtbot.waitSignal(manager.subscription_checked) as blocker:
+        manager.check_now(sub.id)
+    assert blocker.args == [sub.id, 2, ""]
+    failed, cancelled = scheduler.add_imported_tasks.call_args[0][0]
+    temp_db.update_task(failed.id, {"status": "error"})
+    temp_db.update_task(cancelled.id, {"status": "cancelled"})
+
+    with qtbot.waitSignal(manager.subscription_checked) as blocker:
+        manager.check_now(sub.id)
+    assert blocker.args == [sub.id, 0, ""]
+    assert len(temp_db.get_all_tasks()) == 2
+    manager.shutdown()
+
+
+def test_poll_due_bounded_by_workers(qtbot, temp_db):
+    """测试同时进行的检查数不超过线程池容量，其余订阅留待下次"""
+    clock = FakeClock()
+    feeds = {f"https://e.com/list{i}": [] for i in range(5)}
+    manager, _ = _manager(temp_db, feeds, clock, max_workers=2)
+    for url in feeds:
+        manager.add_subscription(url, save_path="/d", format_preset="best", interval=60)
+    clock.now += 60
+
+    assert manager.poll_due() == 2
+    assert manager.poll_due() == 0
+    manager.wait_for_done()
+    qtbot.waitUntil(lambda: not manager._in_flight)
+
+    assert manager.poll_due() == 2
+    manager.wait_for_done()
+    qtbot.waitUntil(lambda: not manager._in_flight)
+    assert manager.poll_due() == 1
+    manager.wait_for_done()
+    qtbot.waitUntil(lambda: not manager._in_flight)
+    assert all(s.last_checked_at == clock.now for s in temp_db.get_subscriptions())
+    manager.shutdown()
+
+
+def test_poll_records_error(qtbot, temp_db):
+    """测试提取失败时记录错误并按原相位安排下次检查"""
+    clock = FakeClock()
+
+    def failing(url):
+        raise RuntimeError("network down")
+
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=0)
+    manager = SubscriptionManager(temp_db, scheduler, extractor=failing, clock=clock)
+    sub = manager.add_subscription(
+        "https://e.com/list", save_path="/d", format_preset="best", interval=60
+    )
+    clock.now = sub.next_check_at + 130
+
+    with qtbot.waitSignal(manager.subscription_checked) as blocker:
+        manager.poll_due()
+    assert blocker.args == [sub.id, 0, "network down"]
+
+    stored = temp_db.get_subscriptions()[0]
+    assert stored.last_error == "network down"
+    assert stored.next_check_at == sub.next_check_at + 180
+    manager.shutdown()
+
+
+def test_subscription_dialog_add_and_remove(qtbot, temp_db):
+    """测试订阅对话框添加、列出与删除订阅"""
+    from yt_dlp_gui.dialogs import SubscriptionDialog
+
+    scheduler = DownloadScheduler(temp_db, max_concurrent_downloads=0)
+    manager = SubscriptionManager(temp_db, scheduler, extractor=lambda url: [])
+    dialog = SubscriptionDialog(manager)
+    qtbot.addWidget(dialog)
+
+    dialog.url_input.setText("https://www.youtube.com/@channel")
+    dialog.interval_combo.setCurrentText("每天")
+    dialog._add()
+    assert dialog.sub_list.count() == 1
+    assert "每天" in dialog.sub_list.item(0).text()
+    assert temp_db.get_subscriptions()[0].interval == 86400
+
+    dialog.sub_list.setCurrentRow(0)
+    dialog._remove_selected()
+    assert dialog.sub_list.count() == 0
+    manager.shutdown()
@@ -0,0 +1,87 @@
+import pytest
+
+from yt_dlp_gui.throughput import QueueThroughput
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_remaining_bytes_follow_progress_and_status(clock):
+    """测试剩余字节随进度增量维护，任务结束或删除后移出汇总"""
+    tracker = QueueThroughput(max_concurrent=2, clock=clock)
+    tracker.reset([(1, "downloading"), (2, "downloading"), (3, "finished")])
+    tracker.update(1, 100, 1000)
+    tracker.update(2, 500, 2000)
+    tracker.update(3, 10, 10)  # 已结束任务迟到的回调被忽略
+
+    snapshot = tracker.snapshot()
+    assert (snapshot.active, snapshot.queued) == (2, 0)
+    assert snapshot.remaining_bytes == 900 + 1500
+    assert not snapshot.estimated
+
+    tracker.update(1, 400, 1000)
+    tracker.set_status(2, "finished")
+    assert tracker.snapshot().remaining_bytes == 600
+
+    tracker.set_status(1, None)
+    snapshot = tracker.snapshot()
+    assert (snapshot.active, snapshot.remaining_bytes, snapshot.eta) == (0, 0, None)
+
+
+def test_unknown_sizes_use_average(clock):
+    """测试大小未知的排队任务按已知任务的平均大小估算"""
+    tracker = QueueThroughput(max_concurrent=1, clock=clock)
+    tracker.reset([(1, "downloading"), (2, "queued"), (3, "queued")])
+    assert tracker.snapshot().remaining_bytes == 0
+
+    tracker.update(1, 0, 3000)
+    snapshot = tracker.snapshot()
+    assert snapshot.estimated
+    assert snapshot.remaining_bytes == 3000 * 3
+
+
+def test_speed_is_smoothed_and_eta_respects_concurrency(clock):
+    """测试总速度按 EWMA 平滑，队列剩余时间按并发上限能占满的槽位估算"""
+    tracker = QueueThroughput(max_concurrent=2, alpha=0.5, clock=clock)
+    tracker.reset([(1, "downloading"), (2, "queued"), (3, "queued")])
+    tracker.update(1, 0, 10_000)
+
+    tracker.update(1, 1000, 10_000)
+    clock.now = 1.0
+    assert tracker.tick().speed == 1000
+
+    # 一秒内突发 3000 字节，平滑后只上升到 2000
+    tracker.update(1, 4000, 10_000)
+    clock.now = 2.0
+    snapshot = tracker.tick()
+    assert snapshot.speed == 2000
+    # 剩余：6000 + 两个排队任务各按平均 10000 估算；一个活动任务 2000 B/s，可同时运行两个
+    assert snapshot.remaining_bytes == 26_000
+    assert snapshot.eta == pytest.approx(26_000 / 4000)
+
+    # 下载下一个文件时已下载字节数从头计算，增量仍为正
+    tracker.update(1, 500, 2000)
+    clock.now = 3.0
+    assert tracker.tick().speed == (2000 + 500) / 2
+
+
+def test_speed_resets_when_idle(clock):
+    """测试没有活动任务时总速度归零"""
+    tracker = QueueThroughput(max_concurrent=1, clock=clock)
+    tracker.set_status(1, "downloading")
+    tracker.update(1, 1000, 2000)
+    clock.now = 1.0
+    assert tracker.tick().speed == 1000
+    tracker.set_status(1, "finished")
+    clock.now = 2.0
+    assert tracker.tick().speed == 0.0
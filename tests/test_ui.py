@@ -135,7 +135,32 @@ def test_mainwindow_show_add_task_success(app_window):
 
     app_window.scheduler = MagicMock()
     app_window._show_add_dialog()
-    app_window.scheduler.add_task.assert_called_once_with(mock_task)
+    app_window.scheduler.add_task.assert_called_once_with(mock_task, allow_duplicate=True)
+
+
+def test_mainwindow_add_duplicate_task_asks_to_redownload(app_window, monkeypatch):
+    """验证添加已下载过的视频时询问用户，拒绝则跳过，确认则重新下载"""
+    from unittest.mock import MagicMock
+
+    from PySide6.QtWidgets import QMessageBox
+
+    done = DownloadTask(url="https://youtu.be/abc", save_path=".", format_preset="mp4")
+    app_window.db.update_task(app_window.db.add_task(done), {"status": "finished"})
+
+    task = DownloadTask(
+        url="https://www.youtube.com/watch?v=abc", save_path=".", format_preset="mp4"
+    )
+    app_window.dialog_manager = MagicMock()
+    app_window.dialog_manager.show_add_task.return_value = task
+    app_window.scheduler = MagicMock()
+
+    monkeypatch.setattr(QMessageBox, "question", lambda *args: QMessageBox.StandardButton.No)
+    app_window._show_add_dialog()
+    app_window.scheduler.add_task.assert_not_called()
+
+    monkeypatch.setattr(QMessageBox, "question", lambda *args: QMessageBox.StandardButton.Yes)
+    app_window._show_add_dialog()
+    app_window.scheduler.add_task.assert_called_once_with(task, allow_duplicate=True)
 
 
 def test_mainwindow_search_filters_tasks(app_window):
@@ -197,6 +222,59 @@ def test_add_task_dialog_fields(qtbot):
     assert task_data.write_subs is True
 
 
+def test_add_task_dialog_uses_database_presets(app_window, qtbot):
+    """测试添加任务对话框列出数据库中的预设，任务引用所选预设的 ID 与音频转换"""
+    from yt_dlp_gui.dialogs import AddTaskDialog
+
+    dialog = AddTaskDialog(presets=app_window.db.get_presets())
+    qtbot.addWidget(dialog)
+    dialog.url_input.setText("https://example.com/v")
+    dialog.format_combo.setCurrentText("仅音频 (MP3)")
+
+    task = dialog.get_task_data()
+    preset = app_window.db.find_preset("仅音频 (MP3)")
+    assert task.preset_id == preset.id
+    assert task.format_preset == preset.selector
+    assert task.audio_format == "mp3"
+
+
+def test_format_preset_dialog_add_and_remove(app_window, qtbot):
+    """测试格式预设对话框：无效输入显示错误，有效预设保存到数据库，内置预设不能删除"""
+    from yt_dlp_gui.dialogs import FormatPresetDialog
+
+    db = app_window.db
+    dialog = FormatPresetDialog(db)
+    qtbot.addWidget(dialog)
+    builtin_count = dialog.preset_list.count()
+
+    dialog.name_input.setText("小体积")
+    dialog.height_input.setText("abc")
+    dialog._add()
+    assert "最大高度" in dialog.error_label.text()
+    assert dialog.preset_list.count() == builtin_count
+
+    dialog.height_input.setText("480")
+    dialog.size_input.setText("50")
+    dialog.audio_format_combo.setCurrentText("m4a")
+    dialog._add()
+    assert dialog.error_label.text() == ""
+    assert dialog.preset_list.count() == builtin_count + 1
+    preset = db.find_preset("小体积")
+    assert preset.max_height == 480
+    assert preset.max_filesize == 50 * 1024 * 1024
+    assert preset.audio_format == "m4a"
+    assert "≤480p" in dialog.preset_list.item(builtin_count).text()
+
+    dialog.preset_list.setCurrentRow(0)
+    dialog._remove_selected()
+    assert "内置" in dialog.error_label.text()
+
+    dialog.preset_list.setCurrentRow(builtin_count)
+    dialog._remove_selected()
+    assert db.find_preset("小体积") is None
+    assert dialog.preset_list.count() == builtin_count
+
+
 def test_about_dialog_version_label(qtbot):
     """测试 AboutDialog 正确渲染和展示传入的版本号"""
     from PySide6.QtWidgets import QLabel
@@ -239,8 +317,8 @@ def test_mainwindow_delete_selected_task_confirmed(app_window, monkeypatch):
     # 5. 触发删除
     app_window._delete_selected_task()
 
-    # 6. 断言 scheduler.delete_task 接收到了正确的 task_id
-    app_window.scheduler.delete_task.assert_called_once_with(123)
+    # 6. 断言 scheduler.delete_many 接收到了正确的 task_id
+    app_window.scheduler.delete_many.assert_called_once_with([123])
 
 
 def test_switch_paint(qtbot):
@@ -323,7 +401,7 @@ def test_dialog_manager_show_add_task(app_window, monkeypatch):
     assert res is None
 
 
-def test_dialog_manager_show_log(app_window, monkeypatch):
+def test_dialog_manager_show_log(app_window, qtbot, tmp_path, monkeypatch):
     """测试 DialogManager 显示非模态日志对话框"""
     from typing import cast
 
@@ -335,11 +413,14 @@ def test_dialog_manager_show_log(app_window, monkeypatch):
         nonlocal called
         called = True
 
+    log_file = tmp_path / "task_1.log"
+    log_file.write_text("line 1\nlogs content\n", encoding="utf-8")
+
     monkeypatch.setattr(LogDialog, "show", lambda self: None)
     manager = DialogManager(app_window)
-    dialog = cast(LogDialog, manager.show_log(1, "title", "logs content", on_finished))
+    dialog = cast(LogDialog, manager.show_log(1, "title", str(log_file), on_finished))
     assert dialog is not None
-    assert dialog.log_output.toPlainText() == "logs content"
+    qtbot.waitUntil(lambda: dialog.log_output.toPlainText() == "line 1\nlogs content")
 
     dialog.finished.emit(0)
     assert called is True
@@ -415,18 +496,18 @@ def test_mainwindow_context_menu(app_window, monkeypatch):
     app_window.scheduler.threads = {}
     MockMenu.return_filter = "开始"
     app_window._show_context_menu(app_window.table.pos())
-    app_window.scheduler.start_task.assert_called_once_with(task_id)
+    app_window.scheduler.start_many.assert_called_once_with([task_id])
 
     # 4. 测试停止
     MockMenu.return_filter = "停止"
     app_window._show_context_menu(app_window.table.pos())
-    app_window.scheduler.stop_task.assert_called_once_with(task_id)
+    app_window.scheduler.stop_many.assert_called_once_with([task_id])
 
     # 5. 测试删除
     monkeypatch.setattr(QMessageBox, "question", lambda *args: QMessageBox.StandardButton.Yes)
     MockMenu.return_filter = "删除"
     app_window._show_context_menu(app_window.table.pos())
-    app_window.scheduler.delete_task.assert_called_once_with(task_id)
+    app_window.scheduler.delete_many.assert_called_once_with([task_id])
 
 
 def test_open_task_folder_invalid(app_window, monkeypatch):
@@ -481,7 +562,7 @@ def test_mainwindow_delete_running_task_confirmed(app_window, monkeypatch):
 
     app_window._delete_selected_task()
     assert question_called is True
-    app_window.scheduler.delete_task.assert_called_once_with(123)
+    app_window.scheduler.delete_many.assert_called_once_with([123])
 
 
 def test_mainwindow_delete_selected_task_rejected(app_window, monkeypatch):
@@ -500,7 +581,7 @@ def test_mainwindow_delete_selected_task_rejected(app_window, monkeypatch):
     monkeypatch.setattr(QMessageBox, "question", lambda *args: QMessageBox.StandardButton.No)
 
     app_window._delete_selected_task()
-    app_window.scheduler.delete_task.assert_not_called()
+    app_window.scheduler.delete_many.assert_not_called()
 
 
 def test_on_scheduler_progress_status(app_window):
@@ -555,6 +636,82 @@ def test_on_scheduler_progress_status(app_window):
     assert retrieved.eta == "--"
 
 
+def test_on_scheduler_progress_uses_estimate(app_window):
+    """测试进度事件带有 Worker 的估算结果时，表格显示整体进度与平滑后的速度"""
+    task = DownloadTask(id=5, url="http://a.com", save_path=".", format_preset="best")
+    app_window.table_model.set_tasks([task])
+    app_window._on_scheduler_progress(
+        5,
+        {
+            "status": "downloading",
+            "downloaded_bytes": 10,
+            "total_bytes": 100,
+            "speed_str": "99MiB/s",
+            "_overall_percent": 62.7,
+            "_smoothed_speed": 2048,
+            "_smoothed_eta": 75,
+        },
+    )
+    retrieved = app_window.table_model._tasks[app_window.table_model.find_row_by_id(5)]
+    assert (retrieved.progress, retrieved.speed, retrieved.eta) == (62, "2.0 KB/s", "01:15")
+
+    app_window._on_scheduler_progress(5, {"status": "merging", "_overall_percent": 99.0})
+    assert retrieved.progress == 99 and retrieved.status == "merging"
+
+
+def test_stream_details_tooltip(app_window):
+    """测试多流任务的行提示显示各流与合并阶段的进度，任务结束后清除"""
+    task = DownloadTask(id=6, url="http://a.com", save_path=".", format_preset="best")
+    app_window.table_model.set_tasks([task])
+    streams = [
+        {
+            "label": "视频 137 (mp4)",
+            "downloaded": 3 * 1024**2,
+            "total": 4 * 1024**2,
+            "state": "running",
+        },
+        {"label": "音频 140 (m4a)", "downloaded": 0, "total": None, "state": "pending"},
+    ]
+    app_window._on_scheduler_progress(
+        6,
+        {
+            "status": "downloading",
+            "_overall_percent": 60.0,
+            "_overall_downloaded": 3 * 1024**2,
+            "_overall_total": None,
+            "_streams": streams,
+            "_merge": "pending",
+        },
+    )
+    index = app_window.table_model.index(0, 2)
+    assert app_window.table_model.data(index, Qt.ItemDataRole.ToolTipRole) == (
+        "视频 137 (mp4): 3.0 MB / 4.0 MB (75%)\n音频 140 (m4a): 等待\n合并: 等待"
+    )
+
+    app_window._on_scheduler_status_changed(6, "finished")
+    assert app_window.table_model.data(index, Qt.ItemDataRole.ToolTipRole) is None
+
+
+def test_status_bar_shows_queue_throughput(app_window):
+    """测试状态栏随状态与进度显示总速度、剩余大小，队列清空后清除"""
+    app_window.table_model.set_tasks([])
+    app_window._on_scheduler_tasks_status_changed([1, 2], "queued")
+    assert app_window._throughput_timer.isActive()
+
+    app_window._on_scheduler_status_changed(1, "downloading")
+    app_window._on_scheduler_progress(
+        1, {"status": "downloading", "downloaded_bytes": 512, "total_bytes": 2048}
+    )
+    app_window._update_throughput()
+    assert "剩余 ≈3.5 KB" in app_window.throughput_info.text()
+
+    app_window._on_scheduler_status_changed(1, "finished")
+    app_window._on_scheduler_tasks_deleted([2])
+    app_window._update_throughput()
+    assert app_window.throughput_info.text() == ""
+    assert not app_window._throughput_timer.isActive()
+
+
 def test_scheduler_signals_and_close(app_window):
     """测试 scheduler 相关的辅助槽函数和 closeEvent"""
     from PySide6.QtGui import QCloseEvent
@@ -574,13 +731,17 @@ def test_scheduler_signals_and_close(app_window):
     app_window._on_scheduler_status_changed(123, "downloading")
     assert app_window.table_model._tasks[row].speed == "--"
 
-    # 日志实时输出
+    # 批量日志只转发给已打开的日志窗口
     from unittest.mock import MagicMock
 
     dialog_mock = MagicMock()
     app_window.active_log_dialogs = {123: dialog_mock}
-    app_window._on_log(123, "new log output")
-    dialog_mock.append_log.assert_called_once_with("new log output")
+    app_window._on_log_chunk(123, [(0, "line 1"), (7, "line 2")])
+    app_window._on_log_chunk(456, [(0, "ignored")])
+    dialog_mock.append_logs.assert_called_once_with([(0, "line 1"), (7, "line 2")])
+    app_window._on_log_reset(123)
+    app_window._on_log_reset(456)
+    dialog_mock.reset_logs.assert_called_once_with()
 
     # 删除回调
     app_window._on_scheduler_deleted(123)
@@ -591,3 +752,71 @@ def test_scheduler_signals_and_close(app_window):
     event = QCloseEvent()
     app_window.closeEvent(event)
     dialog_mock.close.assert_called_once()
+
+
+def test_table_model_bulk_remove_and_update(qtbot):
+    """测试模型批量删除（连续行按范围删除，否则整体重置）与批量更新"""
+    from yt_dlp_gui.models import TaskTableModel
+
+    tasks = [
+        DownloadTask(id=i, url=f"http://x.com/{i}", save_path=".", format_preset="best")
+        for i in range(6)
+    ]
+    model = TaskTableModel(list(tasks))
+    removed, resets, changed = [], [], []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.modelReset.connect(lambda: resets.append(True))
+    model.dataChanged.connect(lambda tl, br, roles: changed.append((tl.row(), br.row())))
+
+    model.remove_tasks([1, 2])
+    assert removed == [(1, 2)]
+    assert not resets
+
+    model.remove_tasks([0, 5])
+    assert len(resets) == 1
+    assert [model.data(model.index(r, 0), Qt.ItemDataRole.UserRole) for r in range(2)] == [3, 4]
+
+    model.update_tasks_data([3, 4], {"status": "queued"})
+    assert changed == [(0, 1)]
+    assert model.data(model.index(1, 1)) == "queued"
+
+
+def test_import_dialog_source_and_mainwindow_import(app_window, qtbot):
+    """测试导入对话框的链接来源，以及 MainWindow 在后台导入后把任务块交给调度器"""
+    from unittest.mock import MagicMock
+
+    from yt_dlp_gui.dialogs import ImportTasksDialog
+
+    dialog = ImportTasksDialog()
+    qtbot.addWidget(dialog)
+    assert dialog.get_import_source() is None
+    dialog.urls_input.setPlainText("https://e.com/1\nhttps://e.com/2")
+    source = dialog.get_import_source()
+    assert source is not None
+    template = dialog.get_task_data()
+    assert template.url == ""
+
+    app_window.scheduler = MagicMock()
+    app_window.import_urls(source, template)
+    qtbot.waitUntil(lambda: not app_window._import_jobs)
+
+    app_window.scheduler.add_imported_tasks.assert_called_once()
+    tasks = app_window.scheduler.add_imported_tasks.call_args.args[0]
+    assert [t.url for t in tasks] == ["https://e.com/1", "https://e.com/2"]
+    assert "新增 2 个任务" in app_window.status_info.text()
+
+
+def test_mainwindow_finish_startup_loads_icons(app_window, monkeypatch):
+    """测试首次绘制后补上工具栏图标，并在后台预加载 yt-dlp"""
+    from unittest.mock import MagicMock
+
+    from yt_dlp_gui import main
+
+    preload = MagicMock()
+    monkeypatch.setattr(main, "preload_yt_dlp", preload)
+
+    app_window.finish_startup()
+    app_window.finish_startup()
+
+    assert all(not target.icon().isNull() for target, _, _ in app_window._deferred_icons)
+    preload.assert_called_once()
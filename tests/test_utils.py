@@ -1,4 +1,4 @@
-from yt_dlp_gui.utils import clean_ansi, format_eta, format_speed
+from yt_dlp_gui.utils import clean_ansi, format_eta, format_size, format_speed, normalize_url
 
 
 def test_clean_ansi() -> None:
@@ -55,6 +55,28 @@ def test_format_eta() -> None:
     assert format_eta([]) == "--"
 
 
+def test_format_size() -> None:
+    assert format_size(None) == "--"
+    assert format_size(512) == "512.0 B"
+    assert format_size(1536) == "1.5 KB"
+    assert format_size(3 * 1024**3) == "3.0 GB"
+    assert format_size(2 * 1024**4) == "2.0 TB"
+
+
+def test_normalize_url() -> None:
+    # 去除空白与包裹符号，小写协议与域名，去掉片段
+    assert normalize_url("  <HTTPS://WWW.Example.com/Watch?v=AbC#t=10>  ") == (
+        "https://www.example.com/Watch?v=AbC"
+    )
+    # 缺少协议时补全 https
+    assert normalize_url("youtu.be/abc") == "https://youtu.be/abc"
+
+    # 非 http(s) 链接或普通文本
+    assert normalize_url("") is None
+    assert normalize_url("ftp://example.com/file") is None
+    assert normalize_url("hello") is None
+
+
 def test_setup_environment() -> None:
     import os
 
@@ -1,5 +1,8 @@
+import time
 from unittest.mock import patch
 
+import pytest
+
 from yt_dlp_gui.worker import DownloadWorker
 
 
@@ -33,22 +36,28 @@ def test_worker_cancel():
     assert worker._is_cancelled
 
 
-def test_worker_logger(qtbot):
-    """Test the YtdlpLogger signal emission."""
+def test_worker_logger():
+    """Test that YtdlpLogger output is buffered only while logs are subscribed."""
     worker = DownloadWorker(task_id=1, url="url", download_path="path")
     logger = worker.YtdlpLogger(worker.task_id, worker._write_log)
 
-    with qtbot.waitSignal(worker.log_message, timeout=1000) as blocker:
-        logger.info("Test Info Message")
-    assert blocker.args[1] == "Test Info Message"
+    logger.info("Unsubscribed Message")
+    assert worker.drain_logs() == []
 
-    with qtbot.waitSignal(worker.log_message, timeout=1000) as blocker:
-        logger.warning("Test Warning")
-    assert "警告: Test Warning" in blocker.args[1]
+    worker.log_subscribed = True
+    logger.info("Test Info Message")
+    logger.warning("Test Warning")
+    logger.error("Test Error")
+    logger.debug("[debug] hidden")
 
-    with qtbot.waitSignal(worker.log_message, timeout=1000) as blocker:
-        logger.error("Test Error")
-    assert "错误: Test Error" in blocker.args[1]
+    lines = worker.drain_logs()
+    # 未写入日志文件的行没有偏移量
+    assert lines == [
+        (None, "Test Info Message"),
+        (None, "警告: Test Warning"),
+        (None, "错误: Test Error"),
+    ]
+    assert worker.drain_logs() == []
 
 
 @patch("yt_dlp.YoutubeDL")
@@ -89,6 +98,7 @@ def test_worker_run_failure(mock_ytdl, qtbot):
 @patch("yt_dlp.YoutubeDL")
 def test_worker_run_complex_config(mock_ytdl, qtbot):
     """Test worker.run with various configuration options."""
+    archive = set()
     worker = DownloadWorker(
         task_id=1,
         url="url",
@@ -100,6 +110,7 @@ def test_worker_run_complex_config(mock_ytdl, qtbot):
         playlist_items="1-3",
         playlist_random=True,
         max_downloads=5,
+        download_archive=archive,
     )
 
     with qtbot.waitSignal(worker.finished, timeout=2000):
@@ -110,12 +121,13 @@ def test_worker_run_complex_config(mock_ytdl, qtbot):
     opts = args[0]
 
     assert opts["proxy"] == "http://proxy"
-    assert opts["concurrent_fragments"] == 8
+    assert opts["concurrent_fragment_downloads"] == 8
     assert opts["writesubtitles"] is True
     assert opts["noplaylist"] is False
     assert opts["playlist_items"] == "1-3"
     assert opts["playlist_random"] is True
     assert opts["max_downloads"] == 5
+    assert opts["download_archive"] is archive
 
 
 def test_progress_hook_extensions(qtbot):
@@ -172,3 +184,294 @@ def test_worker_run_impersonate_and_no_cookies(mock_ytdl, qtbot):
     else:
         assert impersonate_opt == "chrome"
     assert opts["no_cookies"] is True
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_worker_run_precompiled_format_and_audio_conversion(mock_ytdl, qtbot):
+    """测试格式表达式以缓存的选择函数传给 yt-dlp，音频格式预设添加 FFmpegExtractAudio"""
+    from yt_dlp_gui.presets import compiled_selector
+
+    spec = "bestaudio[ext=m4a]/bestaudio/best"
+    worker = DownloadWorker(
+        task_id=1, url="url", download_path=".", format_preset=spec, audio_format="mp3"
+    )
+
+    with qtbot.waitSignal(worker.finished, timeout=2000):
+        worker.run()
+
+    opts = mock_ytdl.call_args[0][0]
+    assert opts["format"] is compiled_selector(spec, opts)
+    assert opts["postprocessors"] == [
+        {"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "2"}
+    ]
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_worker_run_routes_logs_to_writer(mock_ytdl, qtbot):
+    """Test that run() hands log lines to the background log writer."""
+    from unittest.mock import MagicMock
+
+    writer = MagicMock()
+    worker = DownloadWorker(
+        task_id=5, url="url", download_path=".", proxy="http://proxy", log_writer=writer
+    )
+
+    # 运行前的日志不会写入文件
+    worker.log_subscribed = True
+    worker._write_log("before run")
+    writer.write.assert_not_called()
+
+    with qtbot.waitSignal(worker.finished, timeout=2000):
+        worker.run()
+
+    writer.open_task.assert_called_once_with(5)
+    writer.write.assert_any_call(5, "使用代理: http://proxy")
+    writer.finish_task.assert_called_once_with(5)
+
+    # 缓冲的日志带有它们在日志流中连续的逻辑偏移量
+    entries = worker.drain_logs()
+    assert entries[0] == (None, "before run")
+    written = [call.args[1] for call in writer.write.call_args_list]
+    assert [message for _, message in entries[1:]] == written
+    offset = 0
+    for entry_offset, message in entries[1:]:
+        assert entry_offset == offset
+        offset += len(message.encode("utf-8")) + 1
+
+
+def test_progress_hook_attaches_estimate(qtbot):
+    """测试下载进度事件附带整体进度与平滑后的速度和剩余时间"""
+    worker = DownloadWorker(task_id=1, url="url", download_path=".")
+    event = {
+        "status": "downloading",
+        "filename": "test.mp4",
+        "downloaded_bytes": 50,
+        "total_bytes": 100,
+    }
+
+    with qtbot.waitSignal(worker.progress, timeout=1000) as blocker:
+        worker._progress_hook(event)
+    data = blocker.args[1]
+    assert data["_overall_percent"] == pytest.approx(49.5)
+    assert "_smoothed_speed" in data and "_smoothed_eta" in data
+    assert "_overall_percent" not in event
+
+    with qtbot.waitSignal(worker.progress, timeout=1000) as blocker:
+        worker._progress_hook({"status": "finished", "filename": "test.mp4"})
+    assert blocker.args[1]["_overall_percent"] == pytest.approx(49.5)
+
+
+def test_progress_hook_reports_streams_and_merge(qtbot):
+    """测试视频与音频分开下载：第一个流完成时不进入合并，事件附带各流进度，合并开始后进度到顶"""
+    worker = DownloadWorker(task_id=1, url="url", download_path=".")
+    video = {"format_id": "137", "ext": "mp4", "acodec": "none", "filesize": 300}
+    audio = {"format_id": "140", "ext": "m4a", "vcodec": "none", "filesize": 100}
+    worker._plan_streams({"id": "x", "requested_formats": [video, audio]})
+    events = []
+    worker.progress.connect(lambda tid, data: events.append(data))
+
+    for fmt, size in ((video, 300), (audio, 100)):
+        name = f"x.f{fmt['format_id']}.{fmt['ext']}"
+        base = {"filename": name, "total_bytes": size, "info_dict": fmt}
+        worker._progress_hook(dict(base, status="downloading", downloaded_bytes=size // 2))
+        worker._progress_hook(dict(base, status="finished"))
+
+    assert [e["status"] for e in events] == ["downloading", "downloading", "merging"]
+    assert events[0]["_overall_percent"] == pytest.approx(99 * 150 / 400)
+    assert events[1]["_streams"][0]["state"] == "finished"
+    assert events[1]["_overall_downloaded"] == 350 and events[1]["_overall_total"] == 400
+
+    worker._postprocessor_hook({"status": "started", "postprocessor": "Merger"})
+    assert events[-1]["_merge"] == "running" and events[-1]["_overall_percent"] == 99
+    worker._postprocessor_hook({"status": "finished", "postprocessor": "MoveFiles"})
+    assert len(events) == 4
+
+
+def test_parallel_dl_downloads_streams_together(qtbot):
+    """测试并行模式：第一个流开始下载时同时下载全部流并按大小分配限速，之后的调用直接返回结果"""
+    import threading
+    from types import SimpleNamespace
+
+    worker = DownloadWorker(task_id=1, url="url", download_path=".", parallel_streams=True)
+    video = {"format_id": "137", "ext": "mp4", "acodec": "none", "filesize": 300, "url": "v"}
+    audio = {"format_id": "140", "ext": "m4a", "vcodec": "none", "filesize": 100, "url": "a"}
+    sequential = []
+    ydl = SimpleNamespace(
+        params={"ratelimit": 400, "concurrent_fragment_downloads": 4},
+        dl=lambda name, info, **kwargs: sequential.append(name) or (True, False),
+        _progress_hooks=[worker._progress_hook],
+    )
+    # 两个流都开始下载后才能通过，逐个下载时会超时
+    barrier = threading.Barrier(2)
+    downloads = {}
+
+    class FakeDownloader:
+        def __init__(self, ydl, params):
+            self.params = params
+            self.hooks = []
+
+        def add_progress_hook(self, hook):
+            self.hooks.append(hook)
+
+        def download(self, name, info):
+            barrier.wait(timeout=5)
+            downloads[name] = (
+                self.params["ratelimit"],
+                self.params["concurrent_fragment_downloads"],
+            )
+            for hook in self.hooks:
+                hook({"status": "finished", "filename": name, "info_dict": info})
+            return True, True
+
+    events = []
+    worker.progress.connect(lambda tid, data: events.append(data))
+    worker._install_parallel_dl(ydl)
+    worker._plan_streams({"id": "x", "title": "t", "requested_formats": [video, audio]})
+    with patch("yt_dlp.downloader.get_suitable_downloader", return_value=FakeDownloader):
+        assert ydl.dl("x.f137.mp4", dict(video, title="t")) == (True, True)
+        assert ydl.dl("x.f140.m4a", dict(audio, title="t")) == (True, True)
+        ydl.dl("x.en.vtt", {"format_id": "en", "ext": "vtt"}, subtitle=True)
+
+    assert downloads == {"x.f137.mp4": (300, 3), "x.f140.m4a": (100, 1)}
+    assert sequential == ["x.en.vtt"]
+    # 下载线程池中发出的信号经事件循环送达
+    qtbot.waitUntil(lambda: len(events) == 1, timeout=1000)
+    assert events[0]["status"] == "merging"
+
+
+def test_parallel_dl_failure_aborts_other_streams(qtbot):
+    """测试并行下载的一个流失败时其余的流被中断，错误交给 yt-dlp 按原方式处理"""
+    from types import SimpleNamespace
+
+    from yt_dlp.utils import DownloadError
+
+    worker = DownloadWorker(task_id=1, url="url", download_path=".", parallel_streams=True)
+    video = {"format_id": "v", "ext": "mp4", "url": "v"}
+    audio = {"format_id": "a", "ext": "m4a", "url": "a"}
+    ydl = SimpleNamespace(params={}, dl=None, _progress_hooks=[worker._progress_hook])
+    aborted = []
+
+    class FakeDownloader:
+        def __init__(self, ydl, params):
+            self.hooks = []
+
+        def add_progress_hook(self, hook):
+            self.hooks.append(hook)
+
+        def download(self, name, info):
+            if info["format_id"] == "a":
+                raise DownloadError("HTTP Error 500")
+            try:
+                for _ in range(500):
+                    for hook in self.hooks:
+                        hook({"status": "downloading", "filename": name, "info_dict": info})
+                    time.sleep(0.01)
+            except Exception as e:
+                aborted.append(e)
+                raise
+            return True, True
+
+    worker._install_parallel_dl(ydl)
+    worker._plan_streams({"id": "x", "requested_formats": [video, audio]})
+    with patch("yt_dlp.downloader.get_suitable_downloader", return_value=FakeDownloader):
+        with pytest.raises(DownloadError):
+            ydl.dl("x.fv.mp4", dict(video))
+
+    assert len(aborted) == 1
+
+
+def test_deferred_postprocess_runs_in_run_postprocessing(qtbot):
+    """测试推迟后处理：post_process 只记录调用，run_postprocessing 依次执行并报告各个步骤"""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    writer = MagicMock()
+    worker = DownloadWorker(
+        task_id=3, url="url", download_path=".", defer_postprocessing=True, log_writer=writer
+    )
+    calls = []
+
+    def post_process(filename, info, files_to_move=None):
+        worker._postprocessor_hook({"status": "started", "postprocessor": "Merger"})
+        calls.append((filename, info["id"]))
+        worker._postprocessor_hook({"status": "finished", "postprocessor": "Merger"})
+
+    ydl = SimpleNamespace(post_process=post_process)
+    worker._install_deferred_postprocess(ydl)
+    info = {"id": "a"}
+    assert ydl.post_process("a.mp4", info, {}) is info
+    ydl.post_process("b.mp4", {"id": "b"})
+    assert calls == [] and info["filepath"] == "a.mp4"
+
+    with qtbot.waitSignal(worker.downloaded, timeout=1000):
+        assert worker._hand_off()
+    events = []
+    worker.progress.connect(lambda tid, data: events.append(data))
+    with qtbot.waitSignal(worker.finished, timeout=1000) as blocker:
+        worker.run_postprocessing()
+
+    assert blocker.args == [3, True, "完成"]
+    assert calls == [("a.mp4", "a"), ("b.mp4", "b")]
+    assert [e.get("postprocessor") for e in events] == [
+        None,
+        "Merger",
+        "Merger",
+        "Merger",
+        "Merger",
+    ]
+    assert {e["status"] for e in events} == {"postprocessing"}
+    writer.finish_task.assert_called_once_with(3)
+
+
+@patch("yt_dlp.YoutubeDL")
+def test_run_does_not_finish_log_after_hand_off(mock_ytdl, qtbot):
+    """测试交给后处理队列后，即使后处理先于 run() 收尾完成，本轮日志也只结束一次"""
+    from unittest.mock import MagicMock
+
+    from PySide6.QtCore import Qt
+
+    writer = MagicMock()
+    worker = DownloadWorker(
+        task_id=4, url="url", download_path=".", defer_postprocessing=True, log_writer=writer
+    )
+    worker._download = lambda ydl: worker._deferred.append(("a.mp4", {"id": "a"}, {}))
+    # 模拟线程池立即执行后处理：downloaded 发出后 _deferred 随即被清空
+    worker.downloaded.connect(
+        lambda tid: worker.run_postprocessing(), Qt.ConnectionType.DirectConnection
+    )
+    results = []
+    worker.finished.connect(lambda *args: results.append(args))
+
+    worker.run()
+
+    assert results == [(4, True, "完成")]
+    writer.finish_task.assert_called_once_with(4)
+
+
+def test_deferred_postprocess_failure_and_cancel(qtbot):
+    """测试推迟的后处理出错时以错误结束，取消后不再执行剩余的后处理"""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    from yt_dlp.utils import PostProcessingError
+
+    def failing(filename, info, files_to_move=None):
+        raise PostProcessingError("ffmpeg not found")
+
+    worker = DownloadWorker(task_id=1, url="url", download_path=".", log_writer=MagicMock())
+    worker._install_deferred_postprocess(SimpleNamespace(post_process=failing))
+    worker._deferred.append(("a.mp4", {"id": "a"}, None))
+    with qtbot.waitSignal(worker.finished, timeout=1000) as blocker:
+        worker.run_postprocessing()
+    assert blocker.args == [1, False, "ffmpeg not found"]
+    assert isinstance(worker.error, PostProcessingError)
+
+    calls = []
+    worker = DownloadWorker(task_id=2, url="url", download_path=".", log_writer=MagicMock())
+    worker._install_deferred_postprocess(SimpleNamespace(post_process=lambda *a: calls.append(a)))
+    worker._deferred.append(("a.mp4", {"id": "a"}, None))
+    worker.cancel()
+    with qtbot.waitSignal(worker.finished, timeout=1000) as blocker:
+        worker.run_postprocessing()
+    assert blocker.args == [2, False, "用户取消"]
+    assert calls == []